@@ -0,0 +1,309 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import OrderedDict
+
+""" Performance benchmarks for loading, plotting and previewing synthetic files. Each case is timed and its peak memory
+    recorded, and the results are compared with a stored baseline so that regressions are noticed.
+
+    Usage:
+        python -m benchmarks.Benchmarks [--size small] [--shapes wide cube_3d] [--no-startup] [--update-baseline] """
+
+# Render to an offscreen surface so that the benchmarks can run on machines without a display
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+# Results are flagged as regressions when they exceed the baseline by more than this fraction
+DEFAULT_TOLERANCE = 0.5
+
+# Timings below this number of seconds are too noisy to be compared
+MIN_COMPARABLE_SECONDS = 0.01
+
+class _OffscreenMainView(object):
+    """ Stand-in for the MainWindow that ignores the toolbar and status bar. """
+
+    def update_toolbar(self):
+        pass
+
+    def show_status_message(self, message):
+        pass
+
+    def show_timings(self, message):
+        pass
+
+def _measure(func, repeats):
+    """
+    Time a function and record its peak traced memory. The memory is measured in a separate call because tracing
+    allocations slows them down.
+
+    Args:
+        func (callable): The function to measure.
+        repeats (int): The number of timed calls. The fastest is reported.
+
+    Returns:
+        dict: The time in seconds and the peak memory in bytes.
+
+    """
+
+    times = []
+
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {"seconds": min(times), "peak_bytes": peak}
+
+def _copied_bytes(func):
+    """
+    Count the bytes of the arrays that a function copies on its way to the screen, so that extra copies are noticed.
+
+    Args:
+        func (callable): The function to measure.
+
+    Returns:
+        int: The number of bytes copied.
+
+    """
+
+    import datasetviewer.profiling.Tracer as Tracer
+
+    Tracer.enable()
+
+    try:
+        func()
+        return sum(nbytes for _, nbytes in Tracer.copy_counts().values())
+    finally:
+        Tracer.disable()
+
+def _largest_key(dataset):
+
+    return max(dataset, key=lambda key: dataset[key].data.size)
+
+def _create_components():
+    """ Create offscreen plot and preview widgets connected to a MainViewPresenter. """
+
+    from PyQt5.QtWidgets import QApplication
+    from datasetviewer.mainview.MainViewPresenter import MainViewPresenter
+    from datasetviewer.plot.PlotWidget import PlotWidget
+    from datasetviewer.preview.PreviewWidget import PreviewWidget
+
+    qapp = QApplication.instance() or QApplication(sys.argv[:1])
+
+    plot_widget = PlotWidget()
+    plot_widget.resize(800, 600)
+
+    preview_widget = PreviewWidget()
+
+    # Stop the preview from triggering a plot when its first item is selected so that the two are timed separately
+    preview_widget.blockSignals(True)
+
+    MainViewPresenter(_OffscreenMainView(), plot_widget.get_presenter(), preview_widget.get_presenter())
+
+    return qapp, plot_widget, preview_widget
+
+def run_case(file_path, repeats, components):
+    """
+    Benchmark loading, plotting and previewing a single file.
+
+    Args:
+        file_path (str): The path of the file.
+        repeats (int): The number of timed repeats of each step.
+        components (tuple): The QApplication, PlotWidget and PreviewWidget returned by `_create_components`.
+
+    Returns:
+        OrderedDict: The measurements for each step.
+
+    """
+
+    import datasetviewer.fileloader.FileLoaderTool as FileLoaderTool
+
+    _, plot_widget, preview_widget = components
+    plot_presenter = plot_widget.get_presenter()
+    preview_presenter = preview_widget.get_presenter()
+
+    results = OrderedDict()
+    results["file_to_dict"] = _measure(lambda: FileLoaderTool.file_to_dict(file_path), repeats)
+
+    dataset = FileLoaderTool.file_to_dict(file_path)
+    key = _largest_key(dataset)
+    plot_presenter._dict = dataset
+
+    # Without its rendered frame, so that the image is drawn each time
+    def plot_without_frame():
+        plot_presenter._frames.clear()
+        plot_presenter.create_default_plot(key)
+
+    results["create_default_plot"] = _measure(plot_without_frame, repeats)
+    results["create_default_plot"]["copied_bytes"] = _copied_bytes(plot_without_frame)
+
+    # Shown again from the frame of the last plot. `_measure` makes one more call after the timed ones.
+    hits = plot_presenter.frame_cache_stats().hits
+    results["create_default_plot_cached"] = _measure(lambda: plot_presenter.create_default_plot(key), repeats)
+    results["create_default_plot_cached"]["frame_hit_rate"] = (plot_presenter.frame_cache_stats().hits - hits) / (repeats + 1)
+
+    results["preview_set_dict"] = _measure(lambda: preview_presenter.set_dict(dataset), repeats)
+    results.update(run_decompression(dataset[key].data, repeats))
+
+    return results
+
+def run_decompression(data, repeats):
+    """
+    Benchmark reading an image from a compressed variable through the netCDF library, which decompresses one chunk at
+    a time, against decompressing its chunks in parallel. The file is opened again for each serial read, so that none
+    of the chunks come from the netCDF chunk cache of an earlier repeat; the parallel reads don't use that cache.
+
+    Args:
+        data (xarray.DataArray): The variable, as it was opened from the file.
+        repeats (int): The number of timed repeats of each read.
+
+    Returns:
+        OrderedDict: The measurements of each read, or nothing if the variable can't be decompressed in parallel.
+
+    """
+
+    import datasetviewer.fileloader.FileLoaderTool as FileLoaderTool
+    import datasetviewer.readplan.ParallelReadTool as ParallelReadTool
+
+    results = OrderedDict()
+
+    if data.ndim < 3 or not ParallelReadTool.can_read(data):
+        return results
+
+    # The slice across the last dimension touches the most chunks
+    selection = {data.dims[-1]: data.shape[-1] // 2}
+
+    def read_serial():
+
+        with FileLoaderTool.open_dataset(data.encoding["source"]) as dataset:
+            return dataset[data.name].isel(selection).values
+
+    results["read_slice_serial"] = _measure(read_serial, repeats)
+    results["read_slice_parallel"] = _measure(lambda: ParallelReadTool.read_rows(data, selection), repeats)
+
+    return results
+
+def compare_to_baseline(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    Find the measurements that are worse than the baseline.
+
+    Args:
+        results (dict): Measurements keyed by case and then by step.
+        baseline (dict): Measurements in the same layout as `results`.
+        tolerance (float): The allowed fractional increase over the baseline.
+
+    Returns:
+        list: Descriptions of the regressions. Cases and steps that aren't in the baseline are ignored.
+
+    """
+
+    regressions = []
+
+    for case, steps in results.items():
+        for step, measurement in steps.items():
+
+            reference = baseline.get(case, {}).get(step)
+
+            if reference is None:
+                continue
+
+            for metric in ("seconds", "peak_bytes", "copied_bytes"):
+
+                if metric not in reference or metric not in measurement:
+                    continue
+
+                # Skip timings that are dominated by noise
+                if metric == "seconds" and reference[metric] < MIN_COMPARABLE_SECONDS:
+                    continue
+
+                if measurement[metric] > reference[metric] * (1 + tolerance):
+                    regressions.append("{} {} {}: {:.4g} (baseline {:.4g})".format(
+                        case, step, metric, measurement[metric], reference[metric]))
+
+    return regressions
+
+def load_baseline(baseline_path):
+    """
+    Returns:
+        dict: The stored baseline, or an empty dict if the file doesn't exist.
+
+    """
+
+    if not os.path.exists(baseline_path):
+        return {}
+
+    with open(baseline_path) as baseline_file:
+        return json.load(baseline_file)
+
+def main(argv=None):
+
+    from benchmarks import SyntheticFiles
+    from benchmarks.Startup import run_startup
+
+    parser = argparse.ArgumentParser(description="Benchmark the dataset viewer on synthetic files.")
+    parser.add_argument("--size", default="small", choices=list(SyntheticFiles.SIZE_CLASSES))
+    parser.add_argument("--shapes", nargs="+", default=list(SyntheticFiles.SHAPES),
+                        choices=list(SyntheticFiles.SHAPES))
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--workdir", default=os.path.join(tempfile.gettempdir(), "datasetviewer-benchmarks"),
+                        help="Directory for the generated files. Files are reused between runs.")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--no-startup", action="store_true", help="Skip the time-to-window benchmark.")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="Store the results as the new baseline instead of comparing against it.")
+    args = parser.parse_args(argv)
+
+    results = OrderedDict()
+
+    # Measure the startup first, before this process has imported anything that the child processes might share
+    if not args.no_startup:
+        file_path = SyntheticFiles.generate(args.workdir, "cube_3d", "small")
+        results["startup"] = run_startup(file_path, args.repeats)
+
+    components = _create_components()
+
+    for shape in args.shapes:
+
+        case = "{}_{}".format(shape, args.size)
+        file_path = SyntheticFiles.generate(args.workdir, shape, args.size)
+        results[case] = run_case(file_path, args.repeats, components)
+
+    for case, steps in results.items():
+        for step, measurement in steps.items():
+            print("{:<24} {:<20} {:>10.2f} ms {:>10.1f} MiB".format(
+                case, step, measurement["seconds"] * 1e3, measurement.get("peak_bytes", 0) / 2**20))
+
+    baseline = load_baseline(args.baseline)
+
+    if args.update_baseline:
+        baseline.update(results)
+
+        with open(args.baseline, "w") as baseline_file:
+            json.dump(baseline, baseline_file, indent=2)
+
+        print("Baseline written to {}".format(args.baseline))
+        return 0
+
+    regressions = compare_to_baseline(results, baseline, args.tolerance)
+
+    for regression in regressions:
+        print("REGRESSION: " + regression)
+
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
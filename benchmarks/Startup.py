@@ -0,0 +1,105 @@
+import json
+import os
+import subprocess
+import sys
+import time
+from collections import OrderedDict
+
+""" Startup benchmark. Each measurement starts a fresh interpreter so that no modules have been imported yet, and
+    records the time until the main window has been painted and the time until the first plot of a file has been drawn. """
+
+# Runs in the child interpreter. Prints the wall-clock times at which the window was painted and the first plot drawn.
+_CHILD_SCRIPT = """
+import json
+import sys
+import time
+
+from PyQt5.QtCore import QEvent, QObject
+from PyQt5.QtWidgets import QApplication
+
+qapp = QApplication(sys.argv[:1])
+
+class FirstPaint(QObject):
+
+    def __init__(self):
+        QObject.__init__(self)
+        self.time = None
+
+    def eventFilter(self, obj, event):
+        if self.time is None and event.type() == QEvent.Paint:
+            self.time = time.time()
+        return False
+
+first_paint = FirstPaint()
+qapp.installEventFilter(first_paint)
+
+from datasetviewer.app import warm_up_imports
+warm_up_imports()
+
+from datasetviewer.app.MainWindow import MainWindow
+window = MainWindow()
+
+# The window shows itself, and is painted when the events that showing it posted are processed. Processing them also
+# creates the plot area, which comes after the window has been painted.
+while first_paint.time is None:
+    qapp.processEvents()
+
+window.create_plot_area()
+
+import datasetviewer.fileloader.FileLoaderTool as FileLoaderTool
+window.main_presenter.set_dict(FileLoaderTool.file_to_dict(sys.argv[1]))
+qapp.processEvents()
+
+print(json.dumps({"window": first_paint.time, "first_plot": time.time()}))
+"""
+
+def measure_startup(file_path):
+    """
+    Start the viewer in a new process and open a file.
+
+    Args:
+        file_path (str): The file that is plotted.
+
+    Returns:
+        dict: The seconds from starting the process until the window was painted and until the first plot was drawn.
+
+    Raises:
+        RuntimeError: If the child process fails.
+
+    """
+
+    env = dict(os.environ)
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+    start = time.time()
+    completed = subprocess.run([sys.executable, "-c", _CHILD_SCRIPT, file_path], stdout=subprocess.PIPE,
+                               stderr=subprocess.PIPE, env=env, universal_newlines=True)
+
+    if completed.returncode != 0:
+        raise RuntimeError("Startup benchmark failed:\n" + completed.stderr)
+
+    times = json.loads(completed.stdout.strip().splitlines()[-1])
+
+    return {"time_to_window": times["window"] - start, "time_to_first_plot": times["first_plot"] - start}
+
+def run_startup(file_path, repeats):
+    """
+    Repeat the startup measurement and keep the fastest result for each step.
+
+    Args:
+        file_path (str): The file that is plotted.
+        repeats (int): The number of processes to start.
+
+    Returns:
+        OrderedDict: Measurements in the layout used by `Benchmarks.compare_to_baseline`.
+
+    """
+
+    runs = [measure_startup(file_path) for _ in range(repeats)]
+
+    results = OrderedDict()
+
+    for step in ("time_to_window", "time_to_first_plot"):
+        results[step] = {"seconds": min(run[step] for run in runs)}
+
+    return results
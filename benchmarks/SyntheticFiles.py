@@ -0,0 +1,169 @@
+import os
+from collections import OrderedDict
+
+import numpy as np
+from netCDF4 import Dataset
+
+""" Generator for synthetic NetCDF4/HDF5 files of different shapes and sizes. Data is written one slab at a time so that
+    files much larger than the available memory can be created. """
+
+# Approximate number of bytes of data in each file for each size class
+SIZE_CLASSES = OrderedDict([("small", 4 * 2**20),
+                            ("medium", 256 * 2**20),
+                            ("large", 2 * 2**30),
+                            ("huge", 10 * 2**30)])
+
+# The maximum number of bytes that are generated in memory at a time
+SLAB_BYTES = 64 * 2**20
+
+# The number of variables in the "many_small" case
+NUM_SMALL_VARIABLES = 500
+
+ITEMSIZE = np.dtype(np.float64).itemsize
+
+def _wide(target_bytes):
+    """ A single 2D variable with a few rows and a very large number of columns. """
+
+    rows = 64
+    return [("wide", ("row", "column"), (rows, max(1, target_bytes // (ITEMSIZE * rows))), {})]
+
+def _many_small(target_bytes):
+    """ Many short 1D variables. """
+
+    length = max(1, target_bytes // (ITEMSIZE * NUM_SMALL_VARIABLES))
+    return [("var{:03d}".format(i), ("x",), (length,), {}) for i in range(NUM_SMALL_VARIABLES)]
+
+def _huge_1d(target_bytes):
+    """ A single very long 1D variable. """
+
+    return [("huge_1d", ("x",), (max(1, target_bytes // ITEMSIZE),), {})]
+
+def _cube_side(target_bytes):
+
+    return max(2, int(round((target_bytes / ITEMSIZE) ** (1.0 / 3))))
+
+def _cube_3d(target_bytes):
+    """ A single 3D cube stored contiguously. """
+
+    side = _cube_side(target_bytes)
+    return [("cube_3d", ("x", "y", "z"), (side, side, side), {"contiguous": True})]
+
+def _compressed(target_bytes):
+    """ A 3D cube compressed with zlib. """
+
+    side = _cube_side(target_bytes)
+    return [("compressed", ("x", "y", "z"), (side, side, side), {"zlib": True, "complevel": 4, "shuffle": True})]
+
+def _chunked(target_bytes):
+    """ An uncompressed 3D cube split into cubic chunks. """
+
+    side = _cube_side(target_bytes)
+    chunk = max(1, side // 4)
+    return [("chunked", ("x", "y", "z"), (side, side, side), {"chunksizes": (chunk, chunk, chunk)})]
+
+SHAPES = OrderedDict([("wide", _wide),
+                      ("many_small", _many_small),
+                      ("huge_1d", _huge_1d),
+                      ("cube_3d", _cube_3d),
+                      ("compressed", _compressed),
+                      ("chunked", _chunked)])
+
+def variable_specs(shape, size):
+    """
+    Describe the variables of a synthetic file.
+
+    Args:
+        shape (str): One of the keys of `SHAPES`.
+        size (str): One of the keys of `SIZE_CLASSES`.
+
+    Returns:
+        list: (name, dimension names, shape, netCDF4 creation keywords) tuples.
+
+    Raises:
+        ValueError: If the shape or size class is unknown.
+
+    """
+
+    if shape not in SHAPES:
+        raise ValueError("Unknown shape {}. Expected one of {}.".format(shape, list(SHAPES)))
+
+    if size not in SIZE_CLASSES:
+        raise ValueError("Unknown size class {}. Expected one of {}.".format(size, list(SIZE_CLASSES)))
+
+    return SHAPES[shape](SIZE_CLASSES[size])
+
+def _slabs(shape):
+    """
+    Split a variable into slabs of at most SLAB_BYTES. Slabs are whole rows along the first dimension, and rows that are
+    larger than SLAB_BYTES on their own, such as those of the "wide" case, are also split along the second dimension.
+
+    Returns:
+        list: The (start, stop) of each slab along each of the first two dimensions, or only the first for 1D variables.
+
+    """
+
+    row_bytes = ITEMSIZE * int(np.prod(shape[1:], dtype=np.int64))
+
+    if row_bytes <= SLAB_BYTES or len(shape) < 2:
+        rows_per_slab = max(1, SLAB_BYTES // row_bytes)
+        return [((start, min(shape[0], start + rows_per_slab)),) for start in range(0, shape[0], rows_per_slab)]
+
+    column_bytes = ITEMSIZE * int(np.prod(shape[2:], dtype=np.int64))
+    columns_per_slab = max(1, SLAB_BYTES // column_bytes)
+
+    return [((row, row + 1), (start, min(shape[1], start + columns_per_slab)))
+            for row in range(shape[0]) for start in range(0, shape[1], columns_per_slab)]
+
+def _write_variable(nc_var, shape, rng):
+    """ Fill a variable with smooth noisy data one slab at a time. """
+
+    for slab in _slabs(shape):
+
+        index = tuple(slice(start, stop) for start, stop in slab)
+        slab_shape = tuple(stop - start for start, stop in slab) + tuple(shape[len(slab):])
+
+        # A smooth ramp along the first dimension plus noise gives the compressed case something to compress
+        start, stop = slab[0]
+        ramp = np.arange(start, stop, dtype=np.float64).reshape((-1,) + (1,) * (len(shape) - 1))
+        nc_var[index] = ramp + rng.standard_normal(slab_shape)
+
+def generate(directory, shape, size, seed=0):
+    """
+    Create a synthetic file unless a file with the same shape and size class already exists.
+
+    Args:
+        directory (str): The directory in which the file is created.
+        shape (str): One of the keys of `SHAPES`.
+        size (str): One of the keys of `SIZE_CLASSES`.
+        seed (int): The seed for the random data. Defaults to 0.
+
+    Returns:
+        str: The path of the file.
+
+    """
+
+    specs = variable_specs(shape, size)
+    file_path = os.path.join(directory, "{}_{}.nc".format(shape, size))
+
+    if os.path.exists(file_path):
+        return file_path
+
+    os.makedirs(directory, exist_ok=True)
+    rng = np.random.default_rng(seed)
+
+    # Write to a temporary name so that an interrupted run doesn't leave a partial file behind
+    partial_path = file_path + ".partial"
+
+    with Dataset(partial_path, "w", format="NETCDF4") as nc_file:
+
+        for name, dims, var_shape, kwargs in specs:
+
+            for dim, length in zip(dims, var_shape):
+                if dim not in nc_file.dimensions:
+                    nc_file.createDimension(dim, length)
+
+            nc_var = nc_file.createVariable(name, "f8", dims, **kwargs)
+            _write_variable(nc_var, var_shape, rng)
+
+    os.replace(partial_path, file_path)
+    return file_path
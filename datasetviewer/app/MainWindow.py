@@ -2,56 +2,122 @@ from datasetviewer.mainview.interfaces.MainViewInterface import MainViewInterfac
 from datasetviewer.mainview.MainViewPresenter import MainViewPresenter
 from datasetviewer.fileloader.FileLoaderWidget import FileLoaderWidget
 from datasetviewer.preview.PreviewWidget import PreviewWidget
-from PyQt5.QtWidgets import QMainWindow, QAction, QGridLayout, QWidget
-from datasetviewer.plot.PlotWidget import PlotWidget
-
-from matplotlib.backends.backend_qt5agg import NavigationToolbar2QT as NavigationToolbar
+from datasetviewer.catalog.CatalogWidget import CatalogWidget
+from datasetviewer.watch.WatchWidget import WatchWidget
+from PyQt5.QtWidgets import QMainWindow, QAction, QGridLayout, QWidget, QLabel
+from PyQt5.QtCore import QTimer, pyqtSignal
 
 class MainWindow(MainViewInterface, QMainWindow):
 
+    # Emitted once the plot area has been created and files can be opened
+    ready = pyqtSignal()
+
     def __init__(self):
 
         QMainWindow.__init__(self)
 
+        self._plot_area_scheduled = False
+
         menubar = self.menuBar()
         filemenu = menubar.addMenu("File")
 
-        file_loader_widget = FileLoaderWidget(self)
-        file_loader_presenter = file_loader_widget.get_presenter()
-        filemenu.addAction(file_loader_widget)
+        self.file_loader_widget = FileLoaderWidget(self)
+        filemenu.addAction(self.file_loader_widget)
+        filemenu.addAction(self.file_loader_widget.compare_action)
 
-        preview_widget = PreviewWidget()
-        preview_presenter = preview_widget.get_presenter()
+        # Dialog for searching the files that have been indexed and opening them
+        self.catalog_widget = CatalogWidget(self)
+        self.catalog_action = QAction("Catalog...", self)
+        self.catalog_action.triggered.connect(self.catalog_widget.show)
+        filemenu.addAction(self.catalog_action)
 
-        plot_widget = PlotWidget()
-        plot_presenter = plot_widget.get_presenter()
-        self.toolbar = NavigationToolbar(plot_widget, self)
-        self.addToolBar(self.toolbar)
+        # Dialog for following a folder that new runs are written to
+        self.watch_widget = WatchWidget(self)
+        self.watch_action = QAction("Watch Folder...", self)
+        self.watch_action.triggered.connect(self.watch_widget.show)
+        filemenu.addAction(self.watch_action)
+
+        # Files can't be opened until the plot area exists
+        self.file_loader_widget.setEnabled(False)
+        self.file_loader_widget.compare_action.setEnabled(False)
+        self.catalog_action.setEnabled(False)
+        self.watch_action.setEnabled(False)
 
-        MainViewPresenter(self, file_loader_presenter, preview_presenter, plot_presenter)
+        self.preview_widget = PreviewWidget()
+
+        self.toolbar = None
+        self.main_presenter = None
 
         # Action for exiting the program
         exitAct = QAction("Exit", self)
         exitAct.triggered.connect(self.close)
         filemenu.addAction(exitAct)
 
-        self.statusBar()
+        # The timing breakdown is shown on the right of the status bar, where it doesn't replace the other messages
+        self.timings_label = QLabel()
+        self.statusBar().addPermanentWidget(self.timings_label)
 
         centralWidget = QWidget()
         self.setCentralWidget(centralWidget)
 
-        gridLayout = QGridLayout()
-        centralWidget.setLayout(gridLayout)
+        self.gridLayout = QGridLayout()
+        centralWidget.setLayout(self.gridLayout)
 
-        gridLayout.addWidget(preview_widget, 0, 0)
-        gridLayout.addWidget(plot_widget, 0, 1)
+        self.gridLayout.addWidget(self.preview_widget, 0, 0)
 
         self.setWindowTitle("Dataset Viewer")
         self.show()
 
+    def paintEvent(self, event):
+
+        QMainWindow.paintEvent(self, event)
+
+        # Importing matplotlib takes a while, so the plot is only created once the window has been painted. A timer that
+        # is started when the window is shown can run before the window system asks for the first paint.
+        if not self._plot_area_scheduled:
+            self._plot_area_scheduled = True
+            QTimer.singleShot(0, self.create_plot_area)
+
+    def create_plot_area(self):
+        """ Creates the plot and its toolbar, and connects the presenters. Does nothing if the plot area exists. """
+
+        if self.main_presenter is not None:
+            return
+
+        from matplotlib.backends.backend_qt5agg import NavigationToolbar2QT as NavigationToolbar
+        from datasetviewer.plot.PlotWidget import PlotWidget
+
+        plot_widget = PlotWidget()
+        self.toolbar = NavigationToolbar(plot_widget, self)
+        self.addToolBar(self.toolbar)
+        self.addToolBar(plot_widget.create_toolbar(self))
+
+        self.main_presenter = MainViewPresenter(self, self.file_loader_widget.get_presenter(),
+                                                self.preview_widget.get_presenter(), plot_widget.get_presenter(),
+                                                self.catalog_widget.get_presenter(), self.watch_widget.get_presenter())
+
+        self.gridLayout.addWidget(plot_widget, 0, 1)
+        self.gridLayout.addWidget(plot_widget.profile_widget, 1, 1)
+        self.file_loader_widget.setEnabled(True)
+        self.file_loader_widget.compare_action.setEnabled(True)
+        self.catalog_action.setEnabled(True)
+        self.watch_action.setEnabled(True)
+
+        self.ready.emit()
+
     def update_toolbar(self):
         """ Informs the toolbar that the 'Home' button should take the plot back to the current state. Called when a new
             dataset is loaded. """
 
         self.toolbar.update()
         self.toolbar.push_current()
+
+    def show_status_message(self, message):
+        """ Displays a message in the status bar, such as the statistics of the region of interest. """
+
+        self.statusBar().showMessage(message)
+
+    def show_timings(self, message):
+        """ Displays the timing breakdown of the last operation in its own place in the status bar. """
+
+        self.timings_label.setText(message)
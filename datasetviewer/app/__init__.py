@@ -1,13 +1,63 @@
-from datasetviewer.app.MainWindow import MainWindow
+from datasetviewer.eventloop.EventLoop import EventLoop, set_event_loop
+import datasetviewer.profiling.Tracer as Tracer
 from PyQt5 import QtWidgets
+import importlib
+import threading
 import sys
+import os
+
+# Modules that are needed for opening the first file. They are imported on a background thread while the window appears.
+WARM_UP_MODULES = ["numpy", "netCDF4", "xarray"]
+
+def warm_up_imports(modules=WARM_UP_MODULES):
+    """
+    Import modules on a daemon thread so that they are ready by the time they are needed.
+
+    Args:
+        modules (list): The names of the modules to import.
+
+    Returns:
+        threading.Thread: The thread that imports the modules.
+
+    """
+
+    def target():
+        for module in modules:
+            try:
+                importlib.import_module(module)
+            except ImportError:
+                pass
+
+    thread = threading.Thread(target=target, name="datasetviewer-warm-up", daemon=True)
+    thread.start()
+    return thread
 
 def main():
     """
-    Start the application.
+    Start the application. Setting the DATASETVIEWER_TRACE environment variable to 1 shows timing information in the
+    status bar, and setting it to a file path also writes the timings to that file in Chrome trace format on exit.
     """
 
+    trace = os.environ.get("DATASETVIEWER_TRACE")
+
+    if trace:
+        Tracer.enable(None if trace == "1" else trace)
+
     QAPP = QtWidgets.QApplication(sys.argv)
+
+    # Run an asyncio loop alongside the Qt loop so that file reads don't block the interface
+    event_loop = EventLoop()
+    event_loop.start()
+    set_event_loop(event_loop)
+    QAPP.aboutToQuit.connect(event_loop.stop)
+
+    warm_up_imports()
+
+    from datasetviewer.app.MainWindow import MainWindow
+
     APP = MainWindow()
     APP.show()
     QAPP.exec_()
+
+    if trace and trace != "1":
+        Tracer.write_trace()
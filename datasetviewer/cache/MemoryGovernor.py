@@ -0,0 +1,334 @@
+import logging
+import os
+import threading
+from collections import OrderedDict
+from enum import Enum
+
+""" Process-wide accounting of the memory that the viewer holds in caches, prefetched data and rendered frames.
+    Components register their buffers with the governor and supply a callback that releases a buffer when the governor
+    needs room. The budget can be set with the DATASETVIEWER_MEMORY_BUDGET environment variable (in bytes, or with a
+    K/M/G suffix) and otherwise defaults to a quarter of the physical memory. """
+
+_log = logging.getLogger(__name__)
+
+# Fraction of the physical memory that is used as the default budget
+DEFAULT_BUDGET_FRACTION = 0.25
+
+# Budget used when the physical memory can't be determined
+FALLBACK_BUDGET = 2 * 2**30
+
+_SUFFIXES = {"K": 2**10, "M": 2**20, "G": 2**30, "T": 2**40}
+
+class Priority(Enum):
+
+    # Data that was read ahead of time in case the user asks for it
+    PREFETCH = 0
+
+    # Data that has been shown before and is kept so that it can be shown again quickly
+    CACHED = 1
+
+    # Data that is currently on screen
+    VISIBLE = 2
+
+class _Entry(object):
+
+    __slots__ = ("nbytes", "category", "priority", "evict")
+
+    def __init__(self, nbytes, category, priority, evict):
+
+        self.nbytes = nbytes
+        self.category = category
+        self.priority = priority
+        self.evict = evict
+
+def parse_size(text):
+    """
+    Convert a size such as "512M" or "2G" to a number of bytes.
+
+    Args:
+        text (str): A number of bytes, optionally followed by K, M, G or T.
+
+    Returns:
+        int: The number of bytes.
+
+    Raises:
+        ValueError: If the text isn't a valid size.
+
+    """
+
+    text = text.strip().upper().rstrip("B")
+
+    if text and text[-1] in _SUFFIXES:
+        return int(float(text[:-1]) * _SUFFIXES[text[-1]])
+
+    return int(text)
+
+def environment_size(name):
+    """
+    Read a size from an environment variable. A value that isn't a valid size is ignored with a warning, so that a
+    mistyped setting doesn't stop files from being opened.
+
+    Args:
+        name (str): The name of the environment variable, such as DATASETVIEWER_MEMORY_BUDGET.
+
+    Returns:
+        int: The number of bytes, or None if the variable isn't set or isn't a valid size.
+
+    """
+
+    text = os.environ.get(name)
+
+    if not text:
+        return None
+
+    try:
+        size = parse_size(text)
+    except (ValueError, OverflowError):
+        size = -1
+
+    if size < 0:
+        _log.warning("Ignoring %s=%r, which isn't a size such as 1073741824, 512M or 2G. Using the default.", name, text)
+        return None
+
+    return size
+
+def default_budget():
+    """
+    Returns:
+        int: The budget from the DATASETVIEWER_MEMORY_BUDGET environment variable, or a fraction of the physical memory
+            if the variable isn't set or isn't a valid size.
+
+    """
+
+    budget = environment_size("DATASETVIEWER_MEMORY_BUDGET")
+
+    if budget is not None:
+        return budget
+
+    try:
+        physical = os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    except (AttributeError, ValueError, OSError):
+        return FALLBACK_BUDGET
+
+    return int(physical * DEFAULT_BUDGET_FRACTION)
+
+class MemoryGovernor(object):
+    """Enforces a single memory budget across every component that registers buffers with it. When a new buffer doesn't
+    fit, entries of the lowest priority are evicted first, and the least recently used entry within a priority.
+    Entries are only evicted to make room for entries of the same or a higher priority.
+
+    Args:
+        budget (int): The number of bytes that registered buffers may use. Defaults to None, in which case
+            `default_budget` is used.
+
+    Private Attributes:
+        _entries (OrderedDict): Registered entries ordered from least to most recently used.
+        _lock (threading.RLock): Guards the entries because buffers are registered from background threads.
+
+    """
+
+    def __init__(self, budget=None):
+
+        self._budget = default_budget() if budget is None else budget
+        self._entries = OrderedDict()
+        self._total = 0
+        self._lock = threading.RLock()
+
+    @property
+    def budget(self):
+        """int: The number of bytes that registered buffers may use."""
+
+        return self._budget
+
+    def set_budget(self, budget):
+        """
+        Change the budget, evicting entries if the current usage exceeds the new budget.
+
+        Args:
+            budget (int): The new budget in bytes.
+
+        """
+
+        with self._lock:
+            self._budget = budget
+            victims = self._select_victims(0, Priority.VISIBLE, partial=True)
+
+        self._evict(victims)
+
+    def register(self, key, nbytes, category, priority=Priority.CACHED, evict=None):
+        """
+        Account for a buffer, evicting other entries if necessary. Registering an existing key replaces its entry, and
+        the old entry is dropped even if the new one doesn't fit.
+
+        Args:
+            key (hashable): Identifies the buffer.
+            nbytes (int): The size of the buffer.
+            category (str): The category that the buffer is reported under, such as "slices" or "frames".
+            priority (Priority): Determines the order of eviction. Defaults to `Priority.CACHED`.
+            evict (callable): Called without arguments when the governor evicts the buffer. Entries without a callback
+                can't be evicted. The callback runs on the thread that registered the buffer that needed the room, or
+                that lowered the budget, which may be a background thread. Callbacks that change the interface's state
+                should pass the work to the Qt thread with `EventLoop.call_in_main_thread`. Defaults to None.
+
+        Returns:
+            bool: True if the buffer was registered, False otherwise. An evictable buffer that doesn't fit isn't
+                registered, nothing is evicted for it, and the caller should not keep it. Buffers without an eviction
+                callback are always registered.
+
+        """
+
+        with self._lock:
+
+            self._remove(key)
+
+            # Buffers that can't be evicted are always accounted for, even when they exceed the budget
+            victims = self._select_victims(nbytes, priority, partial=evict is None)
+
+            if victims is None:
+                return False
+
+            self._entries[key] = _Entry(nbytes, category, priority, evict)
+            self._total += nbytes
+
+        self._evict(victims)
+        return True
+
+    def unregister(self, key):
+        """
+        Stop accounting for a buffer. The buffer's eviction callback is not called. Unknown keys are ignored.
+
+        Args:
+            key (hashable): Identifies the buffer.
+
+        """
+
+        with self._lock:
+            self._remove(key)
+
+    def touch(self, key, priority=None):
+        """
+        Mark a buffer as recently used, and optionally change its priority.
+
+        Args:
+            key (hashable): Identifies the buffer.
+            priority (Priority): The new priority. Defaults to None, in which case the priority is kept.
+
+        """
+
+        with self._lock:
+
+            if key not in self._entries:
+                return
+
+            self._entries.move_to_end(key)
+
+            if priority is not None:
+                self._entries[key].priority = priority
+
+    def contains(self, key):
+        """
+        Returns:
+            bool: True if the key is registered, False otherwise.
+
+        """
+
+        with self._lock:
+            return key in self._entries
+
+    def total(self):
+        """
+        Returns:
+            int: The number of bytes in all registered buffers.
+
+        """
+
+        return self._total
+
+    def usage(self):
+        """
+        Returns:
+            dict: The number of registered bytes in each category.
+
+        """
+
+        usage = {}
+
+        with self._lock:
+            for entry in self._entries.values():
+                usage[entry.category] = usage.get(entry.category, 0) + entry.nbytes
+
+        return usage
+
+    def _remove(self, key):
+
+        entry = self._entries.pop(key, None)
+
+        if entry is not None:
+            self._total -= entry.nbytes
+
+        return entry
+
+    def _select_victims(self, nbytes, priority, partial=False):
+        """
+        Remove entries until `nbytes` more bytes fit within the budget. Must be called with the lock held.
+
+        Args:
+            nbytes (int): The number of bytes that need to fit.
+            priority (Priority): The highest priority that may be evicted.
+            partial (bool): Whether to remove as much as possible when enough room can't be made. Defaults to False.
+
+        Returns:
+            list: The removed entries, or None if enough room can't be made and `partial` is False. Nothing is removed
+                in that case.
+
+        """
+
+        excess = self._total + nbytes - self._budget
+
+        if excess <= 0:
+            return []
+
+        # Stable sorting keeps the least recently used entries first within each priority
+        candidates = sorted(((key, entry) for key, entry in self._entries.items()
+                             if entry.evict is not None and entry.priority.value <= priority.value),
+                            key=lambda item: item[1].priority.value)
+
+        selected = []
+        freed = 0
+
+        for key, entry in candidates:
+
+            if freed >= excess:
+                break
+
+            selected.append(key)
+            freed += entry.nbytes
+
+        if freed < excess and not partial:
+            return None
+
+        return [self._remove(key) for key in selected]
+
+    def _evict(self, victims):
+        """ Call the eviction callbacks outside of the lock so that they can use the governor themselves. """
+
+        for entry in victims or []:
+            entry.evict()
+
+_governor = None
+_governor_lock = threading.Lock()
+
+def get_governor():
+    """
+    Returns:
+        MemoryGovernor: The process-wide MemoryGovernor, which is created on first use.
+
+    """
+
+    global _governor
+
+    with _governor_lock:
+        if _governor is None:
+            _governor = MemoryGovernor()
+
+        return _governor
@@ -0,0 +1,123 @@
+import hashlib
+import json
+import os
+import threading
+
+""" Persistent cache of per-variable information about a file, such as the shape and type of each variable and its
+    statistics, so that it doesn't have to be computed again when the file is reopened. Each file has a JSON document in
+    the cache directory, which is discarded when the file's size or modification time changes. The directory can be set
+    with the DATASETVIEWER_CACHE_DIR environment variable. """
+
+# Guards the read-modify-write of the cache documents, which are updated from background threads
+_lock = threading.Lock()
+
+def cache_directory():
+    """
+    Returns:
+        str: The directory in which the cache documents are stored.
+
+    """
+
+    directory = os.environ.get("DATASETVIEWER_CACHE_DIR")
+
+    if directory:
+        return directory
+
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "datasetviewer")
+
+class SchemaCache(object):
+    """The cached information about the variables of one file.
+
+    Args:
+        file_path (str): The path of the file.
+        cache_dir (str): The directory of the cache documents. Defaults to None, in which case `cache_directory` is used.
+
+    Private Attributes:
+        _document_path (str): The path of the JSON document for the file.
+        _signature (dict): The size and modification time of the file when the cache was created.
+
+    Raises:
+        OSError: If the file doesn't exist.
+
+    """
+
+    def __init__(self, file_path, cache_dir=None):
+
+        file_path = os.path.abspath(file_path)
+        status = os.stat(file_path)
+
+        name = hashlib.sha1(file_path.encode("utf-8")).hexdigest() + ".json"
+
+        self._document_path = os.path.join(cache_dir or cache_directory(), name)
+        self._signature = {"path": file_path, "size": status.st_size, "mtime_ns": status.st_mtime_ns}
+
+    def _read(self):
+        """ Read the document, ignoring it if it is missing, unreadable or belongs to a different version of the file. """
+
+        try:
+            with open(self._document_path) as document:
+                contents = json.load(document)
+        except (OSError, ValueError):
+            return {}
+
+        if contents.get("signature") != self._signature:
+            return {}
+
+        return contents.get("variables", {})
+
+    def get(self, name, field):
+        """
+        Args:
+            name (str): The name of the variable.
+            field (str): The piece of information, such as "stats".
+
+        Returns:
+            The cached value, or None if it isn't in the cache.
+
+        """
+
+        return self.fields(name).get(field)
+
+    def fields(self, name):
+        """
+        Args:
+            name (str): The name of the variable.
+
+        Returns:
+            dict: Every cached value of the variable, keyed by field. Empty if the variable isn't in the cache.
+
+        """
+
+        with _lock:
+            return self._read().get(name, {})
+
+    def update(self, name, **fields):
+        """
+        Store information about a variable. Failures to write the document are ignored, as the cache is only an
+        optimisation.
+
+        Args:
+            name (str): The name of the variable.
+            **fields: The values to store, keyed by field.
+
+        """
+
+        with _lock:
+
+            variables = self._read()
+            variables.setdefault(name, {}).update(fields)
+
+            try:
+                os.makedirs(os.path.dirname(self._document_path), exist_ok=True)
+
+                # Replace the document in one step so that other processes never see a partly written file
+                temp_path = "{}.{}.tmp".format(self._document_path, os.getpid())
+
+                with open(temp_path, "w") as document:
+                    json.dump({"signature": self._signature, "variables": variables}, document)
+
+                os.replace(temp_path, self._document_path)
+
+            except OSError:
+                pass
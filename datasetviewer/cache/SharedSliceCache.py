@@ -0,0 +1,361 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import namedtuple
+
+import numpy as np
+
+import datasetviewer.profiling.Tracer as Tracer
+from datasetviewer.cache.MemoryGovernor import parse_size
+
+""" Cache of decoded slices that the viewers on a host share, so that a slice of a file that one viewer has read and
+    decompressed is read by the others from memory. Each slice is a .npy file in a shared directory, which is in
+    /dev/shm where it exists and therefore held in memory, and viewers map the files rather than copying them. An index
+    in the same directory, guarded by a file lock, counts the viewers that use each slice and when it was last used.
+    Slices that no viewer uses are evicted, least recently used first, when a new slice doesn't fit in the budget.
+    Slices are keyed by the identity of their file, its device, inode, size and modification time, and by the variable
+    and selection, so a file that is rewritten doesn't match its old slices. The cache is off unless the
+    DATASETVIEWER_SHARED_CACHE environment variable sets its size, such as "4G", and it needs POSIX file locks. """
+
+# Number of slices that the index can hold
+INDEX_SLOTS = 4096
+
+# Seconds after which a slice that is still counted as used is treated as unused, so that the slices of a viewer that
+# exited without releasing them are evicted in the end
+LEASE_TIMEOUT = 3600.0
+
+# An entry of the index. An empty key marks a free slot.
+_SLOT = np.dtype([("key", "S32"), ("nbytes", "<i8"), ("refcount", "<i4"), ("last_used", "<f8")])
+
+# The use of the cache by this process, and the slices and bytes that the index holds
+SharedCacheStats = namedtuple("SharedCacheStats", ["hits", "misses", "entries", "used"])
+
+def _import_fcntl():
+
+    try:
+        import fcntl
+    except ImportError:
+        return None
+
+    return fcntl
+
+def shared_directory():
+    """
+    Returns:
+        str: The directory that the viewers of this user share, in /dev/shm if it exists and in the temporary directory
+            otherwise.
+
+    """
+
+    base = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    return os.path.join(base, "datasetviewer-{}".format(os.getuid() if hasattr(os, "getuid") else 0))
+
+def slice_key(file_path, name, selection):
+    """
+    Args:
+        file_path (str): The path of the file that the variable is read from.
+        name (str): The name of the variable.
+        selection (dict): The index of each dimension that is sliced away.
+
+    Returns:
+        str: A hexadecimal digest of the file's identity, the variable and the selection, or None if the file can't be
+            found.
+
+    """
+
+    if not file_path:
+        return None
+
+    try:
+        status = os.stat(file_path)
+    except OSError:
+        return None
+
+    identity = [status.st_dev, status.st_ino, status.st_size, status.st_mtime_ns, str(name),
+                sorted((str(dim), int(index)) for dim, index in selection.items())]
+
+    return hashlib.blake2b(json.dumps(identity).encode("utf-8"), digest_size=16).hexdigest()
+
+class SharedSliceCache(object):
+    """A cache of slices shared by the processes that open it on the same directory. A slice returned by `get` is
+        leased until it is released, and isn't evicted while any process holds a lease on it.
+
+    Args:
+        budget (int): The number of bytes that the slices may use.
+        directory (str): The shared directory. Defaults to None, in which case `shared_directory` is used.
+        slots (int): The number of slices that the index can hold. Only used by the process that creates the index.
+            Defaults to INDEX_SLOTS.
+
+    Private Attributes:
+        _leases (dict): The number of leases that this process holds on each slice, keyed by its key. The index only
+            counts processes, so it is changed by the first lease and the last release of a process.
+        _lock (threading.Lock): Guards the index and the leases within this process. Other processes are kept out by a
+            lock on the index's lock file.
+        _hits (int): The number of slices that were found in the cache.
+        _misses (int): The number of slices that weren't.
+
+    Raises:
+        OSError: If the directory or the index can't be created.
+
+    """
+
+    def __init__(self, budget, directory=None, slots=INDEX_SLOTS):
+
+        self._budget = budget
+        self._directory = directory or shared_directory()
+        self._leases = {}
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+        os.makedirs(self._directory, mode=0o700, exist_ok=True)
+
+        self._lock_path = os.path.join(self._directory, "index.lock")
+        index_path = os.path.join(self._directory, "index")
+
+        with self._locked():
+            with open(index_path, "ab") as index_file:
+                if index_file.tell() == 0:
+                    index_file.truncate(slots * _SLOT.itemsize)
+
+            self._index = np.memmap(index_path, dtype=_SLOT, mode="r+")
+
+    def _locked(self):
+        """ A context that holds the lock of this process and that of the directory. """
+
+        return _DirectoryLock(self._lock, self._lock_path)
+
+    def _slice_path(self, key):
+
+        return os.path.join(self._directory, key + ".npy")
+
+    def _find(self, key):
+        """ The slot of a slice, or None if the index doesn't hold it. """
+
+        slots = np.flatnonzero(self._index["key"] == key.encode("ascii"))
+        return int(slots[0]) if len(slots) else None
+
+    def _evict(self, slot):
+
+        try:
+            os.unlink(self._slice_path(self._index["key"][slot].decode("ascii")))
+        except OSError:
+            pass
+
+        self._index[slot] = np.zeros((), dtype=_SLOT)
+
+    def _make_room(self, nbytes):
+        """
+        Evict unused slices, least recently used first, until a slice of `nbytes` fits in the budget and a slot is free.
+
+        Returns:
+            int: A free slot, or None if the slices that are in use leave no room.
+
+        """
+
+        index = self._index
+        occupied = index["key"] != b""
+        stale = index["last_used"] < time.time() - LEASE_TIMEOUT
+        evictable = np.flatnonzero(occupied & ((index["refcount"] <= 0) | stale))
+
+        used = int(index["nbytes"][occupied].sum())
+        free = np.flatnonzero(~occupied)
+
+        for slot in evictable[np.argsort(index["last_used"][evictable], kind="stable")]:
+
+            if used + nbytes <= self._budget and len(free):
+                break
+
+            used -= int(index["nbytes"][slot])
+            self._evict(slot)
+            free = np.append(free, slot)
+
+        if used + nbytes > self._budget or not len(free):
+            return None
+
+        return int(free[0])
+
+    def get(self, key):
+        """
+        Look up a slice and lease it. The lease must be given back with `release`.
+
+        Args:
+            key (str): The key of the slice, from `slice_key`.
+
+        Returns:
+            numpy.ndarray: A read-only map of the slice, or None if it isn't in the cache.
+
+        """
+
+        with self._locked():
+
+            slot = self._find(key)
+            values = None
+
+            if slot is not None:
+                try:
+                    values = np.load(self._slice_path(key), mmap_mode="r")
+                except (OSError, ValueError):
+                    self._evict(slot)
+
+            if values is None:
+                self._misses += 1
+                return None
+
+            self._hits += 1
+            self._index["last_used"][slot] = time.time()
+
+            if self._leases.get(key, 0) == 0:
+                self._index["refcount"][slot] += 1
+
+            self._leases[key] = self._leases.get(key, 0) + 1
+
+        # The map stays valid even if the slice is evicted after it is released
+        return values
+
+    def release(self, key):
+        """
+        Give back a lease on a slice.
+
+        Args:
+            key (str): The key of the slice.
+
+        """
+
+        with self._locked():
+
+            if self._leases.get(key, 0) == 0:
+                return
+
+            self._leases[key] -= 1
+
+            if self._leases[key] > 0:
+                return
+
+            del self._leases[key]
+            slot = self._find(key)
+
+            if slot is not None and self._index["refcount"][slot] > 0:
+                self._index["refcount"][slot] -= 1
+
+    def put(self, key, values):
+        """
+        Add a slice to the cache, evicting unused slices if it doesn't fit. Slices that are larger than the budget, or
+        that don't fit next to the slices in use, aren't added. If two processes add the same slice, the first is kept.
+
+        Args:
+            key (str): The key of the slice, from `slice_key`.
+            values (numpy.ndarray): The slice.
+
+        Returns:
+            bool: True if the slice is in the cache, False otherwise.
+
+        """
+
+        values = np.asarray(values)
+
+        if values.dtype.hasobject or values.nbytes > self._budget:
+            return False
+
+        # The slice is written before the index is locked, and only appears under its name once it is complete
+        handle, temporary = tempfile.mkstemp(suffix=".tmp", dir=self._directory)
+
+        try:
+            with os.fdopen(handle, "wb") as slice_file:
+                np.save(slice_file, values)
+
+            Tracer.record_copy("shared_cache", values.nbytes)
+
+            with self._locked():
+
+                if self._find(key) is not None:
+                    return True
+
+                slot = self._make_room(values.nbytes)
+
+                if slot is None:
+                    return False
+
+                os.replace(temporary, self._slice_path(key))
+                self._index[slot] = (key.encode("ascii"), values.nbytes, 0, time.time())
+                return True
+
+        except OSError:
+            return False
+
+        finally:
+            if os.path.exists(temporary):
+                os.unlink(temporary)
+
+    def stats(self):
+        """
+        Returns:
+            SharedCacheStats: The hits and misses of this process, and the number of slices and bytes in the cache.
+
+        """
+
+        with self._locked():
+            occupied = self._index["key"] != b""
+            return SharedCacheStats(self._hits, self._misses, int(occupied.sum()),
+                                    int(self._index["nbytes"][occupied].sum()))
+
+class _DirectoryLock(object):
+    """ Holds a thread lock and an exclusive lock on a file, in that order. """
+
+    def __init__(self, thread_lock, lock_path):
+
+        self._thread_lock = thread_lock
+        self._lock_path = lock_path
+        self._lock_file = None
+
+    def __enter__(self):
+
+        self._thread_lock.acquire()
+
+        try:
+            self._lock_file = open(self._lock_path, "a")
+            _import_fcntl().flock(self._lock_file.fileno(), _import_fcntl().LOCK_EX)
+        except BaseException:
+            if self._lock_file is not None:
+                self._lock_file.close()
+            self._thread_lock.release()
+            raise
+
+    def __exit__(self, *exc_info):
+
+        # Closing the file releases the lock on it
+        self._lock_file.close()
+        self._thread_lock.release()
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+def get_shared_cache():
+    """
+    Returns:
+        SharedSliceCache: The process's view of the shared cache, which is created on first use, or None if the
+            DATASETVIEWER_SHARED_CACHE environment variable isn't set, file locks aren't available or the shared
+            directory can't be used.
+
+    """
+
+    global _shared_cache
+
+    with _shared_cache_lock:
+
+        if _shared_cache is None:
+
+            size = os.environ.get("DATASETVIEWER_SHARED_CACHE")
+
+            if not size or _import_fcntl() is None:
+                return None
+
+            try:
+                _shared_cache = SharedSliceCache(parse_size(size))
+            except (OSError, ValueError):
+                return None
+
+        return _shared_cache
@@ -0,0 +1,133 @@
+from datasetviewer.catalog.interfaces.CatalogPresenterInterface import CatalogPresenterInterface
+from datasetviewer.mainview.interfaces.MainViewPresenterInterface import MainViewPresenterInterface
+from datasetviewer.catalog.Command import Command
+import datasetviewer.catalog.CatalogTool as CatalogTool
+import datasetviewer.eventloop.EventLoop as EventLoop
+
+class CatalogPresenter(CatalogPresenterInterface):
+    """The subpresenter responsible for the catalog of indexed files. Directories are scanned in the background, and the
+    catalog is searched as the search text changes, without opening any of the files.
+
+    Args:
+        catalog_view (CatalogView): An instance of a CatalogView.
+        catalog (Catalog): The catalog. Defaults to None, in which case the catalog in the cache directory is opened when
+            it is first needed.
+
+    Private Attributes:
+        _view (CatalogView): The CatalogView that lists the files. Assigned during initialisation.
+        _catalog (Catalog): The catalog of files.
+        _scanning (bool): Whether a directory is being scanned.
+
+    Raises:
+        ValueError: If the `catalog_view` argument is None.
+
+    """
+
+    def __init__(self, catalog_view, catalog=None):
+
+        if catalog_view is None:
+            raise ValueError("Error: Cannot create CatalogPresenter when View is None.")
+
+        self._view = catalog_view
+        self._catalog = catalog
+        self._main_presenter = None
+        self._scanning = False
+
+    def register_master(self, master):
+        """
+
+        Register the MainViewPresenter as the CatalogPresenter's master. Subscribing in the MainViewPresenter isn't
+        necessary as the MainViewPresenter doesn't send instructions to the CatalogPresenter.
+
+        Args:
+            master (MainViewPresenter): An instance of a MainViewPresenter.
+
+        """
+        assert (isinstance(master, MainViewPresenterInterface))
+
+        self._main_presenter = master
+
+    def _get_catalog(self):
+
+        if self._catalog is None:
+            self._catalog = CatalogTool.Catalog()
+
+        return self._catalog
+
+    def notify(self, command):
+        """
+
+        Interpret a command from the CatalogView and take the appropriate action.
+
+        Args:
+            command (Command): A Command from the CatalogView indicating that an event has taken place.
+
+        Raises:
+            ValueError: If the command isn't recognised.
+
+        """
+
+        if command == Command.SCANREQUEST:
+            directory = self._view.get_scan_directory()
+
+            # Do nothing if the dialog was closed without choosing a directory, or while another scan is running
+            if directory and not self._scanning:
+                self._scan(directory)
+
+        elif command == Command.SEARCHCHANGE:
+            self._show_search_results()
+
+        elif command == Command.OPENREQUEST:
+            file_path = self._view.get_selected_path()
+
+            if file_path:
+                self._main_presenter.open_file(file_path)
+
+        else:
+            raise ValueError("CatalogPresenter received an unrecognised command: {}".format(str(command)))
+
+    def _scan(self, directory):
+        """
+        Index a directory tree in the background, showing the progress on the view.
+
+        Args:
+            directory (str): The root of the tree.
+        """
+
+        self._scanning = True
+        self._view.show_message("Scanning {}...".format(directory))
+
+        def progress(done, total):
+            EventLoop.call_in_main_thread(self._view.show_message, "Scanning {}: {} of {} files read".format(
+                directory, done, total))
+
+        EventLoop.run_in_background(self._get_catalog().scan, directory, None, progress,
+                                    done=self._finish_scan, error=lambda error: self._finish_scan(None, error))
+
+    def _finish_scan(self, result, error=None):
+        """
+        Shows the outcome of a scan and the updated search results.
+
+        Args:
+            result (ScanResult): The outcome of the scan, or None if it failed.
+            error (Exception): The exception raised while scanning. Defaults to None.
+        """
+
+        self._scanning = False
+
+        if error is not None:
+            self._view.show_message("Scan failed: {}".format(error))
+            return
+
+        message = "{} added, {} updated, {} removed, {} unchanged".format(*result[:4])
+
+        if result.failed:
+            message += ", {} couldn't be read".format(result.failed)
+
+        self._view.show_message(message)
+        self._show_search_results()
+
+    def _show_search_results(self):
+        """ Lists the files in the catalog that match the search text. """
+
+        self._view.show_entries(self._get_catalog().search(self._view.get_search_text()))
@@ -0,0 +1,345 @@
+import json
+import multiprocessing
+import os
+import sqlite3
+import sys
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from datasetviewer.cache.SchemaCache import cache_directory
+
+""" Tool for indexing the files in a directory tree. The header of each file (its variables, their dimensions, shapes,
+    types and attributes, and the attributes of the file) is read in a pool of processes and stored in a SQLite
+    database, so that the files can be searched without opening them again. Rescans only read the files whose size or
+    modification time has changed. """
+
+# Name of the database in the cache directory
+CATALOG_NAME = "catalog.sqlite"
+
+# Extensions of the files that are indexed
+EXTENSIONS = (".nc",)
+
+# Headers are read in the calling process when fewer files than this have changed, as starting the pool costs more
+PARALLEL_THRESHOLD = 16
+
+# Minimum number of seconds between progress reports
+PROGRESS_INTERVAL = 0.25
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    directory TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    attrs TEXT,
+    error TEXT
+);
+CREATE TABLE IF NOT EXISTS variables (
+    path TEXT NOT NULL REFERENCES files(path) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    dims TEXT NOT NULL,
+    shape TEXT NOT NULL,
+    dtype TEXT NOT NULL,
+    attrs TEXT
+);
+CREATE INDEX IF NOT EXISTS variables_path ON variables(path);
+CREATE INDEX IF NOT EXISTS variables_name ON variables(name);
+"""
+
+# The outcome of scanning a directory
+ScanResult = namedtuple("ScanResult", ["added", "updated", "removed", "unchanged", "failed"])
+
+# A file in the catalog. `variables` holds a (name, dims, shape, dtype) tuple for each variable, and `error` the reason
+# that the header couldn't be read, or None.
+CatalogEntry = namedtuple("CatalogEntry", ["path", "size", "mtime", "attrs", "variables", "error"])
+
+def _json_value(value):
+    """ Convert an attribute value read from a file to a type that can be stored as JSON. """
+
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+
+    if isinstance(value, np.generic):
+        return value.item()
+
+    if isinstance(value, bytes):
+        return value.decode("utf-8", "replace")
+
+    if isinstance(value, (str, int, float, bool, list)) or value is None:
+        return value
+
+    return str(value)
+
+def _json_attrs(attrs):
+
+    return json.dumps({str(key): _json_value(value) for key, value in attrs.items()})
+
+def read_header(file_path):
+    """
+    Read the metadata of a file without reading its data. This runs in the worker processes of a scan, so it catches
+    its own errors.
+
+    Args:
+        file_path (str): The path of the file.
+
+    Returns:
+        tuple: The path, the attributes of the file as JSON, a (name, dims, shape, dtype, attributes) tuple for each
+            variable, and the error message if the file couldn't be read or None.
+
+    """
+
+    from datasetviewer.fileloader.FileLoaderTool import open_dataset
+
+    try:
+        data = open_dataset(file_path)
+    except Exception as e:
+        return file_path, None, [], "{}: {}".format(type(e).__name__, e)
+
+    try:
+        variables = [(str(name), json.dumps(list(var.dims)), json.dumps(list(var.shape)), str(var.dtype),
+                      _json_attrs(var.attrs))
+                     for name, var in data.variables.items()]
+
+        return file_path, _json_attrs(data.attrs), variables, None
+    finally:
+        data.close()
+
+def _read_header_chunk(paths):
+    """ Read the headers of a chunk of files in a worker process. """
+
+    return [read_header(path) for path in paths]
+
+def find_files(directory):
+    """
+    Find the files that can be indexed in a directory tree.
+
+    Args:
+        directory (str): The root of the tree.
+
+    Returns:
+        dict: The (size, modification time in nanoseconds) of each file, keyed by absolute path.
+
+    """
+
+    files = {}
+
+    for root, _, names in os.walk(directory):
+        for name in names:
+
+            if not name.lower().endswith(EXTENSIONS):
+                continue
+
+            path = os.path.join(root, name)
+
+            try:
+                status = os.stat(path)
+            except OSError:
+                continue
+
+            files[os.path.abspath(path)] = (status.st_size, status.st_mtime_ns)
+
+    return files
+
+class Catalog(object):
+    """An index of the headers of files, stored in a SQLite database.
+
+    Args:
+        db_path (str): The path of the database. Defaults to None, in which case it is kept in the cache directory.
+
+    Private Attributes:
+        _db_path (str): The path of the database.
+
+    """
+
+    def __init__(self, db_path=None):
+
+        self._db_path = db_path or os.path.join(cache_directory(), CATALOG_NAME)
+
+        directory = os.path.dirname(self._db_path)
+
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with self._connect() as connection:
+            connection.executescript(_SCHEMA)
+
+    def _connect(self):
+        """ Open a connection to the database. Scans run on background threads, so each operation opens its own. """
+
+        connection = sqlite3.connect(self._db_path, timeout=30)
+        connection.execute("PRAGMA foreign_keys = ON")
+        return _Connection(connection)
+
+    def scan(self, directory, max_workers=None, progress=None, is_cancelled=None):
+        """
+        Index the files in a directory tree. Files that haven't changed since the last scan aren't read again, and files
+        that have been deleted are removed from the catalog.
+
+        Args:
+            directory (str): The root of the tree.
+            max_workers (int): The number of processes that read headers. Defaults to None, in which case the number of
+                CPUs is used.
+            progress (callable): Called with the number of headers that have been read and the number that need to be
+                read. Calls are at least `PROGRESS_INTERVAL` seconds apart. Defaults to None.
+            is_cancelled (callable): Checked before each header is stored. The headers that have been stored so far
+                are kept when it returns True. Defaults to None.
+
+        Returns:
+            ScanResult: The number of files that were added, updated, removed, unchanged and couldn't be read.
+
+        """
+
+        directory = os.path.abspath(directory)
+        files = find_files(directory)
+
+        with self._connect() as connection:
+            known = {path: (size, mtime_ns) for path, size, mtime_ns in connection.execute(
+                "SELECT path, size, mtime_ns FROM files WHERE directory = ? OR directory LIKE ? ESCAPE '\\'",
+                (directory, _subdirectories(directory)))}
+
+        changed = [path for path, signature in files.items() if known.get(path) != signature]
+        removed = [path for path in known if path not in files]
+
+        with self._connect() as connection:
+            connection.executemany("DELETE FROM files WHERE path = ?", [(path,) for path in removed])
+
+        added = updated = failed = 0
+        last_report = time.perf_counter()
+
+        with self._connect() as connection:
+
+            for done, header in enumerate(self._read_headers(changed, max_workers)):
+
+                if is_cancelled is not None and is_cancelled():
+                    break
+
+                path = header[0]
+                self._store(connection, header, files[path])
+
+                failed += header[3] is not None
+                added += path not in known
+                updated += path in known
+
+                if time.perf_counter() - last_report >= PROGRESS_INTERVAL:
+                    # Make the headers that have been read so far searchable
+                    connection.commit()
+
+                    if progress is not None:
+                        progress(done + 1, len(changed))
+
+                    last_report = time.perf_counter()
+
+        return ScanResult(added, updated, len(removed), len(files) - len(changed), failed)
+
+    @staticmethod
+    def _read_headers(paths, max_workers):
+        """ Read the headers of files in a pool of processes, or in this process if there are only a few. Python 3.6
+            can't choose how the pool starts its processes, so the headers are always read in this process there. """
+
+        if len(paths) < PARALLEL_THRESHOLD or max_workers == 1 or sys.version_info < (3, 7):
+            for path in paths:
+                yield read_header(path)
+            return
+
+        # Forking a process that is running Qt and the asyncio loop isn't safe, so the workers are started afresh
+        context = multiprocessing.get_context("spawn")
+
+        pool = ProcessPoolExecutor(max_workers=max_workers, mp_context=context)
+        chunksize = max(1, len(paths) // (8 * (max_workers or os.cpu_count())))
+        futures = [pool.submit(_read_header_chunk, paths[start:start + chunksize])
+                   for start in range(0, len(paths), chunksize)]
+
+        try:
+            for future in futures:
+                yield from future.result()
+        finally:
+            # Headers that haven't been read yet aren't needed if the scan was cancelled
+            for future in futures:
+                future.cancel()
+
+            pool.shutdown(wait=False)
+
+    @staticmethod
+    def _store(connection, header, signature):
+
+        path, attrs, variables, error = header
+
+        connection.execute("DELETE FROM files WHERE path = ?", (path,))
+        connection.execute("INSERT INTO files VALUES (?, ?, ?, ?, ?, ?)",
+                           (path, os.path.dirname(path), signature[0], signature[1], attrs, error))
+        connection.executemany("INSERT INTO variables VALUES (?, ?, ?, ?, ?, ?)",
+                               [(path,) + variable for variable in variables])
+
+    def search(self, text="", directory=None, limit=1000):
+        """
+        Find files in the catalog.
+
+        Args:
+            text (str): Text that must appear in the path of the file, in the name of one of its variables, or in its
+                attributes. The case is ignored. Defaults to "", which matches every file.
+            directory (str): Only files in this directory tree are found. Defaults to None, in which case every file is
+                searched.
+            limit (int): The largest number of files that are returned.
+
+        Returns:
+            list: A CatalogEntry for each file that was found, newest first.
+
+        """
+
+        query = "SELECT path, size, mtime_ns, attrs, error FROM files WHERE 1"
+        parameters = []
+
+        if text:
+            pattern = "%" + text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            query += (" AND (path LIKE ? ESCAPE '\\' OR attrs LIKE ? ESCAPE '\\' OR path IN "
+                      "(SELECT path FROM variables WHERE name LIKE ? ESCAPE '\\'))")
+            parameters += [pattern] * 3
+
+        if directory is not None:
+            directory = os.path.abspath(directory)
+            query += " AND (directory = ? OR directory LIKE ? ESCAPE '\\')"
+            parameters += [directory, _subdirectories(directory)]
+
+        query += " ORDER BY mtime_ns DESC LIMIT ?"
+        parameters.append(limit)
+
+        with self._connect() as connection:
+            rows = connection.execute(query, parameters).fetchall()
+
+            variables = {}
+
+            for path, name, dims, shape, dtype in connection.execute(
+                    "SELECT path, name, dims, shape, dtype FROM variables WHERE path IN (SELECT path FROM ({}))".format(
+                        query), parameters):
+                variables.setdefault(path, []).append((name, tuple(json.loads(dims)), tuple(json.loads(shape)), dtype))
+
+        return [CatalogEntry(path, size, mtime_ns / 1e9, json.loads(attrs) if attrs else {}, variables.get(path, []),
+                             error)
+                for path, size, mtime_ns, attrs, error in rows]
+
+def _subdirectories(directory):
+    """ A LIKE pattern for the directories below a directory. """
+
+    escaped = directory.rstrip(os.sep).replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return escaped + os.sep + "%"
+
+class _Connection(object):
+    """ Commits and closes a SQLite connection at the end of a `with` block. A bare connection only commits. """
+
+    def __init__(self, connection):
+
+        self._connection = connection
+
+    def __enter__(self):
+
+        return self._connection.__enter__()
+
+    def __exit__(self, *exc_info):
+
+        try:
+            return self._connection.__exit__(*exc_info)
+        finally:
+            self._connection.close()
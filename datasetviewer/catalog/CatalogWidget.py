@@ -0,0 +1,109 @@
+import time
+
+from datasetviewer.catalog.interfaces.CatalogViewInterface import CatalogViewInterface
+from datasetviewer.catalog.CatalogPresenter import CatalogPresenter
+from datasetviewer.catalog.Command import Command
+
+from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import (QDialog, QFileDialog, QHBoxLayout, QLabel, QLineEdit, QPushButton, QTableWidget,
+                             QTableWidgetItem, QVBoxLayout, QAbstractItemView)
+
+class CatalogWidget(CatalogViewInterface, QDialog):
+
+    def __init__(self, parent = None):
+
+        QDialog.__init__(self, parent)
+
+        self.setWindowTitle("Catalog")
+        self.resize(800, 500)
+
+        self._scan_directory = None
+
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText("Search paths, variables and attributes")
+
+        self.scan_button = QPushButton("Scan folder...")
+        self.scan_button.clicked.connect(self.choose_scan_directory)
+
+        self.table = QTableWidget(0, 3)
+        self.table.setHorizontalHeaderLabels(["File", "Modified", "Variables"])
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.horizontalHeader().setStretchLastSection(True)
+
+        self.open_button = QPushButton("Open")
+        self.message_label = QLabel()
+
+        top = QHBoxLayout()
+        top.addWidget(self.search_edit)
+        top.addWidget(self.scan_button)
+
+        bottom = QHBoxLayout()
+        bottom.addWidget(self.message_label, 1)
+        bottom.addWidget(self.open_button)
+
+        layout = QVBoxLayout(self)
+        layout.addLayout(top)
+        layout.addWidget(self.table)
+        layout.addLayout(bottom)
+
+        self._presenter = CatalogPresenter(self)
+
+        self.search_edit.textChanged.connect(lambda: self._presenter.notify(Command.SEARCHCHANGE))
+        self.open_button.clicked.connect(lambda: self._presenter.notify(Command.OPENREQUEST))
+        self.table.cellDoubleClicked.connect(lambda row, col: self._presenter.notify(Command.OPENREQUEST))
+
+    def showEvent(self, event):
+
+        # Show the files that are already in the catalog
+        self._presenter.notify(Command.SEARCHCHANGE)
+        QDialog.showEvent(self, event)
+
+    def choose_scan_directory(self):
+
+        self._scan_directory = QFileDialog.getExistingDirectory(self, "Scan folder")
+        self._presenter.notify(Command.SCANREQUEST)
+
+    def get_scan_directory(self):
+        return self._scan_directory
+
+    def get_search_text(self):
+        return self.search_edit.text()
+
+    def get_selected_path(self):
+
+        row = self.table.currentRow()
+
+        if row < 0:
+            return None
+
+        return self.table.item(row, 0).data(Qt.UserRole)
+
+    def show_entries(self, entries):
+
+        self.table.setRowCount(len(entries))
+
+        for row, entry in enumerate(entries):
+
+            path_item = QTableWidgetItem(entry.path)
+            path_item.setData(Qt.UserRole, entry.path)
+
+            if entry.error:
+                path_item.setToolTip(entry.error)
+                variables = "Unreadable: " + entry.error
+            else:
+                variables = ", ".join("{} {}".format(name, shape) for name, _, shape, _ in entry.variables)
+
+            self.table.setItem(row, 0, path_item)
+            self.table.setItem(row, 1, QTableWidgetItem(time.strftime("%Y-%m-%d %H:%M:%S",
+                                                                      time.localtime(entry.mtime))))
+            self.table.setItem(row, 2, QTableWidgetItem(variables))
+
+        self.table.resizeColumnToContents(0)
+
+    def show_message(self, message):
+        self.message_label.setText(message)
+
+    def get_presenter(self):
+        return self._presenter
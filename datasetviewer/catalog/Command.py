@@ -0,0 +1,12 @@
+from enum import Enum
+
+class Command(Enum):
+
+    # Indicates that the user chose a directory to add to the catalog
+    SCANREQUEST = 400
+
+    # Indicates that the user changed the text that the catalog is searched for
+    SEARCHCHANGE = 401
+
+    # Indicates that the user chose a file in the catalog to open
+    OPENREQUEST = 402
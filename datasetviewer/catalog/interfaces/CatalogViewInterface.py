@@ -0,0 +1,33 @@
+from abc import ABCMeta, abstractmethod
+from PyQt5 import QtCore
+
+from six import with_metaclass
+
+class Meta(ABCMeta, type(QtCore.QObject)):
+    pass
+
+class CatalogViewInterface(with_metaclass(Meta)):
+
+    @abstractmethod
+    def get_presenter(self):
+        pass
+
+    @abstractmethod
+    def get_scan_directory(self):
+        pass
+
+    @abstractmethod
+    def get_search_text(self):
+        pass
+
+    @abstractmethod
+    def get_selected_path(self):
+        pass
+
+    @abstractmethod
+    def show_entries(self, entries):
+        pass
+
+    @abstractmethod
+    def show_message(self, message):
+        pass
@@ -0,0 +1,282 @@
+import time
+from collections import namedtuple, OrderedDict as DataSet
+
+import numpy as np
+
+from datasetviewer.dataset.Variable import Variable
+from datasetviewer.dataset.EventVariable import EventVariable
+import datasetviewer.stats.StatsTool as StatsTool
+
+""" Tool for comparing two files, such as a reprocessed file and the original. Variables are matched by name and shape,
+    and the difference of each pair is a lazy array that only reads the elements that are sliced from both files. The
+    whole-variable comparison streams both variables in chunks along their first dimension, so neither is ever held in
+    memory in full. """
+
+# Minimum number of seconds between progress reports
+PROGRESS_INTERVAL = 0.25
+
+# Suffixes of the keys of the elements that are shown for each pair of matched variables
+SUFFIXES = (" (A)", " (B)", " (A-B)")
+
+# The variables of the two files that can be compared, and those that can't
+Matching = namedtuple("Matching", ["common", "mismatched", "only_a", "only_b"])
+
+# The statistics of the difference A - B of a pair of variables and where the variables differ. The indices are None
+# if no elements differ.
+Difference = namedtuple("Difference", ["stats", "num_different", "first_index", "max_abs", "max_index"])
+
+def match_variables(dict_a, dict_b):
+    """
+    Match the variables of two files by name and shape.
+
+    Args:
+        dict_a (DataSet): The variables of the first file.
+        dict_b (DataSet): The variables of the second file.
+
+    Returns:
+        Matching: The keys of the variables that are in both files with the same dimensions, those that are in both
+            files but differ in dimensions or are event data, and those that are only in one of the files.
+
+    """
+
+    common = []
+    mismatched = []
+
+    for key in dict_a:
+
+        if key not in dict_b:
+            continue
+
+        a, b = dict_a[key], dict_b[key]
+
+        # Event data is histogrammed on demand, so it isn't compared element by element
+        if isinstance(a, EventVariable) or isinstance(b, EventVariable):
+            mismatched.append(key)
+        elif a.data.dims == b.data.dims and a.data.shape == b.data.shape:
+            common.append(key)
+        else:
+            mismatched.append(key)
+
+    return Matching(common, mismatched, [key for key in dict_a if key not in dict_b],
+                    [key for key in dict_b if key not in dict_a])
+
+def comparison_to_dict(dict_a, dict_b):
+    """
+    Create the elements that are shown when two files are compared. Each pair of matched variables becomes three
+    elements: the variable from each file and their difference.
+
+    Args:
+        dict_a (DataSet): The variables of the first file.
+        dict_b (DataSet): The variables of the second file.
+
+    Returns:
+        tuple: The DataSet of elements and the Matching of the variables. Variables that aren't numbers have no
+            difference element.
+
+    Raises:
+        ValueError: If the files have no variables with the same name and shape.
+
+    """
+
+    matching = match_variables(dict_a, dict_b)
+
+    if not matching.common:
+        raise ValueError("The files have no variables with the same name and shape.")
+
+    from datasetviewer.compare.DifferenceArray import difference
+
+    dataset = DataSet()
+
+    for key in matching.common:
+
+        a, b = dict_a[key].data, dict_b[key].data
+        elements = [a, b]
+
+        # Only numbers can be subtracted
+        if _is_numeric(a) and _is_numeric(b):
+            elements.append(difference(a, b))
+
+        for suffix, data in zip(SUFFIXES, elements):
+            dataset[key + suffix] = Variable(key + suffix, data)
+
+    return dataset, matching
+
+def _is_numeric(arr):
+
+    return np.issubdtype(arr.dtype, np.number) or arr.dtype == np.bool_
+
+def _differing(a, b, tolerance):
+    """ Find the elements of two chunks that differ by more than the tolerance. NaNs in the same place are equal. """
+
+    if tolerance > 0:
+        differs = ~(np.abs(np.subtract(a, b, dtype=np.float64)) <= tolerance)
+    else:
+        differs = a != b
+
+    if np.issubdtype(a.dtype, np.inexact) or np.issubdtype(b.dtype, np.inexact):
+        differs &= ~(np.isnan(a) & np.isnan(b))
+
+    return differs
+
+def compare_variables(a, b, tolerance=0, chunk_elements=StatsTool.DEFAULT_CHUNK_ELEMENTS, is_cancelled=None,
+                      chunk_done=None):
+    """
+    Compare two arrays of the same shape by reading one chunk of each at a time.
+
+    Args:
+        a (xarray.DataArray): The first array.
+        b (xarray.DataArray): The second array.
+        tolerance (float): The largest absolute difference at which elements are considered equal. Defaults to 0.
+        chunk_elements (int): The target number of elements in each chunk.
+        is_cancelled (callable): Checked before each chunk is read. Comparing stops when it returns True. Defaults to
+            None.
+        chunk_done (callable): Called with the number of elements that have been compared after each chunk. Defaults
+            to None.
+
+    Returns:
+        Difference: The comparison, or None if it was cancelled.
+
+    """
+
+    stats = StatsTool.RunningStats()
+    num_different = 0
+    first_index = None
+    max_abs = 0.0
+    max_index = None
+
+    if len(a.shape) == 0:
+        starts, rows = [0], 1
+        a, b = a.expand_dims("_scalar"), b.expand_dims("_scalar")
+    else:
+        starts, rows = StatsTool.chunk_starts(a.shape, chunk_elements)
+
+    for start in starts:
+
+        if is_cancelled is not None and is_cancelled():
+            return None
+
+        chunk_a = np.asarray(a[start:start + rows].values)
+        chunk_b = np.asarray(b[start:start + rows].values)
+
+        if not _is_numeric(chunk_a) or not _is_numeric(chunk_b):
+            # Strings and dates are compared for equality only
+            differs = chunk_a != chunk_b
+            diff = None
+        else:
+            diff = np.subtract(chunk_a, chunk_b, dtype=np.float64)
+            differs = _differing(chunk_a, chunk_b, tolerance)
+
+        chunk_different = int(np.count_nonzero(differs))
+
+        if chunk_different:
+
+            if first_index is None:
+                first_index = _index_in_array(np.flatnonzero(differs)[0], start, chunk_a.shape)
+
+            if diff is not None:
+                abs_diff = np.abs(np.where(np.isnan(diff), 0, diff))
+                position = int(np.argmax(abs_diff))
+
+                if abs_diff.flat[position] > max_abs:
+                    max_abs = float(abs_diff.flat[position])
+                    max_index = _index_in_array(position, start, chunk_a.shape)
+
+        num_different += chunk_different
+
+        if diff is not None:
+            stats = stats.merge(StatsTool.RunningStats.from_array(diff))
+
+        if chunk_done is not None:
+            chunk_done(chunk_a.size)
+
+    return Difference(stats, num_different, first_index, max_abs, max_index)
+
+def _index_in_array(flat_index, start, chunk_shape):
+    """ Convert the flat index of an element in a chunk to its index in the whole array. """
+
+    index = np.unravel_index(flat_index, chunk_shape)
+    return (int(index[0]) + start,) + tuple(int(i) for i in index[1:])
+
+def compare_datasets(dict_a, dict_b, keys, tolerance=0, progress=None, is_cancelled=None):
+    """
+    Compare the matched variables of two files.
+
+    Args:
+        dict_a (DataSet): The variables of the first file.
+        dict_b (DataSet): The variables of the second file.
+        keys (list): The keys of the variables that are compared, such as the common keys of a Matching.
+        tolerance (float): The largest absolute difference at which elements are considered equal. Defaults to 0.
+        progress (callable): Called with the fraction of elements that have been compared. Calls are at least
+            `PROGRESS_INTERVAL` seconds apart. Defaults to None.
+        is_cancelled (callable): Checked before each chunk is read. Comparing stops when it returns True. Defaults to
+            None.
+
+    Returns:
+        OrderedDict: The Difference of each variable, or None if comparing was cancelled.
+
+    """
+
+    total = sum(int(np.prod(dict_a[key].data.shape, dtype=np.int64)) for key in keys) or 1
+    compared = [0]
+    last_report = [time.perf_counter()]
+
+    def chunk_done(num_elements):
+
+        compared[0] += num_elements
+
+        if progress is not None and time.perf_counter() - last_report[0] >= PROGRESS_INTERVAL:
+            progress(compared[0] / total)
+            last_report[0] = time.perf_counter()
+
+    differences = DataSet()
+
+    for key in keys:
+
+        differences[key] = compare_variables(dict_a[key].data, dict_b[key].data, tolerance, is_cancelled=is_cancelled,
+                                             chunk_done=chunk_done)
+
+        if differences[key] is None:
+            return None
+
+    return differences
+
+def format_report(differences, matching):
+    """
+    Describe the result of a comparison.
+
+    Args:
+        differences (OrderedDict): The Difference of each compared variable.
+        matching (Matching): The matching of the variables of the two files.
+
+    Returns:
+        tuple: A one-line summary and a report with a line for each variable.
+
+    """
+
+    lines = []
+    num_differing = 0
+
+    for key, diff in differences.items():
+
+        if diff.num_different == 0:
+            lines.append("{}: identical".format(key))
+            continue
+
+        num_differing += 1
+        size = diff.stats.count + diff.stats.nan_count or diff.num_different
+        line = "{}: {} of {} elements differ, first at {}".format(key, diff.num_different, size, diff.first_index)
+
+        if diff.max_index is not None:
+            line += ", largest |A-B| = {:.6g} at {}, mean A-B = {:.6g}".format(diff.max_abs, diff.max_index,
+                                                                               diff.stats.mean)
+
+        lines.append(line)
+
+    for label, keys in (("Not comparable", matching.mismatched), ("Only in A", matching.only_a),
+                        ("Only in B", matching.only_b)):
+        if keys:
+            lines.append("{}: {}".format(label, ", ".join(keys)))
+
+    summary = "{} of {} compared variables differ".format(num_differing, len(differences))
+
+    return summary, "\n".join(lines)
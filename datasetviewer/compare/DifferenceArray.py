@@ -0,0 +1,56 @@
+import numpy as np
+
+from xarray.backends import BackendArray
+from xarray.core import indexing
+
+""" Lazy difference of two arrays. This module imports xarray, so it is only imported once two files are compared. """
+
+class DifferenceArray(BackendArray):
+    """The difference A - B of two arrays of the same shape. Only the elements that are indexed are read from the arrays
+    and subtracted, in the same way that xarray only reads the elements of a file that are indexed.
+
+    Args:
+        a (xarray.DataArray): The first array.
+        b (xarray.DataArray): The second array.
+
+    """
+
+    def __init__(self, a, b):
+
+        self.a = a
+        self.b = b
+        self.shape = a.shape
+        self.dtype = np.result_type(a.dtype, b.dtype)
+
+        # Differences of unsigned integers and booleans can be negative
+        if self.dtype.kind in "ub":
+            self.dtype = np.result_type(self.dtype, np.int8)
+
+    def __getitem__(self, key):
+
+        return indexing.explicit_indexing_adapter(key, self.shape, indexing.IndexingSupport.BASIC, self._getitem)
+
+    def _getitem(self, key):
+
+        a = np.asarray(self.a.variable[key].values, dtype=self.dtype)
+        b = np.asarray(self.b.variable[key].values, dtype=self.dtype)
+
+        return a - b
+
+def difference(a, b):
+    """
+    Create the difference of two arrays without reading them.
+
+    Args:
+        a (xarray.DataArray): The first array.
+        b (xarray.DataArray): The second array, with the same dimensions and shape as `a`.
+
+    Returns:
+        xarray.DataArray: The difference A - B. Slicing it reads the same slice of both arrays. The coordinates are those
+            of `a`.
+
+    """
+
+    from xarray import DataArray, Variable
+
+    return DataArray(Variable(a.dims, indexing.LazilyIndexedArray(DifferenceArray(a, b))), coords=a.coords, name=a.name)
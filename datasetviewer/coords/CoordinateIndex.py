@@ -0,0 +1,81 @@
+import numpy as np
+
+class CoordinateIndex(object):
+    """Finds the element of a coordinate array that is nearest to a position. Evenly spaced coordinates, such as array
+    indices, are found arithmetically in constant time. Other coordinates are sorted once and found with a binary search.
+
+    Args:
+        values (numpy.ndarray): The numeric coordinate of each element.
+
+    Private Attributes:
+        _start (float): The first coordinate, if the coordinates are evenly spaced.
+        _step (float): The spacing of the coordinates, or None if they aren't evenly spaced.
+        _sorted (numpy.ndarray): The finite coordinates in ascending order, if they aren't evenly spaced.
+        _order (numpy.ndarray): The element of each sorted coordinate.
+
+    """
+
+    # Relative tolerance within which the spacing of coordinates is considered to be even
+    UNIFORM_TOLERANCE = 1e-6
+
+    def __init__(self, values):
+
+        values = np.asarray(values, dtype=np.float64).ravel()
+
+        self.size = values.size
+        self._step = None
+
+        if self.size > 1:
+            step = (values[-1] - values[0]) / (self.size - 1)
+
+            if step != 0 and np.allclose(np.diff(values), step, rtol=self.UNIFORM_TOLERANCE, atol=0):
+                self._start = values[0]
+                self._step = step
+                return
+
+        finite = np.flatnonzero(np.isfinite(values))
+        self._order = finite[np.argsort(values[finite], kind="stable")]
+        self._sorted = values[self._order]
+
+    def is_uniform(self):
+        """
+        Returns:
+            bool: True if the coordinates are evenly spaced, False otherwise.
+
+        """
+
+        return self._step is not None
+
+    def nearest(self, position):
+        """
+        Find the element whose coordinate is nearest to a position.
+
+        Args:
+            position (float): The position.
+
+        Returns:
+            int: The index of the element, or None if the position is more than half a spacing beyond the first or last
+                coordinate.
+
+        """
+
+        if self._step is not None:
+            index = int(np.floor((position - self._start) / self._step + 0.5))
+            return index if 0 <= index < self.size else None
+
+        values = self._sorted
+
+        if values.size == 0:
+            return None
+
+        if values.size == 1:
+            return int(self._order[0]) if abs(position - values[0]) <= 0.5 else None
+
+        # Positions beyond the ends are accepted up to half of the spacing of the outermost coordinates
+        if position < values[0] - (values[1] - values[0]) / 2 or position > values[-1] + (values[-1] - values[-2]) / 2:
+            return None
+
+        right = int(np.clip(np.searchsorted(values, position), 1, values.size - 1))
+        nearest = right if values[right] - position < position - values[right - 1] else right - 1
+
+        return int(self._order[nearest])
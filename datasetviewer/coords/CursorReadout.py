@@ -0,0 +1,83 @@
+import numpy as np
+
+from datasetviewer.coords.CoordinateIndex import CoordinateIndex
+
+class CursorReadout(object):
+    """Describes the element of a plotted array that is under the cursor, along with its physical coordinates. The
+    coordinate indexes and the array values are prepared on the first request, so that later requests are only lookups
+    in memory.
+
+    Args:
+        values (xarray.DataArray): The plotted array. An image has the Y axis along its first dimension and the X axis
+            along its second, and a line has the X axis along its only dimension.
+        axes (list): A (dimension name, plotted positions, coordinate variable) tuple for the X axis and, for images,
+            the Y axis. The plotted positions are the places along the axis at which the elements are drawn, in units of
+            the index of the original array. The coordinate variable is None if the dimension doesn't have one.
+
+    Private Attributes:
+        _indexes (list): The CoordinateIndex of each axis. Defaults to None until the first request.
+
+    """
+
+    def __init__(self, values, axes):
+
+        self._values = values
+        self._axes = axes
+        self._indexes = None
+
+    def _prepare(self):
+
+        self._values = np.asarray(self._values)
+        self._indexes = [CoordinateIndex(positions) for _, positions, _ in self._axes]
+
+    @staticmethod
+    def _format(value):
+
+        if isinstance(value, (float, np.floating)):
+            return "{:.6g}".format(value)
+
+        return str(value)
+
+    def _describe_axis(self, axis, element):
+
+        dim, positions, coordinate = axis
+
+        # Rebinned elements are labelled with the original index nearest to their centre
+        index = int(round(float(positions[element])))
+
+        if coordinate is None or index >= coordinate.size:
+            return "{} = {}".format(dim, index)
+
+        units = coordinate.attrs.get("units")
+        value = self._format(coordinate.values[index])
+
+        return "{}[{}] = {}{}".format(dim, index, value, " " + units if units else "")
+
+    def describe(self, x, y=None):
+        """
+        Describe the element under the cursor.
+
+        Args:
+            x (float): The position of the cursor along the X axis.
+            y (float): The position of the cursor along the Y axis. Ignored for lines. Defaults to None.
+
+        Returns:
+            str: The coordinates and value of the element, or None if the cursor isn't over an element.
+
+        """
+
+        if self._indexes is None:
+            self._prepare()
+
+        elements = [index.nearest(position) for index, position in zip(self._indexes, (x, y))]
+
+        if None in elements:
+            return None
+
+        # Images are indexed by row (Y) and then by column (X)
+        value = self._values[tuple(reversed(elements))]
+
+        labels = [self._describe_axis(axis, element) for axis, element in zip(self._axes, elements)]
+        labels.append("value = {}".format(self._format(value)))
+
+        return ", ".join(labels)
@@ -0,0 +1,101 @@
+from datasetviewer.dataset.Variable import Variable
+import datasetviewer.events.EventTool as EventTool
+from datasetviewer.cache.MemoryGovernor import get_governor, Priority
+
+class EventVariable(Variable):
+    """Variable for the event data of an NXevent_data group. The events are histogrammed into a (time of flight, detector
+    pixel) array by `histogram`, which is run in the background, and the histogram is kept for later use.
+
+    Args:
+        name (str): The name/key associated with the data.
+        file_path (str): The path of the file containing the events.
+        group_path (str): The path of the NXevent_data group within the file.
+        num_events (int): The number of events in the group.
+
+    """
+
+    def __init__(self, name, file_path, group_path, num_events):
+
+        Variable.__init__(self, name, None)
+
+        self._file_path = file_path
+        self._group_path = group_path
+        self._num_events = num_events
+
+    @property
+    def data(self):
+        """xarray.DataArray: The histogram of the events, or None until `histogram` has counted them. Reading the data
+            never counts the events, which can take minutes, so that it doesn't block the thread that asks for it."""
+
+        return self._data
+
+    @property
+    def num_events(self):
+        """int: The number of events in the group."""
+
+        return self._num_events
+
+    def is_histogrammed(self):
+        """
+        Returns:
+            bool: True if the histogram has been computed, False otherwise.
+
+        """
+
+        return self._data is not None
+
+    def histogram(self, progress=None, is_cancelled=None):
+        """
+        Histogram the events, or return the histogram if it already exists.
+
+        Args:
+            progress (callable): Receives partial histograms while the events are counted. Defaults to None.
+            is_cancelled (callable): Stops the histogramming when it returns True. Defaults to None.
+
+        Returns:
+            xarray.DataArray: The histogram, or None if histogramming was cancelled.
+
+        """
+
+        if self._data is None:
+            data = EventTool.histogram_events(self._file_path, self._group_path, progress=progress,
+                                              is_cancelled=is_cancelled)
+
+            if data is not None:
+                # The histogram is shown or can be shown again at any time, so it isn't evicted until it is released
+                get_governor().register(self._governor_key(), data.nbytes, EventTool.MEMORY_CATEGORY, Priority.VISIBLE)
+
+            self._data = data
+
+        return self._data
+
+    def _governor_key(self):
+
+        return (id(self), "histogram")
+
+    def release(self):
+        """
+        Stop accounting for the histogram separately. Called when a dataset is set, after which a histogram that is kept
+        is counted as part of the dataset.
+
+        """
+
+        get_governor().unregister(self._governor_key())
+
+    def get_dimensions(self):
+        """
+        Returns:
+            tuple: The number of events.
+
+        """
+
+        return (self._num_events,)
+
+    def memory_usage(self):
+        """
+        Returns:
+            int: The number of bytes in the histogram, or 0 if it hasn't been computed.
+
+        """
+
+        return 0 if self._data is None else self._data.nbytes
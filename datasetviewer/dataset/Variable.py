@@ -1,3 +1,11 @@
+import threading
+import time
+
+import numpy as np
+
+import datasetviewer.stats.StatsTool as StatsTool
+import datasetviewer.stats.QuantileTool as QuantileTool
+
 class Variable(object):
     """Data Structure for storing an array and a name/key.
 
@@ -5,13 +13,39 @@ class Variable(object):
         name (str): The name/key associated with the data.
         data (xarray.core.variable.Variable): An xarray data structure that contains a key, dimension names, dimension
         sizes, and a data array.
+        schema_cache (SchemaCache): The cache of the file that the data comes from, in which its statistics are kept.
+            Defaults to None, in which case the statistics are only kept in memory.
+
+    Private Attributes:
+        _cached_fields (dict): The fields of the variable in the schema cache, read when the first of them is requested
+            and kept until the variable writes to the cache. Empty if the cache holds nothing for data of the same shape
+            and type. Defaults to None until then.
+        _stats (RunningStats): The statistics of the data. Defaults to None until every pass over the data has been read.
+        _percentiles (Percentiles): The percentiles used for colour limits, once every pass over the data has been read.
+            Defaults to None.
+        _sketch (QuantileSketch): The sample of values from the passes that have been read so far. Defaults to None until
+            it holds the first pass.
+        _stride (int): The number of rows between those read in each pass.
+        _remaining_passes (list): The first row of each pass over the data that hasn't been read yet.
+        _pass_stats (RunningStats): The statistics of the passes that have been read so far.
 
     """
 
-    def __init__(self, name, data):
+    def __init__(self, name, data, schema_cache=None):
 
         self._name = name
         self._data = data
+        self._schema_cache = schema_cache
+        self._cached_fields = None
+        self._stats = None
+        self._stats_lock = threading.Lock()
+
+        self._percentiles = None
+        self._sketch = None
+        self._stride = 1
+        self._remaining_passes = []
+        self._pass_stats = StatsTool.RunningStats()
+        self._sketch_lock = threading.RLock()
 
     @property
     def name(self):
@@ -33,3 +67,193 @@ class Variable(object):
         """
 
         return self._data.shape
+
+    def memory_usage(self):
+        """
+        Returns:
+            int: The number of bytes of the data array that are held in memory. Arrays that are read from the file on
+                demand don't count, and nor do memory maps, whose pages belong to the operating system's page cache.
+
+        """
+
+        if not getattr(self._data, "_in_memory", True) or self.is_memory_mapped():
+            return 0
+
+        return self._data.nbytes
+
+    def release(self):
+        """
+        Stop accounting for memory that the variable registered with the MemoryGovernor itself. Called when a dataset is
+        set, after which the memory that the variable holds is counted as part of the dataset, if it is still open. Plain
+        variables don't register anything.
+
+        """
+
+        pass
+
+    def is_memory_mapped(self):
+        """
+        Returns:
+            bool: True if the data array is a memory map of its file, so that slicing it reads the file without going
+                through the netCDF library, False otherwise.
+
+        """
+
+        return isinstance(getattr(getattr(self._data, "variable", None), "_data", None), np.memmap)
+
+    def _schema(self):
+
+        data = self.data
+        return {"dims": list(data.dims), "shape": list(data.shape), "dtype": str(data.dtype)}
+
+    def _from_schema_cache(self, field):
+        """ Find a value in the schema cache, provided that it was stored for data of the same shape and type. The
+            document is only read once, as the values are looked up each time the plot is drawn. """
+
+        if self._schema_cache is None:
+            return None
+
+        if self._cached_fields is None:
+            fields = self._schema_cache.fields(self._name)
+
+            # The schema is compared as well in case the variable changed without the file changing size or time
+            self._cached_fields = fields if fields.get("schema") == self._schema() else {}
+
+        return self._cached_fields.get(field)
+
+    def cached_statistics(self):
+        """
+        Returns:
+            RunningStats: The statistics of the data if they have already been computed, either in this session or when
+                the file was opened before, or None otherwise.
+
+        """
+
+        if self._stats is None:
+            stats = self._from_schema_cache("stats")
+
+            if stats is not None:
+                self._stats = StatsTool.RunningStats.from_dict(stats)
+
+        return self._stats
+
+    def percentiles(self):
+        """
+        Returns:
+            Percentiles: The 1st and 99th percentiles of the data if every pass over it has been read, either in this
+                session or when the file was opened before, or None otherwise.
+
+        """
+
+        if self._percentiles is None:
+            percentiles = self._from_schema_cache("percentiles")
+
+            if percentiles is not None:
+                self._percentiles = QuantileTool.Percentiles(*percentiles)
+
+        return self._percentiles
+
+    def estimate_percentiles(self):
+        """
+        Estimate the 1st and 99th percentiles of the data. Unless the percentiles are already known, this reads a single
+        strided pass over the data, which takes milliseconds even for very large arrays. The estimate is improved by
+        `refine_percentiles`.
+
+        Returns:
+            Percentiles: The estimated percentiles and their rank error, or None if the data has no finite values.
+
+        """
+
+        if self.percentiles() is not None:
+            return self._percentiles
+
+        # Waits for a first pass that another thread is reading rather than reading the next one. Once the sketch is
+        # set it is only added to, under its own lock, so its percentiles are read without holding the variable's lock.
+        if self._sketch is None:
+            with self._sketch_lock:
+                if self._sketch is None:
+                    self._read_next_pass()
+
+        return self._sketch.percentiles()
+
+    def _read_next_pass(self):
+        """
+        Add the values of the next pass over the data to the sample.
+
+        Returns:
+            bool: True if a pass was read, False if every pass has already been read.
+
+        """
+
+        with self._sketch_lock:
+
+            sketch = self._sketch
+
+            if sketch is None:
+                sketch = QuantileTool.QuantileSketch()
+                self._stride = QuantileTool.pass_stride(self.data.shape)
+                self._remaining_passes = QuantileTool.pass_offsets(self._stride)
+
+            if not self._remaining_passes:
+                return False
+
+            values = QuantileTool.read_pass(self.data, self._remaining_passes.pop(0), self._stride)
+
+            sketch.add(values)
+            self._pass_stats = self._pass_stats.merge(StatsTool.RunningStats.from_array(values))
+
+            # Only set once it holds the first pass, so that nothing estimates the percentiles from an empty sketch
+            self._sketch = sketch
+
+            return True
+
+    def refine_percentiles(self, progress=None, is_cancelled=None):
+        """
+        Read the remaining passes over the data into the sample of values. Once every pass has been read, the
+        percentiles and the statistics of the data are stored in the schema cache.
+
+        Args:
+            progress (callable): Called with the improved estimate after each pass. Calls are at least
+                `QuantileTool.PROGRESS_INTERVAL` seconds apart. Defaults to None.
+            is_cancelled (callable): Checked before each pass is read. Reading stops when it returns True, and continues
+                from the same pass the next time this is called. Defaults to None.
+
+        Returns:
+            Percentiles: The percentiles, or None if refining was cancelled or the data has no finite values.
+
+        """
+
+        if self.percentiles() is not None:
+            return self._percentiles
+
+        last_report = time.perf_counter()
+
+        while True:
+
+            if is_cancelled is not None and is_cancelled():
+                return None
+
+            if not self._read_next_pass():
+                break
+
+            if progress is not None and time.perf_counter() - last_report >= QuantileTool.PROGRESS_INTERVAL:
+                progress(self._sketch.percentiles())
+                last_report = time.perf_counter()
+
+        self._percentiles = self._sketch.percentiles()
+
+        if self._percentiles is None:
+            return None
+
+        with self._stats_lock:
+
+            # Every element has been read, so the statistics come for free
+            if self.cached_statistics() is None:
+                self._stats = self._pass_stats
+
+            if self._schema_cache is not None:
+                self._schema_cache.update(self._name, schema=self._schema(), stats=self._stats.to_dict(),
+                                          percentiles=list(self._percentiles))
+                self._cached_fields = None
+
+        return self._percentiles
@@ -0,0 +1,83 @@
+import numpy as np
+
+""" Tool for reducing a long trace to the points that can be seen on screen. The trace is divided into one bucket per
+    horizontal pixel, and only the smallest and largest value of each bucket are kept, in their original order. The
+    decimated trace draws the same envelope as the full trace, including single-sample spikes, with at most two points
+    per pixel. """
+
+def visible_range(x, x_min, x_max):
+    """
+    Find the elements of a trace that fall within a range of X values, plus one on either side so that the lines to
+    the points just outside the range are still drawn.
+
+    Args:
+        x (numpy.ndarray): The ascending X values of the trace.
+        x_min (float): The lower end of the range.
+        x_max (float): The upper end of the range.
+
+    Returns:
+        tuple: The start and stop indices of the elements.
+
+    """
+
+    start = max(0, int(np.searchsorted(x, x_min, side="left")) - 1)
+    stop = min(len(x), int(np.searchsorted(x, x_max, side="right")) + 1)
+
+    return start, stop
+
+def _extremes(buckets, has_nan):
+    """ Find the positions of the smallest and largest finite value in each row, and the rows without finite values. """
+
+    if not has_nan:
+        return buckets.argmin(axis=1), buckets.argmax(axis=1), np.zeros(len(buckets), dtype=bool)
+
+    finite = np.isfinite(buckets)
+    lowest = np.argmin(np.where(finite, buckets, np.inf), axis=1)
+    highest = np.argmax(np.where(finite, buckets, -np.inf), axis=1)
+
+    return lowest, highest, ~finite.any(axis=1)
+
+def decimate(x, y, num_buckets):
+    """
+    Keep the smallest and largest value of each bucket of a trace.
+
+    Args:
+        x (numpy.ndarray): The X values of the trace.
+        y (numpy.ndarray): The Y values of the trace.
+        num_buckets (int): The number of buckets, normally the width of the plot in pixels.
+
+    Returns:
+        tuple: The X and Y values of the decimated trace. Traces with no more than two points per bucket are returned
+            unchanged. Buckets without finite values become NaN, which leaves a gap in the line.
+
+    """
+
+    n = len(y)
+    num_buckets = max(1, int(num_buckets))
+
+    if n <= 2 * num_buckets:
+        return x, y
+
+    y = np.asarray(y, dtype=np.float64)
+    has_nan = bool(np.isnan(y).any())
+
+    bucket_size = -(-n // num_buckets)
+    full = n // bucket_size
+
+    # The full buckets are a view of the trace, and the shorter last bucket is handled separately
+    lowest, highest, empty = _extremes(y[:full * bucket_size].reshape(full, bucket_size), has_nan)
+
+    if full * bucket_size < n:
+        tail = _extremes(y[full * bucket_size:].reshape(1, -1), has_nan)
+        lowest, highest, empty = (np.append(part, end) for part, end in zip((lowest, highest, empty), tail))
+
+    # Keep the two points of each bucket in the order in which they appear in the trace
+    offsets = np.arange(len(lowest)) * bucket_size
+    indices = np.empty(2 * len(lowest), dtype=np.intp)
+    indices[0::2] = offsets + np.minimum(lowest, highest)
+    indices[1::2] = offsets + np.maximum(lowest, highest)
+
+    values = y[indices]
+    values[np.repeat(empty, 2)] = np.nan
+
+    return np.asarray(x)[indices], values
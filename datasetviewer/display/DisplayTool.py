@@ -0,0 +1,86 @@
+import numpy as np
+
+import datasetviewer.profiling.Tracer as Tracer
+
+""" Tool for converting slices to a compact type before they are shown. matplotlib scales and resamples an image in the
+    type it is given, each time the image is drawn, so a float64 slice costs twice the memory and bandwidth of a float32
+    one on every redraw. Slices are converted once, when they are plotted, to the smallest type that shows them without
+    visible loss. The slices themselves are kept at full precision for the statistics, cursor readout and exports. """
+
+# Types that are already compact and are shown as they are
+COMPACT_KINDS = {"b": 1, "i": 2, "u": 2, "f": 4}
+
+# Largest integer that float32 holds exactly
+FLOAT32_EXACT = 2**24
+
+# Fewest distinct float32 values that the range of a slice has to span, so that the colours don't band
+MIN_FLOAT32_LEVELS = 2**11
+
+def display_dtype(values):
+    """
+    Choose the type in which a slice is shown. Small integers and single-precision floats are shown as they are. Larger
+    integers and double-precision floats are shown as float32 when their range allows it: integers must be held exactly,
+    and the range of the floats must be wide enough compared to their magnitude to leave distinct colours.
+
+    Args:
+        values (numpy.ndarray): The slice.
+
+    Returns:
+        numpy.dtype: The type to show the slice in.
+
+    """
+
+    dtype = values.dtype
+
+    if dtype.itemsize <= COMPACT_KINDS.get(dtype.kind, 0):
+        return dtype
+
+    if dtype.kind not in "iuf" or values.size == 0:
+        return dtype
+
+    if dtype.kind in "iu":
+        low, high = int(values.min()), int(values.max())
+        return np.dtype(np.float32) if -FLOAT32_EXACT <= low and high <= FLOAT32_EXACT else dtype
+
+    # Ignores NaN without copying the slice
+    low, high = float(np.fmin.reduce(values, axis=None)), float(np.fmax.reduce(values, axis=None))
+
+    # Only NaN
+    if np.isnan(low):
+        return np.dtype(np.float32)
+
+    magnitude = max(abs(low), abs(high))
+    finfo = np.finfo(np.float32)
+
+    if not np.isfinite(magnitude) or magnitude > float(finfo.max):
+        return dtype
+
+    # Values smaller than this are rounded by float32
+    resolution = max(magnitude * float(finfo.eps), float(finfo.tiny))
+
+    return np.dtype(np.float32) if high - low >= resolution * MIN_FLOAT32_LEVELS or high == low else dtype
+
+def to_display(values, step="display"):
+    """
+    Convert a slice to the type in which it is shown. Slices that are already in that type are returned without copying.
+
+    Args:
+        values (array_like): The slice, such as a numpy array or an xarray DataArray.
+        step (str): The name under which the copy is counted by the Tracer. Defaults to "display".
+
+    Returns:
+        numpy.ndarray: The slice in its display type, in C order if it was converted.
+
+    """
+
+    values = np.asarray(values)
+    dtype = display_dtype(values)
+
+    if dtype == values.dtype:
+        return values
+
+    # A single pass that also lays out transposed slices in the order that they are drawn
+    converted = values.astype(dtype, order="C")
+    Tracer.record_copy(step, converted.nbytes)
+
+    return converted
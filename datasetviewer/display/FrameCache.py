@@ -0,0 +1,185 @@
+import threading
+from collections import OrderedDict, namedtuple
+
+from datasetviewer.cache.MemoryGovernor import environment_size, get_governor, Priority
+
+""" Cache of rendered frames. Drawing an image colour-maps and resamples the whole slice and rasterises the axes and the
+    colour bar, which takes far longer than copying the finished pixels to the screen. The pixels of each image are kept
+    after it is first drawn, so that showing the same image again only copies them back. A frame is keyed by everything
+    that changes its pixels: the variable, the selection and rebinning of its slice, the colour map and limits, and the
+    size of the canvas. The cache has its own budget, which can be set with the DATASETVIEWER_FRAME_CACHE environment
+    variable, and its frames are also registered with the MemoryGovernor. """
+
+# Budget of the cache when DATASETVIEWER_FRAME_CACHE isn't set, enough for about twenty full-screen frames
+DEFAULT_FRAME_BUDGET = 64 * 2**20
+
+# Bytes in each pixel of a frame, which is RGBA
+BYTES_PER_PIXEL = 4
+
+# What a frame shows. The view adds the colour map and the size of the canvas to the key that the presenter makes.
+FrameKey = namedtuple("FrameKey", ["variable", "selection", "rebin_factor", "clim", "colormap", "size"])
+
+# The hits and misses of the cache, and the number of frames and bytes that it holds
+FrameCacheStats = namedtuple("FrameCacheStats", ["hits", "misses", "frames", "used"])
+
+def frame_budget():
+    """
+    Returns:
+        int: The budget from the DATASETVIEWER_FRAME_CACHE environment variable, or DEFAULT_FRAME_BUDGET if the variable
+            isn't set or isn't a valid size.
+
+    """
+
+    budget = environment_size("DATASETVIEWER_FRAME_CACHE")
+    return DEFAULT_FRAME_BUDGET if budget is None else budget
+
+def hit_rate(stats):
+    """
+    Args:
+        stats (FrameCacheStats): The statistics of a cache.
+
+    Returns:
+        float: The fraction of the lookups that found a frame, or None if there haven't been any.
+
+    """
+
+    lookups = stats.hits + stats.misses
+    return stats.hits / lookups if lookups else None
+
+class FrameCache(object):
+    """Keeps rendered frames, evicting the least recently used frame when a new one doesn't fit in the budget.
+
+    Args:
+        budget (int): The number of bytes that frames may use. Defaults to None, in which case `frame_budget` is used.
+        governor (MemoryGovernor): The governor that the frames are registered with. Defaults to None, in which case the
+            process-wide governor is used.
+
+    Private Attributes:
+        _frames (OrderedDict): The (frame, nbytes) of each key, ordered from least to most recently used.
+        _lock (threading.Lock): Guards the frames, which the governor may evict from another thread.
+
+    """
+
+    # Category under which the frames are reported to the MemoryGovernor
+    CATEGORY = "frames"
+
+    def __init__(self, budget=None, governor=None):
+
+        self._budget = frame_budget() if budget is None else budget
+        self._governor = governor or get_governor()
+        self._frames = OrderedDict()
+        self._used = 0
+        self._hits = 0
+        self._misses = 0
+        self._lock = threading.Lock()
+
+    def _governor_key(self, key):
+
+        return (id(self), key)
+
+    def get(self, key):
+        """
+        Args:
+            key (FrameKey): What the frame shows.
+
+        Returns:
+            The frame, or None if it isn't in the cache.
+
+        """
+
+        with self._lock:
+
+            if key not in self._frames:
+                self._misses += 1
+                return None
+
+            self._hits += 1
+            self._frames.move_to_end(key)
+            frame = self._frames[key][0]
+
+        self._governor.touch(self._governor_key(key))
+        return frame
+
+    def put(self, key, frame, nbytes):
+        """
+        Add a frame, evicting the least recently used frames if it doesn't fit. Frames that are larger than the budget,
+        or that the governor has no room for, aren't added.
+
+        Args:
+            key (FrameKey): What the frame shows.
+            frame: The frame, as the view captured it.
+            nbytes (int): The size of the frame.
+
+        Returns:
+            bool: True if the frame was added, False otherwise.
+
+        """
+
+        if nbytes > self._budget:
+            return False
+
+        self.discard(lambda other: other == key)
+
+        with self._lock:
+
+            victims = []
+
+            while self._used + nbytes > self._budget:
+                victim, (_, victim_bytes) = self._frames.popitem(last=False)
+                self._used -= victim_bytes
+                victims.append(victim)
+
+        for victim in victims:
+            self._governor.unregister(self._governor_key(victim))
+
+        if not self._governor.register(self._governor_key(key), nbytes, self.CATEGORY, Priority.CACHED,
+                                       evict=lambda: self._drop(key)):
+            return False
+
+        with self._lock:
+            self._frames[key] = (frame, nbytes)
+            self._used += nbytes
+
+        return True
+
+    def _drop(self, key):
+        """ Called by the governor, which has already stopped accounting for the frame. """
+
+        with self._lock:
+            entry = self._frames.pop(key, None)
+
+            if entry is not None:
+                self._used -= entry[1]
+
+    def discard(self, predicate):
+        """
+        Drop the frames that no longer match what they would show if they were drawn again.
+
+        Args:
+            predicate (callable): Called with the key of each frame, and returns True if the frame should be dropped.
+
+        """
+
+        with self._lock:
+            keys = [key for key in self._frames if predicate(key)]
+
+            for key in keys:
+                self._used -= self._frames.pop(key)[1]
+
+        for key in keys:
+            self._governor.unregister(self._governor_key(key))
+
+    def clear(self):
+        """ Drop every frame. Called when a new dataset is loaded and when the canvas is resized. """
+
+        self.discard(lambda key: True)
+
+    def stats(self):
+        """
+        Returns:
+            FrameCacheStats: The hits and misses of the cache, and the number of frames and bytes that it holds.
+
+        """
+
+        with self._lock:
+            return FrameCacheStats(self._hits, self._misses, len(self._frames), self._used)
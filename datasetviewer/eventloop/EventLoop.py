@@ -0,0 +1,275 @@
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+""" An asyncio event loop that runs alongside the Qt event loop. Coroutines and blocking functions are executed on a
+    worker thread so that the interface remains responsive, and their results are handed back to the Qt thread through a
+    queued signal. When no loop has been started (for example in the unit tests) the module-level helpers fall back to
+    running everything synchronously. """
+
+_log = logging.getLogger(__name__)
+
+class _Dispatcher(QObject):
+    """ Lives in the Qt thread and runs the callables that are posted to it from other threads. An exception raised by one
+        of them, such as a `done` or `error` callback, is logged, as PyQt aborts the application when a slot raises. """
+
+    invoke = pyqtSignal(object)
+
+    def __init__(self):
+
+        QObject.__init__(self)
+        self.invoke.connect(self._run)
+
+    def _run(self, call):
+
+        func, args = call
+
+        try:
+            func(*args)
+        except Exception:
+            _log.exception("Unexpected error in %r, which was called on the Qt thread", func)
+
+class EventLoop(object):
+    """An asyncio event loop running on a background thread that is integrated with the Qt event loop.
+
+    Args:
+        max_workers (int): The number of threads used for running blocking functions. Defaults to None, in which case
+            the `ThreadPoolExecutor` default is used.
+
+    Private Attributes:
+        _loop (asyncio.AbstractEventLoop): The asyncio loop. Defaults to None until `start` is called.
+        _thread (threading.Thread): The thread on which the asyncio loop runs.
+        _executor (ThreadPoolExecutor): The pool used for running blocking functions such as file reads.
+        _dispatcher (_Dispatcher): The object used for running callbacks on the Qt thread.
+
+    """
+
+    def __init__(self, max_workers=None):
+
+        self._max_workers = max_workers
+        self._loop = None
+        self._thread = None
+        self._executor = None
+        self._dispatcher = None
+
+    def start(self):
+        """ Start the asyncio loop on its own thread. Must be called from the Qt thread. """
+
+        if self.is_running():
+            return
+
+        self._dispatcher = _Dispatcher()
+        self._executor = ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix="datasetviewer")
+        self._loop = asyncio.new_event_loop()
+        self._loop.set_default_executor(self._executor)
+
+        started = threading.Event()
+        self._thread = threading.Thread(target=self._run_loop, args=(started,), name="datasetviewer-asyncio",
+                                        daemon=True)
+        self._thread.start()
+        started.wait()
+
+    def _run_loop(self, started):
+        """ Target of the loop thread. Runs the asyncio loop until `stop` is called. """
+
+        asyncio.set_event_loop(self._loop)
+        self._loop.call_soon(started.set)
+        self._loop.run_forever()
+        self._loop.close()
+
+    def stop(self):
+        """ Stop the asyncio loop and wait for its thread to finish. Pending blocking functions are abandoned. """
+
+        if not self.is_running():
+            return
+
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._executor.shutdown(wait=False)
+
+        self._loop = None
+        self._thread = None
+        self._executor = None
+
+    def is_running(self):
+        """
+        Returns:
+            bool: True if the asyncio loop has been started and not yet stopped, False otherwise.
+
+        """
+
+        return self._thread is not None and self._thread.is_alive()
+
+    def submit(self, coro, done=None, error=None):
+        """
+        Schedule a coroutine on the asyncio loop.
+
+        Args:
+            coro (coroutine): The coroutine to run.
+            done (callable): Called on the Qt thread with the result of the coroutine. Defaults to None.
+            error (callable): Called on the Qt thread with the exception if the coroutine raises. Defaults to None.
+
+        Returns:
+            concurrent.futures.Future: A future that holds the result of the coroutine.
+
+        """
+
+        return asyncio.run_coroutine_threadsafe(self._run(coro, done, error), self._loop)
+
+    async def _run(self, coro, done, error):
+        """ Await a coroutine and pass its outcome to the appropriate callback on the Qt thread. The callback is posted
+            before the future completes, so that it is delivered by the next pass of the Qt event loop once the future
+            holds its result. """
+
+        try:
+            result = await coro
+        except Exception as e:
+            if error is not None:
+                self.call_in_main_thread(error, e)
+            raise
+
+        if done is not None:
+            self.call_in_main_thread(done, result)
+
+        return result
+
+    def call_in_main_thread(self, func, *args):
+        """
+        Run a function on the Qt thread. This is used for handing results and progress updates back to the interface.
+
+        Args:
+            func (callable): The function to run.
+            *args: The arguments for the function.
+
+        """
+
+        self._dispatcher.invoke.emit((func, args))
+
+_event_loop = None
+
+def get_event_loop():
+    """
+    Returns:
+        EventLoop: The application's EventLoop, or None if one has not been set.
+
+    """
+
+    return _event_loop
+
+def set_event_loop(event_loop):
+    """
+    Set the EventLoop that is used by the module-level helpers.
+
+    Args:
+        event_loop (EventLoop): An EventLoop, or None to return to synchronous execution.
+
+    """
+
+    global _event_loop
+    _event_loop = event_loop
+
+def _loop_running():
+
+    return _event_loop is not None and _event_loop.is_running()
+
+async def run_blocking(func, *args):
+    """
+    Await a blocking function by running it on the executor of the current asyncio loop. This allows several file reads
+    to overlap when they are combined with `asyncio.gather`.
+
+    Args:
+        func (callable): The blocking function.
+        *args: The arguments for the function.
+
+    Returns:
+        The return value of `func`.
+
+    """
+
+    return await asyncio.get_event_loop().run_in_executor(None, func, *args)
+
+def submit(coro, done=None, error=None):
+    """
+    Run a coroutine on the application's EventLoop. If no loop is running then the coroutine is run to completion in
+    the calling thread and the callbacks are called immediately.
+
+    Args:
+        coro (coroutine): The coroutine to run.
+        done (callable): Called with the result of the coroutine. Defaults to None.
+        error (callable): Called with the exception if the coroutine raises. If this is None and no loop is running
+            then the exception is raised. Defaults to None.
+
+    Returns:
+        concurrent.futures.Future: A future that holds the result, or None if the coroutine was run synchronously.
+
+    """
+
+    if _loop_running():
+        return _event_loop.submit(coro, done, error)
+
+    loop = asyncio.new_event_loop()
+
+    try:
+        result = loop.run_until_complete(coro)
+    except Exception as e:
+        if error is None:
+            raise
+        error(e)
+        return None
+    finally:
+        loop.close()
+
+    if done is not None:
+        done(result)
+
+    return None
+
+def run_in_background(func, *args, done=None, error=None):
+    """
+    Run a blocking function without blocking the Qt thread. Falls back to a synchronous call if no loop is running.
+
+    Args:
+        func (callable): The blocking function.
+        *args: The arguments for the function.
+        done (callable): Called with the return value of `func`. Defaults to None.
+        error (callable): Called with the exception if `func` raises. Defaults to None.
+
+    Returns:
+        concurrent.futures.Future: A future that holds the result, or None if the function was run synchronously.
+
+    """
+
+    if _loop_running():
+        return _event_loop.submit(run_blocking(func, *args), done, error)
+
+    try:
+        result = func(*args)
+    except Exception as e:
+        if error is None:
+            raise
+        error(e)
+        return None
+
+    if done is not None:
+        done(result)
+
+    return None
+
+def call_in_main_thread(func, *args):
+    """
+    Run a function on the Qt thread, or call it directly if no loop is running. Background tasks use this for
+    reporting progress.
+
+    Args:
+        func (callable): The function to run.
+        *args: The arguments for the function.
+
+    """
+
+    if _loop_running():
+        _event_loop.call_in_main_thread(func, *args)
+    else:
+        func(*args)
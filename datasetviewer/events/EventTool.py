@@ -0,0 +1,350 @@
+import time
+
+import numpy as np
+
+from datasetviewer.cache.MemoryGovernor import get_governor, Priority
+
+""" Tool for finding NXevent_data groups in NeXus files and histogramming their events into (detector pixel, time of
+    flight) images. Events are streamed from the file in chunks and counted with `np.bincount`, so files with hundreds of
+    millions of events can be histogrammed without holding the event lists in memory. The counts are registered with the
+    MemoryGovernor as they grow, and histogramming fails rather than growing them past the memory budget. """
+
+# NeXus class of the groups that hold event data
+EVENT_CLASS = "NXevent_data"
+
+# Number of events that are read from the file at a time
+DEFAULT_CHUNK_SIZE = 2**23
+
+# Number of time-of-flight bins used when no bin width is given
+DEFAULT_TOF_BINS = 256
+
+# Minimum number of seconds between progress reports
+PROGRESS_INTERVAL = 0.25
+
+# Bins per event below which the sparse counting method is used
+SPARSE_THRESHOLD = 4
+
+# Category under which histograms are reported to the MemoryGovernor
+MEMORY_CATEGORY = "event_histograms"
+
+def _walk_groups(group):
+
+    for child in group.groups.values():
+        yield child
+        yield from _walk_groups(child)
+
+def find_event_groups(file_path):
+    """
+    Find the event data in a file.
+
+    Args:
+        file_path (str): The path of a NeXus/HDF5 file.
+
+    Returns:
+        list: (group path, number of events) tuples for each NXevent_data group that has `event_id` and
+            `event_time_offset` datasets. The list is empty if the file can't be read.
+
+    """
+
+    from netCDF4 import Dataset
+    from datasetviewer.fileloader.FileLoaderTool import netcdf_lock
+
+    groups = []
+
+    with netcdf_lock():
+
+        try:
+            nc_file = Dataset(file_path)
+        except OSError:
+            return groups
+
+        try:
+            for group in _walk_groups(nc_file):
+
+                if "NX_class" not in group.ncattrs() or group.getncattr("NX_class") != EVENT_CLASS:
+                    continue
+
+                if "event_id" in group.variables and "event_time_offset" in group.variables:
+                    groups.append((group.path, group.variables["event_id"].shape[0]))
+        finally:
+            nc_file.close()
+
+    return groups
+
+class EventHistogram(object):
+    """A histogram of counts per detector pixel and time-of-flight bin. The histogram grows as events outside of its
+    current range are added, so the pixel and time-of-flight ranges don't need to be known in advance.
+
+    Args:
+        tof_bin_width (float): The width of the time-of-flight bins.
+        tof_origin (float): The time of flight at the lower edge of bin 0. Defaults to 0.
+        num_bins (int): The number of bins when the time-of-flight range is known, in which case events at the upper
+            edge of the range are counted in the last bin. Defaults to None, in which case the bins grow as needed.
+        governor (MemoryGovernor): The governor that the counts are registered with. Defaults to None, in which case the
+            process-wide governor is used.
+
+    Attributes:
+        counts (numpy.ndarray): The counts with pixels along the first axis and time-of-flight bins along the second.
+        pixel_offset (int): The detector pixel of the first row of `counts`.
+        bin_offset (int): The bin number of the first column of `counts`.
+
+    """
+
+    def __init__(self, tof_bin_width, tof_origin=0.0, num_bins=None, governor=None):
+
+        self.tof_bin_width = tof_bin_width
+        self.tof_origin = tof_origin
+        self.num_bins = num_bins
+        self.counts = np.zeros((0, 0), dtype=np.int64)
+        self.pixel_offset = 0
+        self.bin_offset = 0
+        self.num_events = 0
+        self._governor = governor or get_governor()
+
+    def _governor_key(self):
+
+        return (id(self), "counts")
+
+    def _reserve(self, shape):
+        """
+        Register the counts of a new shape with the governor.
+
+        Raises:
+            MemoryError: If the counts wouldn't fit in the part of the budget that the rest of the viewer leaves, such as
+                when a stray event has a detector pixel far from the others.
+
+        """
+
+        nbytes = int(np.prod(shape, dtype=np.int64)) * self.counts.itemsize
+        available = self._governor.budget - (self._governor.total() - self.counts.nbytes)
+
+        if nbytes > available:
+            raise MemoryError("Error in EventTool: A histogram of {} pixels by {} time-of-flight bins needs {} MiB, "
+                              "which is more than the memory budget leaves.".format(shape[0], shape[1], nbytes // 2**20))
+
+        # The counts can't be dropped while they are in use, so they are registered without an eviction callback
+        self._governor.register(self._governor_key(), nbytes, MEMORY_CATEGORY, Priority.VISIBLE)
+
+    def release(self):
+        """ Stop accounting for the counts, once they belong to the histogram's DataArray or are no longer used. """
+
+        self._governor.unregister(self._governor_key())
+
+    def _grow(self, pixel_min, pixel_max, bin_min, bin_max):
+        """ Reallocate the counts so that they cover the given pixel and bin ranges, within the memory budget. """
+
+        rows, cols = self.counts.shape
+
+        if rows and cols:
+
+            pixels_covered = self.pixel_offset <= pixel_min and pixel_max < self.pixel_offset + rows
+            bins_covered = self.bin_offset <= bin_min and bin_max < self.bin_offset + cols
+
+            if pixels_covered and bins_covered:
+                return
+
+            pixel_min = min(pixel_min, self.pixel_offset)
+            pixel_max = max(pixel_max, self.pixel_offset + rows - 1)
+            bin_min = min(bin_min, self.bin_offset)
+            bin_max = max(bin_max, self.bin_offset + cols - 1)
+
+        shape = (int(pixel_max - pixel_min + 1), int(bin_max - bin_min + 1))
+        self._reserve(shape)
+        counts = np.zeros(shape, dtype=np.int64)
+
+        row = self.pixel_offset - pixel_min
+        col = self.bin_offset - bin_min
+        counts[row:row + rows, col:col + cols] = self.counts
+
+        self.counts = counts
+        self.pixel_offset = int(pixel_min)
+        self.bin_offset = int(bin_min)
+
+    def add(self, event_id, event_time_offset):
+        """
+        Count a chunk of events.
+
+        Args:
+            event_id (numpy.ndarray): The detector pixel of each event.
+            event_time_offset (numpy.ndarray): The time of flight of each event.
+
+        """
+
+        if len(event_id) == 0:
+            return
+
+        event_id = np.asarray(event_id, dtype=np.int64)
+        bins = np.floor((event_time_offset - self.tof_origin) / self.tof_bin_width).astype(np.int64)
+
+        if self.num_bins is not None:
+            bins = np.minimum(bins, self.num_bins - 1)
+
+        self._grow(event_id.min(), event_id.max(), bins.min(), bins.max())
+
+        cols = self.counts.shape[1]
+        flat = (event_id - self.pixel_offset) * cols + (bins - self.bin_offset)
+
+        lowest = flat.min()
+        span = flat.max() - lowest + 1
+        counts = self.counts.reshape(-1)
+
+        if span <= SPARSE_THRESHOLD * len(flat):
+            # Dense chunks: count every bin in the range that the chunk touches
+            counts[lowest:lowest + span] += np.bincount(flat - lowest, minlength=span)
+        else:
+            # Sparse chunks: avoid allocating a temporary array covering most of the histogram
+            indices, chunk_counts = np.unique(flat, return_counts=True)
+            counts[indices] += chunk_counts
+
+        self.num_events += len(flat)
+
+    def tof_centres(self):
+        """
+        Returns:
+            numpy.ndarray: The time of flight at the centre of each column of `counts`.
+
+        """
+
+        bins = np.arange(self.bin_offset, self.bin_offset + self.counts.shape[1])
+        return self.tof_origin + (bins + 0.5) * self.tof_bin_width
+
+    def to_data_array(self, copy=False):
+        """
+        Convert the histogram to an xarray DataArray with time of flight as the first dimension and the detector pixel as
+        the second, so that the default plot shows time of flight along the X axis.
+
+        Args:
+            copy (bool): Whether to copy the counts so that the result isn't changed by later events. Defaults to False.
+
+        Returns:
+            xarray.DataArray: The histogram.
+
+        """
+
+        from xarray import DataArray
+
+        counts = self.counts.copy() if copy else self.counts
+        pixels = np.arange(self.pixel_offset, self.pixel_offset + counts.shape[0])
+
+        return DataArray(counts.T, dims=("tof", "detector_id"),
+                         coords={"tof": self.tof_centres(), "detector_id": pixels})
+
+def histogram_events(file_path, group_path, tof_bin_width=None, chunk_size=DEFAULT_CHUNK_SIZE, progress=None,
+                     is_cancelled=None):
+    """
+    Histogram the events of an NXevent_data group by reading them from the file one chunk at a time.
+
+    Args:
+        file_path (str): The path of the file.
+        group_path (str): The path of the NXevent_data group within the file.
+        tof_bin_width (float): The width of the time-of-flight bins. Defaults to None, in which case the range of all
+            of the events is divided into `DEFAULT_TOF_BINS` bins.
+        chunk_size (int): The number of events that are read at a time.
+        progress (callable): Called with a copy of the partial histogram as a DataArray and the fraction of events that
+            have been counted. Calls are at least `PROGRESS_INTERVAL` seconds apart. Defaults to None.
+        is_cancelled (callable): Checked before each chunk is read. Histogramming stops when it returns True. Defaults
+            to None.
+
+    Returns:
+        xarray.DataArray: The histogram, or None if histogramming was cancelled.
+
+    Raises:
+        MemoryError: If the histogram would be larger than the memory budget allows.
+
+    """
+
+    from netCDF4 import Dataset
+    from datasetviewer.fileloader.FileLoaderTool import netcdf_lock
+
+    with netcdf_lock():
+        nc_file = Dataset(file_path)
+
+    try:
+        with netcdf_lock():
+            group = nc_file[group_path]
+            event_id = group.variables["event_id"]
+            event_time_offset = group.variables["event_time_offset"]
+
+            # Masked arrays are much slower to work with and events don't have fill values
+            event_id.set_auto_mask(False)
+            event_time_offset.set_auto_mask(False)
+
+            num_events = event_id.shape[0]
+
+        tof_range = _tof_range(event_time_offset, num_events, chunk_size, is_cancelled)
+
+        if tof_range is None:
+            return None
+
+        histogram = _create_histogram(tof_range, tof_bin_width)
+        last_report = time.perf_counter()
+
+        try:
+            for start in range(0, num_events, chunk_size):
+
+                if is_cancelled is not None and is_cancelled():
+                    return None
+
+                stop = min(num_events, start + chunk_size)
+
+                with netcdf_lock():
+                    ids = event_id[start:stop]
+                    tofs = event_time_offset[start:stop]
+
+                histogram.add(ids, tofs)
+
+                if progress is not None and stop < num_events and time.perf_counter() - last_report >= PROGRESS_INTERVAL:
+                    progress(histogram.to_data_array(copy=True), stop / num_events)
+                    last_report = time.perf_counter()
+
+        finally:
+            histogram.release()
+
+    finally:
+        with netcdf_lock():
+            nc_file.close()
+
+    return histogram.to_data_array()
+
+def _tof_range(event_time_offset, num_events, chunk_size, is_cancelled=None):
+    """
+    Find the time-of-flight range of the events, from the valid_min and valid_max attributes of the variable if it has
+    them, and otherwise from a pass over the events that only reads their times.
+
+    Returns:
+        tuple: The lowest and highest times of flight, (0, 0) if there are no events, or None if the pass was
+            cancelled.
+
+    """
+
+    from datasetviewer.fileloader.FileLoaderTool import netcdf_lock
+
+    with netcdf_lock():
+        attributes = event_time_offset.ncattrs()
+
+        if "valid_min" in attributes and "valid_max" in attributes:
+            return float(event_time_offset.getncattr("valid_min")), float(event_time_offset.getncattr("valid_max"))
+
+    tof_min, tof_max = np.inf, -np.inf
+
+    for start in range(0, num_events, chunk_size):
+
+        if is_cancelled is not None and is_cancelled():
+            return None
+
+        with netcdf_lock():
+            tofs = event_time_offset[start:min(num_events, start + chunk_size)]
+
+        tof_min, tof_max = min(tof_min, float(tofs.min())), max(tof_max, float(tofs.max()))
+
+    return (tof_min, tof_max) if num_events else (0.0, 0.0)
+
+def _create_histogram(tof_range, tof_bin_width):
+    """ Create an empty histogram whose bins divide the time-of-flight range of the events, unless a width is given. """
+
+    tof_min, tof_max = tof_range
+
+    if tof_bin_width is not None:
+        return EventHistogram(tof_bin_width, tof_min)
+
+    return EventHistogram((tof_max - tof_min) / DEFAULT_TOF_BINS or 1.0, tof_min, DEFAULT_TOF_BINS)
@@ -0,0 +1,164 @@
+import os
+import time
+
+import numpy as np
+
+import datasetviewer.stats.StatsTool as StatsTool
+from datasetviewer.fileloader.FileLoaderTool import netcdf_lock
+
+""" Tool for writing arrays to NetCDF or NumPy `.npy` files. Arrays are read and written one chunk of rows at a time, so
+    arrays that are read from a file on demand can be exported without holding them in memory. The output is written to
+    a temporary file that replaces the destination once every chunk has been written, so a cancelled or failed export
+    doesn't leave a partial file behind. """
+
+# Number of elements that are read and written at a time
+DEFAULT_CHUNK_ELEMENTS = StatsTool.DEFAULT_CHUNK_ELEMENTS
+
+# Minimum number of seconds between progress reports
+PROGRESS_INTERVAL = 0.25
+
+# What can be exported from the plot
+SLICE = "slice"
+ROI = "roi"
+VARIABLE = "variable"
+
+# Extensions of the supported file formats
+NETCDF_EXTENSION = ".nc"
+NUMPY_EXTENSION = ".npy"
+
+def _exportable_dtype(dtype):
+    """ NetCDF has no boolean type, so booleans are written as bytes. Other types must be numbers. """
+
+    if dtype == np.bool_:
+        return np.dtype(np.int8)
+
+    if not np.issubdtype(dtype, np.number) or np.issubdtype(dtype, np.complexfloating):
+        raise ValueError("Only real numbers can be exported, not {}.".format(dtype))
+
+    return np.dtype(dtype)
+
+def _chunks(data, chunk_elements):
+    """ Yield the first row and values of each chunk of an array. Scalars are a single chunk. """
+
+    if len(data.shape) == 0:
+        yield 0, np.asarray(data.values)
+        return
+
+    starts, rows = StatsTool.chunk_starts(data.shape, chunk_elements)
+
+    for start in starts:
+        yield start, np.asarray(data[start:start + rows].values)
+
+def _open_npy(file_path, data, dtype):
+
+    return np.lib.format.open_memmap(file_path, mode="w+", dtype=dtype, shape=data.shape)
+
+def _open_netcdf(file_path, data, dtype, name):
+    """ Create a NetCDF file with the dimensions, one-dimensional coordinates and attributes of an array. """
+
+    from netCDF4 import Dataset
+
+    with netcdf_lock():
+        nc_file = Dataset(file_path, "w", format="NETCDF4")
+
+        try:
+            for dim, size in zip(data.dims, data.shape):
+                nc_file.createDimension(dim, size)
+
+            for dim in data.dims:
+                if dim in data.coords and data.coords[dim].ndim == 1:
+                    values = np.asarray(data.coords[dim].values)
+
+                    if np.issubdtype(values.dtype, np.number):
+                        nc_file.createVariable(dim, values.dtype, (dim,))[:] = values
+
+            variable = nc_file.createVariable(name, dtype, data.dims, zlib=False)
+            variable.set_auto_mask(False)
+            variable.setncatts({key: value for key, value in data.attrs.items() if not key.startswith("_")})
+
+        except Exception:
+            nc_file.close()
+            raise
+
+    return nc_file, variable
+
+def export_array(data, file_path, name=None, chunk_elements=DEFAULT_CHUNK_ELEMENTS, progress=None, is_cancelled=None):
+    """
+    Write an array to a NetCDF or `.npy` file, depending on the extension of the path.
+
+    Args:
+        data (xarray.DataArray): The array. Arrays that are read from a file on demand are read one chunk at a time.
+        file_path (str): The path of the file, ending in `.nc` or `.npy`.
+        name (str): The name of the variable in a NetCDF file. Defaults to None, in which case the name of the array is
+            used, or "data" if it has none.
+        chunk_elements (int): The target number of elements that are read and written at a time.
+        progress (callable): Called with the fraction of the array that has been written. Calls are at least
+            `PROGRESS_INTERVAL` seconds apart. Defaults to None.
+        is_cancelled (callable): Checked before each chunk is read. The export stops and the file isn't written when it
+            returns True. Defaults to None.
+
+    Returns:
+        bool: True if the file was written, False if the export was cancelled.
+
+    Raises:
+        ValueError: If the extension isn't supported or the array doesn't hold real numbers.
+        OSError: If the file can't be written.
+
+    """
+
+    extension = os.path.splitext(file_path)[1].lower()
+
+    if extension not in (NETCDF_EXTENSION, NUMPY_EXTENSION):
+        raise ValueError("Can't export to {} files. Use {} or {}.".format(extension or "extensionless", NETCDF_EXTENSION,
+                                                                          NUMPY_EXTENSION))
+
+    dtype = _exportable_dtype(data.dtype)
+
+    # Keep the extension so that NumPy doesn't append its own
+    temp_path = "{}.part{}{}".format(os.path.splitext(file_path)[0], os.getpid(), extension)
+    total_rows = data.shape[0] if len(data.shape) else 1
+    last_report = time.perf_counter()
+
+    if extension == NUMPY_EXTENSION:
+        output = _open_npy(temp_path, data, dtype)
+        nc_file = None
+    else:
+        nc_file, output = _open_netcdf(temp_path, data, dtype, name or data.name or "data")
+
+    written = False
+
+    try:
+        for start, values in _chunks(data, chunk_elements):
+
+            if is_cancelled is not None and is_cancelled():
+                return False
+
+            values = values.astype(dtype, copy=False)
+            index = Ellipsis if values.ndim == 0 else slice(start, start + len(values))
+
+            if nc_file is None:
+                output[index] = values
+            else:
+                with netcdf_lock():
+                    output[index] = values
+
+            if progress is not None and time.perf_counter() - last_report >= PROGRESS_INTERVAL:
+                progress((start + len(np.atleast_1d(values))) / total_rows)
+                last_report = time.perf_counter()
+
+        written = True
+
+    finally:
+        if nc_file is None:
+            output.flush()
+            del output
+        else:
+            with netcdf_lock():
+                nc_file.close()
+
+        if written:
+            os.replace(temp_path, file_path)
+        else:
+            os.remove(temp_path)
+
+    return True
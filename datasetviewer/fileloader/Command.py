@@ -4,3 +4,6 @@ class Command(Enum):
 
     # Indicates that the user attempted to open a file via the FileLoaderView
     FILEOPENREQUEST = 200
+
+    # Indicates that the user chose two files to compare via the FileLoaderView
+    COMPAREREQUEST = 201
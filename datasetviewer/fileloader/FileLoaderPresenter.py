@@ -1,19 +1,31 @@
 from datasetviewer.fileloader.interfaces.FileLoaderPresenterInterface import FileLoaderPresenterInterface
 from datasetviewer.fileloader.Command import Command
+import asyncio
+import logging
+
 import datasetviewer.fileloader.FileLoaderTool as FileLoaderTool
+import datasetviewer.compare.CompareTool as CompareTool
+import datasetviewer.eventloop.EventLoop as EventLoop
 from datasetviewer.mainview.interfaces.MainViewPresenterInterface import MainViewPresenterInterface
 
+_log = logging.getLogger(__name__)
+
 class FileLoaderPresenter(FileLoaderPresenterInterface):
     """
 
     Presenter for overseeing the File Loading component of the interface. Receives commands from an associated
     FileLoaderView via a `notify` method. If a `FILEOPENREQUEST` signal is received then the FileLoaderPresenter
-    attempts to open this file and pass the data to the MainViewPresenter.
+    attempts to open this file and pass the data to the MainViewPresenter. The file is read in the background when the
+    application's EventLoop is running so that the interface stays responsive while a large file is opened. A
+    `COMPAREREQUEST` opens two files at once and shows the variables that they have in common side by side with their
+    difference, while the whole of each pair of variables is compared in the background.
 
     Private Attributes:
         _main_presenter (str): The MainViewPresenter object. This is set to None in the constructor and assigned with
             the `register_master` method.
         _view (FileLoaderView): The FileLoaderView that this Presenter will manage.
+        _comparison (object): Identifies the comparison that is running in the background, so that it stops when
+            another file is opened. Defaults to None.
 
     Raises:
         ValueError: If the `file_loader_view` is None.
@@ -29,12 +41,13 @@ class FileLoaderPresenter(FileLoaderPresenterInterface):
 
         self._main_presenter = None
         self._view = file_loader_view
+        self._comparison = None
 
     def register_master(self, master):
         """
 
-        Register the MainViewPresenter as the FileLoaderPresenter's master. Subscribing in the MainViewPresenter
-        isn't necessary as the MainViewPresenter doesn't send instructions to the FileLoaderPresenter.
+        Register the MainViewPresenter as the FileLoaderPresenter's master, and subscribe the FileLoaderPresenter to the
+        MainViewPresenter so that files chosen elsewhere, such as in the catalog, can be opened through it.
 
         Args:
             master (MainViewPresenter): An instance of a MainViewPresenter.
@@ -43,6 +56,7 @@ class FileLoaderPresenter(FileLoaderPresenterInterface):
         assert (isinstance(master, MainViewPresenterInterface))
 
         self._main_presenter = master
+        self._main_presenter.subscribe_file_loader_presenter(self)
 
     def notify(self, command):
         """
@@ -66,16 +80,53 @@ class FileLoaderPresenter(FileLoaderPresenterInterface):
             if not file_path:
                 return
 
-            try:
-                dict = self._load_data(file_path)
-                self._main_presenter.set_dict(dict)
+            self.load_file(file_path)
 
-            except (ValueError, OSError) as e:
-                self._view.show_reject_file_message(str(e))
+        elif command == Command.COMPAREREQUEST:
+            file_paths = self._view.get_compare_file_paths()
+
+            # Do nothing unless both files were chosen
+            if not file_paths or not all(file_paths):
+                return
+
+            self._comparison = None
+
+            EventLoop.submit(self._load_comparison(*file_paths), done=self._show_comparison, error=self._reject_file)
 
         else:
             raise ValueError("FileLoaderPresenter received an unrecognised command: {}".format(str(command)))
 
+    def load_file(self, file_path):
+        """
+        Open a file in the background and pass its data to the MainViewPresenter.
+
+        Args:
+            file_path (str): The path of the file.
+        """
+
+        self._comparison = None
+
+        EventLoop.run_in_background(self._load_data, file_path, done=self._main_presenter.set_dict,
+                                    error=self._reject_file)
+
+    def _reject_file(self, error):
+        """
+        Instructs the view to display a message indicating that the file could not be loaded. Errors other than a
+        missing or invalid file are logged with their traceback, as this is called from the Qt thread, where an
+        exception that isn't handled would abort the application.
+
+        Args:
+            error (Exception): The exception that was raised while loading the file.
+
+        """
+
+        if not isinstance(error, (ValueError, OSError)):
+            _log.error("Unexpected error while loading a file", exc_info=(type(error), error, error.__traceback__))
+            self._view.show_reject_file_message("{}: {}".format(type(error).__name__, error))
+            return
+
+        self._view.show_reject_file_message(str(error))
+
     def _load_data(self, file_path):
         """
         Given a file path, load this file and covert it to a data dictionary. Instructs the view to display a message
@@ -95,3 +146,71 @@ class FileLoaderPresenter(FileLoaderPresenterInterface):
 
         dict = FileLoaderTool.file_to_dict(file_path)
         return dict
+
+    async def _load_comparison(self, file_path_a, file_path_b):
+        """
+        Load two files concurrently and match their variables.
+
+        Args:
+            file_path_a (str): The path of the first file.
+            file_path_b (str): The path of the second file.
+
+        Returns:
+            tuple: The elements to be shown, the Matching of the variables, and the data dictionaries of both files.
+
+        Raises:
+            ValueError: If either file doesn't exist, or if the files have no variables in common.
+            OSError: If either file cannot be converted to an xarray.
+        """
+
+        dict_a, dict_b = await asyncio.gather(FileLoaderTool.file_to_dict_async(file_path_a),
+                                              FileLoaderTool.file_to_dict_async(file_path_b))
+
+        dataset, matching = CompareTool.comparison_to_dict(dict_a, dict_b)
+
+        return dataset, matching, dict_a, dict_b
+
+    def _show_comparison(self, loaded):
+        """
+        Shows the elements of two compared files and starts comparing the whole of each pair of variables in the
+        background. Progress is shown in the status bar.
+
+        Args:
+            loaded (tuple): The return value of `_load_comparison`.
+        """
+
+        dataset, matching, dict_a, dict_b = loaded
+
+        self._main_presenter.set_dict(dataset)
+
+        comparison = object()
+        self._comparison = comparison
+
+        def progress(fraction):
+            EventLoop.call_in_main_thread(self._main_presenter.show_status_message,
+                                          "Comparing files: {:.0%}".format(fraction))
+
+        EventLoop.run_in_background(CompareTool.compare_datasets, dict_a, dict_b, matching.common, 0, progress,
+                                    lambda: self._comparison is not comparison,
+                                    done=lambda differences: self._report_comparison(comparison, differences, matching),
+                                    error=lambda error: self._main_presenter.show_status_message(
+                                        "Comparing files failed: {}".format(error)))
+
+    def _report_comparison(self, comparison, differences, matching):
+        """
+        Shows which variables differ and where, unless the comparison has been replaced by another file.
+
+        Args:
+            comparison (object): The comparison that finished.
+            differences (OrderedDict): The Difference of each variable, or None if the comparison was cancelled.
+            matching (Matching): The matching of the variables of the two files.
+        """
+
+        if differences is None or comparison is not self._comparison:
+            return
+
+        self._comparison = None
+
+        summary, report = CompareTool.format_report(differences, matching)
+        self._main_presenter.show_status_message(summary)
+        self._view.show_comparison_report(summary, report)
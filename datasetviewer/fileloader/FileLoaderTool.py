@@ -1,8 +1,45 @@
-from xarray import open_dataset
 from collections import OrderedDict as DataSet
+import os
 from datasetviewer.dataset.Variable import Variable
+from datasetviewer.dataset.EventVariable import EventVariable
+from datasetviewer.cache.SchemaCache import SchemaCache
+import datasetviewer.events.EventTool as EventTool
+import datasetviewer.fileloader.MemmapTool as MemmapTool
+import datasetviewer.eventloop.EventLoop as EventLoop
+import datasetviewer.profiling.Tracer as Tracer
 
-""" Tool for opening an ncs file and converting it to an OrderedDict of Variable objects. """
+""" Tool for opening an ncs file and converting it to an OrderedDict of Variable objects. xarray is only imported when
+    the first file is opened so that it doesn't slow down the start of the application. """
+
+def open_dataset(file_path):
+    """
+    Opens a file with xarray.
+
+    Args:
+        file_path (str): The path of the file to be opened.
+
+    Returns:
+        xarray.core.dataset.Dataset: The contents of the file.
+
+    """
+
+    import xarray
+
+    return xarray.open_dataset(file_path)
+
+def netcdf_lock():
+    """
+    The netCDF-C and HDF5 libraries are not thread-safe, so files that are read directly with netCDF4 from a background
+    thread must hold the same lock that xarray uses for its own reads.
+
+    Returns:
+        threading.Lock: The lock that guards calls into the netCDF/HDF5 libraries.
+
+    """
+
+    from xarray.backends.locks import HDF5_LOCK
+
+    return HDF5_LOCK
 
 def invalid_dataset(data):
     """
@@ -23,12 +60,14 @@ def invalid_dataset(data):
 
     return False
 
-def dataset_to_dict(data):
+def dataset_to_dict(data, schema_cache=None, mapped=None):
     """
     Converts a dataset from xarray format to an OrderedDict of Variables.
 
     Args:
         data (xarray.core.dataset.Dataset): An xarray dataset.
+        schema_cache (SchemaCache): The cache of the file that the dataset was read from. Defaults to None.
+        mapped (dict): Memory-mapped DataArrays that replace the variables of the same name. Defaults to None.
 
     Returns:
         DataSet: The xarray data in the form of an OrderedDict.
@@ -36,15 +75,42 @@ def dataset_to_dict(data):
     """
 
     dataset = DataSet()
+    mapped = mapped or {}
 
     for key in data.variables:
-        dataset[key] = Variable(key, data[key])
+        dataset[key] = Variable(key, mapped.get(key, data[key]), schema_cache)
+
+    return dataset
+
+def events_to_dict(file_path):
+    """
+    Finds the NXevent_data groups in a file and creates an EventVariable for each of them.
+
+    Args:
+        file_path (str): The path of the file.
+
+    Returns:
+        DataSet: An OrderedDict of EventVariables keyed by group path. Empty if the file doesn't exist or contains no
+            event data.
+
+    """
+
+    dataset = DataSet()
+
+    if not os.path.isfile(file_path):
+        return dataset
+
+    for group_path, num_events in EventTool.find_event_groups(file_path):
+        if num_events > 0:
+            dataset[group_path] = EventVariable(group_path, file_path, group_path, num_events)
 
     return dataset
 
 def file_to_dict(file_path):
     """
-    Loads the data from a file path and converts it to a dictionary.
+    Loads the data from a file path and converts it to a dictionary. Variables that are stored uncompressed and
+    contiguously are memory-mapped rather than read through the netCDF library. Event data in NXevent_data groups is
+    added after the variables of the root group.
 
     Args:
         file_path (str): The path of the file to be opened.
@@ -58,12 +124,46 @@ def file_to_dict(file_path):
 
     """
 
-    data = open_dataset(file_path)
+    with Tracer.span("file_to_dict"):
+
+        with Tracer.span("open_dataset"):
+            data = open_dataset(file_path)
+
+        with Tracer.span("find_events"):
+            events = events_to_dict(file_path)
+
+        with Tracer.span("validate"):
+
+            if len(data.variables) + len(events) < 1:
+                raise ValueError("Error in FileLoader: Dataset is empty.")
+
+            if invalid_dataset(data):
+                raise ValueError("Error in FileLoader: Dataset contains some empty arrays.")
+
+        with Tracer.span("memory_map"):
+            mapped = MemmapTool.memory_map(data, file_path)
+
+        with Tracer.span("dataset_to_dict"):
+            schema_cache = SchemaCache(file_path) if os.path.isfile(file_path) else None
+            dataset = dataset_to_dict(data, schema_cache, mapped)
+            dataset.update(events)
+            return dataset
+
+async def file_to_dict_async(file_path):
+    """
+    Awaitable version of `file_to_dict` that reads the file on the EventLoop's executor. Several files can be loaded
+    concurrently by combining calls with `asyncio.gather`.
+
+    Args:
+        file_path (str): The path of the file to be opened.
 
-    if len(data.variables) < 1:
-        raise ValueError("Error in FileLoader: Dataset is empty.")
+    Raises:
+        ValueError: If the dataset is empty, or if any of its elements are empty.
+        OSError: If the file could not be converted to the an xarray.
+
+    Returns:
+        DataSet: An OrderedDict of Variable objects containing a name and a data array.
 
-    if invalid_dataset(data):
-        raise ValueError("Error in FileLoader: Dataset contains some empty arrays.")
+    """
 
-    return dataset_to_dict(data)
+    return await EventLoop.run_blocking(file_to_dict, file_path)
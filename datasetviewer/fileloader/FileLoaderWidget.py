@@ -2,7 +2,7 @@ from datasetviewer.fileloader.interfaces.FileLoaderViewInterface import FileLoad
 from datasetviewer.fileloader.FileLoaderPresenter import FileLoaderPresenter
 from datasetviewer.fileloader.Command import Command
 
-from PyQt5.QtWidgets import QFileDialog, QAction, QErrorMessage
+from PyQt5.QtWidgets import QFileDialog, QAction, QErrorMessage, QMessageBox
 
 class FileLoaderWidget(QAction, FileLoaderViewInterface):
 
@@ -18,6 +18,12 @@ class FileLoaderWidget(QAction, FileLoaderViewInterface):
         # Action for opening a file
         self.triggered.connect(self.open_file)
 
+        # Action for comparing two files, and the paths of the files
+        self.compare_action = QAction("Compare...", parent)
+        self.compare_action.triggered.connect(self.compare_files)
+        self.compare_fnames = None
+        self.report_box = None
+
         self._presenter = FileLoaderPresenter(self)
 
     def get_selected_file_path(self):
@@ -44,5 +50,31 @@ class FileLoaderWidget(QAction, FileLoaderViewInterface):
         # Inform the presenter that the user attempted to open a file
         self._presenter.notify(Command.FILEOPENREQUEST)
 
+    def compare_files(self):
+
+        self.compare_fnames = None
+
+        # Choose the original file and then the file that it is compared with
+        first = QFileDialog.getOpenFileName(self.parent, "Compare file (A)", "/home", "NetCDF (*.nc)")[0]
+
+        if first:
+            second = QFileDialog.getOpenFileName(self.parent, "With file (B)", first, "NetCDF (*.nc)")[0]
+            self.compare_fnames = (first, second)
+
+        self._presenter.notify(Command.COMPAREREQUEST)
+
+    def get_compare_file_paths(self):
+        return self.compare_fnames
+
+    def show_comparison_report(self, summary, report):
+        '''
+        Non-modal message box listing the variables that differ between the compared files and where they differ.
+        '''
+
+        self.report_box = QMessageBox(QMessageBox.Information, "Comparison", summary, QMessageBox.Ok, self.parent)
+        self.report_box.setDetailedText(report)
+        self.report_box.setModal(False)
+        self.report_box.show()
+
     def get_presenter(self):
         return self._presenter
@@ -0,0 +1,383 @@
+import os
+import struct
+from collections import namedtuple
+
+import numpy as np
+
+import datasetviewer.profiling.Tracer as Tracer
+
+""" Tool for reading uncompressed, contiguous variables through memory maps. Such a variable is a single run of bytes in
+    the file, so it can be mapped as a numpy.memmap at its offset instead of being read through the netCDF library.
+    Slices of it are then copied out of the pages that the operating system fills from its page cache, and viewers on
+    the same machine that open the same file share those pages. The layout of NetCDF-3 files is read from their header,
+    and that of NetCDF4/HDF5 files with h5py, which is optional. Variables are only mapped if xarray would show their
+    values as they are stored, without scaling, masking or decoding them.
+
+    Reading a page of a file that was truncated after it was mapped kills the process with SIGBUS. Files in the folder
+    that is being watched for new runs are still being written, so they are never mapped. Other files are checked once
+    for each slice that is taken from their map, and once a file's inode, size or modification time has changed its
+    slices are read through xarray instead. Slices are copies rather than views of the map, so the plot, the cursor
+    readout and the ROI statistics, which keep the slice that is shown, never read the map after the check. """
+
+# Where a variable's values are in a file, and their type and shape as they are stored
+Layout = namedtuple("Layout", ["offset", "dtype", "shape"])
+
+# The NetCDF-3 external types, which are big-endian. Types 7 to 11 only appear in CDF5 files.
+_NC_TYPES = {1: ">i1", 2: "S1", 3: ">i2", 4: ">i4", 5: ">f4", 6: ">f8", 7: ">u1", 8: ">u2", 9: ">u4", 10: ">i8",
+             11: ">u8"}
+
+# Tags of the lists in a NetCDF-3 header
+_NC_DIMENSION = 10
+_NC_VARIABLE = 11
+_NC_ATTRIBUTE = 12
+
+# Kinds of values that can be mapped: booleans, integers and floats
+_MAPPABLE_KINDS = "biuf"
+
+# The folder that is being watched for new runs, whose files are never mapped
+_watched_directory = None
+
+def _import_h5py():
+
+    try:
+        import h5py
+    except ImportError:
+        return None
+
+    return h5py
+
+class _HeaderReader(object):
+    """Reads the fields of a NetCDF-3 header in order.
+
+    Args:
+        header_file (file): The file, positioned after its magic number.
+        version (int): 1 for the classic format, 2 for 64-bit offsets and 5 for 64-bit data.
+
+    """
+
+    def __init__(self, header_file, version):
+
+        self._file = header_file
+        self._version = version
+
+    def _unpack(self, fmt):
+
+        size = struct.calcsize(fmt)
+        raw = self._file.read(size)
+
+        if len(raw) != size:
+            raise ValueError("Error in MemmapTool: The NetCDF-3 header is truncated.")
+
+        return struct.unpack(fmt, raw)[0]
+
+    def count(self):
+        """ Lengths and counts are 64-bit in CDF5 files. """
+
+        return self._unpack(">q" if self._version == 5 else ">i")
+
+    def tag(self):
+
+        return self._unpack(">i")
+
+    def offset(self):
+        """ The start of a variable is 32-bit in classic files. """
+
+        return self._unpack(">i" if self._version == 1 else ">q")
+
+    def name(self):
+
+        length = self.count()
+        name = self._file.read(length).decode("utf-8")
+        self._file.read(-length % 4)
+
+        return name
+
+    def skip_attributes(self):
+
+        tag, count = self.tag(), self.count()
+
+        if tag not in (0, _NC_ATTRIBUTE):
+            raise ValueError("Error in MemmapTool: Unexpected tag {} in the NetCDF-3 header.".format(tag))
+
+        for _ in range(count):
+            self.name()
+            nc_type = self.tag()
+            size = self.count() * np.dtype(_NC_TYPES[nc_type]).itemsize
+            self._file.read(size + -size % 4)
+
+def netcdf3_layout(file_path):
+    """
+    Find where the variables of a NetCDF-3 file are stored. Record variables, whose values are interleaved with those of
+    the other record variables, aren't contiguous and are left out.
+
+    Args:
+        file_path (str): The path of the file.
+
+    Returns:
+        dict: The Layout of each contiguous variable, keyed by name. Empty if the file isn't a NetCDF-3 file.
+
+    Raises:
+        ValueError: If the header can't be read.
+
+    """
+
+    with open(file_path, "rb") as header_file:
+
+        magic = header_file.read(4)
+
+        if len(magic) != 4 or magic[:3] != b"CDF" or magic[3] not in (1, 2, 5):
+            return {}
+
+        reader = _HeaderReader(header_file, magic[3])
+        reader.count()
+
+        tag, count = reader.tag(), reader.count()
+        dimensions = []
+
+        for _ in range(count if tag == _NC_DIMENSION else 0):
+            reader.name()
+            dimensions.append(reader.count())
+
+        reader.skip_attributes()
+
+        tag, count = reader.tag(), reader.count()
+        layouts = {}
+
+        for _ in range(count if tag == _NC_VARIABLE else 0):
+
+            name = reader.name()
+            ndim = reader.count()
+            shape = tuple(dimensions[reader.count()] for _ in range(ndim))
+            reader.skip_attributes()
+            nc_type = reader.tag()
+            reader.count()
+            begin = reader.offset()
+
+            # The unlimited dimension has a length of 0 in the header, and only comes first
+            if shape and shape[0] == 0:
+                continue
+
+            layouts[name] = Layout(begin, np.dtype(_NC_TYPES[nc_type]), shape)
+
+    return layouts
+
+def hdf5_layout(file_path):
+    """
+    Find where the uncompressed, contiguous datasets in the root group of an HDF5 or NetCDF4 file are stored.
+
+    Args:
+        file_path (str): The path of the file.
+
+    Returns:
+        dict: The Layout of each contiguous dataset, keyed by name. Empty if h5py isn't installed.
+
+    """
+
+    h5py = _import_h5py()
+
+    if h5py is None:
+        return {}
+
+    from datasetviewer.fileloader.FileLoaderTool import netcdf_lock
+
+    layouts = {}
+
+    with netcdf_lock():
+        with h5py.File(file_path, "r") as h5_file:
+            for name, dataset in h5_file.items():
+
+                if not isinstance(dataset, h5py.Dataset) or dataset.chunks is not None or dataset.external:
+                    continue
+
+                # Space that was never written has no offset
+                offset = dataset.id.get_offset()
+
+                if offset is not None and dataset.id.get_create_plist().get_nfilters() == 0:
+                    layouts[name] = Layout(offset, dataset.dtype, dataset.shape)
+
+    return layouts
+
+def file_layout(file_path):
+    """
+    Args:
+        file_path (str): The path of a NetCDF-3, NetCDF4 or HDF5 file.
+
+    Returns:
+        dict: The Layout of each variable that is stored contiguously and uncompressed, keyed by name. Empty if the
+            file is of another type or can't be read.
+
+    """
+
+    try:
+        with open(file_path, "rb") as header_file:
+            magic = header_file.read(8)
+
+        if magic[:3] == b"CDF":
+            return netcdf3_layout(file_path)
+
+        if magic == b"\x89HDF\r\n\x1a\n":
+            return hdf5_layout(file_path)
+
+    except (OSError, ValueError, KeyError, IndexError, struct.error):
+        pass
+
+    return {}
+
+def can_map(variable, layout):
+    """
+    Find whether a variable that xarray has opened shows the values as they are stored, so that a memory map of them
+    can take its place.
+
+    Args:
+        variable (xarray.Variable): The variable, as it was opened from the file.
+        layout (Layout): Where its values are stored.
+
+    Returns:
+        bool: True if the variable can be mapped, False otherwise.
+
+    """
+
+    if getattr(variable, "_in_memory", True) or variable.ndim == 0 or tuple(variable.shape) != tuple(layout.shape):
+        return False
+
+    if layout.dtype.kind not in _MAPPABLE_KINDS or layout.dtype.newbyteorder("=") != variable.dtype.newbyteorder("="):
+        return False
+
+    encoding = variable.encoding
+
+    if "scale_factor" in encoding or "add_offset" in encoding:
+        return False
+
+    # Floats that equal the fill value are shown as NaN, which is already NaN in the file if the fill value is NaN
+    for key in ("_FillValue", "missing_value"):
+        if not np.all(np.isnan(np.asarray(encoding.get(key, np.nan), dtype=float))):
+            return False
+
+    return True
+
+def set_watched_directory(directory):
+    """
+    Stop mapping the files in a folder whose files may still be written to.
+
+    Args:
+        directory (str): The folder that is being watched for new runs, or None if no folder is being watched.
+
+    """
+
+    global _watched_directory
+    _watched_directory = None if directory is None else os.path.realpath(directory)
+
+def _is_watched(file_path):
+
+    if _watched_directory is None:
+        return False
+
+    return os.path.commonpath([_watched_directory, os.path.realpath(file_path)]) == _watched_directory
+
+def file_identity(file_path):
+    """
+    Args:
+        file_path (str): The path of a file.
+
+    Returns:
+        tuple: The device, inode, size and modification time of the file, or None if it can't be found.
+
+    """
+
+    try:
+        status = os.stat(file_path)
+    except OSError:
+        return None
+
+    return status.st_dev, status.st_ino, status.st_size, status.st_mtime_ns
+
+class _CheckedMemmap(np.memmap):
+    """A memory map of a variable that checks that its file hasn't changed since it was mapped before each slice is
+    taken from it. Slices of a file that has changed are read from the variable as xarray opened it. The slices are
+    copied out of the map, so that holding on to them doesn't keep pages of a file that may change.
+
+    Private Attributes:
+        _identity (tuple): The `file_identity` of the file when it was mapped.
+        _fallback (xarray.Variable): The variable as xarray opened it from the file.
+
+    """
+
+    def __array_finalize__(self, obj):
+
+        super().__array_finalize__(obj)
+        self._identity = None
+        self._fallback = None
+
+    def __getitem__(self, key):
+
+        if self._fallback is not None and file_identity(self.filename) != self._identity:
+            values = self._fallback[key].values
+            return values[()] if values.ndim == 0 else values
+
+        result = super().__getitem__(key)
+
+        if not isinstance(result, np.ndarray):
+            return result
+
+        Tracer.record_copy("memory_map", result.nbytes)
+        return np.array(result)
+
+def _map(file_path, layout, fallback, identity):
+    """ Map a variable whose file has the given identity, falling back to its variable as xarray opened it. """
+
+    values = np.memmap(file_path, dtype=layout.dtype, mode="r", offset=layout.offset, shape=layout.shape)
+    values = values.view(_CheckedMemmap)
+    values._identity = identity
+    values._fallback = fallback
+
+    return values
+
+def memory_map(data, file_path):
+    """
+    Map the variables of a dataset that are stored uncompressed and contiguously, unless the file is in the folder that
+    is being watched for new runs.
+
+    Args:
+        data (xarray.Dataset): The dataset, as it was opened from the file.
+        file_path (str): The path of the file.
+
+    Returns:
+        dict: A DataArray for each variable that was mapped, keyed by name, with the same dimensions, coordinates,
+            attributes and encoding as the one that xarray opened.
+
+    """
+
+    if not os.path.isfile(file_path) or _is_watched(file_path):
+        return {}
+
+    # The identity is taken before the layout is read, so that a file that changes in between isn't trusted
+    identity = file_identity(file_path)
+    layouts = file_layout(file_path)
+    file_size = identity[2] if identity is not None else 0
+    mapped = {}
+
+    for name, layout in layouts.items():
+
+        if name not in data.variables or not can_map(data.variables[name], layout):
+            continue
+
+        # Values that would lie past the end of the file were never written
+        if layout.offset + int(np.prod(layout.shape, dtype=np.int64)) * layout.dtype.itemsize > file_size:
+            continue
+
+        values = _map(file_path, layout, data.variables[name], identity)
+        mapped[name] = data[name].copy(deep=False, data=values)
+
+    return mapped
+
+def is_memory_mapped(data):
+    """
+    Args:
+        data (xarray.DataArray): An array.
+
+    Returns:
+        bool: True if the values of the array are a memory map of its file, False otherwise.
+
+    """
+
+    return isinstance(getattr(data.variable, "_data", None), np.memmap)
@@ -10,6 +10,14 @@ class FileLoaderPresenterInterface(ABC):
     def notify(self, command):
         pass
 
+    @abstractmethod
+    def load_file(self, file_path):
+        pass
+
     @abstractmethod
     def _load_data(self, file_path):
         pass
+
+    @abstractmethod
+    def _reject_file(self, error):
+        pass
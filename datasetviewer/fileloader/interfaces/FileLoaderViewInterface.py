@@ -20,6 +20,14 @@ class FileLoaderViewInterface(with_metaclass(Meta)):
     def open_file(self):
         pass
 
+    @abstractmethod
+    def get_compare_file_paths(self):
+        pass
+
+    @abstractmethod
+    def show_comparison_report(self, summary, report):
+        pass
+
     @abstractmethod
     def get_presenter(self):
         pass
@@ -0,0 +1,110 @@
+import numpy as np
+
+""" Tool for sampling an image along a straight line. The points along the line, and across it when a width is given,
+    are interpolated bilinearly in a single vectorised operation, so a profile across a 4k x 4k image takes a few
+    milliseconds. """
+
+def data_to_pixel(x, y, shape, extent=None):
+    """
+    Convert positions in data coordinates to fractional column and row positions of an image, in which the centre of
+    the top-left element is at (0, 0).
+
+    Args:
+        x (numpy.ndarray): The positions along the X axis.
+        y (numpy.ndarray): The positions along the Y axis.
+        shape (tuple): The (rows, columns) shape of the image.
+        extent (tuple): The (left, right, bottom, top) extent of the image, as passed to `imshow`. Defaults to None, in
+            which case the `imshow` default of one unit per element is used.
+
+    Returns:
+        tuple: The column and row positions.
+
+    """
+
+    if extent is None:
+        return x, y
+
+    rows, cols = shape
+    left, right, bottom, top = extent
+
+    return (x - left) * cols / (right - left) - 0.5, (y - top) * rows / (bottom - top) - 0.5
+
+def bilinear(image, cols, rows):
+    """
+    Interpolate an image at fractional positions.
+
+    Args:
+        image (numpy.ndarray): A 2D array.
+        cols (numpy.ndarray): The column position of each point.
+        rows (numpy.ndarray): The row position of each point.
+
+    Returns:
+        numpy.ndarray: The interpolated values, with NaN for points outside of the image.
+
+    """
+
+    image = np.asarray(image)
+    num_rows, num_cols = image.shape
+
+    inside = (cols >= 0) & (cols <= num_cols - 1) & (rows >= 0) & (rows <= num_rows - 1)
+
+    # Points on the last row or column use the element before it as their lower neighbour
+    col0 = np.clip(np.floor(cols), 0, max(num_cols - 2, 0)).astype(np.intp)
+    row0 = np.clip(np.floor(rows), 0, max(num_rows - 2, 0)).astype(np.intp)
+    col1 = np.minimum(col0 + 1, num_cols - 1)
+    row1 = np.minimum(row0 + 1, num_rows - 1)
+
+    dc = cols - col0
+    dr = rows - row0
+
+    top = image[row0, col0] * (1 - dc) + image[row0, col1] * dc
+    bottom = image[row1, col0] * (1 - dc) + image[row1, col1] * dc
+    values = top * (1 - dr) + bottom * dr
+
+    return np.where(inside, values, np.nan)
+
+def line_profile(image, start, end, width=1, extent=None):
+    """
+    Sample an image along a line, averaging across the line when a width is given.
+
+    Args:
+        image (numpy.ndarray): A 2D array with the Y axis along its first dimension.
+        start (tuple): The (x, y) start of the line in data coordinates.
+        end (tuple): The (x, y) end of the line in data coordinates.
+        width (int): The number of parallel lines, one element apart, that are averaged. Defaults to 1.
+        extent (tuple): The extent of the image, as passed to `imshow`. Defaults to None.
+
+    Returns:
+        tuple: The distance of each point from the start of the line in data coordinates, and the profile. Points
+            outside of the image are NaN.
+
+    """
+
+    image = np.asarray(image)
+
+    (x0, y0), (x1, y1) = start, end
+    (c0, c1), (r0, r1) = data_to_pixel(np.array([x0, x1]), np.array([y0, y1]), image.shape, extent)
+
+    # One point per element along the line
+    length = np.hypot(c1 - c0, r1 - r0)
+    fractions = np.linspace(0, 1, max(2, int(np.ceil(length)) + 1))
+
+    cols = c0 + fractions * (c1 - c0)
+    rows = r0 + fractions * (r1 - r0)
+
+    if width > 1 and length > 0:
+        # Parallel lines are offset along the unit normal of the line
+        offsets = np.arange(width) - (width - 1) / 2
+        cols = cols + offsets[:, np.newaxis] * -(r1 - r0) / length
+        rows = rows + offsets[:, np.newaxis] * (c1 - c0) / length
+
+    profile = bilinear(image, cols, rows)
+
+    if profile.ndim == 2:
+        with np.errstate(invalid="ignore"):
+            counts = np.sum(~np.isnan(profile), axis=0)
+            profile = np.where(counts > 0, np.nansum(profile, axis=0) / np.maximum(counts, 1), np.nan)
+
+    distance = fractions * np.hypot(x1 - x0, y1 - y0)
+
+    return distance, profile
@@ -1,8 +1,11 @@
 from datasetviewer.mainview.interfaces.MainViewPresenterInterface import MainViewPresenterInterface
+import datasetviewer.eventloop.EventLoop as EventLoop
+import datasetviewer.profiling.Tracer as Tracer
+from datasetviewer.cache.MemoryGovernor import get_governor, Priority
 
 class MainViewPresenter(MainViewPresenterInterface):
     """ MainViewPresenter that controls SubPresenters and calls their `register_master` method during initialisation.
-        Also controls the MainView by updating its toolbar.
+        Also controls the MainView by updating its toolbar and showing messages in its status bar.
 
     Args:
         mainview (MainView): Instance of a MainView.
@@ -40,6 +43,10 @@ class MainViewPresenter(MainViewPresenterInterface):
 
             presenter.register_master(self)
 
+        # Show the timing breakdown of each operation in the status bar when tracing is enabled. The breakdown has its
+        # own place in the status bar so that it doesn't replace messages such as the ROI statistics.
+        Tracer.set_listener(self._report_timings)
+
     def set_dict(self, dict):
         """Sets the `_dict` attribute in the MainViewPresenter and other Presenters that require access to the data
             dictionary.
@@ -52,7 +59,17 @@ class MainViewPresenter(MainViewPresenterInterface):
 
         """
 
+        # Memory that the variables registered themselves, such as histograms, is either freed with the previous
+        # dataset or counted with the new one
+        for var in list((self._dict or {}).values()) + list(dict.values()):
+            var.release()
+
         self._dict = dict
+
+        # Account for the arrays that the dataset holds in memory. These can't be evicted while the dataset is open.
+        get_governor().register((id(self), "dataset"), sum(var.memory_usage() for var in dict.values()), "dataset",
+                                Priority.VISIBLE)
+
         self._plot_presenter.set_dict(dict)
         self._preview_presenter.set_dict(dict)
 
@@ -74,6 +91,25 @@ class MainViewPresenter(MainViewPresenterInterface):
         """
         self._plot_presenter = plot
 
+    def subscribe_file_loader_presenter(self, file_loader):
+        """Sets the file_loader_presenter attribute so that files can be opened from other parts of the interface.
+
+        Args:
+            file_loader (FileLoaderPresenter): An instance of a FileLoaderPresenter.
+
+        """
+        self._file_loader_presenter = file_loader
+
+    def open_file(self, file_path):
+        """Calls the `load_file` method in the FileLoaderPresenter, for files that are chosen from the catalog.
+
+        Args:
+            file_path (str): The path of the file.
+
+        """
+
+        self._file_loader_presenter.load_file(file_path)
+
     def create_default_plot(self, key):
         """Calls the `create_default_plot` method in the PlotPresenter when a dictionary element has been selected.
 
@@ -84,7 +120,48 @@ class MainViewPresenter(MainViewPresenterInterface):
 
         self._plot_presenter.create_default_plot(key)
 
+    def create_overlay_plot(self, keys):
+        """Calls the `create_overlay_plot` method in the PlotPresenter when several dictionary elements have been
+            selected.
+
+        Args:
+            keys (list): The keys of the dictionary elements to be plotted.
+
+        """
+
+        self._plot_presenter.create_overlay_plot(keys)
+
     def update_toolbar(self):
         """ Calls the `update_toolbar` function in the MainWindow so that the home button works works correctly. """
 
         self._main_view.update_toolbar()
+
+    def memory_usage(self):
+        """
+        Returns:
+            dict: The number of bytes held by the viewer in each memory category.
+
+        """
+
+        return get_governor().usage()
+
+    def show_status_message(self, message):
+        """Calls the `show_status_message` function in the MainWindow.
+
+        Args:
+            message (str): The message to display.
+
+        """
+
+        self._main_view.show_status_message(message)
+
+    def _report_timings(self, breakdown):
+        """Displays the timing breakdown of an operation next to the status messages. Operations such as file loading
+            may finish on a background thread, so the message is passed to the Qt thread.
+
+        Args:
+            breakdown (list): The breakdown from the Tracer.
+
+        """
+
+        EventLoop.call_in_main_thread(self._main_view.show_timings, Tracer.format_breakdown(breakdown))
@@ -11,3 +11,11 @@ class MainViewInterface(with_metaclass(Meta)):
     @abstractmethod
     def update_toolbar(self):
         pass
+
+    @abstractmethod
+    def show_status_message(self, message):
+        pass
+
+    @abstractmethod
+    def show_timings(self, message):
+        pass
@@ -10,6 +10,10 @@ class MainViewPresenterInterface(ABC):
     def subscribe_plot_presenter(self, plot):
         pass
 
+    @abstractmethod
+    def subscribe_file_loader_presenter(self, file_loader):
+        pass
+
     @abstractmethod
     def set_dict(self, dict):
         pass
@@ -18,6 +22,22 @@ class MainViewPresenterInterface(ABC):
     def create_default_plot(self, key):
         pass
 
+    @abstractmethod
+    def create_overlay_plot(self, keys):
+        pass
+
+    @abstractmethod
+    def open_file(self, file_path):
+        pass
+
     @abstractmethod
     def update_toolbar(self):
         pass
+
+    @abstractmethod
+    def show_status_message(self, message):
+        pass
+
+    @abstractmethod
+    def memory_usage(self):
+        pass
@@ -0,0 +1,24 @@
+from enum import Enum
+
+class Command(Enum):
+
+    # Indicates that the user changed the rebinning factor of the plotted axis
+    REBINCHANGE = 300
+
+    # Indicates that the user moved or resized the region of interest on an image
+    ROICHANGE = 301
+
+    # Indicates that the cursor moved over the plot
+    CURSORMOVE = 302
+
+    # Indicates that the user moved the line whose profile is plotted, or changed its width
+    PROFILECHANGE = 303
+
+    # Indicates that the X axis of an overlay plot was zoomed, panned or resized
+    VIEWPORTCHANGE = 304
+
+    # Indicates that the user chose a file to export the plotted data to
+    EXPORTREQUEST = 305
+
+    # Indicates that the plot was resized, or moved to a screen with a different pixel density
+    RESIZE = 306
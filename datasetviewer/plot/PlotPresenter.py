@@ -1,5 +1,27 @@
+import asyncio
+
+import numpy as np
+
 from datasetviewer.plot.interfaces.PlotPresenterInterface import PlotPresenterInterface
 from datasetviewer.mainview.interfaces.MainViewPresenterInterface import MainViewPresenterInterface
+import datasetviewer.profiling.Tracer as Tracer
+import datasetviewer.eventloop.EventLoop as EventLoop
+from datasetviewer.dataset.EventVariable import EventVariable
+from datasetviewer.plot.Command import Command
+from datasetviewer.rebin.CumulativeSumCache import CumulativeSumCache
+import datasetviewer.rebin.RebinTool as RebinTool
+import datasetviewer.stats.QuantileTool as QuantileTool
+from datasetviewer.coords.CursorReadout import CursorReadout
+import datasetviewer.lineprofile.LineProfileTool as LineProfileTool
+import datasetviewer.decimation.DecimationTool as DecimationTool
+import datasetviewer.export.ExportTool as ExportTool
+import datasetviewer.progressive.ProgressiveTool as ProgressiveTool
+import datasetviewer.readplan.ReadPlanTool as ReadPlanTool
+import datasetviewer.display.DisplayTool as DisplayTool
+from datasetviewer.display.FrameCache import FrameCache, FrameKey, BYTES_PER_PIXEL
+from datasetviewer.roi.SummedAreaTable import SummedAreaTable, roi_to_slices
+from datasetviewer.cache.MemoryGovernor import get_governor, Priority
+import datasetviewer.cache.SharedSliceCache as SharedSliceCache
 
 class PlotPresenter(PlotPresenterInterface):
     """The subpresenter responsible for managing a PlotView and creating the arrays for it to plot.
@@ -11,6 +33,25 @@ class PlotPresenter(PlotPresenterInterface):
         _view (PlotView): The PlotView containing the interface elements that display a plot. Assigned
             during initialisation.
         _dict (DataSet): An OrderedDict of xarray Datasets. Defaults to None.
+        _current_key (str): The key of the element that is currently plotted. Defaults to None.
+        _histogramming (set): The keys of event data that is being histogrammed in the background.
+        _refining (set): The keys of variables whose percentiles are being refined in the background.
+        _rebin_factor (int): The number of elements of the X axis that are summed into each displayed bin. Defaults to 1.
+        _cumulative_sums (CumulativeSumCache): Cumulative sums along the X axis that make rebinning cheap.
+        _displayed_image (tuple): The array that is shown as an image and its extent. Defaults to None.
+        _roi_table (SummedAreaTable): The summed-area tables of the displayed image, built when ROI statistics are first
+            requested. Defaults to None.
+        _readout (CursorReadout): Describes the element under the cursor in the current plot. Defaults to None.
+        _overlay (list): The (key, x, y) of each full trace in an overlay plot. Defaults to None.
+        _overlay_ranges (list): The (start, stop) of the part of each trace that was decimated for the current view.
+        _overlay_width (int): The width in pixels that the overlaid traces were decimated to.
+        _plot_request (int): Counts the plots that have been started, so that traces and images that finish loading
+            after another plot has been started are ignored.
+        _shared_lease (str): The key of the displayed slice in the shared slice cache if it was found there, which is
+            leased until another plot is shown. Defaults to None.
+        _frames (FrameCache): The rendered frames of images that have been shown, so that showing one again only copies
+            its pixels to the canvas.
+        _frame_key (FrameKey): What the new plot shows, or None if its frame isn't cached. Defaults to None.
 
         Raises:
             ValueError: If the `plot_view` argument is None.
@@ -23,6 +64,21 @@ class PlotPresenter(PlotPresenterInterface):
 
         self._view = plot_view
         self._dict = None
+        self._current_key = None
+        self._histogramming = set()
+        self._refining = set()
+        self._rebin_factor = 1
+        self._cumulative_sums = CumulativeSumCache()
+        self._displayed_image = None
+        self._roi_table = None
+        self._readout = None
+        self._overlay = None
+        self._overlay_ranges = None
+        self._overlay_width = None
+        self._plot_request = 0
+        self._shared_lease = None
+        self._frames = FrameCache()
+        self._frame_key = None
 
     def set_dict(self, dict):
         """ Set the `_dict` variable to an OrderedDict and plot the first element in the dictionary.
@@ -32,6 +88,11 @@ class PlotPresenter(PlotPresenterInterface):
         """
 
         self._dict = dict
+
+        # Cumulative sums and frames belong to the previous dataset
+        self._cumulative_sums.clear()
+        self._frames.clear()
+
         self.create_default_plot(list(dict.keys())[0])
 
     def create_default_plot(self, key):
@@ -41,54 +102,999 @@ class PlotPresenter(PlotPresenterInterface):
             key (str): A key corresponding with the element to be plotted.
         """
 
-        # Clear a previous plot if one exists
-        self._clear_plot()
+        with Tracer.span("create_default_plot"):
 
-        data = self._dict[key].data
+            # Clear a previous plot if one exists
+            self._clear_plot()
 
-        if data.ndim == 1:
-            # If the array is 1D then plot it as it is
-            self._view.plot_line(data)
+            self._current_key = key
+            variable = self._dict[key]
+
+            if isinstance(variable, EventVariable):
+                self._plot_events(key, variable)
+
+            else:
+                data = variable.data
+
+                if data.ndim <= 2:
+                    self._plot_line(data, key)
+                else:
+                    self._plot_image(data, key)
+
+            self._draw_frame()
+
+            # Update the toolbar so that it returns to this plot when the "Home" button is pressed
+            self._main_presenter.update_toolbar()
+
+    def _draw_frame(self):
+        """Draws a new plot. An image that has been drawn before with the same colours and canvas size is shown by
+            copying its rendered frame to the canvas, and the frame of an image that hasn't is kept after it is drawn,
+            provided its colour limits won't be refined any further.
+        """
+
+        key = self._frame_key
+        frame = None if key is None else self._frames.get(key)
+
+        if frame is not None:
+            with Tracer.span("restore_frame"):
+                self._view.restore_frame(frame)
+            return
+
+        with Tracer.span("draw"):
+            self._draw_plot()
+
+        if key is not None and self._limits_final(key.variable):
+            self._capture_frame(key)
+
+    def _limits_final(self, key):
+        """
+        Args:
+            key (str): The key of a variable.
+
+        Returns:
+            bool: True if the colour limits of the variable's images won't change, because its percentiles have been
+                refined or its images are rebinned and have no limits, False otherwise.
+        """
+
+        return self._rebin_factor > 1 or self._dict[key].percentiles() is not None
+
+    def _capture_frame(self, key):
+        """Keeps the rendered frame of the plot that has just been drawn.
+
+        Args:
+            key (FrameKey): What the plot shows.
+        """
+
+        with Tracer.span("capture_frame"):
+            width, height = key.size
+            self._frames.put(key, self._view.capture_frame(), width * height * BYTES_PER_PIXEL)
+
+    def frame_cache_stats(self):
+        """
+        Returns:
+            FrameCacheStats: The hits and misses of the rendered frame cache, and the frames and bytes that it holds.
+        """
+
+        return self._frames.stats()
+
+    def create_overlay_plot(self, keys):
+        """Plots several elements as lines on the same axes. The elements are read in parallel, and each line is reduced
+            to the points that can be seen at the width of the plot, so that long traces draw quickly. Event data and
+            elements with more than two dimensions are skipped.
+
+        Args:
+            keys (list): The keys of the elements to be plotted.
+        """
+
+        with Tracer.span("create_overlay_plot"):
+
+            self._clear_plot()
+            self._current_key = None
+            request = self._plot_request
+
+            keys = [key for key in keys if not isinstance(self._dict[key], EventVariable) and self._dict[key].data.ndim <= 2]
+
+            if not keys:
+                return
+
+            async def load_traces():
+                return await asyncio.gather(*[EventLoop.run_blocking(self._load_trace, self._dict[key].data)
+                                              for key in keys])
+
+            EventLoop.submit(load_traces(), done=lambda traces: self._show_overlay(request, keys, traces),
+                             error=lambda error: self._main_presenter.show_status_message(
+                                 "Overlay failed: {}".format(error)))
+
+    @staticmethod
+    def _load_trace(data):
+        """Reads the values of an element that is overlaid, using the first column of 2D arrays as in `_plot_line`.
+
+        Args:
+            data (xarray.DataArray): An array with one or two dimensions.
+
+        Returns:
+            tuple: The X and Y values of the trace. The coordinate of the first dimension is used for the X values if it
+                is numeric and ascending, and the index otherwise.
+        """
+
+        dim = data.dims[0]
+
+        if data.ndim == 2:
+            data = data.transpose()[0]
+
+        y = np.asarray(data.values)
+        x = np.arange(len(y))
+
+        if dim in data.coords and data.coords[dim].ndim == 1 and np.issubdtype(data.coords[dim].dtype, np.number):
+            coordinate = np.asarray(data.coords[dim].values)
+
+            if np.all(np.diff(coordinate) > 0):
+                x = coordinate
+
+        return x, y
+
+    def _show_overlay(self, request, keys, traces):
+        """Plots the traces of an overlay once all of them have been read.
+
+        Args:
+            request (int): The value of `_plot_request` when the overlay was started.
+            keys (list): The keys of the traces.
+            traces (list): The (x, y) values of each trace.
+        """
+
+        if request != self._plot_request:
+            return
+
+        self._overlay = [(key, x, y) for key, (x, y) in zip(keys, traces)]
+
+        with Tracer.span("decimate"):
+            decimated = self._decimate_overlay(None, self._view.get_viewport()[2])
+
+        # Every line is added before the one redraw
+        with Tracer.span("plot"):
+            self._view.plot_overlay(decimated)
+
+            dims = set(self._dict[key].data.dims[0] for key in keys)
+
+            if len(dims) == 1:
+                self._view.label_x_axis(dims.pop())
+
+        with Tracer.span("draw"):
+            self._draw_plot()
+
+        self._main_presenter.update_toolbar()
+
+    def _decimate_overlay(self, x_range, width):
+        """Decimates the part of each overlaid trace that falls within a range of X values.
+
+        Args:
+            x_range (tuple): The lower and upper X values of the view, or None for the whole of each trace.
+            width (int): The width of the plot in pixels.
+
+        Returns:
+            list: The key and the decimated X and Y values of each trace.
+        """
+
+        self._overlay_ranges = []
+        decimated = []
+
+        for key, x, y in self._overlay:
+
+            if x_range is None:
+                start, stop = 0, len(x)
+            else:
+                start, stop = DecimationTool.visible_range(x, *x_range)
+
+            self._overlay_ranges.append((start, stop))
+            decimated.append((key,) + DecimationTool.decimate(x[start:stop], y[start:stop], width))
+
+        self._overlay_width = width
+
+        return decimated
+
+    def _update_overlay(self, viewport):
+        """Decimates the overlaid traces again after the view has been zoomed or panned, so that more detail is shown as
+            the visible range narrows.
+
+        Args:
+            viewport (tuple): The lower and upper X values of the view and its width in pixels.
+        """
+
+        if self._overlay is None:
+            return
+
+        x_min, x_max, width = viewport
+        ranges = [DecimationTool.visible_range(x, x_min, x_max) for _, x, _ in self._overlay]
+
+        # Nothing changes when the same elements are still visible at the same width
+        if ranges == self._overlay_ranges and width == self._overlay_width:
+            return
+
+        with Tracer.span("decimate"):
+            decimated = self._decimate_overlay((x_min, x_max), width)
+
+        self._view.update_overlay(decimated)
+        self._draw_plot()
+
+    def _plot_line(self, data, key=None):
+        """Plots a 1D array as it is, or the first column of a 2D array with the first dimension as the X axis.
+
+        Args:
+            data (xarray.DataArray): An array with one or two dimensions.
+            key (str): The key of the array, used for caching its cumulative sum when rebinning. Defaults to None.
+        """
+
+        x = None
 
-        elif data.ndim == 2:
+        if data.ndim == 1:
+            # Takes a memory-mapped line out of its map, once, so that the plot and the readout hold a copy of it
+            mapped = key is not None and self._dict[key].is_memory_mapped()
+            arr = data.isel({data.dims[0]: slice(None)}) if mapped else data
 
+        else:
             # Slice the array if it is 2D, then create a 1D plot with the first dimension as the X axis
-            self._view.plot_line(data.transpose()[0])
+            with Tracer.span("transpose"):
+                transposed = data.transpose()
+
+            with Tracer.span("slice"):
+                if self._from_file(key):
+                    arr = self._read_slice(data, {data.dims[1]: 0}).transpose()
+                else:
+                    arr = transposed[0].load()
+
+        if self._rebin_factor > 1:
+            with Tracer.span("rebin"):
+                arr, x = self._rebin(data, {dim:0 for dim in data.dims[1:]}, key)
+
+        positions = np.arange(arr.shape[0]) if x is None else x
+        self._readout = CursorReadout(arr, [self._readout_axis(data, data.dims[0], positions)])
+
+        with Tracer.span("plot"):
+            self._view.plot_line(arr, x=x)
+
+            if data.ndim == 2:
+                self._view.label_x_axis(data.dims[0])
+
+    def _plot_image(self, data, key=None):
+        """Slices an array by using the first two dimensions as the X and Y axes and plots it as an image.
+
+        Args:
+            data (xarray.DataArray): An array with two or more dimensions.
+            key (str): The key of the array, used for caching its cumulative sum when rebinning. Defaults to None.
+        """
+
+        selection = {dim:0 for dim in data.dims[2:]}
+        extent = None
+        from_file = self._rebin_factor == 1 and self._from_file(key)
+
+        # A slice that another viewer has already read is taken from the shared cache
+        shared = self._shared_slice(data, selection) if from_file else None
+
+        # Large slices that are read from the file are shown as soon as a preview of them has been read
+        if shared is None and from_file and ProgressiveTool.is_progressive(data.shape[:2]):
+            self._plot_progressive_image(data, selection, key)
+            return
+
+        with Tracer.span("slice"):
+            if self._rebin_factor > 1:
+                arr, _ = self._rebin(data, selection, key)
+
+                # Keep the X axis in the units of the original index
+                extent = (-0.5, data.shape[0] - 0.5, data.shape[1] - 0.5, -0.5)
+            elif shared is not None:
+                arr = shared
+            elif from_file:
+                # Read the slice once so that the plot, the ROI statistics and the cursor readout all use it
+                arr = self._read_slice(data, selection)
+                self._share_slice(data, selection, arr.values)
+            else:
+                arr = data.isel(selection).load()
+
+        # A view of the slice, with the second dimension along its rows as it is shown
+        with Tracer.span("transpose"):
+            image = arr.transpose(data.dims[1],data.dims[0])
+
+        # Without a running EventLoop the percentiles are refined here, in time for the limits of this image
+        self._refine_colour_limits(key)
+
+        self._set_displayed_image(data, image, extent)
+
+        # The slice is kept at full precision, and only the copy that is drawn is made compact. The slice is converted in
+        # the order it is stored, and the view transposes it when it is drawn, so no copy is made only to transpose it.
+        with Tracer.span("display_buffer"):
+            display = DisplayTool.to_display(arr)
 
+        clim = self._colour_limits(key)
+
+        with Tracer.span("plot"):
+            self._view.plot_image(display, extent=extent, clim=clim, transpose=True)
             self._view.label_x_axis(data.dims[0])
+            self._view.label_y_axis(data.dims[1])
+
+        # Everything that changes the pixels of the image, so that its frame can be shown again
+        if key is not None:
+            self._frame_key = FrameKey(key, tuple(sorted(selection.items())), self._rebin_factor, clim,
+                                       self._view.get_colormap(), self._view.get_frame_size())
+
+    def _from_file(self, key):
+        """
+        Args:
+            key (str): The key of a variable, or None if the data doesn't belong to a variable.
+
+        Returns:
+            bool: True if the variable is read from its file on demand, False if it is held in memory, in which case its
+                slices are views, or memory-mapped, in which case its slices are copied out of the map.
+        """
+
+        if key is None or self._dict[key].is_memory_mapped():
+            return False
+
+        return self._dict[key].memory_usage() == 0
+
+    def _read_slice(self, data, selection):
+        """Reads a slice of a variable along the grain of its chunks, and shows how much more data was decompressed than
+            is shown.
+
+        Args:
+            data (xarray.DataArray): The variable.
+            selection (dict): The index of each dimension that is sliced away.
+
+        Returns:
+            xarray.DataArray: The slice, held in memory.
+        """
+
+        with Tracer.span("plan_reads"):
+            plan = ReadPlanTool.plan_slice(data, selection)
+
+        self._report_read_plan(plan)
+        return ReadPlanTool.read_slice(data, selection, plan)
+
+    def _shared_slice(self, data, selection):
+        """Looks up a slice in the shared slice cache, and leases it until another plot is shown if it is found.
+
+        Args:
+            data (xarray.DataArray): The variable, as it was opened from its file.
+            selection (dict): The index of each dimension that is sliced away.
+
+        Returns:
+            xarray.DataArray: The slice, backed by the shared copy, or None if the cache is off or doesn't hold it.
+        """
 
+        cache = SharedSliceCache.get_shared_cache()
+        key = None if cache is None else SharedSliceCache.slice_key(data.encoding.get("source"), data.name, selection)
+
+        if key is None:
+            return None
+
+        with Tracer.span("shared_cache"):
+            values = cache.get(key)
+
+        if values is None:
+            return None
+
+        self._shared_lease = key
+        return data.isel(selection).copy(deep=False, data=values)
+
+    def _share_slice(self, data, selection, values):
+        """Adds a slice that was read from its file to the shared slice cache, in the background, so that other viewers
+            don't read it again.
+
+        Args:
+            data (xarray.DataArray): The variable, as it was opened from its file.
+            selection (dict): The index of each dimension that is sliced away.
+            values (numpy.ndarray): The values of the slice, which mustn't be changed afterwards.
+        """
+
+        cache = SharedSliceCache.get_shared_cache()
+        key = None if cache is None else SharedSliceCache.slice_key(data.encoding.get("source"), data.name, selection)
+
+        if key is not None:
+            EventLoop.run_in_background(cache.put, key, values)
+
+    def _release_shared_slice(self):
+        """ Gives back the lease on the displayed slice in the shared slice cache, so that it can be evicted. """
+
+        if self._shared_lease is not None:
+            SharedSliceCache.get_shared_cache().release(self._shared_lease)
+            self._shared_lease = None
+
+    def _report_read_plan(self, plan):
+        """Shows the read amplification of a slice of a chunked variable in the status bar.
+
+        Args:
+            plan (ReadPlan): The plan of the slice.
+        """
+
+        if plan.chunk_shape is not None:
+            self._main_presenter.show_status_message(ReadPlanTool.describe(plan))
+
+    def _set_displayed_image(self, data, arr, extent):
+        """Keeps the slice that is shown as an image for the ROI statistics, profiles, cursor readout and export.
+
+        Args:
+            data (xarray.DataArray): The array that the slice was taken from.
+            arr (xarray.DataArray): The slice, with the second dimension of the array as its rows.
+            extent (tuple): The extent of the image, or None if each element is one unit wide.
+        """
+
+        if extent is None:
+            x_positions = np.arange(data.shape[0])
         else:
+            x_positions = RebinTool.bin_centres(data.shape[0], self._rebin_factor)
+
+        self._readout = CursorReadout(arr, [self._readout_axis(data, data.dims[0], x_positions),
+                                            self._readout_axis(data, data.dims[1], np.arange(data.shape[1]))])
 
-            # Slice the array by using the first two dimensions as the X and Y axes if it is 2D or greater
-            self._view.plot_image(data.isel({dim:0 for dim in data.dims[2:]})
-                                      .transpose(data.dims[1],data.dims[0]))
+        self._displayed_image = (arr, extent)
 
+    def _plot_progressive_image(self, data, selection, key):
+        """Plots a large slice without waiting for all of it to be read. A preview made of every nth element, from no
+            more than `ProgressiveTool.PREVIEW_CHUNKS` chunks, is read in the background along with the estimate of the
+            colour limits, and is shown as soon as it arrives. The ROI statistics, profiles and cursor readout are
+            available once the whole slice has been read.
+
+        Args:
+            data (xarray.DataArray): An array with more than two dimensions.
+            selection (dict): The index of each dimension, other than the first two, that is sliced away.
+            key (str): The key of the array.
+        """
+
+        request = self._plot_request
+        arr = data.isel(selection)
+
+        # Tiles start and end on chunk boundaries, so that each chunk is only decompressed once
+        plan = ReadPlanTool.plan_slice(data, selection, ProgressiveTool.DEFAULT_CHUNK_ELEMENTS)
+        self._report_read_plan(plan)
+
+        chunks = None
+
+        if plan.chunk_shape is not None:
+            chunks = tuple(chunk for dim, chunk in zip(data.dims, plan.chunk_shape) if dim not in selection)
+
+        def read_preview():
+            with Tracer.span("preview"):
+                preview = ProgressiveTool.read_preview(arr, chunks=chunks)
+
+            return preview, self._colour_limits(key)
+
+        EventLoop.run_in_background(read_preview,
+                                    done=lambda result: self._show_preview(request, data, selection, key, plan, *result),
+                                    error=lambda error: self._finish_progressive_image(request, data, arr, None, False,
+                                                                                       error))
+
+    def _show_preview(self, request, data, selection, key, plan, preview, clim):
+        """Draws the preview of a large slice if it is still wanted, and starts reading the slice in the background, with
+            each block drawn over the preview as it arrives.
+
+        Args:
+            request (int): The value of `_plot_request` when the slice was plotted.
+            data (xarray.DataArray): The array that the slice is taken from.
+            selection (dict): The index of each dimension, other than the first two, that is sliced away.
+            key (str): The key of the array.
+            plan (ReadPlan): The plan for reading the slice.
+            preview (numpy.ndarray): The preview.
+            clim (tuple): The colour limits of the image, or None.
+        """
+
+        if request != self._plot_request:
+            return
+
+        self._refine_colour_limits(key)
+
+        # The preview is stretched over the whole slice, so that the tiles and the zoom match the final image
+        with Tracer.span("plot"):
+            self._view.plot_image(DisplayTool.to_display(preview), extent=(-0.5, data.shape[0] - 0.5, data.shape[1] - 0.5, -0.5),
+                                  clim=clim, transpose=True)
             self._view.label_x_axis(data.dims[0])
             self._view.label_y_axis(data.dims[1])
 
         self._draw_plot()
 
-        # Update the toolbar so that it returns to this plot when the "Home" button is pressed
-        self._main_presenter.update_toolbar()
+        arr = data.isel(selection)
+        read = ReadPlanTool.row_reader(data, selection, plan)
+        buffer = np.empty(arr.shape, dtype=arr.dtype)
+        Tracer.record_copy("progressive_buffer", buffer.nbytes)
+
+        def progress(start, stop):
+            EventLoop.call_in_main_thread(self._show_tile, request, buffer, start, stop)
+
+        EventLoop.run_in_background(ProgressiveTool.read_tiles, arr, buffer, plan.block_rows * arr.shape[1],
+                                    progress, lambda: request != self._plot_request, read,
+                                    done=lambda finished: self._finish_progressive_image(request, data, arr, buffer,
+                                                                                         finished),
+                                    error=lambda error: self._finish_progressive_image(request, data, arr, buffer,
+                                                                                       False, error))
+
+    def _show_tile(self, request, buffer, start, stop):
+        """Draws a block of a slice over its preview.
+
+        Args:
+            request (int): The value of `_plot_request` when the slice was plotted.
+            buffer (numpy.ndarray): The slice, which is being read.
+            start (int): The first row of the slice in the block.
+            stop (int): The row after the last row of the slice in the block.
+        """
+
+        # Tiles that arrive after the whole slice has been shown are already part of it
+        if request != self._plot_request or self._displayed_image is not None:
+            return
+
+        tile = DisplayTool.to_display(buffer[start:stop], "display_tile")
+        self._view.add_image_tile(tile, (start - 0.5, stop - 0.5, buffer.shape[1] - 0.5, -0.5))
+        self._draw_plot()
+
+    def _finish_progressive_image(self, request, data, arr, buffer, finished, error=None):
+        """Replaces the preview and tiles with the whole slice once it has been read.
+
+        Args:
+            request (int): The value of `_plot_request` when the slice was plotted.
+            data (xarray.DataArray): The array that the slice was taken from.
+            arr (xarray.DataArray): The slice as it is stored in the file.
+            buffer (numpy.ndarray): The values of the slice.
+            finished (bool): Whether the whole slice was read.
+            error (Exception): The exception raised while reading. Defaults to None.
+        """
+
+        if request != self._plot_request:
+            return
+
+        if error is not None:
+            self._main_presenter.show_status_message("Reading {} failed: {}".format(self._current_key, error))
+            return
+
+        if not finished:
+            return
+
+        image = arr.copy(data=buffer).transpose(data.dims[1], data.dims[0])
+        self._set_displayed_image(data, image, None)
+        self._share_slice(data, {dim: 0 for dim in data.dims[2:]}, buffer)
+
+        self._view.set_image(DisplayTool.to_display(buffer))
+        self._draw_plot()
+
+    def _colour_limits(self, key):
+        """Finds the colour limits of an image from the 1st and 99th percentiles of the whole variable, so that a few hot
+            pixels don't wash out the image and the colours mean the same thing in every slice. The percentiles are
+            estimated from a single strided pass over the variable until they have been refined.
+
+        Args:
+            key (str): The key of the variable, or None if the image doesn't belong to a variable.
+
+        Returns:
+            tuple: The lower and upper colour limits, or None if they can't be found or don't apply to the image.
+        """
+
+        # Rebinned images hold sums of several elements, so the limits of single elements don't apply
+        if key is None or self._rebin_factor > 1:
+            return None
+
+        with Tracer.span("estimate_percentiles"):
+            percentiles = self._dict[key].estimate_percentiles()
+
+        if percentiles is None:
+            return None
+
+        return percentiles.low, percentiles.high
+
+    def _refine_colour_limits(self, key):
+        """Reads the rest of a variable in the background to refine its percentiles, and updates the colour limits of the
+            image as the estimate improves. Refining stops when another element is plotted.
+
+        Args:
+            key (str): The key of the variable, or None if the image doesn't belong to a variable.
+        """
+
+        if key is None or key in self._refining or self._dict[key].percentiles() is not None:
+            return
+
+        self._refining.add(key)
+
+        def progress(percentiles):
+            EventLoop.call_in_main_thread(self._apply_colour_limits, key, percentiles)
+
+        EventLoop.run_in_background(self._dict[key].refine_percentiles, progress, lambda: self._current_key != key,
+                                    done=lambda percentiles: self._finish_colour_limits(key, percentiles),
+                                    error=lambda error: self._finish_colour_limits(key, None, error))
+
+    def _apply_colour_limits(self, key, percentiles):
+        """Sets the colour limits of the displayed image if it still shows the variable.
+
+        Args:
+            key (str): The key of the variable.
+            percentiles (Percentiles): The estimated percentiles, or None if there aren't any.
+        """
+
+        if percentiles is None or key != self._current_key or self._displayed_image is None or self._rebin_factor > 1:
+            return
+
+        clim = (percentiles.low, percentiles.high)
+
+        # Frames of the variable in other colours won't be shown again, as its slices are now shown in these
+        self._frames.discard(lambda frame: frame.variable == key and frame.clim != clim)
+
+        self._view.set_clim(clim)
+        self._draw_plot()
+
+        # The image is kept once it is drawn in its final colours. Progressive images have no frame key until they are
+        # complete.
+        if self._frame_key is not None and self._frame_key.variable == key and self._limits_final(key):
+            self._frame_key = self._frame_key._replace(clim=clim)
+            self._capture_frame(self._frame_key)
+
+    def _finish_colour_limits(self, key, percentiles, error=None):
+        """Applies the refined percentiles of a variable and states their accuracy.
+
+        Args:
+            key (str): The key of the variable.
+            percentiles (Percentiles): The refined percentiles, or None if refining was cancelled or failed.
+            error (Exception): The exception raised while refining. Defaults to None.
+        """
+
+        self._refining.discard(key)
+
+        if error is not None:
+            self._main_presenter.show_status_message("Colour scale of {} failed: {}".format(key, error))
+            return
+
+        self._apply_colour_limits(key, percentiles)
+
+        if percentiles is not None and percentiles.rank_error > 0 and key == self._current_key:
+            self._main_presenter.show_status_message(
+                "Colour scale: 1st-99th percentile, within \u00b1{:.2g} percentile at {:.0%} confidence".format(
+                    percentiles.rank_error * 100, QuantileTool.CONFIDENCE))
+
+    def _rebin(self, data, selection, key=None):
+        """Slices an array and sums the elements along its first dimension into bins of `_rebin_factor` elements. The
+            cached cumulative sum of the whole array is used once it has been computed in the background, so that
+            changing the bin width only costs a subtraction per output bin. Until then only the slice is summed.
+
+        Args:
+            data (xarray.DataArray): The array.
+            selection (dict): The index of each dimension, other than the first, that is sliced away.
+            key (str): The key of the array. The cumulative sum isn't cached when this is None. Defaults to None.
+
+        Returns:
+            tuple: The rebinned slice as a DataArray, and the position of each bin centre along the original index.
+        """
+
+        from xarray import DataArray
+
+        cumsum = None if key is None else self._cumulative_sums.get(key)
+
+        if cumsum is None and key is not None:
+            EventLoop.run_in_background(self._cumulative_sums.build, key, data, lambda: self._current_key != key,
+                                        error=lambda error: self._main_presenter.show_status_message(
+                                            "Couldn't cache the sums for rebinning {}: {}".format(key, error)))
+
+            # The sum is ready straight away when no event loop is running
+            cumsum = self._cumulative_sums.get(key)
+
+        if cumsum is not None:
+            index = tuple(selection.get(dim, slice(None)) for dim in data.dims[1:])
+            values = RebinTool.rebin_cumulative_sum(cumsum[(slice(None),) + index], self._rebin_factor)
+        else:
+            values = RebinTool.rebin(data.isel(selection).values, self._rebin_factor)
+
+        Tracer.record_copy("rebin", values.nbytes)
+        centres = RebinTool.bin_centres(data.shape[0], self._rebin_factor)
+        dims = [dim for dim in data.dims if dim not in selection]
+
+        return DataArray(values, dims=dims, coords={data.dims[0]: centres}), centres
+
+    def notify(self, command):
+        """Interpret a command from the PlotView and take the appropriate action.
+
+        Args:
+            command (Command): A Command from the PlotView indicating that an event has taken place.
+
+        Raises:
+            ValueError: If the command isn't recognised.
+        """
+
+        if command == Command.REBINCHANGE:
+
+            self._rebin_factor = max(1, int(self._view.get_rebin_factor()))
+
+            if self._current_key is not None:
+                self.create_default_plot(self._current_key)
+
+        elif command == Command.VIEWPORTCHANGE:
+            self._update_overlay(self._view.get_viewport())
+
+        elif command == Command.RESIZE:
+            # Frames of the previous size would never be shown again
+            self._frames.clear()
+
+        elif command == Command.EXPORTREQUEST:
+            request = self._view.get_export_request()
+
+            # Do nothing if the file dialog was closed without choosing a file
+            if request is not None:
+                self._export(*request)
+
+        elif command == Command.ROICHANGE:
+            self._show_roi_stats(self._view.get_roi())
+
+        elif command == Command.CURSORMOVE:
+            self._show_cursor_value(self._view.get_cursor())
+
+        elif command == Command.PROFILECHANGE:
+            self._show_profile(self._view.get_profile_line(), self._view.get_profile_width())
+
+        else:
+            raise ValueError("PlotPresenter received an unrecognised command: {}".format(str(command)))
+
+    def _export(self, scope, file_path):
+        """Writes part of the plotted element to a file in the background, showing the progress in the status bar.
+
+        Args:
+            scope (str): `ExportTool.SLICE` for the plotted slice, including any rebinning, `ExportTool.ROI` for the
+                region of interest of the displayed image, or `ExportTool.VARIABLE` for the whole element.
+            file_path (str): The path of the NetCDF or `.npy` file.
+        """
+
+        data = self._export_data(scope)
+
+        if data is None:
+            self._main_presenter.show_status_message("Nothing to export")
+            return
+
+        def progress(fraction):
+            EventLoop.call_in_main_thread(self._main_presenter.show_status_message,
+                                          "Exporting to {}: {:.0%}".format(file_path, fraction))
+
+        EventLoop.run_in_background(ExportTool.export_array, data, file_path, self._current_key,
+                                    ExportTool.DEFAULT_CHUNK_ELEMENTS, progress,
+                                    done=lambda written: self._main_presenter.show_status_message(
+                                        "Exported to {}".format(file_path)),
+                                    error=lambda error: self._main_presenter.show_status_message(
+                                        "Export failed: {}".format(error)))
+
+    def _export_data(self, scope):
+        """Finds the array to be exported. Arrays that are read from a file on demand are left unread, so that the export
+            can read them a chunk at a time.
+
+        Args:
+            scope (str): `ExportTool.SLICE`, `ExportTool.ROI` or `ExportTool.VARIABLE`.
+
+        Returns:
+            xarray.DataArray: The array, or None if there is nothing to export, such as the region of interest of a line
+                plot or event data that is still being histogrammed.
+        """
+
+        key = self._current_key
+
+        if key is None or key in self._histogramming:
+            return None
+
+        data = self._dict[key].data
+
+        # Event data whose histogramming was cancelled
+        if data is None:
+            return None
+
+        if scope == ExportTool.VARIABLE:
+            return data
+
+        if self._displayed_image is not None:
+            arr, extent = self._displayed_image
+
+            if scope == ExportTool.ROI:
+                roi = self._view.get_roi()
+
+                if roi is None:
+                    return None
+
+                (row_start, row_stop), (col_start, col_stop) = roi_to_slices(roi, arr.shape, extent)
+                arr = arr[row_start:row_stop, col_start:col_stop]
+
+                if arr.size == 0:
+                    return None
+
+            # Restore the order of the dimensions in the file
+            return arr.transpose()
+
+        if scope == ExportTool.ROI:
+            return None
+
+        # A slice that is still being read is exported from the file
+        if data.ndim > 2:
+            return data.isel({dim:0 for dim in data.dims[2:]})
+
+        if self._rebin_factor > 1 and data.ndim <= 2:
+            return self._rebin(data, {dim:0 for dim in data.dims[1:]}, key)[0]
+
+        return data if data.ndim == 1 else data.isel({dim:0 for dim in data.dims[1:]})
+
+    @staticmethod
+    def _readout_axis(data, dim, positions):
+        """Describes a plotted axis for the cursor readout.
+
+        Args:
+            data (xarray.DataArray): The array that is plotted.
+            dim (str): The dimension along the axis.
+            positions (numpy.ndarray): The positions of the plotted elements along the axis.
+
+        Returns:
+            tuple: The dimension, the positions, and the coordinate variable of the dimension or None if it has none.
+        """
+
+        coordinate = data.coords[dim] if dim in data.coords and data.coords[dim].ndim == 1 else None
+        return dim, positions, coordinate
+
+    def _show_cursor_value(self, cursor):
+        """Shows the coordinates and value of the element under the cursor in the status bar. Only the plotted slice,
+            which is held in memory, is used.
+
+        Args:
+            cursor (tuple): The (x, y) position of the cursor in data coordinates, or None if it isn't over the plot.
+        """
+
+        if cursor is None or self._readout is None:
+            return
+
+        description = self._readout.describe(*cursor)
+
+        if description is not None:
+            self._main_presenter.show_status_message(description)
+
+    def _show_profile(self, line, width):
+        """Plots the profile of the displayed image along a line, using the slice that is held in memory.
+
+        Args:
+            line (tuple): The (x, y) start and end of the line in data coordinates, or None if there is no line.
+            width (int): The number of parallel lines that are averaged.
+        """
+
+        if line is None or self._displayed_image is None:
+            return
+
+        arr, extent = self._displayed_image
+
+        with Tracer.span("line_profile"):
+            distance, profile = LineProfileTool.line_profile(arr, line[0], line[1], width, extent)
+
+        self._view.plot_profile(distance, profile)
+
+    def _show_roi_stats(self, roi):
+        """Shows the statistics of a rectangular region of the displayed image in the status bar. The summed-area tables
+            of the image are built on the first request, after which each region only costs a few lookups.
+
+        Args:
+            roi (tuple): The (x min, x max, y min, y max) corners of the region in data coordinates, or None if there is
+                no region.
+        """
+
+        if roi is None or self._displayed_image is None:
+            return
+
+        arr, extent = self._displayed_image
+        table = self._roi_table
+
+        if table is None:
+            with Tracer.span("summed_area_table"):
+                table = SummedAreaTable(arr)
+
+            # Keep the tables for the following mouse moves if they fit within the memory budget. The governor may evict
+            # them from a background thread, so they are dropped on the Qt thread.
+            if get_governor().register((id(self), "roi_table"), table.nbytes, "roi_tables", Priority.VISIBLE,
+                                       evict=lambda: EventLoop.call_in_main_thread(self._evict_roi_table, table)):
+                self._roi_table = table
+
+        rows, cols = roi_to_slices(roi, table.shape, extent)
+        stats = table.stats(rows, cols)
+
+        self._main_presenter.show_status_message("ROI: {} pixels, sum {:.6g}, mean {:.6g}, std {:.6g}".format(
+            stats.count, stats.sum, stats.mean, stats.std))
+
+    def _drop_roi_table(self):
+        """ Discards the summed-area tables. Called when the displayed image changes or the MemoryGovernor needs room. """
+
+        if self._roi_table is not None:
+            self._roi_table = None
+            get_governor().unregister((id(self), "roi_table"))
+
+    def _evict_roi_table(self, table):
+        """ Discards summed-area tables that the MemoryGovernor has evicted, unless they have already been replaced.
+
+        Args:
+            table (SummedAreaTable): The evicted tables.
+        """
+
+        if self._roi_table is table:
+            self._roi_table = None
+
+    def _plot_events(self, key, variable):
+        """Plots event data as a (time of flight, detector pixel) image. If the events haven't been histogrammed yet then
+            this is done in the background, and the partial histogram is shown while the events are counted.
+
+        Args:
+            key (str): The key of the event data.
+            variable (EventVariable): The event data.
+        """
+
+        if variable.is_histogrammed():
+            self._plot_image(variable.data, key)
+            return
+
+        # The events are already being counted, and the progress updates will show them again
+        if key in self._histogramming:
+            return
+
+        self._histogramming.add(key)
+        self._main_presenter.show_status_message("Histogramming {} events...".format(variable.num_events))
+
+        def progress(partial, fraction):
+            EventLoop.call_in_main_thread(self._show_partial_histogram, key, partial, fraction)
+
+        EventLoop.run_in_background(variable.histogram, progress, lambda: self._current_key != key,
+                                    done=lambda data: self._finish_histogram(key, data),
+                                    error=lambda error: self._finish_histogram(key, None, error))
+
+    def _show_partial_histogram(self, key, partial, fraction):
+        """Shows a partial histogram if its event data is still selected.
+
+        Args:
+            key (str): The key of the event data.
+            partial (xarray.DataArray): The histogram of the events that have been counted so far.
+            fraction (float): The fraction of the events that have been counted.
+        """
+
+        if key != self._current_key:
+            return
+
+        self._clear_plot()
+        self._plot_image(partial)
+        self._draw_plot()
+        self._main_presenter.show_status_message("Histogramming events: {:.0f}%".format(fraction * 100))
+
+    def _finish_histogram(self, key, data, error=None):
+        """Plots the completed histogram if its event data is still selected.
+
+        Args:
+            key (str): The key of the event data.
+            data (xarray.DataArray): The histogram, or None if histogramming was cancelled or failed.
+            error (Exception): The exception raised while histogramming. Defaults to None.
+        """
+
+        self._histogramming.discard(key)
+
+        if error is not None:
+            self._main_presenter.show_status_message("Histogramming failed: {}".format(error))
+
+        elif data is not None and key == self._current_key:
+            self._main_presenter.show_status_message("")
+            self.create_default_plot(key)
 
     def _clear_plot(self):
         """ Erases the previous plot and plot elements if they exist. """
 
+        self._displayed_image = None
+        self._readout = None
+        self._drop_roi_table()
+        self._release_shared_slice()
+        self._frame_key = None
+
+        # Traces of an overlay or tiles of an image that are still loading are no longer wanted
+        self._overlay = None
+        self._plot_request += 1
+
         # Try to delete a line plot if it exists
         try:
             self._view.line.pop(0).remove()
         except Exception:
             pass
 
-        # Prevent next plot from taking shape of the previous plot by clearing the axis
+        # Try to delete a colourbar if it exists. This is done before clearing the axis, as removing the colourbar gives
+        # the axis back the space that the colourbar took from it only while the image is still on the axis.
         try:
-            self._view.ax.cla()
+            self._view.cbar.remove()
         except Exception:
             pass
 
-        # Try to delete a colourbar if it exists
+        # Prevent next plot from taking shape of the previous plot by clearing the axis
         try:
-            self._view.cbar.remove()
+            self._view.ax.cla()
         except Exception:
             pass
 
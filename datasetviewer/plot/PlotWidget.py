@@ -1,9 +1,19 @@
 
+from matplotlib.backend_bases import DrawEvent
 from matplotlib.backends.backend_qt5agg import FigureCanvas
 from matplotlib.figure import Figure
+from matplotlib.lines import Line2D
+from matplotlib.widgets import RectangleSelector
+
+from PyQt5.QtCore import QTimer
+from PyQt5.QtGui import QGuiApplication
+from PyQt5.QtWidgets import QFileDialog, QMenu, QToolBar, QSpinBox, QToolButton
 
 from datasetviewer.plot.interfaces.PlotViewInterface import PlotViewInterface
 from datasetviewer.plot.PlotPresenter import PlotPresenter
+from datasetviewer.plot.Command import Command
+from datasetviewer.plot.ProfileWidget import ProfileWidget
+import datasetviewer.export.ExportTool as ExportTool
 
 class PlotWidget(FigureCanvas, PlotViewInterface):
 
@@ -18,19 +28,370 @@ class PlotWidget(FigureCanvas, PlotViewInterface):
         self.im = None
         self.cbar = None
 
-    def plot_image(self, arr):
+        # Blocks of a large image that are drawn over its preview while the image is being read
+        self._image_tiles = []
+        self._transpose = False
+
+        # Spin box for the number of X axis elements in each displayed bin
+        self.rebin_spinbox = QSpinBox()
+        self.rebin_spinbox.setPrefix("Rebin x")
+        self.rebin_spinbox.setRange(1, 4096)
+        self.rebin_spinbox.setToolTip("Sum this many elements of the X axis into each bin")
+        self.rebin_spinbox.valueChanged.connect(lambda: self._presenter.notify(Command.REBINCHANGE))
+
+        # Button that switches between navigating the plot and drawing a region of interest on an image
+        self.roi_button = QToolButton()
+        self.roi_button.setText("ROI")
+        self.roi_button.setCheckable(True)
+        self.roi_button.setToolTip("Drag a rectangle on the image to show its statistics in the status bar")
+        self.roi_button.toggled.connect(self._toggle_roi)
+
+        self.roi_selector = None
+        self._roi_motion_cid = None
+
+        # Button for dragging a line across an image to show the profile along it, and the width that is averaged
+        self.profile_button = QToolButton()
+        self.profile_button.setText("Profile")
+        self.profile_button.setCheckable(True)
+        self.profile_button.setToolTip("Drag a line across the image to plot the values along it")
+        self.profile_button.toggled.connect(self._toggle_profile)
+
+        self.profile_width_spinbox = QSpinBox()
+        self.profile_width_spinbox.setPrefix("Width ")
+        self.profile_width_spinbox.setRange(1, 101)
+        self.profile_width_spinbox.setToolTip("Average this many parallel lines across the profile")
+        self.profile_width_spinbox.valueChanged.connect(self._schedule_profile)
+
+        self.profile_widget = ProfileWidget()
+        self.profile_widget.hide()
+
+        self._profile_line = None
+        self._profile_ends = None
+        self._profile_background = None
+
+        # Profiles are requested at most once per screen refresh while the line is dragged
+        screen = QGuiApplication.primaryScreen()
+        refresh_rate = screen.refreshRate() if screen is not None and screen.refreshRate() > 0 else 60
+
+        self._profile_timer = QTimer()
+        self._profile_timer.setSingleShot(True)
+        self._profile_timer.setInterval(int(1000 / refresh_rate))
+        self._profile_timer.timeout.connect(lambda: self._presenter.notify(Command.PROFILECHANGE))
+
+        self.mpl_connect("button_press_event", self._on_profile_press)
+        self.mpl_connect("motion_notify_event", self._on_profile_drag)
+        self.mpl_connect("button_release_event", self._on_profile_release)
+
+        # Button with a menu for writing the plotted slice, the region of interest or the whole element to a file
+        self.export_button = QToolButton()
+        self.export_button.setText("Export")
+        self.export_button.setPopupMode(QToolButton.InstantPopup)
+        self.export_button.setToolTip("Write the plotted data to a NetCDF or NumPy file")
+
+        export_menu = QMenu(self.export_button)
+        export_menu.addAction("Slice...", lambda: self._choose_export_file(ExportTool.SLICE))
+        export_menu.addAction("Region of interest...", lambda: self._choose_export_file(ExportTool.ROI))
+        export_menu.addAction("Whole element...", lambda: self._choose_export_file(ExportTool.VARIABLE))
+        self.export_button.setMenu(export_menu)
+
+        self._export_request = None
 
-        self.im = self.ax.imshow(arr)
+        # Position of the cursor in data coordinates while it is over the plot
+        self._cursor = None
+        self.mpl_connect("motion_notify_event", self._on_motion)
+        self.mpl_connect("axes_leave_event", self._on_leave)
+
+        # Overlaid traces are decimated again at most once per screen refresh while the view is zoomed or panned
+        self._viewport_timer = QTimer()
+        self._viewport_timer.setSingleShot(True)
+        self._viewport_timer.setInterval(int(1000 / refresh_rate))
+        self._viewport_timer.timeout.connect(lambda: self._presenter.notify(Command.VIEWPORTCHANGE))
+        self.mpl_connect("resize_event", lambda event: self._on_resize())
+
+    def create_toolbar(self, parent=None):
+        """ Creates a toolbar containing the controls for the plot. """
+
+        toolbar = QToolBar("Plot tools", parent)
+        toolbar.addWidget(self.rebin_spinbox)
+        toolbar.addWidget(self.roi_button)
+        toolbar.addWidget(self.profile_button)
+        toolbar.addWidget(self.profile_width_spinbox)
+        toolbar.addWidget(self.export_button)
+        return toolbar
+
+    def plot_image(self, arr, extent=None, clim=None, transpose=False):
+
+        # Transposing is a view, so arrays are drawn with the X axis along either of their dimensions without a copy.
+        # Tiles and replacement images are given in the same order as the image.
+        self._transpose = transpose
+        self.im = self.ax.imshow(self._oriented(arr), extent=extent, clim=clim)
         self.cbar = self.figure.colorbar(self.im)
+        self._image_tiles = []
+        self._create_roi_selector()
+        self._reset_profile()
+
+    def add_image_tile(self, arr, extent):
+
+        # Adding an image zooms to it, so the view is kept as it was, whether or not it has been zoomed
+        x_limits, y_limits = self.ax.get_xlim(), self.ax.get_ylim()
+
+        # Tiles share the colour map and limits of the image underneath them
+        self._image_tiles.append(self.ax.imshow(self._oriented(arr), extent=extent, cmap=self.im.cmap, norm=self.im.norm))
+
+        self.ax.set_xlim(x_limits)
+        self.ax.set_ylim(y_limits)
+
+    def set_image(self, arr):
+
+        for tile in self._image_tiles:
+            tile.remove()
+
+        self._image_tiles = []
+        self.im.set_data(self._oriented(arr))
+
+    def _oriented(self, arr):
+
+        return arr.T if self._transpose else arr
+
+    def _create_roi_selector(self):
+        """ Creates a selector for the current image, as clearing the axes removes the previous one. """
+
+        self._remove_roi_selector()
+
+        self.roi_selector = RectangleSelector(self.ax, lambda press, release: self._presenter.notify(Command.ROICHANGE),
+                                              useblit=True, interactive=True)
+        self.roi_selector.set_active(self.roi_button.isChecked())
+
+        # Connected after the selector so that its extents have already been updated when the statistics are requested
+        self._roi_motion_cid = self.mpl_connect("motion_notify_event", self._on_roi_motion)
+
+    def _on_motion(self, event):
+
+        # Dragging is left to the navigation and ROI tools
+        if event.inaxes is not self.ax or event.button is not None:
+            return
+
+        self._cursor = (event.xdata, event.ydata)
+        self._presenter.notify(Command.CURSORMOVE)
+
+    def _on_leave(self, event):
+
+        self._cursor = None
+
+    def get_cursor(self):
+        return self._cursor
+
+    def _remove_roi_selector(self):
+
+        if self.roi_selector is not None:
+            self.roi_selector.disconnect_events()
+            self.mpl_disconnect(self._roi_motion_cid)
+            self.roi_selector = None
+
+    def _on_roi_motion(self, event):
+
+        if self.roi_selector.active and event.button is not None:
+            self._presenter.notify(Command.ROICHANGE)
+
+    def _toggle_roi(self, checked):
+
+        if checked:
+            self.profile_button.setChecked(False)
+
+        if self.roi_selector is None:
+            return
+
+        self.roi_selector.set_active(checked)
+
+        if not checked:
+            self.roi_selector.set_visible(False)
+            self.draw_idle()
+
+    def get_roi(self):
+
+        if self.roi_selector is None or not self.roi_selector.active:
+            return None
+
+        x_min, x_max, y_min, y_max = self.roi_selector.extents
+
+        if x_min == x_max or y_min == y_max:
+            return None
+
+        return x_min, x_max, y_min, y_max
+
+    def _toggle_profile(self, checked):
+
+        if checked:
+            self.roi_button.setChecked(False)
+
+        self.profile_widget.setVisible(checked)
 
-    def plot_line(self, arr):
+        if not checked and self._profile_line is not None:
+            self._profile_line.remove()
+            self._reset_profile()
+            self.draw_idle()
+
+    def _reset_profile(self):
+        """ Forgets the profile line, whose artist is removed when the axes are cleared, and the profile plot. """
+
+        self._profile_line = None
+        self._profile_ends = None
+        self.profile_widget.clear()
+
+    def _on_profile_press(self, event):
+
+        if not self.profile_button.isChecked() or event.inaxes is not self.ax or self.im is None or event.button != 1:
+            return
+
+        start = (event.xdata, event.ydata)
+        self._profile_ends = [start, start]
+
+        if self._profile_line is None:
+            self._profile_line = Line2D([], [], color="white", linewidth=1)
+            self.ax.add_line(self._profile_line)
+
+        # Draw everything except the line once, so that dragging only needs to redraw the line
+        self._profile_line.set_animated(True)
+        self.draw()
+        self._profile_background = self.copy_from_bbox(self.ax.bbox)
+
+        self._update_profile_line()
+
+    def _on_profile_drag(self, event):
+
+        if self._profile_background is None or event.inaxes is not self.ax:
+            return
+
+        self._profile_ends[1] = (event.xdata, event.ydata)
+        self._update_profile_line()
+        self._schedule_profile()
+
+    def _on_profile_release(self, event):
+
+        if self._profile_background is None:
+            return
+
+        self._profile_background = None
+        self._profile_line.set_animated(False)
+        self.draw_idle()
+        self._schedule_profile()
+
+    def _update_profile_line(self):
+
+        (x0, y0), (x1, y1) = self._profile_ends
+        self._profile_line.set_data([x0, x1], [y0, y1])
+
+        self.restore_region(self._profile_background)
+        self.ax.draw_artist(self._profile_line)
+        self.blit(self.ax.bbox)
+
+    def _schedule_profile(self):
+
+        if not self._profile_timer.isActive():
+            self._profile_timer.start()
+
+    def get_profile_line(self):
+
+        if not self.profile_button.isChecked() or self._profile_ends is None:
+            return None
+
+        start, end = self._profile_ends
+        return None if start == end else (start, end)
+
+    def get_profile_width(self):
+        return self.profile_width_spinbox.value()
+
+    def plot_profile(self, distance, values):
+        self.profile_widget.plot(distance, values)
+
+    def plot_line(self, arr, x=None):
+
+        self._remove_roi_selector()
+        self._reset_profile()
+
+        if x is None:
+            self.line = self.ax.plot(arr)
+        else:
+            self.line = self.ax.plot(x, arr)
 
-        self.line = self.ax.plot(arr)
         self.ax.set_aspect('auto')
 
+    def plot_overlay(self, traces):
+
+        self._remove_roi_selector()
+        self._reset_profile()
+
+        self.line = [self.ax.plot(x, y, label=key)[0] for key, x, y in traces]
+        self.ax.legend()
+        self.ax.set_aspect('auto')
+
+        # Clearing the axes removes their callbacks, so this is connected again for each overlay
+        self.ax.callbacks.connect("xlim_changed", lambda ax: self._schedule_viewport())
+
+    def update_overlay(self, traces):
+
+        for line, (_, x, y) in zip(self.line, traces):
+            line.set_data(x, y)
+
+    def _on_resize(self):
+
+        self._presenter.notify(Command.RESIZE)
+        self._schedule_viewport()
+
+    def _schedule_viewport(self):
+
+        if not self._viewport_timer.isActive():
+            self._viewport_timer.start()
+
+    def get_viewport(self):
+
+        x_min, x_max = self.ax.get_xlim()
+        return min(x_min, x_max), max(x_min, x_max), max(1, int(self.ax.bbox.width))
+
+    def _choose_export_file(self, scope):
+
+        file_path, file_filter = QFileDialog.getSaveFileName(self, "Export", "", "NetCDF (*.nc);;NumPy (*.npy)")
+
+        # Add the extension of the chosen format if the name doesn't have one
+        if file_path and not file_path.lower().endswith((ExportTool.NETCDF_EXTENSION, ExportTool.NUMPY_EXTENSION)):
+            file_path += ExportTool.NUMPY_EXTENSION if "npy" in file_filter else ExportTool.NETCDF_EXTENSION
+
+        self._export_request = (scope, file_path) if file_path else None
+        self._presenter.notify(Command.EXPORTREQUEST)
+
+    def get_export_request(self):
+        return self._export_request
+
+    def set_clim(self, clim):
+        self.im.set_clim(clim)
+
+    def get_rebin_factor(self):
+        return self.rebin_spinbox.value()
+
     def draw_plot(self):
         self.draw()
 
+    def get_colormap(self):
+        return None if self.im is None else self.im.cmap.name
+
+    def get_frame_size(self):
+        return self.get_width_height(physical=True)
+
+    def capture_frame(self):
+        return self.copy_from_bbox(self.figure.bbox)
+
+    def restore_frame(self, frame):
+
+        # The aspect ratio of the axes is applied when they are drawn, and the cursor position depends on it
+        for ax in self.figure.axes:
+            ax.apply_aspect()
+
+        self.restore_region(frame)
+        self.blit(self.figure.bbox)
+
+        # Tools that blit over the plot, such as the ROI selector, take their background from the drawn canvas
+        self.callbacks.process("draw_event", DrawEvent("draw_event", self, self.get_renderer()))
+
     def get_presenter(self):
         return self._presenter
 
@@ -0,0 +1,35 @@
+from matplotlib.backends.backend_qt5agg import FigureCanvas
+from matplotlib.figure import Figure
+
+class ProfileWidget(FigureCanvas):
+    """ A small plot of the profile along the line that is drawn on the image in a PlotWidget. """
+
+    def __init__(self):
+        self.figure = Figure()
+        self.ax = self.figure.add_subplot(1, 1, 1)
+        FigureCanvas.__init__(self, self.figure)
+
+        self.line = None
+        self.setFixedHeight(200)
+
+    def plot(self, distance, values):
+
+        if self.line is None:
+            self.line, = self.ax.plot(distance, values)
+            self.ax.set_xlabel("distance along line")
+        else:
+            self.line.set_data(distance, values)
+
+        self.ax.relim()
+        self.ax.autoscale_view()
+        self.draw_idle()
+
+    def clear(self):
+
+        # Clearing the axes takes a while, and every new image clears the profile whether or not one was drawn
+        if self.line is None:
+            return
+
+        self.ax.cla()
+        self.line = None
+        self.draw_idle()
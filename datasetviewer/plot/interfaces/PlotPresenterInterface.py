@@ -6,6 +6,10 @@ class PlotPresenterInterface(ABC):
     def create_default_plot(self, data):
         pass
 
+    @abstractmethod
+    def create_overlay_plot(self, keys):
+        pass
+
     @abstractmethod
     def _clear_plot(self):
         pass
@@ -21,3 +25,7 @@ class PlotPresenterInterface(ABC):
     @abstractmethod
     def set_dict(self, dict):
         pass
+
+    @abstractmethod
+    def notify(self, command):
+        pass
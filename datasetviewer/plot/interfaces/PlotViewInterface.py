@@ -9,11 +9,19 @@ class Meta(ABCMeta, type(QtCore.QObject)):
 class PlotViewInterface(with_metaclass(Meta)):
 
     @abstractmethod
-    def plot_image(self, arr):
+    def plot_image(self, arr, extent=None, clim=None, transpose=False):
         pass
 
     @abstractmethod
-    def plot_line(self, arr):
+    def add_image_tile(self, arr, extent):
+        pass
+
+    @abstractmethod
+    def set_image(self, arr):
+        pass
+
+    @abstractmethod
+    def plot_line(self, arr, x=None):
         pass
 
     @abstractmethod
@@ -31,3 +39,63 @@ class PlotViewInterface(with_metaclass(Meta)):
     @abstractmethod
     def draw_plot(self):
         pass
+
+    @abstractmethod
+    def get_rebin_factor(self):
+        pass
+
+    @abstractmethod
+    def get_roi(self):
+        pass
+
+    @abstractmethod
+    def set_clim(self, clim):
+        pass
+
+    @abstractmethod
+    def get_cursor(self):
+        pass
+
+    @abstractmethod
+    def get_profile_line(self):
+        pass
+
+    @abstractmethod
+    def get_profile_width(self):
+        pass
+
+    @abstractmethod
+    def plot_profile(self, distance, values):
+        pass
+
+    @abstractmethod
+    def plot_overlay(self, traces):
+        pass
+
+    @abstractmethod
+    def update_overlay(self, traces):
+        pass
+
+    @abstractmethod
+    def get_viewport(self):
+        pass
+
+    @abstractmethod
+    def get_export_request(self):
+        pass
+
+    @abstractmethod
+    def get_colormap(self):
+        pass
+
+    @abstractmethod
+    def get_frame_size(self):
+        pass
+
+    @abstractmethod
+    def capture_frame(self):
+        pass
+
+    @abstractmethod
+    def restore_frame(self, frame):
+        pass
@@ -1,6 +1,7 @@
 from datasetviewer.preview.interfaces.PreviewPresenterInterface import PreviewPresenterInterface
 from datasetviewer.mainview.interfaces.MainViewPresenterInterface import MainViewPresenterInterface
 from datasetviewer.preview.Command import Command
+import datasetviewer.profiling.Tracer as Tracer
 
 class PreviewPresenter(PreviewPresenterInterface):
     """The subpresenter responsible for managing a PreviewView and providing it with the information that it will display.
@@ -36,11 +37,16 @@ class PreviewPresenter(PreviewPresenterInterface):
 
         """
 
-        self._dict = dict
-        self._view.clear_preview()
-        self._view.reset_selection()
-        self._populate_preview_list()
-        self._view.select_first_item()
+        with Tracer.span("preview_set_dict"):
+
+            self._dict = dict
+            self._view.clear_preview()
+            self._view.reset_selection()
+
+            with Tracer.span("populate_preview"):
+                self._populate_preview_list()
+
+            self._view.select_first_item()
 
     def register_master(self, master):
         """
@@ -115,8 +121,13 @@ class PreviewPresenter(PreviewPresenterInterface):
 
             # Trim the dimension information from the string
             key = selection.text().split("\n")[0]
+            keys = [item.text().split("\n")[0] for item in self._view.get_selected_items()]
 
-            self._main_presenter.create_default_plot(key)
+            # Several selected elements are plotted together
+            if len(keys) > 1:
+                self._main_presenter.create_overlay_plot(keys)
+            else:
+                self._main_presenter.create_default_plot(key)
 
         else:
             raise ValueError("PreviewPresenter received an unrecognised command: {}".format(str(command)))
@@ -2,7 +2,7 @@ from datasetviewer.preview.interfaces.PreviewViewInterface import PreviewViewInt
 from datasetviewer.preview.PreviewPresenter import PreviewPresenter
 from datasetviewer.preview.Command import Command
 
-from PyQt5.QtWidgets import QListWidget
+from PyQt5.QtWidgets import QAbstractItemView, QListWidget
 
 class PreviewWidget(PreviewViewInterface, QListWidget):
 
@@ -17,6 +17,9 @@ class PreviewWidget(PreviewViewInterface, QListWidget):
 
         self.setMinimumWidth(200)
 
+        # Ctrl or Shift-clicking several elements overlays them
+        self.setSelectionMode(QAbstractItemView.ExtendedSelection)
+
     def reset_selection(self):
         self._selected_item = None
 
@@ -30,11 +33,19 @@ class PreviewWidget(PreviewViewInterface, QListWidget):
     def get_selected_item(self):
         return self._selected_item
 
+    def get_selected_items(self):
+        return self.selectedItems()
+
     def get_presenter(self):
         return self._presenter
 
     def clear_preview(self):
+
+        # Clearing the list reports a change of selection, which would plot an element of the previous dataset. Signals
+        # that a caller has already blocked stay blocked.
+        previous = self.blockSignals(True)
         self.clear()
+        self.blockSignals(previous)
 
     def select_first_item(self):
         self.setCurrentItem(self.item(0))
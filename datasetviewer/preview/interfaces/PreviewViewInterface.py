@@ -28,6 +28,10 @@ class PreviewViewInterface(with_metaclass(Meta)):
     def get_selected_item(self):
         pass
 
+    @abstractmethod
+    def get_selected_items(self):
+        pass
+
     @abstractmethod
     def clear_preview(self):
         pass
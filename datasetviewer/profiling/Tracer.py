@@ -0,0 +1,270 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+
+""" Lightweight timing spans for the hot paths of the viewer. Spans are only recorded once `enable` has been called;
+    otherwise `span` hands out a shared object whose enter and exit methods do nothing, so instrumented code pays for
+    little more than a function call. Completed spans are kept in Chrome trace format ("X" events) and can be written to
+    a JSON file that opens in chrome://tracing or Perfetto. Copies of large arrays can be counted in the same way, by the
+    step that made them, so that redundant allocations show up. """
+
+# The maximum number of trace events that are kept in memory
+MAX_EVENTS = 100000
+
+_enabled = False
+_trace_path = None
+_epoch = 0.0
+_events = deque(maxlen=MAX_EVENTS)
+_lock = threading.Lock()
+_local = threading.local()
+_last_breakdown = []
+_copies = {}
+_listener = None
+
+class _NullSpan(object):
+    """ Span that is handed out when tracing is disabled. """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+_NULL_SPAN = _NullSpan()
+
+class _Span(object):
+    """A timed region of code. Spans that are opened while another span is open on the same thread become its children.
+
+    Args:
+        name (str): The name that appears in the breakdown and in the trace file.
+
+    """
+
+    __slots__ = ("name", "start", "duration", "children")
+
+    def __init__(self, name):
+
+        self.name = name
+        self.start = 0.0
+        self.duration = 0.0
+        self.children = []
+
+    def __enter__(self):
+
+        stack = _span_stack()
+
+        if stack:
+            stack[-1].children.append(self)
+
+        stack.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+
+        self.duration = time.perf_counter() - self.start
+
+        stack = _span_stack()
+        stack.pop()
+
+        _events.append({"name": self.name, "ph": "X", "pid": os.getpid(), "tid": threading.get_ident(),
+                        "ts": (self.start - _epoch) * 1e6, "dur": self.duration * 1e6})
+
+        # Once the outermost span on this thread closes the operation is complete
+        if not stack:
+            _finish_operation(self)
+
+        return False
+
+    def flatten(self, depth=0):
+        """
+        Returns:
+            list: (name, duration in seconds, depth) tuples for this span and all of its descendants in the order that
+                they were started.
+
+        """
+
+        entries = [(self.name, self.duration, depth)]
+
+        for child in self.children:
+            entries += child.flatten(depth + 1)
+
+        return entries
+
+def _span_stack():
+
+    try:
+        return _local.stack
+    except AttributeError:
+        _local.stack = []
+        return _local.stack
+
+def _finish_operation(root):
+    """ Store the breakdown of a completed operation and pass it to the listener. """
+
+    global _last_breakdown
+
+    breakdown = root.flatten()
+
+    with _lock:
+        _last_breakdown = breakdown
+        listener = _listener
+
+    if listener is not None:
+        listener(breakdown)
+
+def span(name):
+    """
+    Create a timing span to be used as a context manager.
+
+    Args:
+        name (str): The name of the span.
+
+    Returns:
+        A context manager that records the time spent inside it when tracing is enabled.
+
+    """
+
+    if not _enabled:
+        return _NULL_SPAN
+
+    return _Span(name)
+
+def enable(trace_path=None):
+    """
+    Start recording spans.
+
+    Args:
+        trace_path (str): The file that `write_trace` writes to when it is called without a path. Defaults to None.
+
+    """
+
+    global _enabled, _trace_path, _epoch
+
+    with _lock:
+        _events.clear()
+        _copies.clear()
+        _trace_path = trace_path
+        _epoch = time.perf_counter()
+        _enabled = True
+
+def disable():
+    """ Stop recording spans. Spans that have already been recorded are kept until tracing is enabled again. """
+
+    global _enabled
+    _enabled = False
+
+def is_enabled():
+    """
+    Returns:
+        bool: True if spans are being recorded, False otherwise.
+
+    """
+
+    return _enabled
+
+def set_listener(listener):
+    """
+    Set the function that is called with the breakdown of each completed operation. The listener is called on the
+    thread that ran the operation.
+
+    Args:
+        listener (callable): A function that accepts a breakdown, or None to remove the listener.
+
+    """
+
+    global _listener
+
+    with _lock:
+        _listener = listener
+
+def record_copy(step, nbytes):
+    """
+    Count a copy of an array. Copies are only counted while spans are being recorded.
+
+    Args:
+        step (str): The step that made the copy.
+        nbytes (int): The size of the copy in bytes.
+
+    """
+
+    if not _enabled:
+        return
+
+    with _lock:
+        count, total = _copies.get(step, (0, 0))
+        _copies[step] = (count + 1, total + nbytes)
+
+        # Shown as a counter track in the trace viewer
+        _events.append({"name": "copied bytes", "ph": "C", "pid": os.getpid(),
+                        "ts": (time.perf_counter() - _epoch) * 1e6, "args": {step: total + nbytes}})
+
+def copy_counts():
+    """
+    Returns:
+        dict: The number of copies and the number of bytes copied by each step since tracing was enabled.
+
+    """
+
+    with _lock:
+        return dict(_copies)
+
+def last_breakdown():
+    """
+    Returns:
+        list: The (name, duration in seconds, depth) tuples of the most recently completed operation.
+
+    """
+
+    with _lock:
+        return list(_last_breakdown)
+
+def format_breakdown(breakdown):
+    """
+    Convert a breakdown into a single line of text that is suitable for a status bar.
+
+    Args:
+        breakdown (list): (name, duration in seconds, depth) tuples with the operation as the first entry.
+
+    Returns:
+        str: The total time of the operation followed by the time of each of its steps.
+
+    """
+
+    if not breakdown:
+        return ""
+
+    name, duration, _ = breakdown[0]
+    text = "{}: {:.1f} ms".format(name, duration * 1e3)
+
+    steps = ["{} {:.1f} ms".format(step, step_duration * 1e3) for step, step_duration, _ in breakdown[1:]]
+
+    if steps:
+        text += " (" + ", ".join(steps) + ")"
+
+    return text
+
+def write_trace(trace_path=None):
+    """
+    Write the recorded spans to a Chrome trace format JSON file.
+
+    Args:
+        trace_path (str): The path of the file. Defaults to None, in which case the path given to `enable` is used.
+
+    Raises:
+        ValueError: If no path was given here or to `enable`.
+
+    """
+
+    trace_path = trace_path or _trace_path
+
+    if trace_path is None:
+        raise ValueError("Error in Tracer: No path was given for the trace file.")
+
+    with _lock:
+        events = list(_events)
+
+    with open(trace_path, "w") as trace_file:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, trace_file)
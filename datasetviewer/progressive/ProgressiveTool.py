@@ -0,0 +1,131 @@
+import time
+
+import numpy as np
+
+import datasetviewer.stats.StatsTool as StatsTool
+
+""" Tool for showing large slices progressively. A preview made of every nth element of the slice is read first, which
+    takes about the same time whatever the size of the slice as long as it only decompresses a bounded number of
+    chunks, and the slice is then read at full resolution one block of
+    rows at a time, so that the plot can be refined tile by tile while the rest is still being read. """
+
+# Slices with more elements than this are shown progressively. Smaller slices are read in one go.
+PROGRESSIVE_ELEMENTS = 2**22
+
+# Largest number of elements along each side of the preview
+PREVIEW_SIZE = 512
+
+# Largest number of chunks that a preview of a chunked variable decompresses
+PREVIEW_CHUNKS = 256
+
+# Number of elements that are read at a time
+DEFAULT_CHUNK_ELEMENTS = 2**20
+
+# Minimum number of seconds between reports of new tiles, so that the plot isn't redrawn for every block
+PROGRESS_INTERVAL = 0.1
+
+def is_progressive(shape):
+    """
+    Args:
+        shape (tuple): The shape of a slice.
+
+    Returns:
+        bool: True if the slice is large enough to be shown progressively, False otherwise.
+
+    """
+
+    return int(np.prod(shape)) > PROGRESSIVE_ELEMENTS
+
+def preview_steps(shape, size=PREVIEW_SIZE, chunks=None, max_chunks=PREVIEW_CHUNKS):
+    """
+    Find the stride of a preview along each dimension. Every element that a preview reads decompresses the whole chunk
+    that holds it, so the strides of a chunked array are made whole numbers of chunks, starting with the dimension that
+    has the most chunks, until the preview decompresses no more than `max_chunks` chunks.
+
+    Args:
+        shape (tuple): The shape of the array.
+        size (int): The largest number of elements along each side of the preview.
+        chunks (tuple): The shape of the chunks of the array. Defaults to None, in which case it isn't chunked.
+        max_chunks (int): The largest number of chunks that the preview may decompress.
+
+    Returns:
+        list: The stride along each dimension.
+
+    """
+
+    steps = [max(1, -(-length // size)) for length in shape]
+
+    if chunks is None:
+        return steps
+
+    def touched(dim):
+        return -(-shape[dim] // max(steps[dim], chunks[dim]))
+
+    while int(np.prod([touched(dim) for dim in range(len(shape))], dtype=np.int64)) > max(1, max_chunks):
+        dim = max(range(len(shape)), key=touched)
+        steps[dim] = chunks[dim] * (steps[dim] // chunks[dim] + 1)
+
+    return steps
+
+def read_preview(data, size=PREVIEW_SIZE, chunks=None, max_chunks=PREVIEW_CHUNKS):
+    """
+    Read every nth element of an array along each dimension, so that no side of the result is longer than `size`, and a
+    chunked array decompresses no more than `max_chunks` chunks.
+
+    Args:
+        data (xarray.DataArray): The array.
+        size (int): The largest number of elements along each side of the preview.
+        chunks (tuple): The shape of the chunks of the array. Defaults to None, in which case it isn't chunked.
+        max_chunks (int): The largest number of chunks that the preview may decompress.
+
+    Returns:
+        numpy.ndarray: The preview.
+
+    """
+
+    steps = tuple(slice(None, None, step) for step in preview_steps(data.shape, size, chunks, max_chunks))
+
+    return np.asarray(data[steps].values)
+
+def read_tiles(data, out, chunk_elements=DEFAULT_CHUNK_ELEMENTS, progress=None, is_cancelled=None, read=None):
+    """
+    Read an array into a buffer one block of rows along its first dimension at a time.
+
+    Args:
+        data (xarray.DataArray): The array.
+        out (numpy.ndarray): The buffer, with the same shape as the array.
+        chunk_elements (int): The target number of elements that are read at a time.
+        progress (callable): Called with the first and last row, exclusive, of the rows that have been read since the
+            last call. Calls are at least `PROGRESS_INTERVAL` seconds apart, apart from the last. Defaults to None.
+        is_cancelled (callable): Checked before each block is read. Reading stops when it returns True. Defaults to
+            None.
+        read (callable): Called with the first and last row, exclusive, of a block, and returns its values. Defaults to
+            None, in which case the block is read from the array.
+
+    Returns:
+        bool: True if the whole array was read, False if reading was cancelled.
+
+    """
+
+    if read is None:
+        def read(start, stop):
+            return data[start:stop].values
+
+    starts, rows = StatsTool.chunk_starts(data.shape, chunk_elements)
+    reported = 0
+    last_report = time.perf_counter()
+
+    for start in starts:
+
+        if is_cancelled is not None and is_cancelled():
+            return False
+
+        stop = min(start + rows, data.shape[0])
+        out[start:stop] = read(start, stop)
+
+        if progress is not None and (stop == data.shape[0] or time.perf_counter() - last_report >= PROGRESS_INTERVAL):
+            progress(reported, stop)
+            reported = stop
+            last_report = time.perf_counter()
+
+    return True
@@ -0,0 +1,244 @@
+import itertools
+import os
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from datasetviewer.fileloader.FileLoaderTool import netcdf_lock
+
+""" Tool for reading slices of compressed NetCDF4/HDF5 variables with every core. The netCDF and HDF5 libraries
+    decompress one chunk at a time on the calling thread. Here, the location of each chunk that a slice touches is
+    looked up with h5py, and the raw chunks are then read from the file and decompressed on a pool of threads, each of
+    which copies its part of the chunk straight into the output. zlib and LZ4 release the GIL while they decompress, so
+    the threads run in parallel. The chunks don't go through the netCDF chunk cache that ReadPlanTool sizes, so reading
+    the same slice again decompresses its chunks again. h5py is optional, as is the lz4 package for LZ4-compressed variables; variables that
+    can't be read this way are read through xarray as usual. """
+
+# Slices that touch fewer chunks than this are read through xarray, as the pool costs more than it saves
+PARALLEL_MIN_CHUNKS = 4
+
+# HDF5 filter identifiers
+_DEFLATE = 1
+_SHUFFLE = 2
+_FLETCHER32 = 3
+_LZ4 = 32004
+
+def _import_h5py():
+
+    try:
+        import h5py
+    except ImportError:
+        return None
+
+    return h5py
+
+def _import_lz4_block():
+
+    try:
+        import lz4.block
+    except ImportError:
+        return None
+
+    return lz4.block
+
+def _pipeline(dataset):
+    """ The (filter, parameters) of each filter of an HDF5 dataset in the order they were applied, or None if one of them
+        can't be decoded here. """
+
+    plist = dataset.id.get_create_plist()
+    pipeline = []
+
+    for position in range(plist.get_nfilters()):
+        code, _, values, _ = plist.get_filter(position)
+
+        if code not in (_DEFLATE, _SHUFFLE, _FLETCHER32) and not (code == _LZ4 and _import_lz4_block() is not None):
+            return None
+
+        pipeline.append((code, values))
+
+    return pipeline
+
+def can_read(data):
+    """
+    Find whether a variable can be read in parallel. It must be read from a chunked variable in an HDF5-based file,
+    without any scaling or type conversion by xarray, and with filters that can be decoded here.
+
+    Args:
+        data (xarray.DataArray): The variable, as it was opened from the file.
+
+    Returns:
+        bool: True if the variable can be read with `read_rows`, False otherwise.
+
+    """
+
+    h5py = _import_h5py()
+    source = data.encoding.get("source")
+
+    if h5py is None or not hasattr(os, "pread") or not source or not os.path.isfile(source):
+        return False
+
+    if data.encoding.get("chunksizes") is None or data.encoding.get("contiguous", False):
+        return False
+
+    # xarray changes the values or the type of variables that are scaled or that have integer fill values
+    if "scale_factor" in data.encoding or "add_offset" in data.encoding or data.encoding.get("dtype") != data.dtype:
+        return False
+
+    try:
+        with netcdf_lock():
+            with h5py.File(source, "r") as h5_file:
+                dataset = h5_file.get(data.name)
+
+                if not isinstance(dataset, h5py.Dataset) or dataset.shape != data.shape or dataset.chunks is None:
+                    return False
+
+                return _pipeline(dataset) is not None
+    except (OSError, ValueError):
+        return False
+
+def _decode(raw, pipeline, filter_mask, itemsize):
+    """ Undo the filters of a chunk in the reverse order to which they were applied, skipping those in its mask. """
+
+    for position in reversed(range(len(pipeline))):
+
+        if filter_mask & (1 << position):
+            continue
+
+        code = pipeline[position][0]
+
+        if code == _DEFLATE:
+            raw = zlib.decompress(raw)
+
+        elif code == _SHUFFLE:
+            # The first byte of every element comes first, then the second byte of every element, and so on. Bytes
+            # after the last whole element, such as a checksum, aren't shuffled.
+            elements = len(raw) // itemsize
+            shuffled = np.frombuffer(raw, dtype=np.uint8, count=elements * itemsize).reshape(itemsize, elements)
+            raw = shuffled.T.tobytes() + raw[elements * itemsize:]
+
+        elif code == _FLETCHER32:
+            raw = raw[:-4]
+
+        elif code == _LZ4:
+            raw = _decode_lz4(raw)
+
+    return raw
+
+def _decode_lz4(raw):
+    """ Decompress a chunk written by the HDF5 LZ4 filter: the total size and block size as big-endian integers,
+        followed by each block and its compressed size. Blocks that didn't shrink are stored as they are. """
+
+    lz4_block = _import_lz4_block()
+
+    total = int.from_bytes(raw[:8], "big")
+    block_size = int.from_bytes(raw[8:12], "big") or total
+    position = 12
+    blocks = []
+
+    while total > 0:
+
+        size = min(block_size, total)
+        compressed = int.from_bytes(raw[position:position + 4], "big")
+        block = raw[position + 4:position + 4 + compressed]
+
+        blocks.append(block if compressed == size else lz4_block.decompress(block, uncompressed_size=size))
+
+        position += 4 + compressed
+        total -= size
+
+    return b"".join(blocks)
+
+def _chunk_offsets(chunks, ranges):
+    """ The first element of each chunk that overlaps a range of each dimension, in the order the chunks are stored. """
+
+    return itertools.product(*[range(start // chunk * chunk, stop, chunk)
+                               for (start, stop), chunk in zip(ranges, chunks)])
+
+def read_rows(data, selection, start=0, stop=None, max_workers=None):
+    """
+    Read a slice of a variable, or a range of rows of it, by decompressing its chunks in parallel. `can_read` must
+    return True for the variable.
+
+    Args:
+        data (xarray.DataArray): The variable, as it was opened from the file.
+        selection (dict): The index of each dimension that is sliced away. The other dimensions are read whole.
+        start (int): The first row along the first dimension that isn't sliced away. Defaults to 0.
+        stop (int): The row after the last row. Defaults to None, in which case every row is read.
+        max_workers (int): The number of threads that decompress chunks. Defaults to None, in which case the number of
+            CPUs is used.
+
+    Returns:
+        numpy.ndarray: The values of the slice, masked in the same way as xarray masks them.
+
+    """
+
+    h5py = _import_h5py()
+    kept = [dim for dim in data.dims if dim not in selection]
+    stop = data.shape[data.dims.index(kept[0])] if stop is None and kept else stop
+
+    ranges = []
+
+    for dim, length in zip(data.dims, data.shape):
+        if dim in selection:
+            ranges.append((selection[dim], selection[dim] + 1))
+        elif dim == kept[0]:
+            ranges.append((start, stop))
+        else:
+            ranges.append((0, length))
+
+    out = np.empty([high - low for (low, high), dim in zip(ranges, data.dims) if dim not in selection], dtype=data.dtype)
+
+    # Finding the chunks goes through the HDF5 library, which isn't thread-safe
+    with netcdf_lock():
+        with h5py.File(data.encoding["source"], "r") as h5_file:
+            dataset = h5_file[data.name]
+            chunks = dataset.chunks
+            stored_dtype = dataset.dtype
+            fill_value = dataset.fillvalue
+            pipeline = _pipeline(dataset)
+            infos = [dataset.id.get_chunk_info_by_coord(offset)
+                     for offset in _chunk_offsets(chunks, ranges)]
+
+    def read_chunk(info, fd):
+
+        if info.byte_offset is None:
+            # Chunks that were never written hold the fill value
+            block = np.full(chunks, fill_value, dtype=stored_dtype)
+        else:
+            raw = _decode(os.pread(fd, info.size, info.byte_offset), pipeline, info.filter_mask, stored_dtype.itemsize)
+            block = np.frombuffer(raw, dtype=stored_dtype).reshape(chunks)
+
+        block_index = []
+        out_index = []
+
+        for dim, offset, chunk, (first, last) in zip(data.dims, info.chunk_offset, chunks, ranges):
+
+            low, high = max(first, offset), min(last, offset + chunk)
+            block_index.append(slice(low - offset, high - offset) if dim not in selection else low - offset)
+
+            if dim not in selection:
+                out_index.append(slice(low - first, high - first))
+
+        out[tuple(out_index)] = block[tuple(block_index)]
+
+    fd = os.open(data.encoding["source"], os.O_RDONLY)
+
+    try:
+        # Each thread holds a decompressed chunk, so there are no more of them than there are cores
+        with ThreadPoolExecutor(max_workers=max_workers or os.cpu_count()) as pool:
+            # Consuming the results raises the first exception of any of the reads
+            list(pool.map(lambda info: read_chunk(info, fd), infos))
+    finally:
+        os.close(fd)
+
+    # xarray shows fill values and missing values as NaN
+    if np.issubdtype(out.dtype, np.floating):
+        for key in ("_FillValue", "missing_value"):
+
+            value = data.encoding.get(key)
+
+            if value is not None and not np.isnan(value):
+                out[out == value] = np.nan
+
+    return out
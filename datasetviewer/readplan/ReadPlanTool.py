@@ -0,0 +1,274 @@
+from collections import namedtuple
+
+import numpy as np
+
+import datasetviewer.stats.StatsTool as StatsTool
+import datasetviewer.profiling.Tracer as Tracer
+import datasetviewer.readplan.ParallelReadTool as ParallelReadTool
+from datasetviewer.fileloader.FileLoaderTool import netcdf_lock
+from datasetviewer.cache.MemoryGovernor import get_governor, Priority
+
+""" Tool for reading slices of chunked NetCDF4/HDF5 variables along the grain of their chunks. Each chunk that a slice
+    touches is decompressed whole, so a slice that cuts across the chunks can decompress far more data than it shows.
+    A plan finds the chunks that a slice touches, reads the slice in blocks of rows that start and end on chunk
+    boundaries in the order that the chunks are stored, and sizes the library's chunk cache to hold the chunks of the
+    slice, so that neighbouring slices are read from the cache rather than decompressed again. """
+
+# Number of elements that are read at a time, rounded to whole chunks
+DEFAULT_BLOCK_ELEMENTS = StatsTool.DEFAULT_CHUNK_ELEMENTS
+
+# Largest chunk cache that is requested for a single variable
+MAX_CACHE_BYTES = 256 * 2**20
+
+# Fraction of fully read chunks that the library evicts first, as recommended for reads that don't revisit chunks
+CACHE_PREEMPTION = 0.75
+
+# How a slice is read. `block_rows` is the number of rows of the first dimension that are read at a time, `chunks_read`
+# the number of chunks that the slice touches, `bytes_read` the number of bytes that are decompressed, `bytes_displayed`
+# the number of bytes in the slice, and `cache_bytes` the chunk cache that is needed, or 0 if the variable isn't
+# chunked.
+ReadPlan = namedtuple("ReadPlan", ["block_rows", "chunk_shape", "chunks_read", "bytes_read", "bytes_displayed",
+                                   "cache_bytes"])
+
+# The library's own chunk cache settings of each variable, keyed by its file and name, captured before the cache is first
+# resized so that it can be restored however many times it has been resized since. Guarded by the NetCDF lock.
+_default_caches = {}
+
+def chunk_shape(data):
+    """
+    Find the shape of the chunks that a variable is stored in.
+
+    Args:
+        data (xarray.DataArray): The variable, as it was opened from the file.
+
+    Returns:
+        tuple: The shape of the chunks, or None if the variable is stored contiguously or isn't read from a NetCDF4 file.
+
+    """
+
+    chunks = data.encoding.get("chunksizes")
+
+    if chunks is None or data.encoding.get("contiguous", False) or len(chunks) != data.ndim:
+        return None
+
+    return tuple(int(chunk) for chunk in chunks)
+
+def amplification(plan):
+    """
+    Args:
+        plan (ReadPlan): The plan of a slice.
+
+    Returns:
+        float: The number of bytes that are decompressed for each byte of the slice.
+
+    """
+
+    return plan.bytes_read / max(plan.bytes_displayed, 1)
+
+def plan_slice(data, selection, block_elements=DEFAULT_BLOCK_ELEMENTS):
+    """
+    Plan the reads of a slice of a variable.
+
+    Args:
+        data (xarray.DataArray): The variable, as it was opened from the file.
+        selection (dict): The index of each dimension that is sliced away. The other dimensions are read whole.
+        block_elements (int): The target number of elements in each block of rows.
+
+    Returns:
+        ReadPlan: The plan.
+
+    """
+
+    itemsize = data.dtype.itemsize
+    slice_shape = tuple(length for dim, length in zip(data.dims, data.shape) if dim not in selection)
+    row_elements = int(np.prod(slice_shape[1:], dtype=np.int64))
+    bytes_displayed = int(np.prod(slice_shape, dtype=np.int64)) * itemsize
+    chunks = chunk_shape(data)
+
+    if chunks is None or not slice_shape:
+        _, rows = StatsTool.chunk_starts(slice_shape or (1,), block_elements)
+        return ReadPlan(rows, None, 0, bytes_displayed, bytes_displayed, 0)
+
+    # A dimension that is sliced away touches one chunk, and one that is read whole touches all of them
+    touched = [1 if dim in selection else -(-length // chunk) for dim, length, chunk in zip(data.dims, data.shape, chunks)]
+    chunk_bytes = int(np.prod(chunks, dtype=np.int64)) * itemsize
+    chunks_read = int(np.prod(touched, dtype=np.int64))
+
+    # Blocks of rows start and end on chunk boundaries, so that every chunk is decompressed by a single block
+    first = data.dims.index(next(dim for dim in data.dims if dim not in selection))
+    rows = chunks[first] * max(1, block_elements // max(1, chunks[first] * row_elements))
+    rows = min(rows, -(-slice_shape[0] // chunks[first]) * chunks[first])
+
+    # The cache holds the chunks of the whole slice if it can, and otherwise the chunks of one block
+    chunks_per_block = chunks_read // touched[first] * (rows // chunks[first])
+    cache_bytes = max(min(chunks_read * chunk_bytes, MAX_CACHE_BYTES), chunks_per_block * chunk_bytes)
+
+    return ReadPlan(rows, chunks, chunks_read, chunks_read * chunk_bytes, bytes_displayed, cache_bytes)
+
+def _netcdf_variable(data):
+    """ Find the netCDF4 variable that xarray reads an array from, or None if it isn't read from a NetCDF file. """
+
+    array = data.variable._data
+
+    while array is not None:
+
+        if hasattr(array, "datastore") and hasattr(array, "get_array"):
+            return array.get_array()
+
+        array = getattr(array, "array", None)
+
+    return None
+
+def size_chunk_cache(data, plan):
+    """
+    Set the size of the library's chunk cache for a variable to fit a plan. The whole cache is accounted for by the
+    memory governor, which shrinks it back to the library's default when the memory is needed elsewhere. Caches are never
+    made smaller than the default, or smaller than a cache that was sized for an earlier plan and is still in place.
+
+    Args:
+        data (xarray.DataArray): The variable, as it was opened from the file.
+        plan (ReadPlan): The plan of the slice that is about to be read.
+
+    Returns:
+        bool: True if the cache was resized, False if the variable isn't chunked, isn't read from a NetCDF file, the
+            cache is already large enough, or there's no room for it.
+
+    """
+
+    if plan.cache_bytes == 0:
+        return False
+
+    # xarray takes the lock itself while it finds the variable
+    variable = _netcdf_variable(data)
+
+    if variable is None:
+        return False
+
+    key = ("chunk cache", data.encoding.get("source"), data.name)
+
+    with netcdf_lock():
+        if key not in _default_caches:
+            _default_caches[key] = variable.get_var_chunk_cache()
+
+        default_bytes, default_slots, default_preemption = _default_caches[key]
+        current_bytes = variable.get_var_chunk_cache()[0]
+
+    if plan.cache_bytes <= default_bytes:
+        return False
+
+    governor = get_governor()
+
+    if plan.cache_bytes <= current_bytes and governor.contains(key):
+        governor.touch(key)
+        return False
+
+    def shrink():
+        with netcdf_lock():
+            variable.set_var_chunk_cache(default_bytes, default_slots, default_preemption)
+
+    if not governor.register(key, plan.cache_bytes, "chunk cache", Priority.CACHED, shrink):
+        # The entry of an earlier plan is dropped by a failed registration, so its cache goes with it
+        shrink()
+        return False
+
+    # The library hashes chunks into this many slots, which should be a prime well above the number of chunks held
+    slots = _next_prime(max(default_slots, 10 * plan.cache_bytes // (plan.bytes_read // plan.chunks_read)))
+
+    with netcdf_lock():
+        variable.set_var_chunk_cache(plan.cache_bytes, slots, CACHE_PREEMPTION)
+
+    return True
+
+def _next_prime(n):
+
+    n = max(2, int(n))
+
+    while any(n % divisor == 0 for divisor in range(2, int(n ** 0.5) + 1)):
+        n += 1
+
+    return n
+
+def _reads_in_parallel(data, plan):
+
+    return plan.chunks_read >= ParallelReadTool.PARALLEL_MIN_CHUNKS and ParallelReadTool.can_read(data)
+
+def row_reader(data, selection, plan):
+    """
+    Choose how the rows of a slice are read. Slices of compressed variables that touch several chunks are decompressed in
+    parallel where possible, reading the chunks straight from the file. Otherwise they are read through xarray, after
+    sizing the chunk cache.
+
+    Args:
+        data (xarray.DataArray): The variable, as it was opened from the file.
+        selection (dict): The index of each dimension that is sliced away.
+        plan (ReadPlan): The plan of the slice.
+
+    Returns:
+        callable: Called with the first and last row, exclusive, of the slice, and returns their values.
+
+    """
+
+    if _reads_in_parallel(data, plan):
+        return lambda start, stop: ParallelReadTool.read_rows(data, selection, start, stop)
+
+    size_chunk_cache(data, plan)
+    arr = data.isel(selection)
+
+    return lambda start, stop: arr[start:stop].values
+
+def read_slice(data, selection, plan=None):
+    """
+    Read a slice of a variable in blocks of rows that follow its chunks, after sizing its chunk cache. Slices that can be
+    decompressed in parallel are read in one go instead, so that all of their chunks are decompressed at the same time.
+
+    Args:
+        data (xarray.DataArray): The variable.
+        selection (dict): The index of each dimension that is sliced away.
+        plan (ReadPlan): The plan of the slice. Defaults to None, in which case it is made here.
+
+    Returns:
+        xarray.DataArray: The slice, held in memory.
+
+    """
+
+    if plan is None:
+        plan = plan_slice(data, selection)
+
+    arr = data.isel(selection)
+
+    if arr.ndim == 0:
+        return arr.load()
+
+    if _reads_in_parallel(data, plan):
+        values = ParallelReadTool.read_rows(data, selection)
+        Tracer.record_copy("read_slice", values.nbytes)
+        return arr.copy(data=values)
+
+    size_chunk_cache(data, plan)
+
+    # A slice that is read in one block is kept as the library returns it, rather than copied into a buffer
+    if plan.block_rows >= arr.shape[0]:
+        values = np.asarray(arr.values)
+    else:
+        values = np.empty(arr.shape, dtype=arr.dtype)
+
+        for start in range(0, arr.shape[0], plan.block_rows):
+            values[start:start + plan.block_rows] = arr[start:start + plan.block_rows].values
+
+    Tracer.record_copy("read_slice", values.nbytes)
+
+    return arr.copy(data=values)
+
+def describe(plan):
+    """
+    Args:
+        plan (ReadPlan): The plan of a slice.
+
+    Returns:
+        str: The read amplification of the slice, for the status bar.
+
+    """
+
+    return "Read amplification {:.1f}x: {} chunks of {} decompressed, {:.1f} MB for {:.1f} MB shown".format(
+        amplification(plan), plan.chunks_read, "x".join(str(chunk) for chunk in plan.chunk_shape),
+        plan.bytes_read / 2**20, plan.bytes_displayed / 2**20)
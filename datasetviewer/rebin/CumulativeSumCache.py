@@ -0,0 +1,162 @@
+import threading
+
+import numpy as np
+
+import datasetviewer.rebin.RebinTool as RebinTool
+from datasetviewer.cache.MemoryGovernor import get_governor, Priority
+
+# Bytes of the variable that are read at a time while its cumulative sum is computed
+CHUNK_BYTES = 64 * 2**20
+
+class CumulativeSumCache(object):
+    """Keeps the cumulative sum of each variable along its first dimension so that rebinning it again is cheap. The sums
+    are registered with the MemoryGovernor and are dropped when it needs room. A sum is computed by `build`, which reads
+    the variable a chunk at a time and is meant to be run in the background.
+
+    Args:
+        governor (MemoryGovernor): The governor that the sums are registered with. Defaults to None, in which case the
+            process-wide governor is used.
+
+    Private Attributes:
+        _sums (dict): Cumulative sums keyed by variable key.
+        _building (set): The keys of the sums that are being computed. A key is removed if the governor evicts the sum
+            while it is computed, which stops the computation.
+
+    """
+
+    # Category under which the sums are reported to the MemoryGovernor
+    CATEGORY = "cumulative_sums"
+
+    def __init__(self, governor=None):
+
+        self._governor = governor or get_governor()
+        self._sums = {}
+        self._building = set()
+        self._lock = threading.Lock()
+
+    def _governor_key(self, key):
+
+        return (id(self), key)
+
+    def get(self, key):
+        """
+        Args:
+            key (str): The key of the variable.
+
+        Returns:
+            numpy.ndarray: The cumulative sum of the variable along its first dimension, or None if it hasn't been
+                computed.
+
+        """
+
+        with self._lock:
+            if key in self._sums:
+                self._governor.touch(self._governor_key(key))
+                return self._sums[key]
+
+        return None
+
+    def build(self, key, data, is_cancelled=None):
+        """
+        Compute the cumulative sum of a variable along its first dimension and keep it. The variable is read a chunk of
+        at most `CHUNK_BYTES` at a time, and the memory for the sum and for a chunk is reserved before anything is read.
+
+        Args:
+            key (str): The key of the variable.
+            data (xarray.DataArray): The variable's data.
+            is_cancelled (callable): Checked before each chunk is read. Computing stops when it returns True. Defaults to
+                None.
+
+        Returns:
+            numpy.ndarray: The cumulative sum, or None if it wouldn't fit within the memory budget, is already being
+                computed, or was cancelled or evicted before it was complete.
+
+        """
+
+        with self._lock:
+            if key in self._sums:
+                return self._sums[key]
+            if key in self._building:
+                return None
+            self._building.add(key)
+
+        row_elements = int(np.prod(data.shape[1:], dtype=np.int64))
+        rows = max(1, CHUNK_BYTES // max(1, row_elements * data.dtype.itemsize))
+        dtype = RebinTool.sum_dtype(data.dtype)
+
+        nbytes = (data.shape[0] + 1) * row_elements * dtype.itemsize
+        chunk_bytes = min(rows, data.shape[0]) * row_elements * data.dtype.itemsize
+
+        # Reserve the memory before reading the data so that nothing is computed if it won't fit
+        if not self._governor.register(self._governor_key(key), nbytes + chunk_bytes, self.CATEGORY, Priority.CACHED,
+                                       evict=lambda: self._discard(key)):
+            with self._lock:
+                self._building.discard(key)
+            return None
+
+        try:
+            cumsum = self._compute(key, data, rows, dtype, is_cancelled)
+        except BaseException:
+            self._governor.unregister(self._governor_key(key))
+            raise
+        finally:
+            with self._lock:
+                complete = key in self._building
+                self._building.discard(key)
+
+        if cumsum is None or not complete:
+            self._governor.unregister(self._governor_key(key))
+            return None
+
+        # Only the sum is kept once the chunks have been read
+        self._governor.register(self._governor_key(key), nbytes, self.CATEGORY, Priority.CACHED,
+                                evict=lambda: self._discard(key))
+
+        with self._lock:
+            self._sums[key] = cumsum
+
+        return cumsum
+
+    def _compute(self, key, data, rows, dtype, is_cancelled):
+        """ Sum the variable a chunk of `rows` rows at a time, carrying the total of the previous chunks forward. """
+
+        length = data.shape[0]
+        cumsum = np.zeros((length + 1,) + tuple(data.shape[1:]), dtype=dtype)
+
+        for start in range(0, length, rows):
+
+            with self._lock:
+                evicted = key not in self._building
+
+            if evicted or (is_cancelled is not None and is_cancelled()):
+                return None
+
+            stop = min(length, start + rows)
+            chunk = np.asarray(data[start:stop])
+
+            np.nancumsum(chunk, axis=0, dtype=dtype, out=cumsum[start + 1:stop + 1])
+            cumsum[start + 1:stop + 1] += cumsum[start]
+
+        return cumsum
+
+    def _discard(self, key):
+
+        with self._lock:
+            self._sums.pop(key, None)
+            self._building.discard(key)
+
+    def clear(self):
+        """ Drop every cumulative sum, and stop those that are being computed. Called when a new dataset is loaded. """
+
+        with self._lock:
+            keys = list(self._sums) + list(self._building)
+            self._sums.clear()
+            self._building.clear()
+
+        for key in keys:
+            self._governor.unregister(self._governor_key(key))
+
+    def __contains__(self, key):
+
+        with self._lock:
+            return key in self._sums
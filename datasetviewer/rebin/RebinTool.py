@@ -0,0 +1,110 @@
+import numpy as np
+
+""" Tool for rebinning arrays along an axis. A cumulative sum along the axis is computed once, after which the sums for
+    any bin width are found from the differences of its values at the bin edges. This takes a time proportional to the
+    number of output bins rather than the size of the array. """
+
+def sum_dtype(dtype):
+    """
+    Args:
+        dtype (numpy.dtype): The type of an array.
+
+    Returns:
+        numpy.dtype: The type that the array is summed as, which is int64 for integers and float64 for everything else.
+
+    """
+
+    return np.dtype(np.int64) if np.issubdtype(dtype, np.integer) else np.dtype(np.float64)
+
+def cumulative_sum(arr, axis=0):
+    """
+    Compute the cumulative sum of an array with a leading zero along the given axis. NaNs are treated as zero.
+
+    Args:
+        arr (numpy.ndarray): The array.
+        axis (int): The axis along which to sum. Defaults to 0.
+
+    Returns:
+        numpy.ndarray: An array that is one element longer than `arr` along `axis`. Integer arrays are summed as int64
+            and all other arrays as float64.
+
+    """
+
+    arr = np.asarray(arr)
+    dtype = sum_dtype(arr.dtype)
+
+    shape = list(arr.shape)
+    shape[axis] += 1
+
+    cumsum = np.zeros(shape, dtype=dtype)
+    inner = [slice(None)] * arr.ndim
+    inner[axis] = slice(1, None)
+
+    np.nancumsum(arr, axis=axis, dtype=dtype, out=cumsum[tuple(inner)])
+    return cumsum
+
+def bin_edges(length, factor):
+    """
+    Args:
+        length (int): The number of elements along the axis.
+        factor (int): The number of elements in each bin. The last bin is smaller if `length` isn't a multiple.
+
+    Returns:
+        numpy.ndarray: The indices of the bin edges, from 0 to `length`.
+
+    """
+
+    edges = np.arange(0, length, factor)
+    return np.append(edges, length)
+
+def bin_centres(length, factor):
+    """
+    Args:
+        length (int): The number of elements along the axis.
+        factor (int): The number of elements in each bin.
+
+    Returns:
+        numpy.ndarray: The position of the centre of each bin in the index units of the original axis.
+
+    """
+
+    edges = bin_edges(length, factor)
+    return (edges[:-1] + edges[1:] - 1) / 2.0
+
+def rebin_cumulative_sum(cumsum, factor, axis=0):
+    """
+    Rebin an array from its cumulative sum.
+
+    Args:
+        cumsum (numpy.ndarray): The result of `cumulative_sum`.
+        factor (int): The number of elements in each bin.
+        axis (int): The axis of the cumulative sum. Defaults to 0.
+
+    Returns:
+        numpy.ndarray: The sum of the elements in each bin.
+
+    """
+
+    edges = bin_edges(cumsum.shape[axis] - 1, factor)
+    return np.take(cumsum, edges[1:], axis=axis) - np.take(cumsum, edges[:-1], axis=axis)
+
+def rebin(arr, factor, axis=0):
+    """
+    Rebin an array directly. Used when a cumulative sum isn't available.
+
+    Args:
+        arr (numpy.ndarray): The array.
+        factor (int): The number of elements in each bin.
+        axis (int): The axis to rebin. Defaults to 0.
+
+    Returns:
+        numpy.ndarray: The sum of the elements in each bin, with NaNs treated as zero.
+
+    """
+
+    arr = np.asarray(arr)
+
+    if np.issubdtype(arr.dtype, np.floating):
+        arr = np.nan_to_num(arr)
+
+    return np.add.reduceat(arr, bin_edges(arr.shape[axis], factor)[:-1], axis=axis)
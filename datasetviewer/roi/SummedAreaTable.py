@@ -0,0 +1,155 @@
+from collections import namedtuple
+
+import numpy as np
+
+""" Summed-area tables (integral images) for finding statistics of rectangular regions of an image. Each table holds the
+    sum of every element above and to the left of a position, so the sum over any rectangle is found from the four
+    values at its corners, however large the rectangle is. The differences of the corners lose precision as the tables
+    grow, so the values are summed relative to the mean of the image, which keeps the table of squares small. """
+
+# Rounding error, relative to the corners of the table of squares, below which a variance is treated as zero
+ROUNDING_TOLERANCE = 64 * np.finfo(np.float64).eps
+
+# Statistics of the finite elements in a region
+RegionStats = namedtuple("RegionStats", ["count", "sum", "mean", "std"])
+
+def _integral(arr, dtype):
+    """ Compute the summed-area table of an array with a row and column of zeros in front. """
+
+    table = np.zeros((arr.shape[0] + 1, arr.shape[1] + 1), dtype=dtype)
+    np.cumsum(arr, axis=0, dtype=dtype, out=table[1:, 1:])
+    np.cumsum(table[1:, 1:], axis=1, out=table[1:, 1:])
+    return table
+
+def _index_range(low, high, origin, step, size):
+    """ Find the elements along one axis whose centres lie between two positions in data coordinates. """
+
+    low, high = sorted(((low - origin) / step, (high - origin) / step))
+
+    start = max(0, int(np.ceil(low - 0.5)))
+    stop = min(size, int(np.floor(high - 0.5)) + 1)
+
+    return start, max(start, stop)
+
+def roi_to_slices(roi, shape, extent=None):
+    """
+    Convert a rectangle in data coordinates to the rows and columns of a displayed image.
+
+    Args:
+        roi (tuple): The (x min, x max, y min, y max) corners of the rectangle.
+        shape (tuple): The (rows, columns) shape of the image.
+        extent (tuple): The (left, right, bottom, top) extent of the image, as passed to `imshow`. Defaults to None, in
+            which case the `imshow` default of one unit per element is used.
+
+    Returns:
+        tuple: The (start, stop) rows and (start, stop) columns of the elements whose centres are inside the rectangle.
+
+    """
+
+    rows, cols = shape
+
+    if extent is None:
+        extent = (-0.5, cols - 0.5, rows - 0.5, -0.5)
+
+    left, right, bottom, top = extent
+    x_min, x_max, y_min, y_max = roi
+
+    return (_index_range(y_min, y_max, top, (bottom - top) / rows, rows),
+            _index_range(x_min, x_max, left, (right - left) / cols, cols))
+
+class SummedAreaTable(object):
+    """Summed-area tables of the values, squared values and finite elements of an image. NaNs are left out of the
+    statistics.
+
+    Args:
+        arr (numpy.ndarray): A 2D array.
+
+    Private Attributes:
+        _offset: The mean of the finite elements, rounded to an integer for integer images, which is subtracted from the
+            values before they are summed.
+        _sums (numpy.ndarray): The table of values. Integer images are summed exactly as int64 without the offset, and
+            others as float64 with the offset subtracted.
+        _squares (numpy.ndarray): The table of squared differences from the offset.
+        _counts (numpy.ndarray): The table of finite elements, or None if every element is finite.
+
+    """
+
+    def __init__(self, arr):
+
+        arr = np.asarray(arr)
+
+        if arr.ndim != 2:
+            raise ValueError("Error: Summed-area tables need a 2D array, not {}D.".format(arr.ndim))
+
+        self.shape = arr.shape
+
+        self._integer = np.issubdtype(arr.dtype, np.integer)
+
+        if self._integer:
+            self._offset = int(np.round(arr.mean())) if arr.size else 0
+            self._sums = _integral(arr, np.int64)
+            self._counts = None
+            values = np.subtract(arr, self._offset, dtype=np.float64)
+        else:
+            finite = np.isfinite(arr)
+            self._offset = float(arr[finite].mean(dtype=np.float64)) if finite.any() else 0.0
+            values = np.where(finite, np.subtract(arr, self._offset, dtype=np.float64), 0.0)
+            self._sums = _integral(values, np.float64)
+            self._counts = None if finite.all() else _integral(finite, np.int64)
+
+        self._squares = _integral(np.square(values, out=values), np.float64)
+
+    @property
+    def nbytes(self):
+        """int: The memory used by the tables."""
+
+        return sum(table.nbytes for table in (self._sums, self._squares, self._counts) if table is not None)
+
+    @staticmethod
+    def _region(table, rows, cols):
+
+        (r0, r1), (c0, c1) = rows, cols
+        return table[r1, c1] - table[r0, c1] - table[r1, c0] + table[r0, c0]
+
+    def stats(self, rows, cols):
+        """
+        Find the statistics of a rectangular region.
+
+        Args:
+            rows (tuple): The (start, stop) rows of the region.
+            cols (tuple): The (start, stop) columns of the region.
+
+        Returns:
+            RegionStats: The number of finite elements and their sum, mean and standard deviation. The mean and standard
+                deviation are NaN for a region without finite elements.
+
+        """
+
+        if self._counts is None:
+            count = (rows[1] - rows[0]) * (cols[1] - cols[0])
+        else:
+            count = int(self._region(self._counts, rows, cols))
+
+        total = self._region(self._sums, rows, cols)
+
+        if self._integer:
+            shifted_mean = (total - self._offset * count) / count if count else np.nan
+        else:
+            shifted_mean = total / count if count else np.nan
+            total = total + self._offset * count
+
+        if count == 0:
+            return RegionStats(0, total, np.nan, np.nan)
+
+        mean_square = self._region(self._squares, rows, cols) / count
+        variance = mean_square - shifted_mean * shifted_mean
+
+        # The table differences are only accurate to the rounding error of the corners that they are taken from, so
+        # smaller variances can't be told apart from zero
+        (r0, r1), (c0, c1) = rows, cols
+        corners = np.abs(self._squares[[r0, r0, r1, r1], [c0, c1, c0, c1]]).sum()
+
+        if variance <= ROUNDING_TOLERANCE * corners / count:
+            variance = 0.0
+
+        return RegionStats(count, total, self._offset + shifted_mean, np.sqrt(variance))
@@ -0,0 +1,196 @@
+import math
+import threading
+from collections import namedtuple
+
+import numpy as np
+
+""" Tool for estimating percentiles of large arrays from a uniform random sample of their values. The array is read in
+    strided passes along its first dimension, so that the first pass already covers the whole array and later passes
+    fill in the rows between. The values of each pass are added to a fixed-size sample, from which percentiles are
+    found with a rank error bounded by the Dvoretzky-Kiefer-Wolfowitz inequality. """
+
+# Number of values that are kept in a sample
+DEFAULT_CAPACITY = 2**16
+
+# Number of elements that are read in each pass
+DEFAULT_PASS_ELEMENTS = 2**20
+
+# Percentiles used for the colour limits of images
+LOW_PERCENTILE = 1
+HIGH_PERCENTILE = 99
+
+# Probability with which the stated rank error holds
+CONFIDENCE = 0.99
+
+# Minimum number of seconds between reports of improved estimates
+PROGRESS_INTERVAL = 0.25
+
+# Estimated low and high percentiles, and the bound on the difference between the percentile that each value truly has
+# and the requested percentile, as a fraction of the number of values. The bound is zero for exact percentiles.
+Percentiles = namedtuple("Percentiles", ["low", "high", "rank_error"])
+
+def dkw_rank_error(sample_size, confidence=CONFIDENCE):
+    """
+    Find the largest difference between the empirical distribution of a uniform random sample and the distribution of
+    the population that it was drawn from, at the given confidence.
+
+    Args:
+        sample_size (int): The number of values in the sample.
+        confidence (float): The probability with which the bound holds.
+
+    Returns:
+        float: The bound as a fraction of the population.
+
+    """
+
+    if sample_size == 0:
+        return 1.0
+
+    return math.sqrt(math.log(2 / (1 - confidence)) / (2 * sample_size))
+
+class QuantileSketch(object):
+    """A uniform random sample without replacement of the finite values offered to it. Each value is given a random key
+    and the values with the smallest keys are kept, which allows whole chunks of values to be added with a few vectorised
+    operations.
+
+    Args:
+        capacity (int): The number of values that are kept. Defaults to `DEFAULT_CAPACITY`.
+        seed (int): Seed of the random key generator. Defaults to None.
+
+    Attributes:
+        seen (int): The number of finite values that have been offered.
+
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY, seed=None):
+
+        self.capacity = capacity
+        self.seen = 0
+
+        self._values = np.empty(0)
+        self._keys = np.empty(0)
+        self._random = np.random.default_rng(seed)
+        self._lock = threading.Lock()
+
+    def add(self, values):
+        """
+        Offer values to the sample. NaNs and infinities are ignored.
+
+        Args:
+            values (numpy.ndarray): The values.
+
+        """
+
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[np.isfinite(values)]
+
+        keys = self._random.random(values.size)
+
+        with self._lock:
+
+            self.seen += values.size
+
+            # Values whose keys are above the largest key of a full sample can't be kept
+            if self._keys.size == self.capacity:
+                keep = keys < self._keys.max()
+                values, keys = values[keep], keys[keep]
+
+            values = np.concatenate((self._values, values))
+            keys = np.concatenate((self._keys, keys))
+
+            if keys.size > self.capacity:
+                smallest = np.argpartition(keys, self.capacity - 1)[:self.capacity]
+                values, keys = values[smallest], keys[smallest]
+
+            self._values, self._keys = values, keys
+
+    @property
+    def size(self):
+        """int: The number of values in the sample."""
+
+        return self._values.size
+
+    def is_exact(self):
+        """
+        Returns:
+            bool: True if every value that was offered is in the sample, False otherwise.
+
+        """
+
+        return self.size == self.seen
+
+    def percentiles(self, low=LOW_PERCENTILE, high=HIGH_PERCENTILE, confidence=CONFIDENCE):
+        """
+        Estimate two percentiles of the values that have been offered.
+
+        Args:
+            low (float): The lower percentile.
+            high (float): The upper percentile.
+            confidence (float): The probability with which the rank error holds.
+
+        Returns:
+            Percentiles: The estimates and their rank error, or None if no values have been offered.
+
+        """
+
+        with self._lock:
+            values = self._values
+            exact = self.is_exact()
+
+        if values.size == 0:
+            return None
+
+        low_value, high_value = np.percentile(values, [low, high])
+        rank_error = 0.0 if exact else dkw_rank_error(values.size, confidence)
+
+        return Percentiles(float(low_value), float(high_value), rank_error)
+
+def pass_offsets(stride):
+    """
+    Order the passes over an array so that each one falls between the rows of the passes before it.
+
+    Args:
+        stride (int): The number of passes.
+
+    Returns:
+        list: The first row of each pass, in bit-reversed order, e.g. 0, 4, 2, 6, 1, 5, 3, 7 for a stride of 8.
+
+    """
+
+    bits = max(1, (stride - 1).bit_length())
+
+    def reversed_bits(offset):
+        return int(format(offset, "0{}b".format(bits))[::-1], 2)
+
+    return sorted(range(stride), key=reversed_bits)
+
+def pass_stride(shape, pass_elements=DEFAULT_PASS_ELEMENTS):
+    """
+    Returns:
+        int: The row stride for which each pass over an array of the given shape reads about `pass_elements` elements.
+
+    """
+
+    total = int(np.prod(shape, dtype=np.int64))
+
+    if len(shape) == 0 or total == 0:
+        return 1
+
+    return max(1, min(shape[0], -(-total // pass_elements)))
+
+def read_pass(data, offset, stride):
+    """
+    Args:
+        data (xarray.DataArray): The array.
+        offset (int): The first row of the pass.
+        stride (int): The step between rows.
+
+    Returns:
+        numpy.ndarray: The rows of the pass.
+
+    """
+
+    if len(data.shape) == 0:
+        return np.asarray(data)
+
+    return np.asarray(data[offset::stride])
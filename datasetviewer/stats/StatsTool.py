@@ -0,0 +1,201 @@
+from concurrent.futures import ThreadPoolExecutor
+from functools import reduce
+
+import numpy as np
+
+import datasetviewer.profiling.Tracer as Tracer
+from datasetviewer.cache.MemoryGovernor import get_governor, Priority
+
+""" Tool for computing the statistics of a variable in a single pass over its data. The data is read in chunks along
+    its first dimension, the chunks are summarised on a small pool of threads, and the summaries are combined with the
+    parallel form of Welford's algorithm (Chan et al.), so the whole array is never held in memory at once. """
+
+# Number of elements in each chunk that is summarised separately
+DEFAULT_CHUNK_ELEMENTS = 2**22
+
+# Number of threads that summarise chunks. Reads through the netCDF library hold a lock, so one thread can read the
+# next chunk while the other summarises the last, and more threads would only hold more chunks in memory.
+DEFAULT_WORKERS = 2
+
+# The category that the chunks being summarised are reported under by the MemoryGovernor
+MEMORY_CATEGORY = "statistics"
+
+class RunningStats(object):
+    """Summary statistics of a set of values that can be merged with the summary of another set. NaNs are counted but
+    are otherwise left out of the statistics.
+
+    Args:
+        count (int): The number of values that aren't NaN.
+        mean (float): The mean of the values.
+        m2 (float): The sum of the squared differences between the values and their mean.
+        minimum (float): The smallest value.
+        maximum (float): The largest value.
+        nan_count (int): The number of NaNs.
+
+    """
+
+    def __init__(self, count=0, mean=0.0, m2=0.0, minimum=np.nan, maximum=np.nan, nan_count=0):
+
+        self.count = int(count)
+        self.mean = float(mean)
+        self.m2 = float(m2)
+        self.minimum = float(minimum)
+        self.maximum = float(maximum)
+        self.nan_count = int(nan_count)
+
+    @classmethod
+    def from_array(cls, arr):
+        """
+        Summarise the values of an array.
+
+        Args:
+            arr (numpy.ndarray): The values.
+
+        Returns:
+            RunningStats: The statistics of the values.
+
+        """
+
+        flat = np.asarray(arr).ravel()
+        nan_count = 0
+
+        if np.issubdtype(flat.dtype, np.inexact):
+            nans = np.isnan(flat)
+            nan_count = int(np.count_nonzero(nans))
+
+            if nan_count:
+                flat = flat[~nans]
+
+        if flat.size == 0:
+            return cls(nan_count=nan_count)
+
+        mean = flat.mean(dtype=np.float64)
+        m2 = np.square(flat - mean).sum()
+
+        return cls(flat.size, mean, m2, flat.min(), flat.max(), nan_count)
+
+    def merge(self, other):
+        """
+        Combine these statistics with those of another set of values.
+
+        Args:
+            other (RunningStats): The statistics of the other values.
+
+        Returns:
+            RunningStats: The statistics of both sets of values.
+
+        """
+
+        nan_count = self.nan_count + other.nan_count
+
+        if other.count == 0:
+            return RunningStats(self.count, self.mean, self.m2, self.minimum, self.maximum, nan_count)
+
+        if self.count == 0:
+            return RunningStats(other.count, other.mean, other.m2, other.minimum, other.maximum, nan_count)
+
+        count = self.count + other.count
+        delta = other.mean - self.mean
+
+        return RunningStats(count,
+                            self.mean + delta * other.count / count,
+                            self.m2 + other.m2 + delta * delta * self.count * other.count / count,
+                            min(self.minimum, other.minimum),
+                            max(self.maximum, other.maximum),
+                            nan_count)
+
+    @property
+    def variance(self):
+        """float: The population variance of the values, or NaN if there are none."""
+
+        return self.m2 / self.count if self.count else np.nan
+
+    @property
+    def std(self):
+        """float: The population standard deviation of the values, or NaN if there are none."""
+
+        return np.sqrt(self.variance)
+
+    def to_dict(self):
+        """
+        Returns:
+            dict: The statistics in a form that can be stored as JSON.
+
+        """
+
+        return {"count": self.count, "mean": self.mean, "m2": self.m2, "min": self.minimum, "max": self.maximum,
+                "nan_count": self.nan_count}
+
+    @classmethod
+    def from_dict(cls, values):
+        """
+        Args:
+            values (dict): Statistics created by `to_dict`.
+
+        Returns:
+            RunningStats: The statistics.
+
+        """
+
+        return cls(values["count"], values["mean"], values["m2"], values["min"], values["max"], values["nan_count"])
+
+def chunk_starts(shape, chunk_elements=DEFAULT_CHUNK_ELEMENTS):
+    """
+    Divide the first dimension of an array into chunks of roughly the given number of elements.
+
+    Args:
+        shape (tuple): The shape of the array.
+        chunk_elements (int): The target number of elements in each chunk.
+
+    Returns:
+        tuple: The first index of each chunk and the number of indices in each chunk.
+
+    """
+
+    row_elements = int(np.prod(shape[1:], dtype=np.int64)) or 1
+    rows = max(1, chunk_elements // row_elements)
+
+    return range(0, shape[0], rows), rows
+
+def compute_stats(data, chunk_elements=DEFAULT_CHUNK_ELEMENTS, max_workers=None):
+    """
+    Compute the statistics of an array by summarising chunks of it in parallel and merging the summaries. The chunks
+    that are held at the same time, one for each thread, are counted by the MemoryGovernor until they are summarised.
+
+    Args:
+        data (xarray.DataArray): The array. Arrays that are read from a file on demand are read one chunk at a time.
+        chunk_elements (int): The target number of elements in each chunk.
+        max_workers (int): The number of threads that summarise chunks. Defaults to None, in which case
+            `DEFAULT_WORKERS` are used.
+
+    Returns:
+        RunningStats: The statistics of the whole array.
+
+    """
+
+    with Tracer.span("statistics"):
+
+        if len(data.shape) == 0:
+            return RunningStats.from_array(np.asarray(data))
+
+        starts, rows = chunk_starts(data.shape, chunk_elements)
+        workers = min(len(starts), max_workers or DEFAULT_WORKERS)
+
+        def summarise(start):
+            return RunningStats.from_array(np.asarray(data[start:start + rows]))
+
+        row_bytes = int(np.prod(data.shape[1:], dtype=np.int64)) * data.dtype.itemsize
+        key = (id(data), "statistics")
+
+        # The chunks can't be evicted, but other buffers make room for them
+        get_governor().register(key, workers * min(rows, data.shape[0]) * row_bytes, MEMORY_CATEGORY, Priority.VISIBLE)
+
+        try:
+            if workers == 1:
+                return reduce(RunningStats.merge, map(summarise, starts), RunningStats())
+
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                return reduce(RunningStats.merge, pool.map(summarise, starts), RunningStats())
+
+        finally:
+            get_governor().unregister(key)
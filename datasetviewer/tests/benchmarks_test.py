@@ -0,0 +1,92 @@
+import unittest
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from benchmarks import SyntheticFiles
+from benchmarks.Benchmarks import compare_to_baseline
+
+import datasetviewer.fileloader.FileLoaderTool as FileLoaderTool
+
+class BenchmarksTest(unittest.TestCase):
+
+    def setUp(self):
+
+        self.baseline = {"case": {"file_to_dict": {"seconds": 1.0, "peak_bytes": 1000},
+                                  "create_default_plot": {"seconds": 0.001, "peak_bytes": 1000}}}
+
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_unknown_shape_or_size_raises(self):
+        '''
+        Test that asking for an unknown shape or size class raises an Exception.
+        '''
+        with self.assertRaises(ValueError):
+            SyntheticFiles.variable_specs("triangle", "small")
+
+        with self.assertRaises(ValueError):
+            SyntheticFiles.variable_specs("wide", "gigantic")
+
+    def test_specs_match_size_class(self):
+        '''
+        Test that each synthetic shape holds approximately the number of bytes of its size class.
+        '''
+        target = SyntheticFiles.SIZE_CLASSES["huge"]
+
+        for shape in SyntheticFiles.SHAPES:
+            specs = SyntheticFiles.variable_specs(shape, "huge")
+            total = sum(8 * int(np.prod(var_shape)) for _, _, var_shape, _ in specs)
+            self.assertAlmostEqual(total / target, 1, delta=0.05)
+
+    def test_slabs_within_cap(self):
+        '''
+        Test that every slab that is generated in memory is within SLAB_BYTES, including the slabs of variables whose
+        rows are larger than that on their own, and that the slabs cover the whole variable.
+        '''
+        for shape in SyntheticFiles.SHAPES:
+            for _, _, var_shape, _ in SyntheticFiles.variable_specs(shape, "huge")[:1]:
+
+                slabs = SyntheticFiles._slabs(var_shape)
+                sizes = [8 * int(np.prod([stop - start for start, stop in slab] + list(var_shape[len(slab):])))
+                         for slab in slabs]
+
+                self.assertLessEqual(max(sizes), SyntheticFiles.SLAB_BYTES)
+                self.assertEqual(sum(sizes), 8 * int(np.prod(var_shape)))
+
+    def test_generated_file_can_be_loaded(self):
+        '''
+        Test that a generated file can be opened by the FileLoaderTool and that existing files are reused.
+        '''
+        file_path = SyntheticFiles.generate(self.directory, "compressed", "small")
+
+        dataset = FileLoaderTool.file_to_dict(file_path)
+        self.assertEqual(list(dataset.keys()), ["compressed"])
+
+        modified = os.path.getmtime(file_path)
+        self.assertEqual(SyntheticFiles.generate(self.directory, "compressed", "small"), file_path)
+        self.assertEqual(os.path.getmtime(file_path), modified)
+
+    def test_compare_to_baseline_finds_regressions(self):
+        '''
+        Test that measurements exceeding the baseline by more than the tolerance are reported.
+        '''
+        results = {"case": {"file_to_dict": {"seconds": 2.0, "peak_bytes": 1100}}}
+        regressions = compare_to_baseline(results, self.baseline, tolerance=0.25)
+
+        self.assertEqual(len(regressions), 1)
+        self.assertIn("seconds", regressions[0])
+
+    def test_compare_to_baseline_ignores_noise_and_new_cases(self):
+        '''
+        Test that very short timings and cases missing from the baseline aren't reported.
+        '''
+        results = {"case": {"create_default_plot": {"seconds": 0.004, "peak_bytes": 1000}},
+                   "new_case": {"file_to_dict": {"seconds": 100.0, "peak_bytes": 1}}}
+
+        self.assertEqual(compare_to_baseline(results, self.baseline), [])
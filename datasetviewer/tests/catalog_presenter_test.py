@@ -0,0 +1,96 @@
+import unittest
+
+import mock
+
+from enum import Enum
+
+from datasetviewer.catalog.CatalogPresenter import CatalogPresenter
+from datasetviewer.catalog.interfaces.CatalogViewInterface import CatalogViewInterface
+from datasetviewer.catalog.CatalogTool import Catalog, CatalogEntry, ScanResult
+from datasetviewer.mainview.interfaces.MainViewPresenterInterface import MainViewPresenterInterface
+from datasetviewer.catalog.Command import Command
+
+class CatalogPresenterTest(unittest.TestCase):
+
+    def setUp(self):
+
+        self.mock_view = mock.create_autospec(CatalogViewInterface)
+        self.mock_main_presenter = mock.create_autospec(MainViewPresenterInterface)
+        self.mock_catalog = mock.create_autospec(Catalog)
+
+        self.entries = [CatalogEntry("/data/run2.nc", 100, 2.0, {}, [("counts", ("x",), (5,), "float64")], None)]
+        self.mock_catalog.search.return_value = self.entries
+
+    def test_presenter_throws_if_view_none(self):
+        '''
+        Test that the CatalogPresenter throws an Exception when the CatalogView is None.
+        '''
+
+        with self.assertRaises(ValueError):
+            CatalogPresenter(None)
+
+    def test_search_change_shows_entries(self):
+        '''
+        Test that changing the search text lists the matching files from the catalog.
+        '''
+
+        self.mock_view.get_search_text.return_value = "counts"
+
+        presenter = CatalogPresenter(self.mock_view, self.mock_catalog)
+        presenter.notify(Command.SEARCHCHANGE)
+
+        self.mock_catalog.search.assert_called_once_with("counts")
+        self.mock_view.show_entries.assert_called_once_with(self.entries)
+
+    def test_scan_request_scans_and_refreshes(self):
+        '''
+        Test that choosing a directory scans it, shows the outcome, and lists the updated catalog.
+        '''
+
+        self.mock_view.get_scan_directory.return_value = "/data"
+        self.mock_view.get_search_text.return_value = ""
+        self.mock_catalog.scan.return_value = ScanResult(3, 1, 0, 10, 1)
+
+        presenter = CatalogPresenter(self.mock_view, self.mock_catalog)
+        presenter.notify(Command.SCANREQUEST)
+
+        self.assertEqual(self.mock_catalog.scan.call_args[0][0], "/data")
+        self.mock_view.show_message.assert_called_with(
+            "3 added, 1 updated, 0 removed, 10 unchanged, 1 couldn't be read")
+        self.mock_view.show_entries.assert_called_once_with(self.entries)
+
+    def test_closing_directory_dialog_does_nothing(self):
+        '''
+        Test that nothing is scanned when the directory dialog is closed without choosing a directory.
+        '''
+
+        self.mock_view.get_scan_directory.return_value = ""
+
+        presenter = CatalogPresenter(self.mock_view, self.mock_catalog)
+        presenter.notify(Command.SCANREQUEST)
+
+        self.mock_catalog.scan.assert_not_called()
+
+    def test_open_request_opens_file(self):
+        '''
+        Test that opening a file from the catalog passes its path to the MainViewPresenter.
+        '''
+
+        self.mock_view.get_selected_path.return_value = "/data/run2.nc"
+
+        presenter = CatalogPresenter(self.mock_view, self.mock_catalog)
+        presenter.register_master(self.mock_main_presenter)
+        presenter.notify(Command.OPENREQUEST)
+
+        self.mock_main_presenter.open_file.assert_called_once_with("/data/run2.nc")
+
+    def test_notify_raises_if_command_unknown(self):
+        '''
+        Test that an exception is thrown if notify is called with a command it does not recognise.
+        '''
+
+        presenter = CatalogPresenter(self.mock_view, self.mock_catalog)
+        fake_enum = Enum(value='invalid', names=[('bad_command', -400000)])
+
+        with self.assertRaises(ValueError):
+            presenter.notify(fake_enum.bad_command)
@@ -0,0 +1,116 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import mock
+import numpy as np
+import xarray as xr
+
+import datasetviewer.catalog.CatalogTool as CatalogTool
+
+class CatalogToolTest(unittest.TestCase):
+
+    def setUp(self):
+
+        self.directory = tempfile.mkdtemp()
+        self.data_dir = os.path.join(self.directory, "runs_1")
+        os.makedirs(os.path.join(self.data_dir, "day2"))
+
+        self.paths = []
+
+        for i, name in enumerate(["run1.nc", "run2.nc", os.path.join("day2", "run3.nc")]):
+            path = os.path.join(self.data_dir, name)
+            xr.Dataset({"counts_{}".format(i): (("x", "y"), np.zeros((4, 3)))},
+                       attrs={"title": "run {}".format(i + 1)}).to_netcdf(path)
+            os.utime(path, ns=(10**18 + i, 10**18 + i))
+            self.paths.append(path)
+
+        with open(os.path.join(self.data_dir, "broken.nc"), "w") as broken:
+            broken.write("not a netcdf file")
+
+        with open(os.path.join(self.data_dir, "notes.txt"), "w") as notes:
+            notes.write("ignored")
+
+        self.catalog = CatalogTool.Catalog(os.path.join(self.directory, "catalog.sqlite"))
+
+    def tearDown(self):
+
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_scan_indexes_headers(self):
+        '''
+        Test that scanning a directory tree stores the variables and attributes of each file, and records the files
+        that can't be read.
+        '''
+
+        result = self.catalog.scan(self.data_dir)
+
+        self.assertEqual(result, CatalogTool.ScanResult(added=4, updated=0, removed=0, unchanged=0, failed=1))
+
+        entries = self.catalog.search("counts_2")
+
+        self.assertEqual(len(entries), 1)
+        self.assertEqual(entries[0].path, self.paths[2])
+        self.assertEqual(entries[0].variables, [("counts_2", ("x", "y"), (4, 3), "float64")])
+        self.assertEqual(entries[0].attrs, {"title": "run 3"})
+        self.assertIsNone(entries[0].error)
+
+        broken = self.catalog.search("broken")
+        self.assertEqual(len(broken), 1)
+        self.assertIsNotNone(broken[0].error)
+
+    def test_rescan_only_reads_changed_files(self):
+        '''
+        Test that a rescan doesn't read unchanged files, reads files with a new modification time, and removes deleted
+        files.
+        '''
+
+        self.catalog.scan(self.data_dir)
+
+        os.utime(self.paths[0], ns=(2 * 10**18, 2 * 10**18))
+        os.remove(self.paths[1])
+
+        with mock.patch("datasetviewer.catalog.CatalogTool.read_header", wraps=CatalogTool.read_header) as read_header:
+            result = self.catalog.scan(self.data_dir)
+
+        read_header.assert_called_once_with(self.paths[0])
+        self.assertEqual(result, CatalogTool.ScanResult(added=0, updated=1, removed=1, unchanged=2, failed=0))
+        self.assertEqual(self.catalog.search("run2"), [])
+
+    def test_search(self):
+        '''
+        Test that files are found by path, variable name and attribute, newest first, and within a directory.
+        '''
+
+        self.catalog.scan(self.data_dir)
+
+        self.assertEqual([entry.path for entry in self.catalog.search("COUNTS")[:3]], self.paths[::-1])
+        self.assertEqual([entry.path for entry in self.catalog.search("run 2")], [self.paths[1]])
+        self.assertEqual([entry.path for entry in self.catalog.search(directory=os.path.join(self.data_dir, "day2"))],
+                         [self.paths[2]])
+
+        # Wildcard characters are matched literally
+        self.assertEqual(self.catalog.search("%"), [])
+        self.assertEqual(len(self.catalog.search("runs_1")), 4)
+
+    def test_scan_in_process_pool(self):
+        '''
+        Test that headers read by the worker processes are the same as those read in this process.
+        '''
+
+        with mock.patch("datasetviewer.catalog.CatalogTool.PARALLEL_THRESHOLD", 0):
+            result = self.catalog.scan(self.data_dir, max_workers=2)
+
+        self.assertEqual(result.added, 4)
+        self.assertEqual(self.catalog.search("counts_1")[0].variables, [("counts_1", ("x", "y"), (4, 3), "float64")])
+
+    def test_cancelled_scan_keeps_nothing_new(self):
+        '''
+        Test that a cancelled scan stops before storing more headers.
+        '''
+
+        result = self.catalog.scan(self.data_dir, is_cancelled=lambda: True)
+
+        self.assertEqual(result.added, 0)
+        self.assertEqual(self.catalog.search(), [])
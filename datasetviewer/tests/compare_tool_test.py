@@ -0,0 +1,147 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import xarray as xr
+
+from collections import OrderedDict as DataSet
+
+import datasetviewer.compare.CompareTool as CompareTool
+import datasetviewer.fileloader.FileLoaderTool as FileLoaderTool
+from datasetviewer.dataset.Variable import Variable
+
+class CompareToolTest(unittest.TestCase):
+
+    def setUp(self):
+
+        self.original = np.random.rand(40, 6, 3)
+        self.reprocessed = self.original.copy()
+        self.reprocessed[12, 4, 2] += 0.5
+        self.reprocessed[30, 0, 1] -= 2
+
+        self.dict_a = DataSet()
+        self.dict_a["counts"] = Variable("counts", xr.DataArray(self.original, dims=['x', 'y', 'z']))
+        self.dict_a["same"] = Variable("same", xr.DataArray(np.arange(5, dtype=np.uint8), dims=['t']))
+        self.dict_a["resized"] = Variable("resized", xr.DataArray(np.zeros(4), dims=['t']))
+        self.dict_a["old"] = Variable("old", xr.DataArray(np.zeros(4), dims=['t']))
+
+        self.dict_b = DataSet()
+        self.dict_b["counts"] = Variable("counts", xr.DataArray(self.reprocessed, dims=['x', 'y', 'z']))
+        self.dict_b["same"] = Variable("same", xr.DataArray(np.arange(5, dtype=np.uint8), dims=['t']))
+        self.dict_b["resized"] = Variable("resized", xr.DataArray(np.zeros(5), dims=['t']))
+        self.dict_b["new"] = Variable("new", xr.DataArray(np.zeros(4), dims=['t']))
+
+    def test_variables_matched_by_name_and_shape(self):
+        '''
+        Test that variables are only compared if they have the same name and shape in both files.
+        '''
+
+        matching = CompareTool.match_variables(self.dict_a, self.dict_b)
+
+        self.assertEqual(matching.common, ["counts", "same"])
+        self.assertEqual(matching.mismatched, ["resized"])
+        self.assertEqual(matching.only_a, ["old"])
+        self.assertEqual(matching.only_b, ["new"])
+
+    def test_comparison_elements(self):
+        '''
+        Test that each matched variable is shown from both files and as their difference, and that unsigned integers
+        have a signed difference.
+        '''
+
+        dataset, _ = CompareTool.comparison_to_dict(self.dict_a, self.dict_b)
+
+        self.assertEqual(list(dataset.keys()), ["counts (A)", "counts (B)", "counts (A-B)", "same (A)", "same (B)",
+                                                "same (A-B)"])
+
+        np.testing.assert_allclose(dataset["counts (A-B)"].data.isel(z=2).values,
+                                   (self.original - self.reprocessed)[:, :, 2])
+        self.assertEqual(dataset["same (A-B)"].data.dtype.kind, "i")
+
+        with self.assertRaises(ValueError):
+            CompareTool.comparison_to_dict(self.dict_a, DataSet())
+
+    def test_difference_found_in_chunks(self):
+        '''
+        Test that the number of differing elements, the first of them and the largest difference are found when the
+        variables are compared a few rows at a time.
+        '''
+
+        difference = CompareTool.compare_variables(self.dict_a["counts"].data, self.dict_b["counts"].data,
+                                                   chunk_elements=50)
+
+        self.assertEqual(difference.num_different, 2)
+        self.assertEqual(difference.first_index, (12, 4, 2))
+        self.assertEqual(difference.max_index, (30, 0, 1))
+        self.assertAlmostEqual(difference.max_abs, 2)
+        self.assertAlmostEqual(difference.stats.mean, (self.original - self.reprocessed).mean())
+
+        identical = CompareTool.compare_variables(self.dict_a["same"].data, self.dict_b["same"].data)
+
+        self.assertEqual(identical.num_different, 0)
+        self.assertIsNone(identical.first_index)
+
+    def test_tolerance_and_matching_nans(self):
+        '''
+        Test that differences within the tolerance and NaNs in the same place don't count as differences.
+        '''
+
+        a = xr.DataArray(np.array([1.0, np.nan, 3.0, np.nan]), dims=['t'])
+        b = xr.DataArray(np.array([1.0 + 1e-9, np.nan, 3.0, 4.0]), dims=['t'])
+
+        difference = CompareTool.compare_variables(a, b, tolerance=1e-6)
+
+        self.assertEqual(difference.num_different, 1)
+        self.assertEqual(difference.first_index, (3,))
+
+    def test_report_lists_differences(self):
+        '''
+        Test that the report states which variables differ and where, and which couldn't be compared.
+        '''
+
+        matching = CompareTool.match_variables(self.dict_a, self.dict_b)
+        differences = CompareTool.compare_datasets(self.dict_a, self.dict_b, matching.common)
+
+        summary, report = CompareTool.format_report(differences, matching)
+
+        self.assertEqual(summary, "1 of 2 compared variables differ")
+        self.assertIn("counts: 2 of 720 elements differ, first at (12, 4, 2)", report)
+        self.assertIn("same: identical", report)
+        self.assertIn("Only in A: old", report)
+
+    def test_cancel_comparison(self):
+        '''
+        Test that comparing stops when it is cancelled.
+        '''
+
+        self.assertIsNone(CompareTool.compare_datasets(self.dict_a, self.dict_b, ["counts"], is_cancelled=lambda: True))
+
+class CompareFilesTest(unittest.TestCase):
+
+    def setUp(self):
+
+        self.directory = tempfile.mkdtemp()
+        self.data = np.random.rand(20, 10, 4)
+
+        for name, offset in (("a.nc", 0), ("b.nc", 1)):
+            xr.Dataset({"image": (("x", "y", "z"), self.data + offset)}).to_netcdf(os.path.join(self.directory, name))
+
+    def tearDown(self):
+
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_difference_of_files_is_lazy(self):
+        '''
+        Test that the difference of variables that are read from files isn't read until it is sliced.
+        '''
+
+        dict_a = FileLoaderTool.file_to_dict(os.path.join(self.directory, "a.nc"))
+        dict_b = FileLoaderTool.file_to_dict(os.path.join(self.directory, "b.nc"))
+
+        dataset, _ = CompareTool.comparison_to_dict(dict_a, dict_b)
+        difference = dataset["image (A-B)"]
+
+        self.assertEqual(difference.memory_usage(), 0)
+        np.testing.assert_allclose(difference.data.isel(z=1).values, -np.ones((20, 10)))
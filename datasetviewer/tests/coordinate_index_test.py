@@ -0,0 +1,74 @@
+import unittest
+
+import numpy as np
+import xarray as xr
+
+from datasetviewer.coords.CoordinateIndex import CoordinateIndex
+from datasetviewer.coords.CursorReadout import CursorReadout
+
+class CoordinateIndexTest(unittest.TestCase):
+
+    def test_uniform_coordinates(self):
+        '''
+        Test that evenly spaced coordinates are recognised and that positions are mapped to the nearest element, with
+        positions more than half a spacing beyond the ends rejected.
+        '''
+        index = CoordinateIndex(np.linspace(10, 0, 21))
+
+        self.assertTrue(index.is_uniform())
+        self.assertEqual(index.nearest(10), 0)
+        self.assertEqual(index.nearest(7.3), 5)
+        self.assertEqual(index.nearest(-0.2), 20)
+        self.assertIsNone(index.nearest(-0.3))
+        self.assertIsNone(index.nearest(10.3))
+
+    def test_irregular_coordinates(self):
+        '''
+        Test that unsorted, unevenly spaced coordinates are searched correctly and that NaN coordinates are skipped.
+        '''
+        values = np.array([5.0, 1.0, np.nan, 2.0, 10.0])
+        index = CoordinateIndex(values)
+
+        self.assertFalse(index.is_uniform())
+
+        for position in np.linspace(0.55, 12.45, 50):
+            distances = np.abs(values - position)
+            self.assertEqual(index.nearest(position), np.nanargmin(distances))
+
+        self.assertIsNone(index.nearest(0.4))
+        self.assertIsNone(index.nearest(12.6))
+
+    def test_single_coordinate(self):
+        '''
+        Test that a single coordinate covers half a unit on either side.
+        '''
+        index = CoordinateIndex([3.0])
+
+        self.assertEqual(index.nearest(3.4), 0)
+        self.assertIsNone(index.nearest(3.6))
+
+class CursorReadoutTest(unittest.TestCase):
+
+    def setUp(self):
+
+        self.data = xr.DataArray(np.arange(12.0).reshape(3, 4), dims=["x", "y"],
+                                 coords={"x": xr.DataArray([0.5, 1.5, 4.0], dims=["x"], attrs={"units": "m"})})
+
+    def test_image_readout(self):
+        '''
+        Test that the readout of an image gives the index and coordinate of each axis and the value of the element.
+        '''
+        image = self.data.transpose("y", "x")
+        readout = CursorReadout(image, [("x", np.arange(3), self.data.coords["x"]), ("y", np.arange(4), None)])
+
+        self.assertEqual(readout.describe(2.2, 0.9), "x[2] = 4 m, y = 1, value = 9")
+        self.assertIsNone(readout.describe(3.0, 1.0))
+
+    def test_rebinned_line_readout(self):
+        '''
+        Test that rebinned elements are found from their centres and labelled with the nearest original index.
+        '''
+        readout = CursorReadout(np.array([3.0, 7.0]), [("x", np.array([0.5, 2.0]), self.data.coords["x"])])
+
+        self.assertEqual(readout.describe(0.2, 100), "x[0] = 0.5 m, value = 3")
+        self.assertEqual(readout.describe(2.1), "x[2] = 4 m, value = 7")
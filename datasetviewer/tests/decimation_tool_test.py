@@ -0,0 +1,74 @@
+import unittest
+
+import numpy as np
+
+import datasetviewer.decimation.DecimationTool as DecimationTool
+
+class DecimationToolTest(unittest.TestCase):
+
+    def setUp(self):
+
+        self.x = np.arange(10000, dtype=float)
+        self.y = np.sin(self.x / 300)
+
+    def test_short_trace_unchanged(self):
+        '''
+        Test that a trace with no more than two points per bucket is returned as it is.
+        '''
+
+        x, y = DecimationTool.decimate(self.x[:20], self.y[:20], 10)
+
+        np.testing.assert_array_equal(x, self.x[:20])
+        np.testing.assert_array_equal(y, self.y[:20])
+
+    def test_envelope_preserved(self):
+        '''
+        Test that the decimated trace has two points per bucket, in their original order, and keeps the smallest and
+        largest value of each bucket, including a single-sample spike.
+        '''
+
+        self.y[4321] = 50
+        self.y[7001] = -50
+
+        x, y = DecimationTool.decimate(self.x, self.y, 100)
+
+        self.assertEqual(len(x), 200)
+        self.assertTrue(np.all(np.diff(x) > 0))
+        self.assertIn(50, y)
+        self.assertIn(-50, y)
+
+        np.testing.assert_allclose(np.minimum(y[0::2], y[1::2]), self.y.reshape(100, 100).min(axis=1))
+        np.testing.assert_allclose(np.maximum(y[0::2], y[1::2]), self.y.reshape(100, 100).max(axis=1))
+
+    def test_uneven_last_bucket(self):
+        '''
+        Test that the elements left over after the full buckets form a shorter last bucket.
+        '''
+
+        x, y = DecimationTool.decimate(self.x[:1005], self.y[:1005], 100)
+
+        self.assertLessEqual(len(x), 2 * 100)
+        self.assertGreaterEqual(x[-2], 1001)
+        self.assertEqual(y[-2:].max(), self.y[1001:1005].max())
+
+    def test_nan_buckets_leave_gaps(self):
+        '''
+        Test that NaN values are ignored within a bucket, and that buckets without any finite values become NaN.
+        '''
+
+        self.y[:100] = np.nan
+        self.y[150] = np.nan
+
+        x, y = DecimationTool.decimate(self.x, self.y, 100)
+
+        self.assertTrue(np.isnan(y[:2]).all())
+        self.assertFalse(np.isnan(y[2:]).any())
+
+    def test_visible_range(self):
+        '''
+        Test that the visible range includes one element on either side of the X range and is clipped to the trace.
+        '''
+
+        self.assertEqual(DecimationTool.visible_range(self.x, 10.5, 20.5), (10, 22))
+        self.assertEqual(DecimationTool.visible_range(self.x, -5, 20), (0, 22))
+        self.assertEqual(DecimationTool.visible_range(self.x, 9990, 20000), (9989, 10000))
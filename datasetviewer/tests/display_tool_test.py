@@ -0,0 +1,79 @@
+import unittest
+import warnings
+
+import numpy as np
+import xarray as xr
+
+import datasetviewer.display.DisplayTool as DisplayTool
+import datasetviewer.profiling.Tracer as Tracer
+
+class DisplayToolTest(unittest.TestCase):
+
+    def tearDown(self):
+
+        Tracer.disable()
+
+    def test_compact_types_are_kept(self):
+        '''
+        Test that small integers and single-precision floats are shown in their own type, without a copy.
+        '''
+
+        for dtype in (np.uint8, np.int16, np.float32, np.bool_):
+            values = np.ones((4, 3), dtype=dtype)
+            self.assertIs(DisplayTool.to_display(values), values)
+
+    def test_doubles_become_floats(self):
+        '''
+        Test that double-precision slices, including transposed ones, are converted once to C-ordered float32.
+        '''
+
+        values = np.random.rand(5, 7)
+        values[1, 2] = np.nan
+
+        display = DisplayTool.to_display(xr.DataArray(values).T)
+
+        self.assertEqual(display.dtype, np.float32)
+        self.assertTrue(display.flags.c_contiguous)
+        np.testing.assert_array_equal(display, values.T.astype(np.float32))
+
+    def test_integers_become_floats_when_exact(self):
+        '''
+        Test that large integer types are shown as float32 only when float32 holds their values exactly.
+        '''
+
+        counts = np.arange(12, dtype=np.int64).reshape(3, 4)
+        self.assertEqual(DisplayTool.display_dtype(counts), np.float32)
+
+        counts[0, 0] = DisplayTool.FLOAT32_EXACT + 1
+        self.assertEqual(DisplayTool.display_dtype(counts), np.int64)
+
+    def test_narrow_ranges_keep_precision(self):
+        '''
+        Test that doubles whose range is too narrow for their magnitude, or too large for float32, are kept as they are.
+        '''
+
+        self.assertEqual(DisplayTool.display_dtype(1e9 + np.random.rand(4, 4)), np.float64)
+        self.assertEqual(DisplayTool.display_dtype(np.array([[0.0, 1e300]])), np.float64)
+        self.assertEqual(DisplayTool.display_dtype(np.full((2, 2), np.nan)), np.float32)
+        self.assertEqual(DisplayTool.display_dtype(np.full((2, 2), 3.0)), np.float32)
+
+    def test_large_magnitudes_compared_without_warnings(self):
+        '''
+        Test that magnitudes beyond the range of float32 are compared with its limits without overflow warnings.
+        '''
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            self.assertEqual(DisplayTool.display_dtype(np.array([[1.0, 1e300]])), np.float64)
+
+    def test_conversions_are_counted(self):
+        '''
+        Test that each conversion is counted by the Tracer under its step.
+        '''
+
+        Tracer.enable()
+
+        DisplayTool.to_display(np.zeros((10, 10)), "tile")
+        DisplayTool.to_display(np.zeros((10, 10), dtype=np.float32), "tile")
+
+        self.assertEqual(Tracer.copy_counts(), {"tile": (1, 400)})
@@ -0,0 +1,160 @@
+import unittest
+import asyncio
+import threading
+
+import mock
+
+from PyQt5.QtCore import QCoreApplication
+
+import datasetviewer.eventloop.EventLoop as EventLoop
+
+class EventLoopTest(unittest.TestCase):
+
+    def setUp(self):
+
+        # A Qt application is required for the queued signals that carry results back to the main thread
+        self.qapp = QCoreApplication.instance() or QCoreApplication([])
+
+        self.event_loop = EventLoop.EventLoop(max_workers=4)
+
+    def tearDown(self):
+
+        self.event_loop.stop()
+        EventLoop.set_event_loop(None)
+
+    def _wait_for(self, future):
+        '''
+        Wait for a future to finish and then process the Qt events so that its callbacks are delivered.
+        '''
+        future.result(timeout=5)
+        self.qapp.processEvents()
+
+    def test_start_and_stop(self):
+        '''
+        Test that the EventLoop reports whether or not it is running.
+        '''
+        self.assertFalse(self.event_loop.is_running())
+        self.event_loop.start()
+        self.assertTrue(self.event_loop.is_running())
+        self.event_loop.stop()
+        self.assertFalse(self.event_loop.is_running())
+
+    def test_done_callback_runs_in_main_thread(self):
+        '''
+        Test that the result of a coroutine is passed to the `done` callback on the thread that started the loop.
+        '''
+        self.event_loop.start()
+
+        callback_threads = []
+        done = mock.MagicMock(side_effect=lambda result: callback_threads.append(threading.current_thread()))
+
+        async def add(a, b):
+            return a + b
+
+        self._wait_for(self.event_loop.submit(add(1, 2), done=done))
+
+        done.assert_called_once_with(3)
+        self.assertEqual(callback_threads, [threading.current_thread()])
+
+    def test_error_callback(self):
+        '''
+        Test that an exception raised by a coroutine is passed to the `error` callback rather than the `done` callback.
+        '''
+        self.event_loop.start()
+
+        done = mock.MagicMock()
+        error = mock.MagicMock()
+        exception = ValueError("bad file")
+
+        async def fail():
+            raise exception
+
+        future = self.event_loop.submit(fail(), done=done, error=error)
+
+        with self.assertRaises(ValueError):
+            future.result(timeout=5)
+
+        self.qapp.processEvents()
+
+        done.assert_not_called()
+        error.assert_called_once_with(exception)
+
+    def test_raising_callback_is_logged(self):
+        '''
+        Test that an exception raised by a `done` callback is logged rather than raised through the Qt slot, and that
+        later callbacks are still delivered.
+        '''
+        self.event_loop.start()
+
+        async def identity(value):
+            return value
+
+        failing = mock.MagicMock(side_effect=RuntimeError("broken callback"))
+        done = mock.MagicMock()
+
+        with self.assertLogs("datasetviewer.eventloop.EventLoop", level="ERROR") as logs:
+            self._wait_for(self.event_loop.submit(identity(1), done=failing))
+
+        self.assertIn("broken callback", logs.output[0])
+
+        self._wait_for(self.event_loop.submit(identity(2), done=done))
+        done.assert_called_once_with(2)
+
+    def test_blocking_calls_overlap(self):
+        '''
+        Test that blocking functions awaited with `run_blocking` run concurrently rather than one after another.
+        '''
+        self.event_loop.start()
+
+        # Each read can only finish once both of them have started
+        barrier = threading.Barrier(2, timeout=5)
+
+        def read(value):
+            barrier.wait()
+            return value
+
+        async def read_both():
+            return await asyncio.gather(EventLoop.run_blocking(read, "a"), EventLoop.run_blocking(read, "b"))
+
+        self.assertEqual(self.event_loop.submit(read_both()).result(timeout=5), ["a", "b"])
+
+    def test_run_in_background_uses_running_loop(self):
+        '''
+        Test that `run_in_background` runs the function away from the main thread when the EventLoop has been set.
+        '''
+        self.event_loop.start()
+        EventLoop.set_event_loop(self.event_loop)
+
+        done = mock.MagicMock()
+        future = EventLoop.run_in_background(threading.current_thread, done=done)
+        self._wait_for(future)
+
+        self.assertIsNot(done.call_args[0][0], threading.current_thread())
+
+    def test_synchronous_fallback(self):
+        '''
+        Test that the module-level helpers call the function and callbacks directly when no loop is running.
+        '''
+        done = mock.MagicMock()
+        error = mock.MagicMock()
+
+        self.assertIsNone(EventLoop.run_in_background(lambda x: x * 2, 4, done=done, error=error))
+        done.assert_called_once_with(8)
+        error.assert_not_called()
+
+        exception = OSError("missing")
+        EventLoop.run_in_background(mock.MagicMock(side_effect=exception), error=error)
+        error.assert_called_once_with(exception)
+
+    def test_synchronous_fallback_raises_without_error_callback(self):
+        '''
+        Test that an exception is raised in the caller when no loop is running and no error callback is given.
+        '''
+        with self.assertRaises(ValueError):
+            EventLoop.run_in_background(mock.MagicMock(side_effect=ValueError))
+
+        async def fail():
+            raise ValueError
+
+        with self.assertRaises(ValueError):
+            EventLoop.submit(fail())
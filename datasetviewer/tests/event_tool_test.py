@@ -0,0 +1,239 @@
+import unittest
+import os
+import shutil
+import tempfile
+
+import mock
+import numpy as np
+from netCDF4 import Dataset
+
+import datasetviewer.events.EventTool as EventTool
+import datasetviewer.fileloader.FileLoaderTool as FileLoaderTool
+from datasetviewer.dataset.EventVariable import EventVariable
+from datasetviewer.cache.MemoryGovernor import MemoryGovernor
+
+def create_event_file(file_path, event_id, event_time_offset):
+    '''
+    Write events to a NeXus-style file with an NXevent_data group at /entry/detector/events.
+    '''
+    with Dataset(file_path, "w") as nc_file:
+
+        nc_file.createDimension("x", 3)
+        nc_file.createVariable("monitor", "f8", ("x",))[:] = [1, 2, 3]
+
+        entry = nc_file.createGroup("entry")
+        entry.setncattr("NX_class", "NXentry")
+
+        detector = entry.createGroup("detector")
+        detector.setncattr("NX_class", "NXdetector")
+
+        events = detector.createGroup("events")
+        events.setncattr("NX_class", "NXevent_data")
+        events.createDimension("event", len(event_id))
+        events.createVariable("event_id", "u4", ("event",))[:] = event_id
+        events.createVariable("event_time_offset", "f4", ("event",))[:] = event_time_offset
+
+        # A group with the right class but without events shouldn't be found
+        other = entry.createGroup("other")
+        other.setncattr("NX_class", "NXevent_data")
+
+class EventToolTest(unittest.TestCase):
+
+    def setUp(self):
+
+        rng = np.random.default_rng(1)
+        self.num_events = 10000
+        self.event_id = rng.integers(100, 140, self.num_events)
+        self.event_time_offset = rng.uniform(0, 1000, self.num_events).astype(np.float32)
+
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+
+        self.file_path = os.path.join(directory, "events.nxs")
+        create_event_file(self.file_path, self.event_id, self.event_time_offset)
+
+    def _expected_counts(self, histogram):
+        '''
+        Compute the expected counts for a DataArray histogram with np.histogram2d.
+        '''
+        pixels = histogram.coords["detector_id"].values
+        tofs = histogram.coords["tof"].values
+        width = tofs[1] - tofs[0]
+
+        pixel_edges = np.append(pixels, pixels[-1] + 1) - 0.5
+        tof_edges = np.append(tofs - width / 2, tofs[-1] + width / 2)
+
+        counts, _, _ = np.histogram2d(self.event_id, self.event_time_offset, bins=[pixel_edges, tof_edges])
+        return counts
+
+    def test_find_event_groups(self):
+        '''
+        Test that only NXevent_data groups containing events are found.
+        '''
+        self.assertEqual(EventTool.find_event_groups(self.file_path), [("/entry/detector/events", self.num_events)])
+
+    def test_find_event_groups_unreadable_file(self):
+        '''
+        Test that a file which can't be opened contains no event data.
+        '''
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+
+        bad_path = os.path.join(directory, "bad.nxs")
+
+        with open(bad_path, "w") as bad_file:
+            bad_file.write("not a file")
+
+        self.assertEqual(EventTool.find_event_groups(bad_path), [])
+
+    def test_histogram_matches_reference(self):
+        '''
+        Test that streaming the events in chunks gives the same counts as histogramming them all at once.
+        '''
+        histogram = EventTool.histogram_events(self.file_path, "/entry/detector/events", chunk_size=999)
+
+        self.assertEqual(histogram.dims, ("tof", "detector_id"))
+        self.assertEqual(int(histogram.sum()), self.num_events)
+        np.testing.assert_array_equal(histogram.values.T, self._expected_counts(histogram))
+
+    def test_histogram_grows_for_new_pixels_and_times(self):
+        '''
+        Test that the histogram grows when events fall outside of the range of the previous chunks.
+        '''
+        histogram = EventTool.EventHistogram(tof_bin_width=10.0)
+        histogram.add(np.array([5, 6]), np.array([15.0, 25.0]))
+        histogram.add(np.array([2, 9]), np.array([-5.0, 95.0]))
+
+        self.assertEqual(histogram.pixel_offset, 2)
+        self.assertEqual(histogram.bin_offset, -1)
+        self.assertEqual(histogram.counts.shape, (8, 11))
+        self.assertEqual(histogram.counts.sum(), 4)
+        self.assertEqual(histogram.counts[5 - 2, 1 + 1], 1)
+        self.assertEqual(histogram.counts[2 - 2, -1 + 1], 1)
+
+    def test_sparse_and_dense_counting_agree(self):
+        '''
+        Test that the counting method used for sparse chunks gives the same result as the dense method.
+        '''
+        ids = np.array([0, 1000, 1000, 3])
+        tofs = np.array([0.0, 5.0, 5.0, 1.0])
+
+        sparse = EventTool.EventHistogram(tof_bin_width=1.0)
+        sparse.add(ids, tofs)
+
+        with mock.patch("datasetviewer.events.EventTool.SPARSE_THRESHOLD", 10**9):
+            dense = EventTool.EventHistogram(tof_bin_width=1.0)
+            dense.add(ids, tofs)
+
+        np.testing.assert_array_equal(sparse.counts, dense.counts)
+        self.assertEqual(sparse.counts[1000, 5], 2)
+
+    def test_progress_reports_partial_histograms(self):
+        '''
+        Test that partial histograms are reported while the events are counted.
+        '''
+        progress = mock.MagicMock()
+
+        with mock.patch("datasetviewer.events.EventTool.PROGRESS_INTERVAL", 0):
+            EventTool.histogram_events(self.file_path, "/entry/detector/events", chunk_size=2500, progress=progress)
+
+        self.assertEqual(progress.call_count, 3)
+        self.assertEqual([call[0][1] for call in progress.call_args_list], [0.25, 0.5, 0.75])
+        self.assertEqual(int(progress.call_args_list[0][0][0].sum()), 2500)
+
+    def test_cancelled_histogram(self):
+        '''
+        Test that histogramming stops and returns None when it is cancelled.
+        '''
+        self.assertIsNone(EventTool.histogram_events(self.file_path, "/entry/detector/events",
+                                                     is_cancelled=lambda: True))
+
+    def test_file_to_dict_adds_event_variables(self):
+        '''
+        Test that the FileLoaderTool adds an EventVariable for the event data after the variables of the root group.
+        '''
+        dataset = FileLoaderTool.file_to_dict(self.file_path)
+
+        self.assertEqual(list(dataset.keys()), ["monitor", "/entry/detector/events"])
+
+        variable = dataset["/entry/detector/events"]
+        self.assertIsInstance(variable, EventVariable)
+        self.assertEqual(variable.get_dimensions(), (self.num_events,))
+        self.assertFalse(variable.is_histogrammed())
+        self.assertEqual(variable.memory_usage(), 0)
+
+        # Reading the data doesn't count the events, which is left to the background
+        self.assertIsNone(variable.data)
+        self.assertFalse(variable.is_histogrammed())
+
+        self.assertEqual(int(variable.histogram().sum()), self.num_events)
+        self.assertTrue(variable.is_histogrammed())
+        self.assertEqual(int(variable.data.sum()), self.num_events)
+
+    def test_histograms_released_with_their_dataset(self):
+        '''
+        Test that the histograms of a file stop counting towards the memory budget once another file is loaded, so that
+        loading files one after another doesn't use up the budget.
+        '''
+        from datasetviewer.mainview.MainViewPresenter import MainViewPresenter
+        from datasetviewer.mainview.interfaces.MainViewInterface import MainViewInterface
+        from datasetviewer.preview.interfaces.PreviewPresenterInterface import PreviewPresenterInterface
+        from datasetviewer.plot.interfaces.PlotPresenterInterface import PlotPresenterInterface
+        from datasetviewer.fileloader.interfaces.FileLoaderPresenterInterface import FileLoaderPresenterInterface
+
+        sub_presenters = [mock.create_autospec(interface) for interface in
+                          (PreviewPresenterInterface, PlotPresenterInterface, FileLoaderPresenterInterface)]
+        main_presenter = MainViewPresenter(mock.create_autospec(MainViewInterface), *sub_presenters)
+        main_presenter.subscribe_preview_presenter(sub_presenters[0])
+        main_presenter.subscribe_plot_presenter(sub_presenters[1])
+
+        governor = MemoryGovernor(budget=10**9)
+        histograms = []
+
+        with mock.patch("datasetviewer.mainview.MainViewPresenter.get_governor", return_value=governor), \
+                mock.patch("datasetviewer.dataset.EventVariable.get_governor", return_value=governor), \
+                mock.patch("datasetviewer.events.EventTool.get_governor", return_value=governor):
+
+            for _ in range(3):
+                dataset = FileLoaderTool.file_to_dict(self.file_path)
+                main_presenter.set_dict(dataset)
+                histograms.append(dataset["/entry/detector/events"].histogram())
+
+                self.assertEqual(governor.total(), dataset["monitor"].memory_usage() + histograms[-1].nbytes)
+
+            # A histogram that is kept with a dataset that is shown again is counted once, as part of the dataset
+            main_presenter.set_dict(dataset)
+            self.assertEqual(governor.usage(), {"dataset": dataset["monitor"].memory_usage() + histograms[-1].nbytes})
+
+    def test_histogram_limited_by_budget(self):
+        '''
+        Test that a histogram that would grow past the memory budget, such as for a stray event with a distant pixel,
+        fails instead of being allocated, and that the counts are accounted for while they grow.
+        '''
+        governor = MemoryGovernor(budget=10000)
+        histogram = EventTool.EventHistogram(tof_bin_width=1.0, governor=governor)
+
+        histogram.add(np.array([0, 9]), np.array([0.0, 9.0]))
+        self.assertEqual(governor.usage(), {EventTool.MEMORY_CATEGORY: 800})
+
+        with self.assertRaises(MemoryError):
+            histogram.add(np.array([10**6]), np.array([0.0]))
+
+        histogram.release()
+        self.assertEqual(governor.total(), 0)
+
+    def test_time_of_flight_range_covers_every_chunk(self):
+        '''
+        Test that the bins cover the times of flight of all of the events and not only those of the first chunk.
+        '''
+        event_time_offset = self.event_time_offset.copy()
+        event_time_offset[:1000] = np.linspace(400, 500, 1000)
+        create_event_file(self.file_path, self.event_id, event_time_offset)
+
+        histogram = EventTool.histogram_events(self.file_path, "/entry/detector/events", chunk_size=1000)
+
+        self.assertEqual(histogram.sizes["tof"], EventTool.DEFAULT_TOF_BINS)
+        self.assertEqual(int(histogram.sum()), self.num_events)
+
+        tofs = histogram.coords["tof"].values
+        self.assertAlmostEqual(tofs[0] - (tofs[1] - tofs[0]) / 2, float(event_time_offset.min()), places=3)
@@ -0,0 +1,78 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import xarray as xr
+
+import datasetviewer.export.ExportTool as ExportTool
+
+class ExportToolTest(unittest.TestCase):
+
+    def setUp(self):
+
+        self.directory = tempfile.mkdtemp()
+        self.data = xr.DataArray(np.random.rand(30, 4, 5), dims=['x', 'y', 'z'], coords={'x': np.arange(30) * 0.5},
+                                 name="image", attrs={"units": "counts"})
+
+    def tearDown(self):
+
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_export_npy_in_chunks(self):
+        '''
+        Test that an array written a few rows at a time to a `.npy` file is read back unchanged.
+        '''
+
+        file_path = os.path.join(self.directory, "slice.npy")
+        self.assertTrue(ExportTool.export_array(self.data, file_path, chunk_elements=45))
+
+        np.testing.assert_array_equal(np.load(file_path), self.data.values)
+        self.assertEqual(os.listdir(self.directory), ["slice.npy"])
+
+    def test_export_netcdf_keeps_coordinates(self):
+        '''
+        Test that a NetCDF export keeps the dimension names, coordinates and attributes of the array.
+        '''
+
+        file_path = os.path.join(self.directory, "slice.nc")
+        ExportTool.export_array(self.data, file_path, chunk_elements=45)
+
+        with xr.open_dataset(file_path) as exported:
+            xr.testing.assert_identical(exported["image"].load(), self.data)
+
+    def test_export_lazy_array(self):
+        '''
+        Test that an array that is read from a file on demand can be exported.
+        '''
+
+        source_path = os.path.join(self.directory, "source.nc")
+        self.data.to_dataset().to_netcdf(source_path)
+
+        with xr.open_dataset(source_path) as source:
+            ExportTool.export_array(source["image"].isel(z=2), os.path.join(self.directory, "out.npy"),
+                                    chunk_elements=8)
+
+        np.testing.assert_array_equal(np.load(os.path.join(self.directory, "out.npy")), self.data.values[:, :, 2])
+
+    def test_cancelled_export_leaves_no_file(self):
+        '''
+        Test that cancelling an export doesn't leave a partial file behind.
+        '''
+
+        written = ExportTool.export_array(self.data, os.path.join(self.directory, "slice.nc"), is_cancelled=lambda: True)
+
+        self.assertFalse(written)
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_unsupported_exports_raise(self):
+        '''
+        Test that unknown extensions and arrays that aren't numbers are rejected.
+        '''
+
+        with self.assertRaises(ValueError):
+            ExportTool.export_array(self.data, os.path.join(self.directory, "slice.csv"))
+
+        with self.assertRaises(ValueError):
+            ExportTool.export_array(xr.DataArray(np.array(["a", "b"])), os.path.join(self.directory, "text.npy"))
@@ -54,6 +54,17 @@ class FileLoaderPresenterTest(unittest.TestCase):
         fl_presenter.notify(Command.FILEOPENREQUEST)
         self.mock_view.get_selected_file_path.assert_called_once()
 
+    def test_register_master_subscribes(self):
+        '''
+        Test that registering the MainViewPresenter subscribes the FileLoaderPresenter to it, so that it can open files
+        that are chosen elsewhere.
+        '''
+
+        fl_presenter = FileLoaderPresenter(self.mock_view)
+        fl_presenter.register_master(self.mock_main_presenter)
+
+        self.mock_main_presenter.subscribe_file_loader_presenter.assert_called_once_with(fl_presenter)
+
     def test_bad_file_shows_message_on_view(self):
         '''
         Test that the request to open a bad file causes the view to display a message.
@@ -153,3 +164,76 @@ class FileLoaderPresenterTest(unittest.TestCase):
 
         with self.assertRaises(ValueError):
             fl_presenter.notify(fake_enum.bad_command)
+
+    def test_unexpected_error_shown_not_raised(self):
+        '''
+        Test that an unexpected error while loading a file is logged and shown to the user instead of being raised in
+        the Qt thread.
+        '''
+        fl_presenter = FileLoaderPresenter(self.mock_view)
+
+        with self.assertLogs("datasetviewer.fileloader.FileLoaderPresenter", level="ERROR"):
+            fl_presenter._reject_file(KeyError("counts"))
+
+        self.mock_view.show_reject_file_message.assert_called_once_with("KeyError: 'counts'")
+
+    def test_file_loaded_in_background(self):
+        '''
+        Test that the file is read through the EventLoop so that opening a large file does not block the interface.
+        '''
+        fl_presenter = FileLoaderPresenter(self.mock_view)
+        fl_presenter.register_master(self.mock_main_presenter)
+
+        with mock.patch("datasetviewer.eventloop.EventLoop.run_in_background") as mock_run_in_background:
+
+            fl_presenter.notify(Command.FILEOPENREQUEST)
+
+            mock_run_in_background.assert_called_once_with(fl_presenter._load_data, self.fake_file_path[0],
+                                                           done=self.mock_main_presenter.set_dict,
+                                                           error=fl_presenter._reject_file)
+
+    def test_compare_request_shows_matched_variables(self):
+        '''
+        Test that comparing two files sends the matched variables and their differences to the MainViewPresenter, and
+        that the report of the whole-variable comparison is shown on the view.
+        '''
+
+        import numpy as np
+        from datasetviewer.dataset.Variable import Variable
+
+        dicts = {}
+
+        for path, values in (("a.nc", np.arange(6.0)), ("b.nc", np.arange(6.0) * 2)):
+            dicts[path] = DataSet()
+            dicts[path]["trace"] = Variable("trace", xr.DataArray(values, dims=['t']))
+
+        self.mock_view.get_compare_file_paths = mock.MagicMock(return_value=("a.nc", "b.nc"))
+
+        fl_presenter = FileLoaderPresenter(self.mock_view)
+        fl_presenter.register_master(self.mock_main_presenter)
+
+        with mock.patch("datasetviewer.fileloader.FileLoaderTool.file_to_dict", side_effect=lambda path: dicts[path]):
+            fl_presenter.notify(Command.COMPAREREQUEST)
+
+        dataset = self.mock_main_presenter.set_dict.call_args[0][0]
+        self.assertEqual(list(dataset.keys()), ["trace (A)", "trace (B)", "trace (A-B)"])
+
+        summary, report = self.mock_view.show_comparison_report.call_args[0]
+        self.assertEqual(summary, "1 of 1 compared variables differ")
+        self.assertIn("trace: 5 of 6 elements differ, first at (1,)", report)
+
+    def test_compare_request_without_both_files_does_nothing(self):
+        '''
+        Test that closing either file dialog when comparing files doesn't load anything.
+        '''
+
+        self.mock_view.get_compare_file_paths = mock.MagicMock(return_value=("a.nc", ""))
+
+        fl_presenter = FileLoaderPresenter(self.mock_view)
+        fl_presenter.register_master(self.mock_main_presenter)
+
+        with mock.patch("datasetviewer.fileloader.FileLoaderTool.file_to_dict") as file_to_dict:
+            fl_presenter.notify(Command.COMPAREREQUEST)
+
+        file_to_dict.assert_not_called()
+        self.mock_main_presenter.set_dict.assert_not_called()
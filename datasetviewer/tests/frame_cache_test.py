@@ -0,0 +1,89 @@
+import os
+import unittest
+
+import mock
+
+from datasetviewer.cache.MemoryGovernor import MemoryGovernor
+from datasetviewer.display.FrameCache import FrameCache, FrameCacheStats, FrameKey, frame_budget, hit_rate, \
+    DEFAULT_FRAME_BUDGET
+
+class FrameCacheTest(unittest.TestCase):
+
+    def setUp(self):
+
+        self.governor = MemoryGovernor(budget=1000)
+        self.frames = FrameCache(budget=100, governor=self.governor)
+        self.keys = [FrameKey("counts", (("z", z),), 1, (0.0, 1.0), "viridis", (10, 10)) for z in range(4)]
+
+    def test_frames_found_and_counted(self):
+        '''
+        Test that a frame is found under its key and not under a key that differs in any part, and that the hits and
+        misses are counted.
+        '''
+
+        self.assertTrue(self.frames.put(self.keys[0], "frame", 40))
+
+        self.assertEqual(self.frames.get(self.keys[0]), "frame")
+        self.assertIsNone(self.frames.get(self.keys[0]._replace(clim=(0.0, 2.0))))
+        self.assertIsNone(self.frames.get(self.keys[0]._replace(size=(20, 10))))
+
+        stats = self.frames.stats()
+        self.assertEqual(stats, FrameCacheStats(1, 2, 1, 40))
+        self.assertAlmostEqual(hit_rate(stats), 1 / 3)
+        self.assertIsNone(hit_rate(FrameCacheStats(0, 0, 0, 0)))
+
+    def test_least_recently_used_frame_evicted(self):
+        '''
+        Test that the least recently used frames are evicted when a frame doesn't fit in the budget, that frames
+        larger than the budget aren't kept, and that the frames are reported to the governor.
+        '''
+
+        for key in self.keys[:2]:
+            self.frames.put(key, key, 40)
+
+        self.frames.get(self.keys[0])
+        self.frames.put(self.keys[2], self.keys[2], 40)
+
+        self.assertIsNone(self.frames.get(self.keys[1]))
+        self.assertIsNotNone(self.frames.get(self.keys[0]))
+        self.assertFalse(self.frames.put(self.keys[3], self.keys[3], 101))
+        self.assertEqual(self.governor.usage(), {"frames": 80})
+
+    def test_governor_evicts_frames(self):
+        '''
+        Test that frames are dropped when the governor needs their memory.
+        '''
+
+        self.frames.put(self.keys[0], "frame", 40)
+        self.governor.set_budget(10)
+
+        self.assertIsNone(self.frames.get(self.keys[0]))
+        self.assertEqual(self.frames.stats().used, 0)
+
+    def test_discard_and_clear(self):
+        '''
+        Test that frames can be dropped selectively or all at once, and that the governor stops counting them.
+        '''
+
+        for key in self.keys[:2]:
+            self.frames.put(key, key, 20)
+
+        self.frames.discard(lambda key: key.selection == (("z", 0),))
+        self.assertIsNone(self.frames.get(self.keys[0]))
+        self.assertIsNotNone(self.frames.get(self.keys[1]))
+
+        self.frames.clear()
+        self.assertEqual(self.frames.stats().frames, 0)
+        self.assertEqual(self.governor.total(), 0)
+
+    def test_budget_from_environment(self):
+        '''
+        Test that the budget can be set with the DATASETVIEWER_FRAME_CACHE environment variable.
+        '''
+
+        with mock.patch.dict(os.environ, {"DATASETVIEWER_FRAME_CACHE": "16M"}):
+            self.assertEqual(frame_budget(), 16 * 2**20)
+
+        with mock.patch.dict(os.environ, {"DATASETVIEWER_FRAME_CACHE": "lots"}):
+            with self.assertLogs("datasetviewer.cache.MemoryGovernor", level="WARNING"):
+                self.assertEqual(frame_budget(), DEFAULT_FRAME_BUDGET)
@@ -0,0 +1,60 @@
+import unittest
+
+import numpy as np
+
+import datasetviewer.lineprofile.LineProfileTool as LineProfileTool
+
+class LineProfileToolTest(unittest.TestCase):
+
+    def setUp(self):
+
+        # A plane is reproduced exactly by bilinear interpolation
+        self.image = np.fromfunction(lambda row, col: 2 * col + 3 * row, (20, 30))
+
+    def test_bilinear_interpolation(self):
+        '''
+        Test that interpolated values lie on the plane, including on the last row and column, and that points outside
+        of the image are NaN.
+        '''
+        cols = np.array([0.5, 12.25, 29.0, 29.5, -0.1])
+        rows = np.array([0.0, 7.75, 19.0, 3.0, 3.0])
+
+        values = LineProfileTool.bilinear(self.image, cols, rows)
+
+        np.testing.assert_allclose(values[:3], 2 * cols[:3] + 3 * rows[:3])
+        self.assertTrue(np.isnan(values[3:]).all())
+
+    def test_profile_along_line(self):
+        '''
+        Test that the profile has a point for each element along the line and gives the distance from its start.
+        '''
+        distance, profile = LineProfileTool.line_profile(self.image, (1, 2), (13, 7))
+
+        self.assertEqual(len(profile), 14)
+        np.testing.assert_allclose(distance[[0, -1]], [0, 13])
+        np.testing.assert_allclose(profile, 2 * np.linspace(1, 13, 14) + 3 * np.linspace(2, 7, 14))
+
+    def test_width_averaging(self):
+        '''
+        Test that parallel lines on either side of the line are averaged, ignoring those that fall outside the image.
+        '''
+        image = np.zeros((5, 10))
+        image[1] = 3.0
+        image[2] = 6.0
+
+        _, profile = LineProfileTool.line_profile(image, (0, 2), (9, 2), width=3)
+        np.testing.assert_allclose(profile, 3.0)
+
+        _, profile = LineProfileTool.line_profile(image, (0, 0), (9, 0), width=3)
+        np.testing.assert_allclose(profile, 1.5)
+
+    def test_extent(self):
+        '''
+        Test that a line in the data coordinates of an image with an extent is sampled at the matching elements.
+        '''
+        extent = (-0.5, 59.5, 19.5, -0.5)
+
+        distance, profile = LineProfileTool.line_profile(self.image, (1, 4), (21, 4), extent=extent)
+
+        np.testing.assert_allclose(profile[[0, -1]], [2 * 0.25 + 12, 2 * 10.25 + 12])
+        self.assertEqual(distance[-1], 20)
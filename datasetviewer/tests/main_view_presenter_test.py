@@ -10,6 +10,8 @@ from datasetviewer.preview.interfaces.PreviewPresenterInterface import PreviewPr
 from datasetviewer.plot.interfaces.PlotPresenterInterface import PlotPresenterInterface
 from datasetviewer.fileloader.interfaces.FileLoaderPresenterInterface import FileLoaderPresenterInterface
 from datasetviewer.dataset.Variable import Variable
+import datasetviewer.profiling.Tracer as Tracer
+from datasetviewer.cache.MemoryGovernor import MemoryGovernor
 
 from collections import OrderedDict as DataSet
 import numpy as np
@@ -91,6 +93,17 @@ class MainViewPresenterTest(unittest.TestCase):
         # Test that the `create_default_plot` method in the PlotPresenter is called with the same key.
         self.mock_plot_presenter.create_default_plot.assert_called_once_with("good")
 
+    def test_open_file(self):
+        '''
+        Test that opening a file from elsewhere in the interface calls `load_file` in the FileLoaderPresenter.
+        '''
+
+        main_view_presenter = MainViewPresenter(self.mock_main_view, *self.mock_sub_presenters)
+        main_view_presenter.subscribe_file_loader_presenter(self.mock_file_loader_presenter)
+        main_view_presenter.open_file("/data/run.nc")
+
+        self.mock_file_loader_presenter.load_file.assert_called_once_with("/data/run.nc")
+
     def test_update_toolbar(self):
         '''
         Test that the `update_toolbar` method in the MainViewPresenter calls another function of the same name in the
@@ -100,3 +113,53 @@ class MainViewPresenterTest(unittest.TestCase):
         main_view_presenter = MainViewPresenter(self.mock_main_view, *self.mock_sub_presenters)
         main_view_presenter.update_toolbar()
         self.mock_main_view.update_toolbar.assert_called_once()
+
+    def test_show_status_message(self):
+        '''
+        Test that the `show_status_message` method in the MainViewPresenter calls another function of the same name in
+        the MainView.
+        '''
+
+        main_view_presenter = MainViewPresenter(self.mock_main_view, *self.mock_sub_presenters)
+        main_view_presenter.show_status_message("message")
+        self.mock_main_view.show_status_message.assert_called_once_with("message")
+
+    def test_timings_shown_in_status_bar(self):
+        '''
+        Test that the timing breakdown of a traced operation is shown in the MainView's status bar, without replacing the
+        status message.
+        '''
+
+        MainViewPresenter(self.mock_main_view, *self.mock_sub_presenters)
+
+        Tracer.enable()
+
+        try:
+            with Tracer.span("operation"):
+                pass
+        finally:
+            Tracer.disable()
+            Tracer.set_listener(None)
+
+        self.mock_main_view.show_timings.assert_called_once()
+        self.assertTrue(self.mock_main_view.show_timings.call_args[0][0].startswith("operation:"))
+        self.mock_main_view.show_status_message.assert_not_called()
+
+    def test_set_dict_registers_memory(self):
+        '''
+        Test that the in-memory size of a new data dictionary is reported under the "dataset" category.
+        '''
+
+        main_view_presenter = MainViewPresenter(self.mock_main_view, *self.mock_sub_presenters)
+        main_view_presenter.subscribe_preview_presenter(self.mock_preview_presenter)
+        main_view_presenter.subscribe_plot_presenter(self.mock_plot_presenter)
+
+        governor = MemoryGovernor(budget=10**6)
+
+        with mock.patch("datasetviewer.mainview.MainViewPresenter.get_governor", return_value=governor):
+            main_view_presenter.set_dict(self.fake_dict)
+            self.assertEqual(main_view_presenter.memory_usage(), {"dataset": (3 * 4 * 5 + 3) * 8})
+
+            # Replacing the dictionary replaces its entry
+            main_view_presenter.set_dict(DataSet([("valid", self.fake_dict["valid"])]))
+            self.assertEqual(main_view_presenter.memory_usage(), {"dataset": 3 * 8})
@@ -0,0 +1,167 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import mock
+import numpy as np
+import xarray as xr
+
+import datasetviewer.fileloader.FileLoaderTool as FileLoaderTool
+import datasetviewer.fileloader.MemmapTool as MemmapTool
+
+class MemmapToolTest(unittest.TestCase):
+
+    def setUp(self):
+
+        self.directory = tempfile.mkdtemp()
+        self.values = np.random.rand(6, 5, 4)
+        self.counts = np.arange(30, dtype=np.int32).reshape(6, 5)
+
+        self.data = xr.Dataset({"values": (("x", "y", "z"), self.values),
+                                "counts": (("x", "y"), self.counts),
+                                "records": (("run", "x"), np.random.rand(3, 6))},
+                               coords={"x": np.arange(6) * 10.0})
+
+    def tearDown(self):
+
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def _write(self, file_format, encoding=None):
+
+        path = os.path.join(self.directory, "{}.nc".format(file_format))
+        unlimited = ["run"] if file_format.startswith("NETCDF3") else None
+        self.data.to_netcdf(path, format=file_format, encoding=encoding, unlimited_dims=unlimited)
+
+        return path
+
+    def test_netcdf3_layout(self):
+        '''
+        Test that the offsets in a NetCDF-3 header point at the values of each variable, and that record variables,
+        which are interleaved, are left out.
+        '''
+
+        for file_format in ("NETCDF3_CLASSIC", "NETCDF3_64BIT"):
+            path = self._write(file_format)
+            layouts = MemmapTool.netcdf3_layout(path)
+
+            self.assertNotIn("records", layouts)
+            self.assertEqual(layouts["values"].shape, (6, 5, 4))
+            self.assertEqual(layouts["values"].dtype, np.dtype(">f8"))
+
+            with open(path, "rb") as nc_file:
+                nc_file.seek(layouts["counts"].offset)
+                stored = np.frombuffer(nc_file.read(self.counts.nbytes), dtype=">i4").reshape(6, 5)
+
+            np.testing.assert_array_equal(stored, self.counts)
+
+    def test_file_to_dict_maps_contiguous_variables(self):
+        '''
+        Test that contiguous variables are memory-mapped when a file is loaded, with the same values, dimensions and
+        coordinates as xarray gives them, and that they aren't counted as memory that the viewer holds.
+        '''
+
+        formats = ["NETCDF3_64BIT"]
+
+        if MemmapTool._import_h5py() is not None:
+            formats.append("NETCDF4")
+
+        for file_format in formats:
+            dataset = FileLoaderTool.file_to_dict(self._write(file_format))
+
+            self.assertTrue(dataset["values"].is_memory_mapped())
+            self.assertTrue(dataset["counts"].is_memory_mapped())
+            self.assertEqual(dataset["values"].memory_usage(), 0)
+
+            xr.testing.assert_identical(dataset["values"].data, self.data["values"])
+            np.testing.assert_array_equal(dataset["counts"].data.isel(y=2).values, self.counts[:, 2])
+
+    def test_changed_file_read_through_library(self):
+        '''
+        Test that slices of a mapped variable are copied out of the map after checking the file once, so that a slice
+        that is kept can still be read after its file is truncated, and that later slices are read through the library
+        rather than from pages that are no longer in the file, which would raise SIGBUS.
+        '''
+
+        # The values span many pages, and only pages that lie wholly past the end of the file raise SIGBUS
+        values = np.random.rand(64, 64, 4)
+        path = os.path.join(self.directory, "large.nc")
+        xr.Dataset({"values": (("x", "y", "z"), values)}).to_netcdf(path, format="NETCDF3_64BIT")
+
+        dataset = FileLoaderTool.file_to_dict(path)
+        mapped = dataset["values"].data.variable.data
+
+        with mock.patch("datasetviewer.fileloader.MemmapTool.file_identity", wraps=MemmapTool.file_identity) as identity:
+            first = dataset["values"].data.isel(z=1).values
+
+        self.assertEqual(identity.call_count, 1)
+        self.assertFalse(np.shares_memory(first, mapped))
+        np.testing.assert_array_equal(first, values[:, :, 1])
+
+        # Leaves the header, but not the values
+        layout = MemmapTool.netcdf3_layout(path)["values"]
+
+        with open(path, "r+b") as nc_file:
+            nc_file.truncate(layout.offset)
+
+        np.testing.assert_array_equal(first, values[:, :, 1])
+
+        again = dataset["values"].data.isel(z=1).values
+        self.assertFalse(np.shares_memory(again, mapped))
+        self.assertEqual(again.shape, (64, 64))
+
+    def test_watched_folder_not_mapped(self):
+        '''
+        Test that files in the folder that is being watched for new runs aren't mapped, as they may still be written.
+        '''
+
+        path = self._write("NETCDF3_64BIT")
+        MemmapTool.set_watched_directory(self.directory)
+
+        try:
+            self.assertFalse(FileLoaderTool.file_to_dict(path)["values"].is_memory_mapped())
+        finally:
+            MemmapTool.set_watched_directory(None)
+
+        self.assertTrue(FileLoaderTool.file_to_dict(path)["values"].is_memory_mapped())
+
+    def test_decoded_variables_not_mapped(self):
+        '''
+        Test that variables whose values xarray scales or masks are read through the library.
+        '''
+
+        path = self._write("NETCDF3_64BIT", {"values": {"dtype": "int16", "scale_factor": 0.01, "_FillValue": -1},
+                                             "counts": {"_FillValue": 7}})
+
+        dataset = FileLoaderTool.file_to_dict(path)
+
+        self.assertFalse(dataset["values"].is_memory_mapped())
+        self.assertFalse(dataset["counts"].is_memory_mapped())
+        self.assertTrue(np.isnan(dataset["counts"].data.values[1, 2]))
+
+    def test_other_files_not_mapped(self):
+        '''
+        Test that files that aren't NetCDF, and NetCDF-3 files with damaged headers, have no layout.
+        '''
+
+        path = os.path.join(self.directory, "notes.txt")
+
+        with open(path, "w") as text_file:
+            text_file.write("not a netcdf file")
+
+        self.assertEqual(MemmapTool.file_layout(path), {})
+
+        truncated = os.path.join(self.directory, "truncated.nc")
+
+        with open(self._write("NETCDF3_CLASSIC"), "rb") as nc_file, open(truncated, "wb") as truncated_file:
+            truncated_file.write(nc_file.read(40))
+
+        self.assertEqual(MemmapTool.file_layout(truncated), {})
+
+    def test_hdf5_layout_without_h5py(self):
+        '''
+        Test that NetCDF4 files aren't mapped when h5py isn't installed.
+        '''
+
+        with mock.patch("datasetviewer.fileloader.MemmapTool._import_h5py", return_value=None):
+            self.assertEqual(MemmapTool.file_layout(self._write("NETCDF4")), {})
@@ -0,0 +1,151 @@
+import unittest
+
+import mock
+
+from datasetviewer.cache.MemoryGovernor import MemoryGovernor, Priority, parse_size, get_governor
+
+class MemoryGovernorTest(unittest.TestCase):
+
+    def setUp(self):
+
+        self.governor = MemoryGovernor(budget=100)
+
+    def test_register_within_budget(self):
+        '''
+        Test that buffers which fit within the budget are registered and reported under their category.
+        '''
+        self.assertTrue(self.governor.register("a", 40, "slices", evict=mock.MagicMock()))
+        self.assertTrue(self.governor.register("b", 30, "frames", evict=mock.MagicMock()))
+        self.assertTrue(self.governor.register("c", 10, "slices", evict=mock.MagicMock()))
+
+        self.assertEqual(self.governor.usage(), {"slices": 50, "frames": 30})
+        self.assertEqual(self.governor.total(), 80)
+
+    def test_prefetch_evicted_before_visible(self):
+        '''
+        Test that lower priority entries are evicted first regardless of how recently they were used.
+        '''
+        evict_visible = mock.MagicMock()
+        evict_prefetch = mock.MagicMock()
+
+        self.governor.register("visible", 50, "slices", Priority.VISIBLE, evict_visible)
+        self.governor.register("prefetch", 50, "slices", Priority.PREFETCH, evict_prefetch)
+
+        self.assertTrue(self.governor.register("new", 50, "slices", Priority.VISIBLE, mock.MagicMock()))
+
+        evict_prefetch.assert_called_once()
+        evict_visible.assert_not_called()
+        self.assertFalse(self.governor.contains("prefetch"))
+
+    def test_least_recently_used_evicted_within_priority(self):
+        '''
+        Test that the least recently used entry is evicted when entries share a priority.
+        '''
+        evict_first = mock.MagicMock()
+        evict_second = mock.MagicMock()
+
+        self.governor.register("first", 50, "slices", evict=evict_first)
+        self.governor.register("second", 50, "slices", evict=evict_second)
+        self.governor.touch("first")
+
+        self.governor.register("third", 50, "slices", evict=mock.MagicMock())
+
+        evict_second.assert_called_once()
+        evict_first.assert_not_called()
+
+    def test_low_priority_cannot_evict_high_priority(self):
+        '''
+        Test that prefetched data is rejected rather than evicting data that is on screen.
+        '''
+        evict_visible = mock.MagicMock()
+        self.governor.register("visible", 80, "slices", Priority.VISIBLE, evict_visible)
+
+        self.assertFalse(self.governor.register("prefetch", 50, "slices", Priority.PREFETCH, mock.MagicMock()))
+
+        evict_visible.assert_not_called()
+        self.assertFalse(self.governor.contains("prefetch"))
+        self.assertEqual(self.governor.total(), 80)
+
+    def test_pinned_entries_always_registered(self):
+        '''
+        Test that entries without an eviction callback are accounted for even when they exceed the budget.
+        '''
+        evict = mock.MagicMock()
+        self.governor.register("cached", 50, "slices", evict=evict)
+
+        self.assertTrue(self.governor.register("dataset", 150, "dataset", Priority.VISIBLE))
+
+        evict.assert_called_once()
+        self.assertEqual(self.governor.usage(), {"dataset": 150})
+
+    def test_shrinking_budget_evicts(self):
+        '''
+        Test that lowering the budget evicts entries until the usage fits.
+        '''
+        evict_a = mock.MagicMock()
+        evict_b = mock.MagicMock()
+        self.governor.register("a", 40, "slices", Priority.PREFETCH, evict_a)
+        self.governor.register("b", 40, "slices", Priority.VISIBLE, evict_b)
+
+        self.governor.set_budget(50)
+
+        evict_a.assert_called_once()
+        evict_b.assert_not_called()
+        self.assertEqual(self.governor.budget, 50)
+
+    def test_unregister(self):
+        '''
+        Test that unregistering a buffer frees its bytes without calling its eviction callback.
+        '''
+        evict = mock.MagicMock()
+        self.governor.register("a", 40, "slices", evict=evict)
+        self.governor.unregister("a")
+        self.governor.unregister("unknown")
+
+        evict.assert_not_called()
+        self.assertEqual(self.governor.total(), 0)
+
+    def test_eviction_callback_may_use_governor(self):
+        '''
+        Test that an eviction callback can call back into the governor without deadlocking.
+        '''
+        self.governor.register("a", 60, "slices", evict=lambda: self.governor.usage())
+        self.assertTrue(self.governor.register("b", 60, "slices", evict=mock.MagicMock()))
+
+    def test_parse_size(self):
+        '''
+        Test the conversion of budget strings to bytes.
+        '''
+        self.assertEqual(parse_size("1024"), 1024)
+        self.assertEqual(parse_size("512M"), 512 * 2**20)
+        self.assertEqual(parse_size("2gb"), 2 * 2**30)
+
+        with self.assertRaises(ValueError):
+            parse_size("lots")
+
+    def test_budget_from_environment(self):
+        '''
+        Test that the default budget can be set with an environment variable.
+        '''
+        with mock.patch.dict("os.environ", {"DATASETVIEWER_MEMORY_BUDGET": "3G"}):
+            self.assertEqual(MemoryGovernor().budget, 3 * 2**30)
+
+    def test_invalid_budget_from_environment(self):
+        '''
+        Test that a budget that isn't a valid size is ignored with a warning, rather than stopping files from being
+        opened.
+        '''
+        default = MemoryGovernor().budget
+
+        for text in ("1.5", "lots", "-2G"):
+            with mock.patch.dict("os.environ", {"DATASETVIEWER_MEMORY_BUDGET": text}):
+                with self.assertLogs("datasetviewer.cache.MemoryGovernor", level="WARNING") as logs:
+                    self.assertEqual(MemoryGovernor().budget, default)
+
+            self.assertIn("DATASETVIEWER_MEMORY_BUDGET", logs.output[0])
+
+    def test_get_governor_is_shared(self):
+        '''
+        Test that the same governor is returned for the whole process.
+        '''
+        self.assertIs(get_governor(), get_governor())
@@ -0,0 +1,107 @@
+import os
+import shutil
+import tempfile
+import unittest
+import zlib
+
+import mock
+import numpy as np
+import xarray as xr
+
+import datasetviewer.readplan.ParallelReadTool as ParallelReadTool
+import datasetviewer.readplan.ReadPlanTool as ReadPlanTool
+
+@unittest.skipIf(ParallelReadTool._import_h5py() is None, "h5py isn't installed")
+class ParallelReadToolTest(unittest.TestCase):
+
+    def setUp(self):
+
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "compressed.nc")
+        self.values = np.random.rand(20, 25, 6)
+        self.values[3, 4, :] = np.nan
+
+        encoding = {"counts": {"chunksizes": (7, 9, 3), "zlib": True, "shuffle": True, "fletcher32": True}}
+        xr.Dataset({"counts": (("x", "y", "z"), self.values)}).to_netcdf(self.path, encoding=encoding)
+
+        self.dataset = xr.open_dataset(self.path)
+        self.data = self.dataset["counts"]
+
+    def tearDown(self):
+
+        self.dataset.close()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_can_read_compressed_variable(self):
+        '''
+        Test that a chunked, compressed variable can be read in parallel, and that arrays in memory can't.
+        '''
+
+        self.assertTrue(ParallelReadTool.can_read(self.data))
+        self.assertFalse(ParallelReadTool.can_read(xr.DataArray(self.values)))
+
+    def test_cannot_read_scaled_variable(self):
+        '''
+        Test that variables whose values are changed by xarray as they are read are left to xarray.
+        '''
+
+        path = os.path.join(self.directory, "scaled.nc")
+        encoding = {"counts": {"chunksizes": (7, 9, 3), "zlib": True, "dtype": "int16", "scale_factor": 0.01,
+                               "_FillValue": -1}}
+        xr.Dataset({"counts": (("x", "y", "z"), np.nan_to_num(self.values))}).to_netcdf(path, encoding=encoding)
+
+        with xr.open_dataset(path) as dataset:
+            self.assertFalse(ParallelReadTool.can_read(dataset["counts"]))
+
+    def test_cannot_read_without_h5py(self):
+        '''
+        Test that nothing is read in parallel when h5py isn't installed.
+        '''
+
+        with mock.patch("datasetviewer.readplan.ParallelReadTool._import_h5py", return_value=None):
+            self.assertFalse(ParallelReadTool.can_read(self.data))
+
+    def test_read_rows_matches_xarray(self):
+        '''
+        Test that slices read in parallel, including slices that cut across the chunks and ranges of rows that start
+        and stop inside a chunk, are the same as those read by xarray.
+        '''
+
+        for selection in ({"z": 4}, {"y": 10}, {"x": 19, "z": 0}):
+            expected = self.data.isel(selection).values
+            np.testing.assert_array_equal(ParallelReadTool.read_rows(self.data, selection, max_workers=3), expected)
+
+        np.testing.assert_array_equal(ParallelReadTool.read_rows(self.data, {"z": 1}, 5, 16),
+                                      self.data.isel(z=1).values[5:16])
+
+    def test_decode_shuffle_before_checksum(self):
+        '''
+        Test that a chunk is unshuffled without its checksum, which is added after the shuffle, and that filters in the
+        chunk's mask are skipped.
+        '''
+
+        values = np.arange(6, dtype=np.int32)
+        shuffled = values.view(np.uint8).reshape(6, 4).T.tobytes()
+        pipeline = [(ParallelReadTool._SHUFFLE, ()), (ParallelReadTool._DEFLATE, (4,)),
+                    (ParallelReadTool._FLETCHER32, ())]
+
+        raw = zlib.compress(shuffled) + b"\x00\x01\x02\x03"
+        decoded = ParallelReadTool._decode(raw, pipeline, 0, 4)
+        np.testing.assert_array_equal(np.frombuffer(decoded, dtype=np.int32), values)
+
+        # A chunk that didn't compress is stored without the deflate filter
+        raw = shuffled + b"\x00\x01\x02\x03"
+        decoded = ParallelReadTool._decode(raw, pipeline, 0b10, 4)
+        np.testing.assert_array_equal(np.frombuffer(decoded, dtype=np.int32), values)
+
+    def test_read_slice_uses_parallel_reads(self):
+        '''
+        Test that a slice touching several chunks is decompressed in parallel rather than through the chunk cache.
+        '''
+
+        with mock.patch("datasetviewer.readplan.ReadPlanTool.size_chunk_cache") as size_chunk_cache:
+            arr = ReadPlanTool.read_slice(self.data, {"z": 2})
+
+        size_chunk_cache.assert_not_called()
+        np.testing.assert_array_equal(arr.values, self.values[:, :, 2])
+        self.assertEqual(arr.dims, ("x", "y"))
@@ -8,9 +8,13 @@ from datasetviewer.mainview.interfaces.MainViewInterface import MainViewInterfac
 from datasetviewer.mainview.interfaces.MainViewPresenterInterface import MainViewPresenterInterface
 from datasetviewer.plot.interfaces.PlotViewInterface import PlotViewInterface
 from datasetviewer.plot.PlotPresenter import PlotPresenter
+from datasetviewer.plot.Command import Command
+
+from enum import Enum
 
 from collections import OrderedDict as DataSet
 from datasetviewer.dataset.Variable import Variable
+from datasetviewer.dataset.EventVariable import EventVariable
 
 class PlotPresenterTest(unittest.TestCase):
 
@@ -18,6 +22,8 @@ class PlotPresenterTest(unittest.TestCase):
 
         self.mock_main_view = mock.create_autospec(MainViewInterface)
         self.mock_plot_view = mock.create_autospec(PlotViewInterface)
+        self.mock_plot_view.get_colormap.return_value = "viridis"
+        self.mock_plot_view.get_frame_size.return_value = (640, 480)
 
         self.mock_main_presenter = mock.create_autospec(MainViewPresenterInterface)
 
@@ -65,8 +71,12 @@ class PlotPresenterTest(unittest.TestCase):
                                     self.fake_dict["twodims"].data.transpose()[0])
 
         plot_pres.create_default_plot("fourdims")
-        xr.testing.assert_identical(self.mock_plot_view.plot_image.call_args[0][0],
-                                    self.fake_dict["fourdims"].data.isel({'e':0, 'f':0}).transpose('d', 'c'))
+        image = self.fake_dict["fourdims"].data.isel({'e':0, 'f':0}).transpose('d', 'c')
+
+        # The slice is kept at full precision and drawn as float32, in the order it is stored and transposed by the view
+        xr.testing.assert_identical(plot_pres._displayed_image[0], image)
+        np.testing.assert_array_equal(self.mock_plot_view.plot_image.call_args[0][0], image.values.T.astype(np.float32))
+        self.assertTrue(self.mock_plot_view.plot_image.call_args[1]["transpose"])
 
     def test_register_master(self):
         '''
@@ -133,3 +143,758 @@ class PlotPresenterTest(unittest.TestCase):
 
         plot_pres.create_default_plot("onedim")
         self.mock_main_presenter.update_toolbar.assert_called_once()
+
+    def test_event_data_plotted_as_image(self):
+        '''
+        Test that event data is histogrammed and plotted as a time-of-flight by detector pixel image, with the partial
+        histograms shown while the events are counted.
+        '''
+
+        event_variable = EventVariable("events", "file.nxs", "/entry/events", 100)
+        histogram = xr.DataArray(np.random.rand(6, 4), dims=("tof", "detector_id"))
+
+        def fake_histogram(file_path, group_path, progress=None, is_cancelled=None):
+            progress(histogram * 0.5, 0.5)
+            return histogram
+
+        self.fake_dict["events"] = event_variable
+
+        plot_pres = PlotPresenter(self.mock_plot_view)
+        plot_pres.register_master(self.mock_main_presenter)
+        plot_pres._dict = self.fake_dict
+
+        with mock.patch("datasetviewer.events.EventTool.histogram_events", side_effect=fake_histogram):
+            plot_pres.create_default_plot("events")
+
+        # One image for the partial histogram and one for the complete histogram
+        self.assertEqual(self.mock_plot_view.plot_image.call_count, 2)
+        xr.testing.assert_identical(plot_pres._displayed_image[0], histogram.transpose("detector_id", "tof"))
+        self.mock_plot_view.label_x_axis.assert_called_with("tof")
+        self.assertTrue(event_variable.is_histogrammed())
+
+    def test_partial_histogram_ignored_after_selection_changes(self):
+        '''
+        Test that progress from event data that is no longer selected doesn't replace the current plot.
+        '''
+
+        plot_pres = PlotPresenter(self.mock_plot_view)
+        plot_pres.register_master(self.mock_main_presenter)
+        plot_pres._dict = self.fake_dict
+        plot_pres.create_default_plot("onedim")
+
+        plot_pres._show_partial_histogram("events", xr.DataArray(np.zeros((2, 2)), dims=("tof", "detector_id")), 0.5)
+        self.mock_plot_view.plot_image.assert_not_called()
+
+    def test_rebin_change_replots_with_bins(self):
+        '''
+        Test that changing the rebinning factor replots the current element with the X axis summed into bins.
+        '''
+
+        self.mock_plot_view.get_rebin_factor = mock.MagicMock(return_value=2)
+
+        plot_pres = PlotPresenter(self.mock_plot_view)
+        plot_pres.register_master(self.mock_main_presenter)
+        plot_pres.set_dict(self.fake_dict)
+
+        plot_pres.create_default_plot("twodims")
+        plot_pres.notify(Command.REBINCHANGE)
+
+        data = self.fake_dict["twodims"].data.values
+        np.testing.assert_allclose(self.mock_plot_view.plot_line.call_args[0][0], [data[0:2, 0].sum(), data[2, 0]])
+        np.testing.assert_array_equal(self.mock_plot_view.plot_line.call_args[1]["x"], [0.5, 2])
+
+        plot_pres.create_default_plot("fourdims")
+        image = self.mock_plot_view.plot_image.call_args[0][0]
+        expected = self.fake_dict["fourdims"].data.values[:, :, 0, 0]
+        np.testing.assert_allclose(image, np.array([expected[0:2].sum(axis=0), expected[2:3].sum(axis=0)]))
+        self.assertEqual(self.mock_plot_view.plot_image.call_args[1]["extent"], (-0.5, 2.5, 3.5, -0.5))
+
+    def test_new_dict_discards_cumulative_sums(self):
+        '''
+        Test that the cached cumulative sums are dropped when a new dictionary is set.
+        '''
+
+        self.mock_plot_view.get_rebin_factor = mock.MagicMock(return_value=2)
+
+        plot_pres = PlotPresenter(self.mock_plot_view)
+        plot_pres.register_master(self.mock_main_presenter)
+        plot_pres.set_dict(self.fake_dict)
+        plot_pres.notify(Command.REBINCHANGE)
+
+        self.assertIn("threedims", plot_pres._cumulative_sums)
+
+        plot_pres.set_dict(DataSet([("onedim", self.fake_dict["onedim"])]))
+        self.assertNotIn("threedims", plot_pres._cumulative_sums)
+
+    def test_notify_raises_if_command_unknown(self):
+        '''
+        Test that an exception is thrown if notify is called with a command it does not recognise.
+        '''
+
+        plot_pres = PlotPresenter(self.mock_plot_view)
+        fake_enum = Enum(value='invalid', names=[('bad_command', -200000)])
+
+        with self.assertRaises(ValueError):
+            plot_pres.notify(fake_enum.bad_command)
+
+    def test_roi_change_shows_stats(self):
+        '''
+        Test that moving a region of interest shows the statistics of the displayed image inside it, and that the
+        summed-area tables are only built once for each image.
+        '''
+
+        self.mock_plot_view.get_roi = mock.MagicMock(return_value=(0.6, 2.4, 0.6, 1.4))
+
+        plot_pres = PlotPresenter(self.mock_plot_view)
+        plot_pres.register_master(self.mock_main_presenter)
+        plot_pres.set_dict(self.fake_dict)
+
+        plot_pres.notify(Command.ROICHANGE)
+
+        # The image shows the first dimension along the X axis
+        region = self.fake_dict["threedims"].data.values[1:3, 1, 0]
+        self.mock_main_presenter.show_status_message.assert_called_with(
+            "ROI: 2 pixels, sum {:.6g}, mean {:.6g}, std {:.6g}".format(region.sum(), region.mean(), region.std()))
+
+        table = plot_pres._roi_table
+        plot_pres.notify(Command.ROICHANGE)
+        self.assertIs(plot_pres._roi_table, table)
+
+        plot_pres.create_default_plot("fourdims")
+        self.assertIsNone(plot_pres._roi_table)
+
+    def test_evicted_roi_table_dropped_on_main_thread(self):
+        '''
+        Test that summed-area tables that the MemoryGovernor evicts are dropped on the Qt thread, and that a late drop
+        doesn't discard the tables of a newer image.
+        '''
+        from datasetviewer.cache.MemoryGovernor import MemoryGovernor
+
+        self.mock_plot_view.get_roi = mock.MagicMock(return_value=(0.6, 2.4, 0.6, 1.4))
+        governor = MemoryGovernor(budget=10**6)
+        posted = []
+
+        plot_pres = PlotPresenter(self.mock_plot_view)
+        plot_pres.register_master(self.mock_main_presenter)
+        plot_pres.set_dict(self.fake_dict)
+
+        with mock.patch("datasetviewer.plot.PlotPresenter.get_governor", return_value=governor), \
+                mock.patch("datasetviewer.eventloop.EventLoop.call_in_main_thread",
+                           side_effect=lambda func, *args: posted.append((func, args))):
+
+            plot_pres.notify(Command.ROICHANGE)
+            table = plot_pres._roi_table
+
+            governor.set_budget(0)
+            self.assertIs(plot_pres._roi_table, table)
+
+            func, args = posted.pop()
+            func(*args)
+            self.assertIsNone(plot_pres._roi_table)
+
+            # Tables of the next image aren't dropped by the eviction of the previous ones
+            governor.set_budget(10**6)
+            plot_pres.notify(Command.ROICHANGE)
+            func(*args)
+            self.assertIsNotNone(plot_pres._roi_table)
+
+    def test_roi_change_ignored_without_image(self):
+        '''
+        Test that no statistics are shown when a line is plotted or there is no region.
+        '''
+
+        self.mock_plot_view.get_roi = mock.MagicMock(return_value=None)
+
+        plot_pres = PlotPresenter(self.mock_plot_view)
+        plot_pres.register_master(self.mock_main_presenter)
+        plot_pres.set_dict(self.fake_dict)
+        plot_pres.notify(Command.ROICHANGE)
+
+        self.mock_plot_view.get_roi.return_value = (0, 1, 0, 1)
+        plot_pres.create_default_plot("onedim")
+        plot_pres.notify(Command.ROICHANGE)
+
+        self.mock_main_presenter.show_status_message.assert_not_called()
+
+    def test_image_colour_limits_from_percentiles(self):
+        '''
+        Test that images are plotted with the 1st and 99th percentiles of the whole variable as their colour limits,
+        and that no limits are given for rebinned images.
+        '''
+
+        plot_pres = PlotPresenter(self.mock_plot_view)
+        plot_pres.register_master(self.mock_main_presenter)
+        plot_pres.set_dict(self.fake_dict)
+
+        data = self.fake_dict["threedims"].data.values
+        np.testing.assert_allclose(self.mock_plot_view.plot_image.call_args[1]["clim"], np.percentile(data, [1, 99]))
+
+        self.mock_plot_view.get_rebin_factor = mock.MagicMock(return_value=2)
+        plot_pres.notify(Command.REBINCHANGE)
+        self.assertIsNone(self.mock_plot_view.plot_image.call_args[1]["clim"])
+
+    def test_colour_limits_refined_in_background(self):
+        '''
+        Test that the first image is plotted with limits estimated from one pass over the variable, that the limits are
+        replaced once the remaining passes have been read in the background, and that late results for an element that
+        is no longer plotted are ignored.
+        '''
+
+        plot_pres = PlotPresenter(self.mock_plot_view)
+        plot_pres.register_master(self.mock_main_presenter)
+
+        callbacks = []
+
+        with mock.patch("datasetviewer.eventloop.EventLoop.run_in_background",
+                        side_effect=lambda func, *args, done, error: callbacks.append((func, args, done))), \
+                mock.patch("datasetviewer.stats.QuantileTool.pass_stride", return_value=3):
+            plot_pres.set_dict(self.fake_dict)
+
+        data = self.fake_dict["threedims"].data.values
+        np.testing.assert_allclose(self.mock_plot_view.plot_image.call_args[1]["clim"], np.percentile(data[0], [1, 99]))
+
+        func, args, done = callbacks[0]
+        done(func(*args))
+        np.testing.assert_allclose(self.mock_plot_view.set_clim.call_args[0][0], np.percentile(data, [1, 99]))
+
+        plot_pres.create_default_plot("onedim")
+        done(func(*args))
+        self.mock_plot_view.set_clim.assert_called_once()
+
+    def test_cursor_move_shows_value(self):
+        '''
+        Test that moving the cursor over an image or a line shows the element under it in the status bar, and that
+        nothing is shown when the cursor is outside of the data.
+        '''
+
+        plot_pres = PlotPresenter(self.mock_plot_view)
+        plot_pres.register_master(self.mock_main_presenter)
+        plot_pres.set_dict(self.fake_dict)
+
+        data = self.fake_dict["threedims"].data.values
+
+        self.mock_plot_view.get_cursor = mock.MagicMock(return_value=(1.8, 3.1))
+        plot_pres.notify(Command.CURSORMOVE)
+        self.mock_main_presenter.show_status_message.assert_called_with(
+            "x = 2, y = 3, value = {:.6g}".format(data[2, 3, 0]))
+
+        plot_pres.create_default_plot("onedim")
+        self.mock_plot_view.get_cursor.return_value = (0.6, 0)
+        plot_pres.notify(Command.CURSORMOVE)
+        self.mock_main_presenter.show_status_message.assert_called_with(
+            "b = 1, value = {:.6g}".format(self.fake_dict["onedim"].data.values[1]))
+
+        self.mock_main_presenter.show_status_message.reset_mock()
+
+        self.mock_plot_view.get_cursor.return_value = (7, 0)
+        plot_pres.notify(Command.CURSORMOVE)
+        self.mock_plot_view.get_cursor.return_value = None
+        plot_pres.notify(Command.CURSORMOVE)
+
+        self.mock_main_presenter.show_status_message.assert_not_called()
+
+    def test_profile_change_plots_profile(self):
+        '''
+        Test that moving the profile line plots the values of the displayed image along it, and that nothing is plotted
+        without a line or for a line plot.
+        '''
+
+        self.mock_plot_view.get_profile_line = mock.MagicMock(return_value=((0, 1), (2, 1)))
+        self.mock_plot_view.get_profile_width = mock.MagicMock(return_value=1)
+
+        plot_pres = PlotPresenter(self.mock_plot_view)
+        plot_pres.register_master(self.mock_main_presenter)
+        plot_pres.set_dict(self.fake_dict)
+        plot_pres.notify(Command.PROFILECHANGE)
+
+        distance, profile = self.mock_plot_view.plot_profile.call_args[0]
+        np.testing.assert_allclose(distance, [0, 1, 2])
+        np.testing.assert_allclose(profile, self.fake_dict["threedims"].data.values[:, 1, 0])
+
+        self.mock_plot_view.plot_profile.reset_mock()
+
+        plot_pres.create_default_plot("onedim")
+        plot_pres.notify(Command.PROFILECHANGE)
+
+        self.mock_plot_view.plot_profile.assert_not_called()
+
+    def test_overlay_plots_each_line_once(self):
+        '''
+        Test that selecting several elements plots them together with a single draw, and that elements that can't be
+        shown as lines are skipped.
+        '''
+
+        self.mock_plot_view.get_viewport = mock.MagicMock(return_value=(0, 2, 800))
+
+        plot_pres = PlotPresenter(self.mock_plot_view)
+        plot_pres.register_master(self.mock_main_presenter)
+        plot_pres.set_dict(self.fake_dict)
+        self.mock_plot_view.draw_plot.reset_mock()
+
+        plot_pres.create_overlay_plot(["onedim", "twodims", "threedims"])
+
+        traces = self.mock_plot_view.plot_overlay.call_args[0][0]
+
+        self.assertEqual([trace[0] for trace in traces], ["onedim", "twodims"])
+        np.testing.assert_array_equal(traces[0][2], self.fake_dict["onedim"].data.values)
+        np.testing.assert_array_equal(traces[1][2], self.fake_dict["twodims"].data.values[:, 0])
+        np.testing.assert_array_equal(traces[1][1], np.arange(3))
+
+        self.mock_plot_view.draw_plot.assert_called_once()
+
+    def test_overlay_decimated_to_viewport(self):
+        '''
+        Test that long traces are reduced to two points per pixel, and that zooming in decimates the visible part of the
+        traces again.
+        '''
+
+        self.fake_dict["long"] = Variable("long", xr.DataArray(np.random.rand(100000), dims=['t'],
+                                                               coords={'t': np.linspace(0, 1, 100000)}))
+        self.mock_plot_view.get_viewport = mock.MagicMock(return_value=(0, 1, 500))
+
+        plot_pres = PlotPresenter(self.mock_plot_view)
+        plot_pres.register_master(self.mock_main_presenter)
+        plot_pres.set_dict(self.fake_dict)
+        plot_pres.create_overlay_plot(["onedim", "long"])
+
+        traces = self.mock_plot_view.plot_overlay.call_args[0][0]
+
+        self.assertEqual(len(traces[0][1]), 3)
+        self.assertEqual(len(traces[1][1]), 1000)
+        self.assertEqual(traces[1][2].max(), self.fake_dict["long"].data.values.max())
+
+        # The view hasn't changed, so nothing is decimated again
+        plot_pres.notify(Command.VIEWPORTCHANGE)
+        self.mock_plot_view.update_overlay.assert_not_called()
+
+        self.mock_plot_view.get_viewport.return_value = (0.5, 0.51, 500)
+        plot_pres.notify(Command.VIEWPORTCHANGE)
+
+        x = self.mock_plot_view.update_overlay.call_args[0][0][1][1]
+        self.assertLessEqual(len(x), 1000)
+        self.assertTrue(np.all((x > 0.4999) & (x < 0.5101)))
+        self.assertTrue(x.min() < 0.5005 and x.max() > 0.5095)
+
+    def test_overlay_ignored_after_selection_changes(self):
+        '''
+        Test that traces which finish loading after another element has been plotted aren't shown.
+        '''
+
+        self.mock_plot_view.get_viewport = mock.MagicMock(return_value=(0, 2, 800))
+
+        plot_pres = PlotPresenter(self.mock_plot_view)
+        plot_pres.register_master(self.mock_main_presenter)
+        plot_pres.set_dict(self.fake_dict)
+
+        with mock.patch("datasetviewer.plot.PlotPresenter.EventLoop.submit") as submit:
+            plot_pres.create_overlay_plot(["onedim", "twodims"])
+
+        plot_pres.create_default_plot("onedim")
+
+        coro = submit.call_args[0][0]
+        coro.close()
+        submit.call_args[1]["done"]([(np.arange(3), np.zeros(3))] * 2)
+
+        self.mock_plot_view.plot_overlay.assert_not_called()
+
+    def test_export_request_writes_file(self):
+        '''
+        Test that exporting writes the plotted slice, the region of interest or the whole element to the chosen file,
+        and that nothing is written without a region of interest.
+        '''
+
+        import os
+        import shutil
+        import tempfile
+
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, True)
+
+        plot_pres = PlotPresenter(self.mock_plot_view)
+        plot_pres.register_master(self.mock_main_presenter)
+        plot_pres.set_dict(self.fake_dict)
+
+        data = self.fake_dict["threedims"].data.values
+        self.mock_plot_view.get_roi = mock.MagicMock(return_value=(0.6, 2.4, -0.4, 1.4))
+
+        for scope, expected in (("slice", data[:, :, 0]), ("roi", data[1:3, 0:2, 0]), ("variable", data)):
+            file_path = os.path.join(directory, scope + ".npy")
+            self.mock_plot_view.get_export_request = mock.MagicMock(return_value=(scope, file_path))
+            plot_pres.notify(Command.EXPORTREQUEST)
+
+            np.testing.assert_array_equal(np.load(file_path), expected)
+
+        self.mock_plot_view.get_roi.return_value = None
+        self.mock_plot_view.get_export_request.return_value = ("roi", os.path.join(directory, "none.npy"))
+        plot_pres.notify(Command.EXPORTREQUEST)
+
+        self.assertFalse(os.path.exists(os.path.join(directory, "none.npy")))
+        self.mock_main_presenter.show_status_message.assert_called_with("Nothing to export")
+
+    def test_large_slice_shown_progressively(self):
+        '''
+        Test that a large slice that is read from the file is shown as a preview, refined with tiles, and then replaced
+        with the whole slice, which is used for the cursor readout.
+        '''
+
+        import datasetviewer.progressive.ProgressiveTool as ProgressiveTool
+
+        values = np.random.rand(1030, 20, 2)
+        self.fake_dict["large"] = Variable("large", xr.DataArray(values, dims=["x", "y", "z"]))
+
+        plot_pres = PlotPresenter(self.mock_plot_view)
+        plot_pres.register_master(self.mock_main_presenter)
+        plot_pres._dict = self.fake_dict
+
+        with mock.patch.object(Variable, "memory_usage", return_value=0), \
+                mock.patch.object(ProgressiveTool, "PROGRESSIVE_ELEMENTS", 1000), \
+                mock.patch.object(ProgressiveTool, "DEFAULT_CHUNK_ELEMENTS", 200), \
+                mock.patch.object(ProgressiveTool, "PROGRESS_INTERVAL", 0):
+            plot_pres.create_default_plot("large")
+
+        # The preview takes every third element along the X axis, and is stretched over the whole slice
+        np.testing.assert_array_equal(self.mock_plot_view.plot_image.call_args[0][0], values[::3, :, 0].astype(np.float32))
+        self.assertEqual(self.mock_plot_view.plot_image.call_args[1]["extent"], (-0.5, 1029.5, 19.5, -0.5))
+
+        self.assertEqual(self.mock_plot_view.add_image_tile.call_count, 103)
+        np.testing.assert_array_equal(self.mock_plot_view.add_image_tile.call_args[0][0],
+                                      values[1020:, :, 0].astype(np.float32))
+        self.assertEqual(self.mock_plot_view.add_image_tile.call_args[0][1], (1019.5, 1029.5, 19.5, -0.5))
+
+        np.testing.assert_array_equal(self.mock_plot_view.set_image.call_args[0][0], values[:, :, 0].astype(np.float32))
+
+        image = plot_pres._displayed_image[0]
+        np.testing.assert_array_equal(image, values[:, :, 0].T)
+        self.assertEqual(image.dims, ("y", "x"))
+
+    def test_preview_read_in_background(self):
+        '''
+        Test that the preview of a large slice and its colour limits are read in the background, and that the preview is
+        only drawn when it arrives if the slice is still wanted.
+        '''
+
+        import datasetviewer.progressive.ProgressiveTool as ProgressiveTool
+
+        self.fake_dict["large"] = Variable("large", xr.DataArray(np.random.rand(1030, 20, 2), dims=["x", "y", "z"]))
+
+        plot_pres = PlotPresenter(self.mock_plot_view)
+        plot_pres.register_master(self.mock_main_presenter)
+        plot_pres._dict = self.fake_dict
+
+        with mock.patch.object(Variable, "memory_usage", return_value=0), \
+                mock.patch.object(ProgressiveTool, "PROGRESSIVE_ELEMENTS", 1000), \
+                mock.patch("datasetviewer.eventloop.EventLoop.run_in_background") as run_in_background, \
+                mock.patch.object(Variable, "estimate_percentiles") as estimate_percentiles:
+
+            plot_pres.create_default_plot("large")
+
+            self.mock_plot_view.plot_image.assert_not_called()
+            estimate_percentiles.assert_not_called()
+
+            read_preview = run_in_background.call_args[0][0]
+            done = run_in_background.call_args[1]["done"]
+            result = read_preview()
+            estimate_percentiles.assert_called_once_with()
+
+            plot_pres._plot_request += 1
+            done(result)
+            self.mock_plot_view.plot_image.assert_not_called()
+
+            plot_pres._plot_request -= 1
+            done(result)
+
+        self.assertEqual(self.mock_plot_view.plot_image.call_args[0][0].shape, (344, 20))
+
+    def test_progressive_tiles_ignored_after_new_plot(self):
+        '''
+        Test that tiles of a slice that arrive after another element has been plotted aren't drawn.
+        '''
+
+        plot_pres = PlotPresenter(self.mock_plot_view)
+        plot_pres.register_master(self.mock_main_presenter)
+        plot_pres.set_dict(self.fake_dict)
+
+        request = plot_pres._plot_request
+        plot_pres.create_default_plot("onedim")
+
+        plot_pres._show_tile(request, np.zeros((3, 4)), 0, 3)
+        plot_pres._finish_progressive_image(request, self.fake_dict["threedims"].data,
+                                            self.fake_dict["threedims"].data.isel(z=0), np.zeros((3, 4)), True)
+
+        self.mock_plot_view.add_image_tile.assert_not_called()
+        self.mock_plot_view.set_image.assert_not_called()
+
+    def test_chunked_slice_reports_amplification(self):
+        '''
+        Test that plotting a slice of a chunked variable that is read from its file reports the read amplification.
+        '''
+
+        import os
+        import shutil
+        import tempfile
+
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, True)
+
+        path = os.path.join(directory, "chunked.nc")
+        values = np.random.rand(20, 10, 4)
+        xr.Dataset({"counts": (("x", "y", "z"), values)}).to_netcdf(
+            path, encoding={"counts": {"chunksizes": (10, 10, 2), "zlib": True}})
+
+        dataset = xr.open_dataset(path)
+        self.addCleanup(dataset.close)
+
+        plot_pres = PlotPresenter(self.mock_plot_view)
+        plot_pres.register_master(self.mock_main_presenter)
+        plot_pres.set_dict(DataSet([("counts", Variable("counts", dataset["counts"]))]))
+
+        np.testing.assert_array_equal(plot_pres._displayed_image[0], values[:, :, 0].T)
+        self.mock_main_presenter.show_status_message.assert_any_call(
+            "Read amplification 2.0x: 2 chunks of 10x10x2 decompressed, 0.0 MB for 0.0 MB shown")
+
+    def test_image_converted_once_for_display(self):
+        '''
+        Test that an image is copied once, to float32, on its way to the PlotView, and that compact images aren't copied.
+        '''
+
+        import datasetviewer.profiling.Tracer as Tracer
+
+        self.fake_dict["counts"] = Variable("counts", xr.DataArray(np.arange(60, dtype=np.int16).reshape(3, 4, 5),
+                                                                   dims=['c', 'd', 'e']))
+
+        plot_pres = PlotPresenter(self.mock_plot_view)
+        plot_pres.register_master(self.mock_main_presenter)
+        plot_pres._dict = self.fake_dict
+
+        Tracer.enable()
+        self.addCleanup(Tracer.disable)
+
+        plot_pres.create_default_plot("threedims")
+        self.assertEqual(Tracer.copy_counts(), {"display": (1, 3 * 4 * 4)})
+
+        Tracer.enable()
+        plot_pres.create_default_plot("counts")
+        self.assertEqual(Tracer.copy_counts(), {})
+        self.assertEqual(self.mock_plot_view.plot_image.call_args[0][0].dtype, np.int16)
+
+    def test_slices_reach_view_without_copies(self):
+        '''
+        Test that compact slices are passed to the PlotView as views of the arrays they come from: a memory-mapped array
+        isn't copied at all, and a slice that is read from a file is copied once, by the read.
+        '''
+
+        import os
+        import shutil
+        import tempfile
+        import datasetviewer.profiling.Tracer as Tracer
+
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, True)
+
+        values = np.random.rand(30, 20, 4).astype(np.float32)
+        mapped = np.memmap(os.path.join(directory, "counts.dat"), dtype=np.float32, mode="w+", shape=values.shape)
+        mapped[:] = values
+
+        path = os.path.join(directory, "counts.nc")
+        xr.Dataset({"counts": (("x", "y", "z"), values)}).to_netcdf(path)
+        dataset = xr.open_dataset(path)
+        self.addCleanup(dataset.close)
+
+        plot_pres = PlotPresenter(self.mock_plot_view)
+        plot_pres.register_master(self.mock_main_presenter)
+        plot_pres._dict = DataSet([("mapped", Variable("mapped", xr.DataArray(mapped, dims=("x", "y", "z")))),
+                                   ("file", Variable("file", dataset["counts"]))])
+
+        Tracer.enable()
+        self.addCleanup(Tracer.disable)
+
+        plot_pres.create_default_plot("mapped")
+
+        self.assertEqual(Tracer.copy_counts(), {})
+        self.assertTrue(np.shares_memory(self.mock_plot_view.plot_image.call_args[0][0], mapped))
+        self.assertTrue(np.shares_memory(plot_pres._displayed_image[0].values, mapped))
+
+        Tracer.enable()
+        plot_pres.create_default_plot("file")
+
+        self.assertEqual(Tracer.copy_counts(), {"read_slice": (1, 30 * 20 * 4)})
+        self.assertTrue(np.shares_memory(self.mock_plot_view.plot_image.call_args[0][0],
+                                         plot_pres._displayed_image[0].values))
+
+    def test_memory_mapped_plots_copied_out_of_map(self):
+        '''
+        Test that the line or image that is plotted from a memory-mapped variable, and kept for the cursor readout, is
+        copied out of the map after checking the file once, so that nothing reads the map if the file changes later.
+        '''
+
+        import os
+        import shutil
+        import tempfile
+        import datasetviewer.fileloader.FileLoaderTool as FileLoaderTool
+        import datasetviewer.fileloader.MemmapTool as MemmapTool
+
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, True)
+
+        path = os.path.join(directory, "mapped.nc")
+        xr.Dataset({"line": (("x",), np.random.rand(50)),
+                    "cube": (("x", "y", "z"), np.random.rand(50, 20, 4))}).to_netcdf(path, format="NETCDF3_64BIT")
+
+        plot_pres = PlotPresenter(self.mock_plot_view)
+        plot_pres.register_master(self.mock_main_presenter)
+        plot_pres._dict = FileLoaderTool.file_to_dict(path)
+
+        # Sampling the variable for its colour limits is a read of its own
+        plot_pres._refine_colour_limits = mock.Mock()
+        plot_pres._colour_limits = mock.Mock(return_value=None)
+
+        for key in ("line", "cube"):
+
+            mapped = plot_pres._dict[key].data.variable.data
+            self.assertTrue(plot_pres._dict[key].is_memory_mapped())
+
+            with mock.patch("datasetviewer.fileloader.MemmapTool.file_identity",
+                            wraps=MemmapTool.file_identity) as identity:
+                plot_pres.create_default_plot(key)
+
+            self.assertEqual(identity.call_count, 1)
+            self.assertFalse(np.shares_memory(np.asarray(plot_pres._readout._values), mapped))
+
+        self.assertFalse(np.shares_memory(self.mock_plot_view.plot_line.call_args[0][0], mapped))
+        self.assertFalse(np.shares_memory(self.mock_plot_view.plot_image.call_args[0][0], mapped))
+
+    def test_slices_shared_between_viewers(self):
+        '''
+        Test that a slice read by one viewer is taken from the shared slice cache by another viewer of the same file,
+        which leases it until it shows another plot.
+        '''
+
+        import os
+        import shutil
+        import tempfile
+        import datasetviewer.profiling.Tracer as Tracer
+        from datasetviewer.cache.SharedSliceCache import SharedSliceCache
+
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, True)
+
+        values = np.random.rand(30, 20, 4).astype(np.float32)
+        path = os.path.join(directory, "counts.nc")
+        xr.Dataset({"counts": (("x", "y", "z"), values)}).to_netcdf(path)
+
+        viewers = []
+
+        for _ in range(2):
+            dataset = xr.open_dataset(path)
+            self.addCleanup(dataset.close)
+
+            plot_pres = PlotPresenter(self.mock_plot_view)
+            plot_pres.register_master(self.mock_main_presenter)
+            plot_pres._dict = DataSet([("counts", Variable("counts", dataset["counts"]))])
+            viewers.append((plot_pres, SharedSliceCache(10**6, os.path.join(directory, "shared"))))
+
+        Tracer.enable()
+        self.addCleanup(Tracer.disable)
+
+        for plot_pres, cache in viewers:
+            with mock.patch("datasetviewer.cache.SharedSliceCache.get_shared_cache", return_value=cache):
+                plot_pres.create_default_plot("counts")
+
+        self.assertEqual(Tracer.copy_counts(), {"read_slice": (1, 30 * 20 * 4), "shared_cache": (1, 30 * 20 * 4)})
+        self.assertEqual(viewers[1][1].stats().hits, 1)
+        np.testing.assert_array_equal(viewers[1][0]._displayed_image[0].values, values[:, :, 0].T)
+
+        plot_pres, cache = viewers[1]
+        slot = cache._find(plot_pres._shared_lease)
+        self.assertEqual(cache._index["refcount"][slot], 1)
+
+        with mock.patch("datasetviewer.cache.SharedSliceCache.get_shared_cache", return_value=cache):
+            plot_pres._clear_plot()
+
+        self.assertIsNone(plot_pres._shared_lease)
+        self.assertEqual(cache._index["refcount"][slot], 0)
+
+    def test_image_shown_again_from_its_frame(self):
+        '''
+        Test that an image that has been drawn before is shown by restoring its rendered frame instead of drawing it,
+        and that it is drawn again if the colour map or the size of the canvas has changed.
+        '''
+
+        plot_pres = PlotPresenter(self.mock_plot_view)
+        plot_pres.register_master(self.mock_main_presenter)
+
+        self.mock_plot_view.capture_frame.return_value = "threedims frame"
+        plot_pres.set_dict(self.fake_dict)
+
+        self.mock_plot_view.draw_plot.reset_mock()
+        plot_pres.create_default_plot("onedim")
+        plot_pres.create_default_plot("threedims")
+
+        self.mock_plot_view.restore_frame.assert_called_once_with("threedims frame")
+        self.assertEqual(self.mock_plot_view.draw_plot.call_count, 1)
+        self.assertEqual(plot_pres.frame_cache_stats().hits, 1)
+
+        self.mock_plot_view.get_colormap.return_value = "magma"
+        plot_pres.create_default_plot("threedims")
+
+        self.mock_plot_view.get_frame_size.return_value = (320, 240)
+        plot_pres.create_default_plot("threedims")
+
+        self.mock_plot_view.restore_frame.assert_called_once()
+        self.assertEqual(self.mock_plot_view.draw_plot.call_count, 3)
+
+    def test_frames_invalidated(self):
+        '''
+        Test that an image is only kept once its colour limits are final, that it is kept after it is redrawn in the
+        refined limits, and that the frames are dropped when the canvas is resized and when a new dictionary is set.
+        '''
+
+        plot_pres = PlotPresenter(self.mock_plot_view)
+        plot_pres.register_master(self.mock_main_presenter)
+
+        callbacks = []
+
+        with mock.patch("datasetviewer.eventloop.EventLoop.run_in_background",
+                        side_effect=lambda func, *args, done, error: callbacks.append((func, args, done))), \
+                mock.patch("datasetviewer.stats.QuantileTool.pass_stride", return_value=3):
+            plot_pres.set_dict(self.fake_dict)
+
+        # The image in the estimated limits isn't kept
+        self.assertEqual(plot_pres.frame_cache_stats().frames, 0)
+
+        # The image in the refined limits is
+        func, args, done = callbacks[0]
+        percentiles = func(*args)
+        self.mock_plot_view.capture_frame.return_value = "refined frame"
+        done(percentiles)
+
+        self.assertEqual(plot_pres.frame_cache_stats().frames, 1)
+        self.assertEqual(plot_pres._frame_key.clim, (percentiles.low, percentiles.high))
+
+        plot_pres.create_default_plot("threedims")
+        self.mock_plot_view.restore_frame.assert_called_once_with("refined frame")
+
+        plot_pres.create_default_plot("fourdims")
+        self.assertEqual(plot_pres.frame_cache_stats().frames, 2)
+
+        plot_pres.notify(Command.RESIZE)
+        self.assertEqual(plot_pres.frame_cache_stats().frames, 0)
+
+        plot_pres.create_default_plot("threedims")
+        plot_pres.set_dict(self.fake_dict)
+        self.assertEqual(plot_pres.frame_cache_stats().misses, 4)
+
+    def test_colourbar_removed_before_axes_cleared(self):
+        '''
+        Test that the colourbar is removed while its image is still on the axes, so that the axes get back the space
+        that it took and don't shrink with each plot.
+        '''
+
+        calls = mock.MagicMock()
+        self.mock_plot_view.cbar = calls.cbar
+        self.mock_plot_view.ax = calls.ax
+
+        plot_pres = PlotPresenter(self.mock_plot_view)
+        plot_pres._clear_plot()
+
+        self.assertEqual(calls.mock_calls[:2], [mock.call.cbar.remove(), mock.call.ax.cla()])
@@ -134,6 +134,27 @@ class PreviewPresenterTest(unittest.TestCase):
         '''
         self.mock_master_presenter.create_default_plot.assert_called_once_with("expected_key")
 
+    def test_multiple_selection_calls_overlay_plot(self):
+        '''
+        Test that selecting several elements on the PreviewView causes the MainViewPresenter to be alerted that they
+        should be overlaid.
+        '''
+
+        prev_presenter = PreviewPresenter(self.mock_preview_view)
+        prev_presenter.register_master(self.mock_master_presenter)
+
+        fake_list_items = [QListWidgetItem(), QListWidgetItem()]
+        fake_list_items[0].setText("first_key\n(5,)")
+        fake_list_items[1].setText("second_key\n(7,)")
+
+        self.mock_preview_view.get_selected_item = mock.MagicMock(return_value=fake_list_items[1])
+        self.mock_preview_view.get_selected_items = mock.MagicMock(return_value=fake_list_items)
+
+        prev_presenter.notify(Command.ELEMENTSELECTION)
+
+        self.mock_master_presenter.create_overlay_plot.assert_called_once_with(["first_key", "second_key"])
+        self.mock_master_presenter.create_default_plot.assert_not_called()
+
     def test_bad_command_throws(self):
         '''
         Test that an unrecognised command passed to notify causes an exception to be thrown
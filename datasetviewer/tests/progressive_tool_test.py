@@ -0,0 +1,90 @@
+import unittest
+
+import mock
+import numpy as np
+import xarray as xr
+
+import datasetviewer.progressive.ProgressiveTool as ProgressiveTool
+
+class ProgressiveToolTest(unittest.TestCase):
+
+    def setUp(self):
+
+        self.data = xr.DataArray(np.random.rand(100, 30), dims=("x", "y"))
+
+    def test_is_progressive(self):
+        '''
+        Test that only slices with more elements than the threshold are shown progressively.
+        '''
+
+        with mock.patch.object(ProgressiveTool, "PROGRESSIVE_ELEMENTS", 100):
+            self.assertFalse(ProgressiveTool.is_progressive((10, 10)))
+            self.assertTrue(ProgressiveTool.is_progressive((10, 11)))
+
+    def test_read_preview_strides(self):
+        '''
+        Test that the preview takes every nth element along each dimension, so that no side is longer than the size.
+        '''
+
+        preview = ProgressiveTool.read_preview(self.data, size=16)
+
+        np.testing.assert_array_equal(preview, self.data.values[::7, ::2])
+        self.assertLessEqual(max(preview.shape), 16)
+
+    def test_preview_limited_to_whole_chunks(self):
+        '''
+        Test that the strides of a preview of a chunked array become whole numbers of chunks when it would otherwise
+        decompress too many chunks, and that they are left alone when it wouldn't.
+        '''
+
+        self.assertEqual(ProgressiveTool.preview_steps((100, 30), size=16, chunks=(10, 10), max_chunks=100), [7, 2])
+        self.assertEqual(ProgressiveTool.preview_steps((100, 30), size=16, chunks=(10, 10), max_chunks=4), [50, 20])
+
+        preview = ProgressiveTool.read_preview(self.data, size=16, chunks=(10, 10), max_chunks=4)
+        np.testing.assert_array_equal(preview, self.data.values[::50, ::20])
+
+    def test_read_tiles_fills_buffer(self):
+        '''
+        Test that reading the tiles fills the buffer and reports every row once, in order.
+        '''
+
+        out = np.empty(self.data.shape)
+        reports = []
+
+        with mock.patch.object(ProgressiveTool, "PROGRESS_INTERVAL", 0):
+            finished = ProgressiveTool.read_tiles(self.data, out, chunk_elements=300,
+                                                  progress=lambda start, stop: reports.append((start, stop)))
+
+        self.assertTrue(finished)
+        np.testing.assert_array_equal(out, self.data.values)
+        self.assertEqual(reports, [(start, start + 10) for start in range(0, 100, 10)])
+
+    def test_progress_batches_rows(self):
+        '''
+        Test that rows read between reports are reported together, and that the last rows are always reported.
+        '''
+
+        reports = []
+
+        with mock.patch.object(ProgressiveTool, "PROGRESS_INTERVAL", 3600):
+            ProgressiveTool.read_tiles(self.data, np.empty(self.data.shape), chunk_elements=300,
+                                       progress=lambda start, stop: reports.append((start, stop)))
+
+        self.assertEqual(reports, [(0, 100)])
+
+    def test_read_tiles_cancelled(self):
+        '''
+        Test that reading stops when it is cancelled.
+        '''
+
+        checks = []
+
+        def is_cancelled():
+            checks.append(None)
+            return len(checks) > 2
+
+        finished = ProgressiveTool.read_tiles(self.data, np.empty(self.data.shape), chunk_elements=300,
+                                              is_cancelled=is_cancelled)
+
+        self.assertFalse(finished)
+        self.assertEqual(len(checks), 3)
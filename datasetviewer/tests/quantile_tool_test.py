@@ -0,0 +1,176 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import mock
+import numpy as np
+import xarray as xr
+
+import datasetviewer.stats.QuantileTool as QuantileTool
+from datasetviewer.stats.QuantileTool import QuantileSketch
+from datasetviewer.cache.SchemaCache import SchemaCache
+from datasetviewer.dataset.Variable import Variable
+
+class QuantileToolTest(unittest.TestCase):
+
+    def test_small_sample_is_exact(self):
+        '''
+        Test that the percentiles are exact, with no rank error, while every value fits in the sample.
+        '''
+        values = np.random.rand(500)
+        values[7] = np.nan
+
+        sketch = QuantileSketch(capacity=1000)
+        sketch.add(values[:200])
+        sketch.add(values[200:])
+
+        percentiles = sketch.percentiles()
+
+        self.assertTrue(sketch.is_exact())
+        self.assertEqual(sketch.seen, 499)
+        np.testing.assert_allclose(percentiles[:2], np.nanpercentile(values, [1, 99]))
+        self.assertEqual(percentiles.rank_error, 0)
+
+    def test_estimate_within_rank_error(self):
+        '''
+        Test that a sample of a large array with hot pixels gives percentiles whose true ranks are within the stated
+        rank error of the requested ones.
+        '''
+        values = np.random.default_rng(1).exponential(size=10**6)
+        values[::1000] = 1e9
+
+        sketch = QuantileSketch(capacity=10**4, seed=2)
+
+        for chunk in np.array_split(values, 13):
+            sketch.add(chunk)
+
+        percentiles = sketch.percentiles()
+
+        self.assertEqual(sketch.size, 10**4)
+        self.assertAlmostEqual(percentiles.rank_error, QuantileTool.dkw_rank_error(10**4))
+        self.assertLess(percentiles.high, 1e9)
+
+        for value, fraction in ((percentiles.low, 0.01), (percentiles.high, 0.99)):
+            self.assertLessEqual(abs(np.mean(values <= value) - fraction), percentiles.rank_error)
+
+    def test_empty_sketch(self):
+        '''
+        Test that there are no percentiles until a finite value has been added.
+        '''
+        sketch = QuantileSketch()
+        sketch.add(np.array([np.nan, np.inf]))
+
+        self.assertIsNone(sketch.percentiles())
+
+    def test_pass_order(self):
+        '''
+        Test that the passes cover every row once and that each pass falls between the earlier ones.
+        '''
+        self.assertEqual(QuantileTool.pass_offsets(8), [0, 4, 2, 6, 1, 5, 3, 7])
+        self.assertEqual(sorted(QuantileTool.pass_offsets(11)), list(range(11)))
+
+        self.assertEqual(QuantileTool.pass_stride((1000, 100), pass_elements=10**4), 10)
+        self.assertEqual(QuantileTool.pass_stride((3, 10**6), pass_elements=10**4), 3)
+        self.assertEqual(QuantileTool.pass_stride((5,), pass_elements=10**4), 1)
+
+class VariablePercentilesTest(unittest.TestCase):
+
+    def setUp(self):
+
+        self.cache_dir = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.cache_dir, "data.nc")
+
+        with open(self.file_path, "w") as data_file:
+            data_file.write("data")
+
+        self.data = xr.DataArray(np.random.rand(12, 5), dims=["x", "y"])
+
+    def tearDown(self):
+
+        shutil.rmtree(self.cache_dir)
+
+    def test_estimate_then_refine(self):
+        '''
+        Test that the estimate only uses the first pass, that refining reads the rest and can be resumed after being
+        cancelled, and that the refined percentiles and statistics are persisted.
+        '''
+        variable = Variable("var", self.data, SchemaCache(self.file_path, self.cache_dir))
+
+        with mock.patch("datasetviewer.stats.QuantileTool.pass_stride", return_value=4):
+
+            estimate = variable.estimate_percentiles()
+            np.testing.assert_allclose(estimate[:2], np.percentile(self.data.values[0::4], [1, 99]))
+
+            self.assertIsNone(variable.refine_percentiles(is_cancelled=lambda: True))
+            self.assertIsNone(variable.percentiles())
+
+            progress = mock.MagicMock()
+
+            with mock.patch("datasetviewer.stats.QuantileTool.PROGRESS_INTERVAL", 0):
+                refined = variable.refine_percentiles(progress)
+
+        self.assertEqual(progress.call_count, 3)
+        np.testing.assert_allclose(refined[:2], np.percentile(self.data.values, [1, 99]))
+        self.assertAlmostEqual(variable.cached_statistics().mean, float(self.data.mean()))
+
+        reopened = Variable("var", self.data, SchemaCache(self.file_path, self.cache_dir))
+        self.assertEqual(reopened.percentiles(), refined)
+        self.assertEqual(reopened.estimate_percentiles(), refined)
+
+    def test_schema_cache_read_once(self):
+        '''
+        Test that the schema cache is read once for the percentiles and statistics, including when it holds nothing for
+        the variable, and read again after the variable has written to it.
+        '''
+        variable = Variable("var", self.data, SchemaCache(self.file_path, self.cache_dir))
+
+        with mock.patch.object(SchemaCache, "fields", autospec=True, side_effect=SchemaCache.fields) as fields:
+
+            for _ in range(3):
+                self.assertIsNone(variable.percentiles())
+                self.assertIsNone(variable.cached_statistics())
+
+            self.assertEqual(fields.call_count, 1)
+
+            refined = variable.refine_percentiles()
+            variable._percentiles = None
+
+            self.assertEqual(variable.percentiles(), refined)
+            self.assertEqual(fields.call_count, 2)
+
+    def test_estimate_waits_for_first_pass(self):
+        '''
+        Test that an estimate that is requested while another thread reads the first pass waits for that pass instead
+        of using an empty sketch or reading another pass.
+        '''
+        import threading
+
+        variable = Variable("var", self.data)
+        reading = threading.Event()
+        release = threading.Event()
+        read_pass = QuantileTool.read_pass
+
+        def slow_read_pass(*args):
+            reading.set()
+            release.wait(5)
+            return read_pass(*args)
+
+        with mock.patch("datasetviewer.stats.QuantileTool.read_pass", side_effect=slow_read_pass) as mock_read_pass:
+
+            reader = threading.Thread(target=variable.refine_percentiles, kwargs={"is_cancelled": lambda: reading.is_set()})
+            reader.start()
+            reading.wait(5)
+
+            estimates = []
+            estimator = threading.Thread(target=lambda: estimates.append(variable.estimate_percentiles()))
+            estimator.start()
+
+            # Gives the estimate time to reach the sketch while the first pass is still being read
+            estimator.join(0.1)
+            release.set()
+            reader.join(5)
+            estimator.join(5)
+
+        self.assertIsNotNone(estimates[0])
+        self.assertEqual(mock_read_pass.call_count, 1)
@@ -0,0 +1,148 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import mock
+import numpy as np
+import xarray as xr
+
+import datasetviewer.readplan.ReadPlanTool as ReadPlanTool
+from datasetviewer.cache.MemoryGovernor import MemoryGovernor
+
+class ReadPlanToolTest(unittest.TestCase):
+
+    def setUp(self):
+
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "chunked.nc")
+        self.values = np.random.rand(40, 30, 8)
+
+        xr.Dataset({"counts": (("x", "y", "z"), self.values)}).to_netcdf(
+            self.path, encoding={"counts": {"chunksizes": (10, 10, 4), "zlib": True}})
+
+        self.dataset = xr.open_dataset(self.path)
+        self.data = self.dataset["counts"]
+
+    def tearDown(self):
+
+        self.dataset.close()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_chunk_shape(self):
+        '''
+        Test that the chunk shape is read from the encoding of a variable, and that arrays in memory have none.
+        '''
+
+        self.assertEqual(ReadPlanTool.chunk_shape(self.data), (10, 10, 4))
+        self.assertIsNone(ReadPlanTool.chunk_shape(xr.DataArray(self.values)))
+
+    def test_plan_counts_touched_chunks(self):
+        '''
+        Test that a slice across the chunk grain decompresses every chunk that it touches, and that the amplification
+        is the ratio of the bytes decompressed to the bytes shown.
+        '''
+
+        image = ReadPlanTool.plan_slice(self.data, {"z": 0})
+
+        self.assertEqual(image.chunks_read, 4 * 3)
+        self.assertEqual(image.bytes_read, 12 * 400 * 8)
+        self.assertEqual(image.bytes_displayed, 40 * 30 * 8)
+        self.assertEqual(ReadPlanTool.amplification(image), 4)
+
+        line = ReadPlanTool.plan_slice(self.data, {"y": 0, "z": 0})
+
+        self.assertEqual(line.chunks_read, 4)
+        self.assertEqual(ReadPlanTool.amplification(line), 40)
+
+    def test_blocks_follow_chunks(self):
+        '''
+        Test that blocks of rows are whole numbers of chunks, no longer than the slice, and that the cache holds at
+        least one block of chunks.
+        '''
+
+        small = ReadPlanTool.plan_slice(self.data, {"z": 0}, block_elements=700)
+        self.assertEqual(small.block_rows, 20)
+
+        tiny = ReadPlanTool.plan_slice(self.data, {"z": 0}, block_elements=1)
+        self.assertEqual(tiny.block_rows, 10)
+
+        whole = ReadPlanTool.plan_slice(self.data, {"z": 0})
+        self.assertEqual(whole.block_rows, 40)
+        self.assertEqual(whole.cache_bytes, whole.bytes_read)
+
+        with mock.patch.object(ReadPlanTool, "MAX_CACHE_BYTES", 1):
+            self.assertEqual(ReadPlanTool.plan_slice(self.data, {"z": 0}, block_elements=1).cache_bytes, 3 * 400 * 8)
+
+    def test_memory_arrays_not_chunked(self):
+        '''
+        Test that slices of arrays in memory are read in plain blocks, with no decompression and no cache.
+        '''
+
+        plan = ReadPlanTool.plan_slice(xr.DataArray(self.values, dims=("x", "y", "z")), {"z": 0})
+
+        self.assertIsNone(plan.chunk_shape)
+        self.assertEqual(plan.cache_bytes, 0)
+        self.assertEqual(ReadPlanTool.amplification(plan), 1)
+
+    def test_read_slice(self):
+        '''
+        Test that reading a slice in blocks gives the same values and coordinates as reading it in one go.
+        '''
+
+        plan = ReadPlanTool.plan_slice(self.data, {"z": 3}, block_elements=300)
+        arr = ReadPlanTool.read_slice(self.data, {"z": 3}, plan)
+
+        xr.testing.assert_identical(arr, self.data.isel(z=3).load())
+
+    def test_chunk_cache_sized_and_evicted(self):
+        '''
+        Test that the chunk cache is enlarged for a plan that needs more than the default, that the extra memory is
+        accounted for, and that evicting it restores the default.
+        '''
+
+        governor = MemoryGovernor(budget=2**30)
+        variable = ReadPlanTool._netcdf_variable(self.data)
+        default = variable.get_var_chunk_cache()
+
+        plan = ReadPlanTool.plan_slice(self.data, {"z": 0})._replace(cache_bytes=default[0] + 2**20)
+
+        with mock.patch("datasetviewer.readplan.ReadPlanTool.get_governor", return_value=governor):
+            self.assertTrue(ReadPlanTool.size_chunk_cache(self.data, plan))
+
+        self.assertEqual(variable.get_var_chunk_cache()[0], default[0] + 2**20)
+        self.assertEqual(governor.usage(), {"chunk cache": default[0] + 2**20})
+
+        governor.set_budget(0)
+        self.assertEqual(variable.get_var_chunk_cache(), default)
+
+    def test_repeated_sizing_restores_library_default(self):
+        '''
+        Test that sizing the cache again for larger and smaller plans registers the whole cache, and that evicting it
+        restores the library's default rather than the size of an earlier plan.
+        '''
+
+        governor = MemoryGovernor(budget=2**30)
+        variable = ReadPlanTool._netcdf_variable(self.data)
+        default = variable.get_var_chunk_cache()
+        plan = ReadPlanTool.plan_slice(self.data, {"z": 0})
+
+        with mock.patch("datasetviewer.readplan.ReadPlanTool.get_governor", return_value=governor):
+            self.assertTrue(ReadPlanTool.size_chunk_cache(self.data, plan._replace(cache_bytes=default[0] + 2**20)))
+            self.assertTrue(ReadPlanTool.size_chunk_cache(self.data, plan._replace(cache_bytes=default[0] + 2**21)))
+            self.assertFalse(ReadPlanTool.size_chunk_cache(self.data, plan._replace(cache_bytes=default[0] + 2**20)))
+
+        self.assertEqual(variable.get_var_chunk_cache()[0], default[0] + 2**21)
+        self.assertEqual(governor.usage(), {"chunk cache": default[0] + 2**21})
+
+        governor.set_budget(0)
+        self.assertEqual(variable.get_var_chunk_cache(), default)
+
+    def test_small_plan_keeps_default_cache(self):
+        '''
+        Test that the cache isn't shrunk for a plan that needs less than the default.
+        '''
+
+        plan = ReadPlanTool.plan_slice(self.data, {"z": 0})
+
+        self.assertFalse(ReadPlanTool.size_chunk_cache(self.data, plan))
@@ -0,0 +1,133 @@
+import unittest
+
+import mock
+import numpy as np
+import xarray as xr
+
+import datasetviewer.rebin.RebinTool as RebinTool
+from datasetviewer.rebin.CumulativeSumCache import CumulativeSumCache
+from datasetviewer.cache.MemoryGovernor import MemoryGovernor
+
+class RebinToolTest(unittest.TestCase):
+
+    def setUp(self):
+
+        self.arr = np.random.rand(10, 4)
+
+    def test_cumulative_sum_has_leading_zero(self):
+        '''
+        Test that the cumulative sum starts at zero and ends at the total along the axis.
+        '''
+        cumsum = RebinTool.cumulative_sum(self.arr, axis=0)
+
+        self.assertEqual(cumsum.shape, (11, 4))
+        np.testing.assert_array_equal(cumsum[0], 0)
+        np.testing.assert_allclose(cumsum[-1], self.arr.sum(axis=0))
+
+    def test_cumulative_sum_dtype_and_nans(self):
+        '''
+        Test that integer arrays are summed as integers and that NaNs count as zero.
+        '''
+        self.assertEqual(RebinTool.cumulative_sum(np.arange(5, dtype=np.uint8)).dtype, np.int64)
+        np.testing.assert_array_equal(RebinTool.cumulative_sum(np.array([1.0, np.nan, 2.0])), [0, 1, 1, 3])
+
+    def test_bin_edges_and_centres(self):
+        '''
+        Test the bin edges and centres when the length isn't a multiple of the factor.
+        '''
+        np.testing.assert_array_equal(RebinTool.bin_edges(10, 4), [0, 4, 8, 10])
+        np.testing.assert_array_equal(RebinTool.bin_centres(10, 4), [1.5, 5.5, 8.5])
+
+    def test_rebin_from_cumulative_sum_matches_direct_rebin(self):
+        '''
+        Test that rebinning from the cumulative sum gives the same sums as summing each bin directly.
+        '''
+        cumsum = RebinTool.cumulative_sum(self.arr, axis=0)
+
+        for factor in (1, 3, 4, 10, 20):
+            expected = np.array([self.arr[i:i + factor].sum(axis=0) for i in range(0, 10, factor)])
+            np.testing.assert_allclose(RebinTool.rebin_cumulative_sum(cumsum, factor), expected)
+            np.testing.assert_allclose(RebinTool.rebin(self.arr, factor), expected)
+
+class CumulativeSumCacheTest(unittest.TestCase):
+
+    def setUp(self):
+
+        self.data = xr.DataArray(np.random.rand(10, 4), dims=["x", "y"])
+
+    def test_sum_computed_once(self):
+        '''
+        Test that the cumulative sum is cached and reported to the MemoryGovernor.
+        '''
+        governor = MemoryGovernor(budget=10**6)
+        cache = CumulativeSumCache(governor)
+
+        self.assertIsNone(cache.get("key"))
+
+        first = cache.build("key", self.data)
+        self.assertIs(cache.get("key"), first)
+        self.assertIs(cache.build("key", self.data), first)
+        self.assertEqual(governor.usage(), {CumulativeSumCache.CATEGORY: 11 * 4 * 8})
+
+    def test_sum_computed_in_chunks(self):
+        '''
+        Test that the sum is computed a few rows at a time with the same result as summing the whole variable, and that
+        the memory for a chunk of the variable is reserved while it is computed.
+        '''
+        governor = MemoryGovernor(budget=10**6)
+        cache = CumulativeSumCache(governor)
+        reserved = []
+
+        data = mock.MagicMock(wraps=self.data, shape=self.data.shape, dtype=self.data.dtype)
+        data.__getitem__.side_effect = lambda rows: reserved.append(governor.total()) or self.data[rows]
+
+        with mock.patch("datasetviewer.rebin.CumulativeSumCache.CHUNK_BYTES", 3 * 4 * 8):
+            cumsum = cache.build("key", data)
+
+        np.testing.assert_allclose(cumsum, RebinTool.cumulative_sum(self.data.values))
+        self.assertEqual(data.__getitem__.call_count, 4)
+        self.assertEqual(reserved, [11 * 4 * 8 + 3 * 4 * 8] * 4)
+        self.assertEqual(governor.total(), 11 * 4 * 8)
+
+    def test_failed_sum_releases_memory(self):
+        '''
+        Test that the memory reserved for a sum is released if reading the variable fails or the sum is cancelled.
+        '''
+        governor = MemoryGovernor(budget=10**6)
+        cache = CumulativeSumCache(governor)
+
+        data = mock.MagicMock(shape=self.data.shape, dtype=self.data.dtype)
+        data.__getitem__.side_effect = IOError("unreadable")
+
+        with self.assertRaises(IOError):
+            cache.build("key", data)
+
+        self.assertIsNone(cache.build("key", self.data, is_cancelled=lambda: True))
+        self.assertNotIn("key", cache)
+        self.assertEqual(governor.total(), 0)
+
+    def test_sum_not_computed_when_over_budget(self):
+        '''
+        Test that no cumulative sum is computed when it wouldn't fit within the budget.
+        '''
+        cache = CumulativeSumCache(MemoryGovernor(budget=100))
+
+        self.assertIsNone(cache.build("key", self.data))
+        self.assertNotIn("key", cache)
+
+    def test_eviction_and_clear(self):
+        '''
+        Test that evicted sums are dropped and that clearing the cache releases its memory.
+        '''
+        # Room for two sums, or for one sum and another that is being computed
+        governor = MemoryGovernor(budget=11 * 4 * 8 * 2)
+        cache = CumulativeSumCache(governor)
+
+        cache.build("a", self.data)
+        cache.build("b", self.data)
+        self.assertNotIn("a", cache)
+        self.assertIn("b", cache)
+
+        cache.clear()
+        self.assertNotIn("b", cache)
+        self.assertEqual(governor.total(), 0)
@@ -0,0 +1,124 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+import mock
+import numpy as np
+
+import datasetviewer.cache.SharedSliceCache as SharedSliceCache
+from datasetviewer.cache.SharedSliceCache import SharedSliceCache as Cache
+
+@unittest.skipIf(SharedSliceCache._import_fcntl() is None, "file locks aren't available")
+class SharedSliceCacheTest(unittest.TestCase):
+
+    def setUp(self):
+
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "run.nc")
+
+        with open(self.path, "wb") as run_file:
+            run_file.write(b"run")
+
+        # Two views of the same directory stand in for two viewer processes
+        self.first = Cache(1000, os.path.join(self.directory, "shared"), slots=4)
+        self.second = Cache(1000, os.path.join(self.directory, "shared"))
+
+    def tearDown(self):
+
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_slice_key(self):
+        '''
+        Test that a slice is keyed by its file, variable and selection, and that its key changes when the file does.
+        '''
+
+        key = SharedSliceCache.slice_key(self.path, "counts", {"z": 1, "t": 0})
+
+        self.assertEqual(key, SharedSliceCache.slice_key(self.path, "counts", {"t": 0, "z": 1}))
+        self.assertNotEqual(key, SharedSliceCache.slice_key(self.path, "counts", {"t": 0, "z": 2}))
+        self.assertNotEqual(key, SharedSliceCache.slice_key(self.path, "errors", {"t": 0, "z": 1}))
+        self.assertIsNone(SharedSliceCache.slice_key(None, "counts", {}))
+        self.assertIsNone(SharedSliceCache.slice_key(os.path.join(self.directory, "missing.nc"), "counts", {}))
+
+        with open(self.path, "ab") as run_file:
+            run_file.write(b" rewritten")
+
+        self.assertNotEqual(key, SharedSliceCache.slice_key(self.path, "counts", {"t": 0, "z": 1}))
+
+    def test_slice_is_shared(self):
+        '''
+        Test that a slice added by one process is found by another as a read-only map, and that the hits and misses
+        are counted by each process.
+        '''
+
+        key = SharedSliceCache.slice_key(self.path, "counts", {"z": 0})
+        values = np.arange(12, dtype=np.float32).reshape(3, 4)
+
+        self.assertIsNone(self.second.get(key))
+        self.assertTrue(self.first.put(key, values))
+
+        shared = self.second.get(key)
+
+        np.testing.assert_array_equal(shared, values)
+        self.assertFalse(shared.flags.writeable)
+        self.assertEqual(self.second.stats(), SharedSliceCache.SharedCacheStats(1, 1, 1, 48))
+        self.assertEqual(self.first.stats().hits, 0)
+
+    def test_least_recently_used_slice_evicted(self):
+        '''
+        Test that unused slices are evicted in the order they were last used when a new slice doesn't fit, and that
+        slices larger than the budget aren't added.
+        '''
+
+        keys = [SharedSliceCache.slice_key(self.path, "counts", {"z": z}) for z in range(4)]
+
+        for key in keys[:2]:
+            self.assertTrue(self.first.put(key, np.zeros(50)))
+
+        # Using the first slice makes the second the least recently used
+        self.second.get(keys[0])
+        self.second.release(keys[0])
+
+        self.assertTrue(self.first.put(keys[2], np.zeros(50)))
+
+        self.assertIsNotNone(self.second.get(keys[0]))
+        self.assertIsNone(self.second.get(keys[1]))
+        self.assertFalse(self.first.put(keys[3], np.zeros(200)))
+        self.assertEqual(os.listdir(os.path.join(self.directory, "shared")).count(keys[1] + ".npy"), 0)
+
+    def test_leased_slice_not_evicted(self):
+        '''
+        Test that a slice isn't evicted while any process holds a lease on it, that each process counts once however
+        many leases it holds, and that leases that are never released expire.
+        '''
+
+        keys = [SharedSliceCache.slice_key(self.path, "counts", {"z": z}) for z in range(3)]
+        self.first.put(keys[0], np.ones(100))
+
+        self.first.get(keys[0])
+        self.second.get(keys[0])
+        self.second.get(keys[0])
+        self.second.release(keys[0])
+        self.first.release(keys[0])
+
+        self.assertFalse(self.first.put(keys[1], np.ones(100)))
+
+        self.second.release(keys[0])
+        self.assertTrue(self.first.put(keys[1], np.ones(100)))
+        self.assertIsNone(self.first.get(keys[0]))
+
+        self.first.get(keys[1])
+
+        with mock.patch("time.time", return_value=time.time() + SharedSliceCache.LEASE_TIMEOUT + 1):
+            self.assertTrue(self.second.put(keys[2], np.ones(100)))
+
+    def test_disabled_without_budget(self):
+        '''
+        Test that the cache is off unless its size is set.
+        '''
+
+        with mock.patch.dict(os.environ, {"DATASETVIEWER_SHARED_CACHE": ""}), \
+                mock.patch("datasetviewer.cache.SharedSliceCache._shared_cache", None):
+            self.assertIsNone(SharedSliceCache.get_shared_cache())
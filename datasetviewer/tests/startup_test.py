@@ -0,0 +1,62 @@
+import unittest
+import subprocess
+import sys
+
+class StartupTest(unittest.TestCase):
+
+    def _imported_after(self, statement, modules):
+        '''
+        Run an import statement in a fresh interpreter and return which of the modules it caused to be imported.
+        '''
+        script = "import sys\n{}\nprint(','.join(m for m in {} if m in sys.modules))".format(statement, modules)
+        output = subprocess.check_output([sys.executable, "-c", script], universal_newlines=True)
+        return [module for module in output.strip().split(",") if module]
+
+    def test_main_window_does_not_import_scientific_stack(self):
+        '''
+        Test that importing the MainWindow doesn't import xarray, netCDF4 or matplotlib, so that the window can be
+        shown before they have loaded.
+        '''
+        self.assertEqual(self._imported_after("import datasetviewer.app.MainWindow",
+                                              ["xarray", "netCDF4", "matplotlib"]), [])
+
+    def test_window_painted_before_plot_area(self):
+        '''
+        Test that the MainWindow is painted before the plot area imports matplotlib, and that the plot area is created
+        afterwards.
+        '''
+        script = "\n".join([
+            "import os, sys",
+            "os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')",
+            "from PyQt5.QtCore import QEvent, QObject",
+            "from PyQt5.QtWidgets import QApplication",
+            "qapp = QApplication(sys.argv[:1])",
+            "from datasetviewer.app.MainWindow import MainWindow",
+            "painted = []",
+            "class FirstPaint(QObject):",
+            "    def eventFilter(self, obj, event):",
+            "        if not painted and isinstance(obj, MainWindow) and event.type() == QEvent.Paint:",
+            "            painted.append('matplotlib' in sys.modules)",
+            "        return False",
+            "first_paint = FirstPaint()",
+            "qapp.installEventFilter(first_paint)",
+            "window = MainWindow()",
+            "while window.main_presenter is None:",
+            "    qapp.processEvents()",
+            "print(painted)"])
+
+        output = subprocess.check_output([sys.executable, "-c", script], universal_newlines=True)
+        self.assertEqual(output.strip().splitlines()[-1], "[False]")
+
+    def test_file_loader_imports_xarray_lazily(self):
+        '''
+        Test that the FileLoaderTool only imports xarray when a file is opened.
+        '''
+        self.assertEqual(self._imported_after("import datasetviewer.fileloader.FileLoaderTool", ["xarray"]), [])
+
+    def test_warm_up_imports(self):
+        '''
+        Test that the warm-up thread imports the requested modules.
+        '''
+        statement = "from datasetviewer.app import warm_up_imports\nwarm_up_imports(['colorsys', 'not_a_module']).join()"
+        self.assertEqual(self._imported_after(statement, ["colorsys"]), ["colorsys"])
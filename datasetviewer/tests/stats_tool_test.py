@@ -0,0 +1,156 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import mock
+import numpy as np
+import xarray as xr
+
+import datasetviewer.stats.StatsTool as StatsTool
+from datasetviewer.cache.MemoryGovernor import MemoryGovernor
+from datasetviewer.stats.StatsTool import RunningStats
+from datasetviewer.cache.SchemaCache import SchemaCache
+from datasetviewer.dataset.Variable import Variable
+
+class StatsToolTest(unittest.TestCase):
+
+    def setUp(self):
+
+        self.arr = np.random.rand(50, 7, 3)
+        self.arr[4, 2, 1] = np.nan
+        self.arr[30, 0, 0] = np.nan
+
+    def assert_matches_array(self, stats, arr):
+
+        self.assertEqual(stats.count, np.count_nonzero(~np.isnan(arr)))
+        self.assertEqual(stats.nan_count, np.count_nonzero(np.isnan(arr)))
+        self.assertAlmostEqual(stats.mean, np.nanmean(arr))
+        self.assertAlmostEqual(stats.std, np.nanstd(arr))
+        self.assertEqual(stats.minimum, np.nanmin(arr))
+        self.assertEqual(stats.maximum, np.nanmax(arr))
+
+    def test_from_array(self):
+        '''
+        Test that the statistics of an array match those calculated by numpy, with NaNs counted separately.
+        '''
+        self.assert_matches_array(RunningStats.from_array(self.arr), self.arr)
+
+    def test_merge(self):
+        '''
+        Test that merging the statistics of two parts of an array gives the statistics of the whole array, including
+        when one of the parts is empty.
+        '''
+        merged = RunningStats.from_array(self.arr[:11]).merge(RunningStats.from_array(self.arr[11:]))
+        self.assert_matches_array(merged, self.arr)
+
+        nans = np.full(3, np.nan)
+        empty = RunningStats.from_array(nans)
+        self.assertTrue(np.isnan(empty.std))
+
+        self.assert_matches_array(empty.merge(merged).merge(RunningStats()), np.append(nans, self.arr))
+
+    def test_compute_stats_in_chunks(self):
+        '''
+        Test that the chunked, parallel computation gives the statistics of the whole array.
+        '''
+        data = xr.DataArray(self.arr, dims=["x", "y", "z"])
+
+        starts, rows = StatsTool.chunk_starts(data.shape, chunk_elements=50)
+        self.assertEqual(rows, 2)
+        self.assertEqual(len(starts), 25)
+
+        self.assert_matches_array(StatsTool.compute_stats(data, chunk_elements=50, max_workers=4), self.arr)
+
+    def test_chunks_counted_by_governor(self):
+        '''
+        Test that the chunks that the threads hold are counted by the MemoryGovernor while they are summarised, and no
+        longer once the statistics have been computed.
+        '''
+        data = xr.DataArray(self.arr, dims=["x", "y", "z"])
+        governor = MemoryGovernor(budget=10**6)
+        usage = []
+        from_array = RunningStats.from_array
+
+        def summarise(arr):
+            usage.append(governor.usage())
+            return from_array(arr)
+
+        with mock.patch("datasetviewer.stats.StatsTool.get_governor", return_value=governor), \
+                mock.patch.object(RunningStats, "from_array", side_effect=summarise):
+            StatsTool.compute_stats(data, chunk_elements=50)
+
+        # Two threads, each holding two rows of 7 x 3 doubles
+        self.assertEqual(usage[0], {StatsTool.MEMORY_CATEGORY: StatsTool.DEFAULT_WORKERS * 2 * 7 * 3 * 8})
+        self.assertEqual(governor.total(), 0)
+
+    def test_integer_data(self):
+        '''
+        Test that integer arrays are summarised without NaN checks.
+        '''
+        stats = StatsTool.compute_stats(xr.DataArray(np.arange(10, dtype=np.int16)), chunk_elements=3)
+
+        self.assertEqual((stats.count, stats.minimum, stats.maximum, stats.mean), (10, 0, 9, 4.5))
+
+    def test_dict_round_trip(self):
+        '''
+        Test that statistics are unchanged by converting them to a dictionary and back.
+        '''
+        stats = RunningStats.from_array(self.arr)
+        self.assertEqual(RunningStats.from_dict(stats.to_dict()).to_dict(), stats.to_dict())
+
+class VariableStatisticsTest(unittest.TestCase):
+
+    def setUp(self):
+
+        self.cache_dir = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.cache_dir, "data.nc")
+
+        with open(self.file_path, "w") as data_file:
+            data_file.write("data")
+
+        self.data = xr.DataArray(np.random.rand(4, 5), dims=["x", "y"])
+
+    def tearDown(self):
+
+        shutil.rmtree(self.cache_dir)
+
+    def test_statistics_are_persisted(self):
+        '''
+        Test that statistics are stored in the schema cache and used by a Variable for the same file, without being
+        computed again.
+        '''
+        variable = Variable("var", self.data, SchemaCache(self.file_path, self.cache_dir))
+
+        self.assertIsNone(variable.cached_statistics())
+        variable.refine_percentiles()
+
+        stats = variable.cached_statistics()
+        self.assertAlmostEqual(stats.mean, float(self.data.mean()))
+        self.assertIs(variable.cached_statistics(), stats)
+
+        reopened = Variable("var", self.data, SchemaCache(self.file_path, self.cache_dir))
+        self.assertEqual(reopened.cached_statistics().to_dict(), stats.to_dict())
+
+    def test_changed_file_invalidates_cache(self):
+        '''
+        Test that cached statistics are ignored once the file changes or the variable has a different shape.
+        '''
+        Variable("var", self.data, SchemaCache(self.file_path, self.cache_dir)).refine_percentiles()
+
+        self.assertIsNone(Variable("var", self.data[:2], SchemaCache(self.file_path, self.cache_dir)).cached_statistics())
+
+        with open(self.file_path, "a") as data_file:
+            data_file.write("more data")
+
+        self.assertIsNone(Variable("var", self.data, SchemaCache(self.file_path, self.cache_dir)).cached_statistics())
+
+    def test_unwritable_cache_is_ignored(self):
+        '''
+        Test that statistics are still returned when the cache directory can't be created.
+        '''
+        cache_dir = os.path.join(self.file_path, "cache")
+        variable = Variable("var", self.data, SchemaCache(self.file_path, cache_dir))
+
+        variable.refine_percentiles()
+        self.assertAlmostEqual(variable.cached_statistics().mean, float(self.data.mean()))
@@ -0,0 +1,88 @@
+import unittest
+
+import numpy as np
+
+from datasetviewer.roi.SummedAreaTable import SummedAreaTable, roi_to_slices
+
+class SummedAreaTableTest(unittest.TestCase):
+
+    def setUp(self):
+
+        self.arr = np.random.rand(6, 9)
+
+    def test_stats_match_direct_calculation(self):
+        '''
+        Test that the statistics of every region match those calculated from the elements of the region.
+        '''
+        table = SummedAreaTable(self.arr)
+
+        for rows, cols in [((0, 6), (0, 9)), ((2, 5), (1, 4)), ((3, 4), (8, 9))]:
+            region = self.arr[rows[0]:rows[1], cols[0]:cols[1]]
+            stats = table.stats(rows, cols)
+
+            self.assertEqual(stats.count, region.size)
+            self.assertAlmostEqual(stats.sum, region.sum())
+            self.assertAlmostEqual(stats.mean, region.mean())
+            self.assertAlmostEqual(stats.std, region.std())
+
+    def test_nans_are_ignored(self):
+        '''
+        Test that NaNs are left out of the count, sum, mean and standard deviation.
+        '''
+        self.arr[1, 1] = np.nan
+        table = SummedAreaTable(self.arr)
+        stats = table.stats((0, 3), (0, 3))
+
+        self.assertEqual(stats.count, 8)
+        self.assertAlmostEqual(stats.sum, np.nansum(self.arr[:3, :3]))
+        self.assertAlmostEqual(stats.std, np.nanstd(self.arr[:3, :3]))
+
+    def test_integer_sums_are_exact(self):
+        '''
+        Test that integer images are summed without rounding.
+        '''
+        arr = np.full((4, 4), 2**53, dtype=np.int64)
+        arr[0, 0] += 1
+
+        self.assertEqual(SummedAreaTable(arr).stats((0, 4), (0, 4)).sum, 16 * 2**53 + 1)
+
+    def test_far_corner_of_large_offset_image(self):
+        '''
+        Test that a constant region far from the origin of a large image with a large offset has no spread, although the
+        corners of the tables there are large.
+        '''
+        arr = np.random.default_rng(3).uniform(1000, 1001, (2048, 2048))
+        table = SummedAreaTable(arr)
+
+        stats = table.stats((2047, 2048), (2047, 2048))
+        self.assertEqual(stats.std, 0)
+        self.assertAlmostEqual(stats.mean, arr[2047, 2047])
+
+        stats = table.stats((2040, 2048), (2040, 2048))
+        self.assertAlmostEqual(stats.std, arr[2040:, 2040:].std())
+
+    def test_empty_region(self):
+        '''
+        Test that an empty region has no elements and an undefined mean.
+        '''
+        stats = SummedAreaTable(self.arr).stats((2, 2), (0, 9))
+
+        self.assertEqual(stats.count, 0)
+        self.assertTrue(np.isnan(stats.mean))
+
+    def test_table_requires_2d_array(self):
+        '''
+        Test that an exception is thrown when the array doesn't have two dimensions.
+        '''
+        with self.assertRaises(ValueError):
+            SummedAreaTable(np.zeros(5))
+
+    def test_roi_to_slices(self):
+        '''
+        Test that the rows and columns whose centres are inside a rectangle are found with and without an extent.
+        '''
+        self.assertEqual(roi_to_slices((0.2, 3.6, 2.1, 0.9), (6, 9)), ((1, 3), (1, 4)))
+        self.assertEqual(roi_to_slices((-10, 100, -10, 100), (6, 9)), ((0, 6), (0, 9)))
+
+        # Each column covers two units of the X axis
+        self.assertEqual(roi_to_slices((1.6, 6.4, -0.5, 5.5), (6, 9), extent=(-0.5, 17.5, 5.5, -0.5)), ((0, 6), (1, 3)))
@@ -0,0 +1,129 @@
+import unittest
+import json
+import os
+import shutil
+import tempfile
+
+import mock
+
+import datasetviewer.profiling.Tracer as Tracer
+
+class TracerTest(unittest.TestCase):
+
+    def tearDown(self):
+
+        Tracer.disable()
+        Tracer.set_listener(None)
+
+    def test_disabled_spans_are_shared(self):
+        '''
+        Test that no span objects are created when tracing is disabled.
+        '''
+        self.assertIs(Tracer.span("a"), Tracer.span("b"))
+
+        with Tracer.span("a"):
+            pass
+
+    def test_breakdown_contains_nested_spans(self):
+        '''
+        Test that the breakdown of an operation contains the operation followed by its steps in the order they started.
+        '''
+        Tracer.enable()
+
+        with Tracer.span("plot"):
+            with Tracer.span("slice"):
+                pass
+            with Tracer.span("draw"):
+                with Tracer.span("inner"):
+                    pass
+
+        breakdown = Tracer.last_breakdown()
+
+        self.assertEqual([(name, depth) for name, _, depth in breakdown],
+                         [("plot", 0), ("slice", 1), ("draw", 1), ("inner", 2)])
+        self.assertGreaterEqual(breakdown[0][1], breakdown[2][1])
+
+    def test_listener_called_once_per_operation(self):
+        '''
+        Test that the listener is only informed when the outermost span closes.
+        '''
+        listener = mock.MagicMock()
+        Tracer.set_listener(listener)
+        Tracer.enable()
+
+        with Tracer.span("load"):
+            with Tracer.span("open"):
+                pass
+
+        listener.assert_called_once()
+        self.assertEqual(listener.call_args[0][0][0][0], "load")
+
+    def test_span_records_when_exception_raised(self):
+        '''
+        Test that a span is still closed and the exception passed on when the code inside it fails.
+        '''
+        Tracer.enable()
+
+        with self.assertRaises(ValueError):
+            with Tracer.span("load"):
+                raise ValueError
+
+        self.assertEqual(Tracer.last_breakdown()[0][0], "load")
+
+    def test_format_breakdown(self):
+        '''
+        Test the text that is generated for the status bar.
+        '''
+        breakdown = [("create_default_plot", 0.1, 0), ("slice", 0.002, 1), ("draw", 0.05, 1)]
+
+        self.assertEqual(Tracer.format_breakdown(breakdown),
+                         "create_default_plot: 100.0 ms (slice 2.0 ms, draw 50.0 ms)")
+        self.assertEqual(Tracer.format_breakdown([]), "")
+
+    def test_write_trace(self):
+        '''
+        Test that the recorded spans are written as Chrome trace events.
+        '''
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+
+        trace_path = os.path.join(directory, "trace.json")
+        Tracer.enable(trace_path)
+
+        with Tracer.span("file_to_dict"):
+            pass
+
+        Tracer.write_trace()
+
+        with open(trace_path) as trace_file:
+            events = json.load(trace_file)["traceEvents"]
+
+        self.assertEqual(len(events), 1)
+        self.assertEqual(events[0]["name"], "file_to_dict")
+        self.assertEqual(events[0]["ph"], "X")
+
+    def test_write_trace_without_path_raises(self):
+        '''
+        Test that writing a trace fails when no path has been given.
+        '''
+        Tracer.enable()
+
+        with self.assertRaises(ValueError):
+            Tracer.write_trace()
+
+    def test_copies_counted_while_enabled(self):
+        '''
+        Test that copies are counted by step only while tracing is enabled, and that enabling tracing clears the counts.
+        '''
+        Tracer.record_copy("display", 100)
+        self.assertEqual(Tracer.copy_counts(), {})
+
+        Tracer.enable()
+        Tracer.record_copy("display", 100)
+        Tracer.record_copy("display", 50)
+        Tracer.record_copy("read_slice", 200)
+
+        self.assertEqual(Tracer.copy_counts(), {"display": (2, 150), "read_slice": (1, 200)})
+
+        Tracer.enable()
+        self.assertEqual(Tracer.copy_counts(), {})
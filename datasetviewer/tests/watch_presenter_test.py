@@ -0,0 +1,178 @@
+import unittest
+
+import mock
+
+from datasetviewer.watch.WatchPresenter import WatchPresenter
+from datasetviewer.watch.interfaces.WatchViewInterface import WatchViewInterface
+from datasetviewer.watch.WatchTool import PreparedRun
+from datasetviewer.mainview.interfaces.MainViewPresenterInterface import MainViewPresenterInterface
+from datasetviewer.watch.Command import Command
+import datasetviewer.fileloader.MemmapTool as MemmapTool
+
+class WatchPresenterTest(unittest.TestCase):
+
+    def setUp(self):
+
+        self.mock_view = mock.create_autospec(WatchViewInterface)
+        self.mock_main_presenter = mock.create_autospec(MainViewPresenterInterface)
+
+        self.mock_view.get_watch_directory.return_value = "/data"
+        self.mock_view.watch_directory.return_value = True
+        self.mock_view.get_auto_open.return_value = True
+
+        self.files = {"/data/run1.nc": (100, 1)}
+        self.runs = {}
+
+        list_patch = mock.patch("datasetviewer.watch.WatchTool.list_files", side_effect=lambda directory: self.files)
+        prepare_patch = mock.patch("datasetviewer.watch.WatchTool.prepare_run", side_effect=self._prepare_run)
+
+        self.mock_list_files = list_patch.start()
+        self.mock_prepare_run = prepare_patch.start()
+
+        self.addCleanup(list_patch.stop)
+        self.addCleanup(prepare_patch.stop)
+        self.addCleanup(MemmapTool.set_watched_directory, None)
+
+        self.presenter = WatchPresenter(self.mock_view, settle_seconds=0)
+        self.presenter.register_master(self.mock_main_presenter)
+
+    def _prepare_run(self, file_path):
+
+        self.runs[file_path] = PreparedRun(file_path, self.files[file_path][1], {"run": file_path}, None)
+        return self.runs[file_path]
+
+    def _write(self, file_path, mtime):
+
+        self.files[file_path] = (100, mtime)
+
+        # The first check finds the file, and the second finds that it hasn't changed
+        self.presenter.notify(Command.FOLDERCHANGE)
+        self.presenter.notify(Command.FOLDERCHANGE)
+
+    def test_presenter_throws_if_view_none(self):
+        '''
+        Test that the WatchPresenter throws an Exception when the WatchView is None.
+        '''
+
+        with self.assertRaises(ValueError):
+            WatchPresenter(None)
+
+    def test_existing_files_ignored(self):
+        '''
+        Test that the files that are in a folder before it is watched aren't opened.
+        '''
+
+        self.presenter.notify(Command.WATCHREQUEST)
+        self.presenter.notify(Command.FOLDERCHANGE)
+        self.presenter.notify(Command.FOLDERCHANGE)
+
+        self.mock_view.watch_directory.assert_called_once_with("/data")
+        self.mock_prepare_run.assert_not_called()
+
+    def test_watched_files_not_memory_mapped(self):
+        '''
+        Test that files in the watched folder, which may still be written to, aren't memory-mapped.
+        '''
+
+        self.presenter.notify(Command.WATCHREQUEST)
+
+        self.assertTrue(MemmapTool._is_watched("/data/run2.nc"))
+        self.assertFalse(MemmapTool._is_watched("/other/run2.nc"))
+
+    def test_new_run_opened_once(self):
+        '''
+        Test that a new run is opened once it has stopped changing, listed, and shown, and that it isn't opened again.
+        '''
+
+        self.presenter.notify(Command.WATCHREQUEST)
+        self._write("/data/run2.nc", 2)
+        self.presenter.notify(Command.FOLDERCHANGE)
+
+        self.mock_prepare_run.assert_called_once_with("/data/run2.nc")
+        self.mock_view.add_run.assert_called_once_with("/data/run2.nc", None)
+        self.mock_main_presenter.set_dict.assert_called_once_with({"run": "/data/run2.nc"})
+
+    def test_polls_while_files_settle(self):
+        '''
+        Test that the folder is polled while a file is being written, and that polling stops once it has settled.
+        '''
+
+        self.presenter.notify(Command.WATCHREQUEST)
+        self.mock_view.set_polling.assert_called_with(False)
+
+        self.files["/data/run2.nc"] = (100, 2)
+        self.presenter.notify(Command.FOLDERCHANGE)
+        self.mock_view.set_polling.assert_called_with(True)
+
+        self.presenter.notify(Command.FOLDERCHANGE)
+        self.mock_view.set_polling.assert_called_with(False)
+
+    def test_polls_without_notifications(self):
+        '''
+        Test that the folder is always polled when the view can't be notified of changes to it.
+        '''
+
+        self.mock_view.watch_directory.return_value = False
+
+        self.presenter.notify(Command.WATCHREQUEST)
+
+        self.mock_view.set_polling.assert_called_with(True)
+
+    def test_auto_open_off_lists_without_showing(self):
+        '''
+        Test that runs are only listed when they aren't opened automatically, and that the newest is shown when
+        automatic opening is turned back on.
+        '''
+
+        self.mock_view.get_auto_open.return_value = False
+
+        self.presenter.notify(Command.WATCHREQUEST)
+        self._write("/data/run3.nc", 3)
+        self._write("/data/run2.nc", 2)
+
+        self.mock_main_presenter.set_dict.assert_not_called()
+        self.assertEqual(self.mock_view.add_run.call_count, 2)
+
+        self.mock_view.get_auto_open.return_value = True
+        self.presenter.notify(Command.AUTOOPENCHANGE)
+
+        self.mock_main_presenter.set_dict.assert_called_once_with({"run": "/data/run3.nc"})
+
+    def test_open_request_uses_prepared_run(self):
+        '''
+        Test that choosing a run that has been opened shows it without reading the file again.
+        '''
+
+        self.mock_view.get_auto_open.return_value = False
+
+        self.presenter.notify(Command.WATCHREQUEST)
+        self._write("/data/run2.nc", 2)
+
+        self.mock_view.get_selected_run.return_value = "/data/run2.nc"
+        self.presenter.notify(Command.OPENREQUEST)
+
+        self.mock_main_presenter.set_dict.assert_called_once_with({"run": "/data/run2.nc"})
+        self.mock_main_presenter.open_file.assert_not_called()
+
+    def test_unreadable_run_not_retried(self):
+        '''
+        Test that a run that can't be opened is reported, and isn't opened again unless it changes.
+        '''
+
+        self.mock_prepare_run.side_effect = OSError("truncated")
+
+        self.presenter.notify(Command.WATCHREQUEST)
+        self._write("/data/run2.nc", 2)
+        self.presenter.notify(Command.FOLDERCHANGE)
+
+        self.mock_prepare_run.assert_called_once_with("/data/run2.nc")
+        self.mock_view.show_message.assert_called_with("Couldn't read /data/run2.nc: truncated")
+        self.mock_view.add_run.assert_not_called()
+
+    def test_unrecognised_command_raises(self):
+        '''
+        Test that an unrecognised command raises a ValueError.
+        '''
+
+        with self.assertRaises(ValueError):
+            self.presenter.notify(None)
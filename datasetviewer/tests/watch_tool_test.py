@@ -0,0 +1,120 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import xarray as xr
+
+import datasetviewer.watch.WatchTool as WatchTool
+
+class WatchToolTest(unittest.TestCase):
+
+    def setUp(self):
+
+        self.directory = tempfile.mkdtemp()
+        self.tracker = WatchTool.StableFileTracker(settle_seconds=2)
+
+    def tearDown(self):
+
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_list_files_finds_run_files(self):
+        '''
+        Test that only the run files at the top of the folder are listed, with their size and modification time.
+        '''
+
+        path = os.path.join(self.directory, "run1.nc")
+
+        with open(path, "w") as run:
+            run.write("data")
+
+        with open(os.path.join(self.directory, "notes.txt"), "w") as notes:
+            notes.write("ignored")
+
+        os.makedirs(os.path.join(self.directory, "old"))
+        open(os.path.join(self.directory, "old", "run0.nc"), "w").close()
+
+        self.assertEqual(WatchTool.list_files(self.directory), {path: (4, os.stat(path).st_mtime_ns)})
+        self.assertEqual(WatchTool.list_files(os.path.join(self.directory, "missing")), {})
+
+    def test_file_settles_once_unchanged(self):
+        '''
+        Test that a file is only reported once it has stayed the same for the settling time, and only reported once.
+        '''
+
+        files = {"/data/run1.nc": (100, 1)}
+
+        self.assertEqual(self.tracker.update(files, 0), [])
+        self.assertTrue(self.tracker.has_pending())
+        self.assertEqual(self.tracker.update(files, 1), [])
+        self.assertEqual(self.tracker.update(files, 2), ["/data/run1.nc"])
+        self.assertFalse(self.tracker.has_pending())
+        self.assertEqual(self.tracker.update(files, 10), [])
+
+    def test_changing_file_restarts_settling(self):
+        '''
+        Test that a file that is still being written isn't reported until it stops changing, and that a file that is
+        written again after being reported is reported again.
+        '''
+
+        self.tracker.update({"/data/run1.nc": (100, 1)}, 0)
+        self.assertEqual(self.tracker.update({"/data/run1.nc": (200, 2)}, 2), [])
+        self.assertEqual(self.tracker.update({"/data/run1.nc": (200, 2)}, 3), [])
+        self.assertEqual(self.tracker.update({"/data/run1.nc": (200, 2)}, 4), ["/data/run1.nc"])
+
+        self.tracker.update({"/data/run1.nc": (300, 3)}, 5)
+        self.assertEqual(self.tracker.update({"/data/run1.nc": (300, 3)}, 7), ["/data/run1.nc"])
+
+    def test_ignored_and_deleted_files(self):
+        '''
+        Test that ignored files aren't reported, and that a file that is deleted and written again is reported.
+        '''
+
+        files = {"/data/run1.nc": (100, 1)}
+        self.tracker.ignore(files)
+
+        self.tracker.update(files, 0)
+        self.assertEqual(self.tracker.update(files, 5), [])
+
+        self.tracker.update({}, 6)
+        self.tracker.update(files, 7)
+        self.assertEqual(self.tracker.update(files, 9), ["/data/run1.nc"])
+
+    def test_settled_files_oldest_first(self):
+        '''
+        Test that files that settle together are reported in the order they were modified.
+        '''
+
+        files = {"/data/run2.nc": (100, 20), "/data/run1.nc": (100, 10)}
+
+        self.tracker.update(files, 0)
+        self.assertEqual(self.tracker.update(files, 2), ["/data/run1.nc", "/data/run2.nc"])
+
+    def test_thumbnail_strides_first_slice(self):
+        '''
+        Test that a thumbnail is read from every nth element of the first slice, with the rows of the plot.
+        '''
+
+        data = xr.DataArray(np.arange(200 * 130 * 3).reshape(200, 130, 3), dims=("x", "y", "z"))
+
+        thumbnail = WatchTool.thumbnail(data, size=64)
+
+        np.testing.assert_array_equal(thumbnail, data.values[::4, ::3, 0].T)
+        self.assertIsNone(WatchTool.thumbnail(data.isel(y=0, z=0)))
+
+    def test_prepare_run(self):
+        '''
+        Test that preparing a run opens its dataset and makes a thumbnail of its largest variable.
+        '''
+
+        path = os.path.join(self.directory, "run1.nc")
+        xr.Dataset({"monitor": ("t", np.ones(5)),
+                    "counts": (("x", "y"), np.arange(12.0).reshape(4, 3))}).to_netcdf(path)
+
+        run = WatchTool.prepare_run(path)
+
+        self.assertEqual(run.path, path)
+        self.assertEqual(run.mtime, os.stat(path).st_mtime)
+        self.assertEqual(list(run.dataset.keys()), ["monitor", "counts"])
+        np.testing.assert_array_equal(run.thumbnail, np.arange(12.0).reshape(4, 3).T)
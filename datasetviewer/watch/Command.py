@@ -0,0 +1,15 @@
+from enum import Enum
+
+class Command(Enum):
+
+    # Indicates that the user chose a folder to watch
+    WATCHREQUEST = 500
+
+    # Indicates that the watched folder has changed, or that it is time to check it again
+    FOLDERCHANGE = 501
+
+    # Indicates that the user chose whether the newest run is opened automatically
+    AUTOOPENCHANGE = 502
+
+    # Indicates that the user chose a run to open
+    OPENREQUEST = 503
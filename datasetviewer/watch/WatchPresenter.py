@@ -0,0 +1,186 @@
+import time
+from collections import OrderedDict
+
+from datasetviewer.watch.interfaces.WatchPresenterInterface import WatchPresenterInterface
+from datasetviewer.mainview.interfaces.MainViewPresenterInterface import MainViewPresenterInterface
+from datasetviewer.watch.Command import Command
+import datasetviewer.watch.WatchTool as WatchTool
+import datasetviewer.fileloader.MemmapTool as MemmapTool
+import datasetviewer.eventloop.EventLoop as EventLoop
+
+class WatchPresenter(WatchPresenterInterface):
+    """The subpresenter responsible for following a folder that new runs are written to. Each run is opened in the
+    background once the writer has closed it, and can be shown straight away, either automatically or when it is chosen.
+
+    Args:
+        watch_view (WatchView): An instance of a WatchView.
+        settle_seconds (float): The number of seconds for which a file must stay the same before it is opened.
+
+    Private Attributes:
+        _view (WatchView): The WatchView that lists the runs. Assigned during initialisation.
+        _directory (str): The folder that is being watched, or None.
+        _tracker (StableFileTracker): Finds the files in the folder that have stopped changing.
+        _notifications (bool): Whether the view is notified of changes to the folder. The folder is polled if not.
+        _runs (OrderedDict): The PreparedRun of each of the most recently opened files, keyed by path, oldest first.
+
+    Raises:
+        ValueError: If the `watch_view` argument is None.
+
+    """
+
+    def __init__(self, watch_view, settle_seconds=WatchTool.SETTLE_SECONDS):
+
+        if watch_view is None:
+            raise ValueError("Error: Cannot create WatchPresenter when View is None.")
+
+        self._view = watch_view
+        self._settle_seconds = settle_seconds
+        self._main_presenter = None
+        self._directory = None
+        self._tracker = None
+        self._notifications = False
+        self._runs = OrderedDict()
+
+    def register_master(self, master):
+        """
+
+        Register the MainViewPresenter as the WatchPresenter's master. Subscribing in the MainViewPresenter isn't
+        necessary as the MainViewPresenter doesn't send instructions to the WatchPresenter.
+
+        Args:
+            master (MainViewPresenter): An instance of a MainViewPresenter.
+
+        """
+        assert (isinstance(master, MainViewPresenterInterface))
+
+        self._main_presenter = master
+
+    def notify(self, command):
+        """
+
+        Interpret a command from the WatchView and take the appropriate action.
+
+        Args:
+            command (Command): A Command from the WatchView indicating that an event has taken place.
+
+        Raises:
+            ValueError: If the command isn't recognised.
+
+        """
+
+        if command == Command.WATCHREQUEST:
+            directory = self._view.get_watch_directory()
+
+            # Do nothing if the dialog was closed without choosing a folder
+            if directory:
+                self._watch(directory)
+
+        elif command == Command.FOLDERCHANGE:
+            self._check_folder()
+
+        elif command == Command.AUTOOPENCHANGE:
+
+            if self._view.get_auto_open() and self._runs:
+                self._main_presenter.set_dict(self._newest_run().dataset)
+
+        elif command == Command.OPENREQUEST:
+            file_path = self._view.get_selected_run()
+
+            if file_path in self._runs:
+                self._main_presenter.set_dict(self._runs[file_path].dataset)
+
+            # Runs that are no longer kept open are read again
+            elif file_path:
+                self._main_presenter.open_file(file_path)
+
+        else:
+            raise ValueError("WatchPresenter received an unrecognised command: {}".format(str(command)))
+
+    def _watch(self, directory):
+        """
+        Start following a folder. The files that are already in it are ignored. The files in the folder may still be
+        written to, so they are read through the library rather than memory-mapped.
+
+        Args:
+            directory (str): The folder.
+        """
+
+        self._directory = directory
+        MemmapTool.set_watched_directory(directory)
+        self._tracker = WatchTool.StableFileTracker(self._settle_seconds)
+        self._tracker.ignore(WatchTool.list_files(directory))
+        self._runs.clear()
+
+        self._view.clear_runs()
+        self._notifications = self._view.watch_directory(directory)
+
+        # Without notifications of new files, the folder has to be checked all of the time
+        self._view.set_polling(not self._notifications)
+        self._view.show_message("Watching {}{}".format(directory, "" if self._notifications else " by polling"))
+
+    def _check_folder(self):
+        """ Opens the files in the watched folder that have stopped changing since it was last checked. """
+
+        if self._directory is None:
+            return
+
+        for file_path in self._tracker.update(WatchTool.list_files(self._directory), time.monotonic()):
+            self._prepare(file_path)
+
+        # Notifications only report new files, so files that are being written are followed by polling
+        self._view.set_polling(self._tracker.has_pending() or not self._notifications)
+
+    def _prepare(self, file_path):
+        """
+        Open a run in the background.
+
+        Args:
+            file_path (str): The path of the run.
+        """
+
+        directory = self._directory
+        self._view.show_message("Reading {}...".format(file_path))
+
+        EventLoop.run_in_background(WatchTool.prepare_run, file_path,
+                                    done=lambda run: self._add_run(directory, run),
+                                    error=lambda error: self._reject_run(file_path, error))
+
+    def _add_run(self, directory, run):
+        """
+        List a run that has been opened, and show it if it is the newest and runs are opened automatically.
+
+        Args:
+            directory (str): The folder that was being watched when the run was found.
+            run (PreparedRun): The run.
+        """
+
+        # Ignore runs from a folder that is no longer watched
+        if directory != self._directory:
+            return
+
+        self._runs[run.path] = run
+        self._runs.move_to_end(run.path)
+
+        while len(self._runs) > WatchTool.MAX_PREPARED_RUNS:
+            self._runs.popitem(last=False)
+
+        self._view.add_run(run.path, run.thumbnail)
+        self._view.show_message("Ready: {}".format(run.path))
+
+        if self._view.get_auto_open() and self._newest_run() is run:
+            self._main_presenter.set_dict(run.dataset)
+
+    def _reject_run(self, file_path, error):
+        """
+        Reports a file that couldn't be opened. It isn't opened again unless it changes.
+
+        Args:
+            file_path (str): The path of the file.
+            error (Exception): The exception raised while opening it.
+        """
+
+        self._view.show_message("Couldn't read {}: {}".format(file_path, error))
+
+    def _newest_run(self):
+
+        return max(self._runs.values(), key=lambda run: run.mtime)
@@ -0,0 +1,195 @@
+import os
+from collections import namedtuple
+
+import numpy as np
+
+from datasetviewer.dataset.EventVariable import EventVariable
+import datasetviewer.fileloader.FileLoaderTool as FileLoaderTool
+
+""" Tool for following a folder that new run files are written to. A file is only opened once its size and modification
+    time have stopped changing for a few seconds, which means that the writer has closed it, and each version of a file
+    is only opened once. Opening a run reads its metadata, a small thumbnail and an estimate of the colour limits of its
+    largest variable, so that it can be plotted straight away. """
+
+# Seconds for which a file must stay the same size and age before it is opened
+SETTLE_SECONDS = 2.0
+
+# Seconds between checks of the folder while files are being written, or when change notifications aren't available
+POLL_INTERVAL = 1.0
+
+# Largest number of elements along each side of a thumbnail
+THUMBNAIL_SIZE = 64
+
+# Number of the newest runs that are kept open, so that they can be shown without reading the file again
+MAX_PREPARED_RUNS = 16
+
+# Extensions of the files that are followed
+EXTENSIONS = (".nc",)
+
+# A run that has been opened, with the thumbnail of its largest variable or None if it has none
+PreparedRun = namedtuple("PreparedRun", ["path", "mtime", "dataset", "thumbnail"])
+
+def list_files(directory):
+    """
+    Find the run files in a folder. Subfolders aren't searched.
+
+    Args:
+        directory (str): The folder.
+
+    Returns:
+        dict: The (size, modification time in nanoseconds) of each file, keyed by path. Empty if the folder can't be
+            read.
+
+    """
+
+    files = {}
+
+    try:
+        entries = list(os.scandir(directory))
+    except OSError:
+        return files
+
+    for entry in entries:
+
+        if not entry.name.lower().endswith(EXTENSIONS):
+            continue
+
+        try:
+            if entry.is_file():
+                status = entry.stat()
+                files[entry.path] = (status.st_size, status.st_mtime_ns)
+        except OSError:
+            continue
+
+    return files
+
+class StableFileTracker(object):
+    """Finds the files that have stopped changing. Each version of a file, identified by its size and modification time,
+    is only reported once, so a file that can't be opened isn't tried again until it changes.
+
+    Args:
+        settle_seconds (float): The number of seconds for which a file must stay the same before it is reported.
+
+    Private Attributes:
+        _pending (dict): The version of each changing file and the time at which it was first seen, keyed by path.
+        _handled (dict): The version of each file that has been reported or ignored, keyed by path.
+
+    """
+
+    def __init__(self, settle_seconds=SETTLE_SECONDS):
+
+        self._settle_seconds = settle_seconds
+        self._pending = {}
+        self._handled = {}
+
+    def ignore(self, files):
+        """
+        Stop the current versions of files from being reported, such as the files that were already in a folder before
+        it was watched.
+
+        Args:
+            files (dict): The (size, modification time) of each file, keyed by path.
+
+        """
+
+        self._handled.update(files)
+
+    def update(self, files, now):
+        """
+        Compare the files in a folder with those seen before.
+
+        Args:
+            files (dict): The (size, modification time) of each file, keyed by path, as returned by `list_files`.
+            now (float): The current time in seconds, from a monotonic clock.
+
+        Returns:
+            list: The paths of the files that have just settled, oldest first.
+
+        """
+
+        settled = []
+
+        for path, version in files.items():
+
+            if self._handled.get(path) == version:
+                continue
+
+            seen = self._pending.get(path)
+
+            if seen is None or seen[0] != version:
+                self._pending[path] = (version, now)
+
+            elif now - seen[1] >= self._settle_seconds:
+                del self._pending[path]
+                self._handled[path] = version
+                settled.append(path)
+
+        # Forget files that have been deleted, so that a new file with the same name is reported
+        for known in (self._pending, self._handled):
+            for path in [path for path in known if path not in files]:
+                del known[path]
+
+        return sorted(settled, key=lambda path: files[path][1])
+
+    def has_pending(self):
+        """
+        Returns:
+            bool: True if any files are still changing or settling, False otherwise.
+
+        """
+
+        return bool(self._pending)
+
+def thumbnail(data, size=THUMBNAIL_SIZE):
+    """
+    Read a small version of the first slice of an array by taking every nth element along its first two dimensions.
+
+    Args:
+        data (xarray.DataArray): An array with two or more dimensions.
+        size (int): The largest number of elements along each side of the thumbnail.
+
+    Returns:
+        numpy.ndarray: The thumbnail, with the second dimension as the rows as in the plot, or None if the array has
+            fewer than two dimensions.
+
+    """
+
+    if data.ndim < 2:
+        return None
+
+    first_slice = data.isel({dim: 0 for dim in data.dims[2:]})
+    steps = tuple(slice(None, None, max(1, -(-length // size))) for length in first_slice.shape)
+
+    return np.asarray(first_slice[steps].values, dtype=np.float64).T
+
+def prepare_run(file_path):
+    """
+    Open a run file and read what is needed to show it straight away.
+
+    Args:
+        file_path (str): The path of the file.
+
+    Returns:
+        PreparedRun: The run.
+
+    Raises:
+        ValueError: If the dataset is empty, or if any of its elements are empty.
+        OSError: If the file could not be converted to an xarray, for example because it is still being written.
+
+    """
+
+    dataset = FileLoaderTool.file_to_dict(file_path)
+    mtime = os.stat(file_path).st_mtime
+
+    sizes = {key: variable.data.size for key, variable in dataset.items() if not isinstance(variable, EventVariable)}
+
+    if not sizes:
+        return PreparedRun(file_path, mtime, dataset, None)
+
+    largest = dataset[max(sizes, key=sizes.get)]
+
+    # Estimating the percentiles now means that the first plot of the run doesn't have to wait for them
+    if largest.data.ndim >= 2:
+        largest.estimate_percentiles()
+
+    return PreparedRun(file_path, mtime, dataset, thumbnail(largest.data))
@@ -0,0 +1,144 @@
+import os
+
+import numpy as np
+
+from datasetviewer.watch.interfaces.WatchViewInterface import WatchViewInterface
+from datasetviewer.watch.WatchPresenter import WatchPresenter
+from datasetviewer.watch.Command import Command
+import datasetviewer.watch.WatchTool as WatchTool
+
+from PyQt5.QtCore import Qt, QFileSystemWatcher, QSize, QTimer
+from PyQt5.QtGui import QIcon, QImage, QPixmap
+from PyQt5.QtWidgets import (QCheckBox, QDialog, QFileDialog, QHBoxLayout, QLabel, QListWidget, QListWidgetItem,
+                             QPushButton, QVBoxLayout)
+
+class WatchWidget(WatchViewInterface, QDialog):
+
+    def __init__(self, parent = None):
+
+        QDialog.__init__(self, parent)
+
+        self.setWindowTitle("Watch Folder")
+        self.resize(500, 500)
+
+        self._watch_directory = None
+
+        self.watch_button = QPushButton("Watch folder...")
+        self.watch_button.clicked.connect(self.choose_watch_directory)
+
+        self.auto_open_box = QCheckBox("Show the newest run")
+        self.auto_open_box.setChecked(True)
+
+        self.run_list = QListWidget()
+        self.run_list.setIconSize(QSize(WatchTool.THUMBNAIL_SIZE, WatchTool.THUMBNAIL_SIZE))
+
+        self.open_button = QPushButton("Open")
+        self.message_label = QLabel()
+
+        # Uses inotify on Linux. Notifications only report files being added or removed, not written to.
+        self._watcher = QFileSystemWatcher(self)
+
+        self._poll_timer = QTimer(self)
+        self._poll_timer.setInterval(int(WatchTool.POLL_INTERVAL * 1000))
+
+        top = QHBoxLayout()
+        top.addWidget(self.watch_button)
+        top.addWidget(self.auto_open_box)
+
+        bottom = QHBoxLayout()
+        bottom.addWidget(self.message_label, 1)
+        bottom.addWidget(self.open_button)
+
+        layout = QVBoxLayout(self)
+        layout.addLayout(top)
+        layout.addWidget(self.run_list)
+        layout.addLayout(bottom)
+
+        self._presenter = WatchPresenter(self)
+
+        self._watcher.directoryChanged.connect(lambda path: self._presenter.notify(Command.FOLDERCHANGE))
+        self._poll_timer.timeout.connect(lambda: self._presenter.notify(Command.FOLDERCHANGE))
+        self.auto_open_box.toggled.connect(lambda checked: self._presenter.notify(Command.AUTOOPENCHANGE))
+        self.open_button.clicked.connect(lambda: self._presenter.notify(Command.OPENREQUEST))
+        self.run_list.itemDoubleClicked.connect(lambda item: self._presenter.notify(Command.OPENREQUEST))
+
+    def choose_watch_directory(self):
+
+        self._watch_directory = QFileDialog.getExistingDirectory(self, "Watch folder")
+        self._presenter.notify(Command.WATCHREQUEST)
+
+    def get_watch_directory(self):
+        return self._watch_directory
+
+    def get_auto_open(self):
+        return self.auto_open_box.isChecked()
+
+    def get_selected_run(self):
+
+        item = self.run_list.currentItem()
+
+        if item is None:
+            return None
+
+        return item.data(Qt.UserRole)
+
+    def watch_directory(self, directory):
+
+        watched = self._watcher.directories()
+
+        if watched:
+            self._watcher.removePaths(watched)
+
+        return self._watcher.addPath(directory)
+
+    def set_polling(self, polling):
+
+        if polling and not self._poll_timer.isActive():
+            self._poll_timer.start()
+
+        elif not polling:
+            self._poll_timer.stop()
+
+    def clear_runs(self):
+        self.run_list.clear()
+
+    def add_run(self, file_path, thumbnail):
+
+        # A run that has been written again replaces its entry
+        for row in range(self.run_list.count()):
+            if self.run_list.item(row).data(Qt.UserRole) == file_path:
+                self.run_list.takeItem(row)
+                break
+
+        item = QListWidgetItem(os.path.basename(file_path))
+        item.setData(Qt.UserRole, file_path)
+        item.setToolTip(file_path)
+
+        if thumbnail is not None:
+            item.setIcon(QIcon(QPixmap.fromImage(self._thumbnail_image(thumbnail))))
+
+        # Newest first
+        self.run_list.insertItem(0, item)
+
+    @staticmethod
+    def _thumbnail_image(thumbnail):
+        """ Converts a thumbnail to a greyscale image, scaled between its 1st and 99th percentiles. """
+
+        finite = thumbnail[np.isfinite(thumbnail)]
+
+        if finite.size:
+            low, high = np.percentile(finite, [1, 99])
+        else:
+            low, high = 0, 0
+
+        scaled = np.clip((thumbnail - low) / ((high - low) or 1), 0, 1)
+        pixels = np.ascontiguousarray(np.nan_to_num(scaled) * 255, dtype=np.uint8)
+
+        # The image refers to the array rather than copying it, so it is copied before the array is freed
+        return QImage(pixels.data, pixels.shape[1], pixels.shape[0], pixels.strides[0], QImage.Format_Grayscale8).copy()
+
+    def show_message(self, message):
+        self.message_label.setText(message)
+
+    def get_presenter(self):
+        return self._presenter
@@ -0,0 +1,11 @@
+from abc import ABC, abstractmethod
+
+class WatchPresenterInterface(ABC):
+
+    @abstractmethod
+    def register_master(self, master):
+        pass
+
+    @abstractmethod
+    def notify(self, command):
+        pass
@@ -0,0 +1,45 @@
+from abc import ABCMeta, abstractmethod
+from PyQt5 import QtCore
+
+from six import with_metaclass
+
+class Meta(ABCMeta, type(QtCore.QObject)):
+    pass
+
+class WatchViewInterface(with_metaclass(Meta)):
+
+    @abstractmethod
+    def get_presenter(self):
+        pass
+
+    @abstractmethod
+    def get_watch_directory(self):
+        pass
+
+    @abstractmethod
+    def get_auto_open(self):
+        pass
+
+    @abstractmethod
+    def get_selected_run(self):
+        pass
+
+    @abstractmethod
+    def watch_directory(self, directory):
+        pass
+
+    @abstractmethod
+    def set_polling(self, polling):
+        pass
+
+    @abstractmethod
+    def clear_runs(self):
+        pass
+
+    @abstractmethod
+    def add_run(self, file_path, thumbnail):
+        pass
+
+    @abstractmethod
+    def show_message(self, message):
+        pass
@@ -1,4 +1,6 @@
 from __future__ import absolute_import
 from datasetviewer.app import main
 
-main()
+# The catalog starts worker processes that import this script, and they mustn't start the application
+if __name__ == "__main__":
+    main()